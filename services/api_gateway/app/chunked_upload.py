@@ -0,0 +1,267 @@
+# services/api_gateway/app/chunked_upload.py
+# -*- coding: utf-8 -*-
+
+"""
+可续传的分片上传。
+
+大视频通过 /v1/files/upload 单个请求上传时，连接中断只能从头再来，并且整个传输期间占用一个网关 worker。
+分片上传协议：
+
+1. POST /v1/files/uploads 创建会话：网关在 MinIO 上创建分片上传（multipart upload），按总大小与分片大小
+   计算分片数，会话信息保存在状态库 upload_session:{upload_id}
+2. PUT /v1/files/uploads/{upload_id}/parts/{part_number} 上传分片，分片之间互不依赖，可并行、可重传
+3. GET /v1/files/uploads/{upload_id} 查询已存在与缺失的分片（以 MinIO 中的分片为准），中断后据此续传
+4. POST /v1/files/uploads/{upload_id}/complete 校验分片齐全后在 MinIO 服务端合并为一个对象
+
+过期未完成的会话在创建新会话时放弃（abort），MinIO 释放已上传的分片。
+"""
+
+import json
+import math
+import mimetypes
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from services.common.logger import get_logger
+
+logger = get_logger('chunked_upload')
+
+SESSION_KEY_PREFIX = "upload_session"
+# 会话过期时间索引（有序集合，分值为过期时间戳），用于放弃过期的分片上传
+SESSION_EXPIRY_KEY = "upload_session:expiry"
+
+MB = 1024 * 1024
+# S3 分片上传限制：除最后一片外每片至少 5MB，最多 10000 片
+MIN_PART_SIZE = 5 * MB
+MAX_PART_COUNT = 10000
+# 会话键在逻辑过期后再保留一段时间，供 abort_expired 读取分片上传ID
+SESSION_GRACE_SECONDS = 24 * 60 * 60
+
+
+class UploadSessionNotFoundError(LookupError):
+    """上传会话不存在或已过期"""
+
+
+class ChunkedUploadManager:
+    """分片上传会话管理"""
+
+    def __init__(self, minio_service, redis_client, config: Dict[str, Any]):
+        """
+        Args:
+            minio_service: MinIOFileService 实例
+            redis_client: 状态库客户端
+            config: config.yml 中的 chunked_upload 配置段
+        """
+        self.minio_service = minio_service
+        self.redis_client = redis_client
+        self.default_part_size = int(float(config.get('default_part_size_mb', 16)) * MB)
+        self.max_part_size = int(float(config.get('max_part_size_mb', 64)) * MB)
+        self.session_ttl = int(float(config.get('session_ttl_hours', 24)) * 3600)
+
+    @staticmethod
+    def _key(upload_id: str) -> str:
+        return f"{SESSION_KEY_PREFIX}:{upload_id}"
+
+    def _load(self, upload_id: str) -> Dict[str, Any]:
+        raw = self.redis_client.get(self._key(upload_id))
+        session = json.loads(raw) if raw else None
+        if not session or session["expires_ts"] < time.time():
+            raise UploadSessionNotFoundError(f"上传会话不存在或已过期: {upload_id}")
+        return session
+
+    def _save(self, session: Dict[str, Any]) -> None:
+        expires_ts = time.time() + self.session_ttl
+        session["expires_ts"] = expires_ts
+        session["expires_at"] = datetime.fromtimestamp(expires_ts).isoformat()
+        pipe = self.redis_client.pipeline()
+        pipe.setex(self._key(session["upload_id"]), self.session_ttl + SESSION_GRACE_SECONDS,
+                   json.dumps(session, ensure_ascii=False))
+        pipe.zadd(SESSION_EXPIRY_KEY, {session["upload_id"]: expires_ts})
+        pipe.execute()
+
+    def _drop(self, upload_id: str) -> None:
+        pipe = self.redis_client.pipeline()
+        pipe.delete(self._key(upload_id))
+        pipe.zrem(SESSION_EXPIRY_KEY, upload_id)
+        pipe.execute()
+
+    def _expected_size(self, session: Dict[str, Any], part_number: int) -> int:
+        if part_number < session["part_count"]:
+            return session["part_size"]
+        return session["total_size"] - session["part_size"] * (session["part_count"] - 1)
+
+    def create(self, file_path: str, total_size: int, bucket: Optional[str] = None,
+               part_size: Optional[int] = None, content_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        创建上传会话
+
+        Args:
+            file_path: 文件在MinIO中的路径
+            total_size: 文件总大小（字节）
+            part_size: 分片大小（字节），默认 default_part_size_mb；分片数超过 10000 时自动增大
+
+        Returns:
+            Dict: 会话信息（含 upload_id、part_size、part_count）
+        """
+        if ".." in file_path or file_path.startswith("/"):
+            raise ValueError("无效的文件路径")
+        if total_size <= 0:
+            raise ValueError("文件大小为0")
+        part_size = part_size or self.default_part_size
+        if part_size < MIN_PART_SIZE or part_size > self.max_part_size:
+            raise ValueError(f"分片大小需在 {MIN_PART_SIZE // MB}MB 到 {self.max_part_size // MB}MB 之间")
+        part_size = max(part_size, math.ceil(total_size / MAX_PART_COUNT))
+        if part_size > self.max_part_size:
+            raise ValueError(f"文件过大，分片数超过 {MAX_PART_COUNT}")
+
+        self.abort_expired()
+        bucket = bucket or self.minio_service.default_bucket
+        content_type = content_type or mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        multipart_id = self.minio_service.create_multipart_upload(file_path, bucket, content_type)
+        session = {
+            "upload_id": uuid.uuid4().hex,
+            "file_path": file_path,
+            "bucket": bucket,
+            "total_size": total_size,
+            "part_size": part_size,
+            "part_count": math.ceil(total_size / part_size),
+            "content_type": content_type,
+            "multipart_id": multipart_id,
+            "created_at": datetime.now().isoformat(),
+        }
+        self._save(session)
+        logger.info(
+            f"创建分片上传会话: {session['upload_id']} -> {bucket}/{file_path}, "
+            f"大小: {total_size} bytes, 分片: {session['part_count']} x {part_size} bytes"
+        )
+        return self._describe(session, [])
+
+    def get(self, upload_id: str) -> Dict[str, Any]:
+        """查询会话与已上传的分片"""
+        session = self._load(upload_id)
+        parts = self.minio_service.list_uploaded_parts(
+            session["file_path"], session["bucket"], session["multipart_id"]
+        )
+        return self._describe(session, parts)
+
+    def upload_part(self, upload_id: str, part_number: int, data: bytes,
+                    content_md5: Optional[str] = None) -> Dict[str, Any]:
+        """
+        上传一个分片，大小需与会话约定一致
+
+        Returns:
+            Dict: {"part_number", "etag", "size"}
+        """
+        session = self._load(upload_id)
+        if not 1 <= part_number <= session["part_count"]:
+            raise ValueError(f"分片号超出范围: {part_number}（共 {session['part_count']} 片）")
+        expected = self._expected_size(session, part_number)
+        if len(data) != expected:
+            raise ValueError(f"分片 {part_number} 大小应为 {expected} bytes，实际 {len(data)} bytes")
+
+        etag = self.minio_service.upload_part(
+            session["file_path"], session["bucket"], session["multipart_id"], part_number, data, content_md5
+        )
+        # 有上传活动的会话延长有效期
+        self._save(session)
+        return {"part_number": part_number, "etag": etag, "size": len(data)}
+
+    def complete(self, upload_id: str) -> Dict[str, Any]:
+        """
+        校验分片齐全后合并为对象
+
+        Returns:
+            Dict: 与 /v1/files/upload 相同的上传结果（FileUploadResponse）
+        """
+        session = self._load(upload_id)
+        parts = self.minio_service.list_uploaded_parts(
+            session["file_path"], session["bucket"], session["multipart_id"]
+        )
+        described = self._describe(session, parts)
+        if described["missing_parts"]:
+            missing = described["missing_parts"]
+            raise ValueError(f"分片不完整，缺少 {len(missing)} 片: {missing[:20]}")
+        wrong = [p["part_number"] for p in parts if p["size"] is not None
+                 and p["size"] != self._expected_size(session, p["part_number"])]
+        if wrong:
+            raise ValueError(f"分片大小与会话不一致: {wrong[:20]}")
+
+        self.minio_service.complete_multipart_upload(
+            session["file_path"], session["bucket"], session["multipart_id"], parts
+        )
+        self._drop(upload_id)
+        logger.info(f"分片上传完成: {session['bucket']}/{session['file_path']}, 大小: {session['total_size']} bytes")
+
+        download_url = self.minio_service.client.presigned_get_object(
+            session["bucket"], session["file_path"], expires=timedelta(hours=24)
+        )
+        return {
+            "file_path": session["file_path"],
+            "bucket": session["bucket"],
+            "download_url": download_url,
+            "size": session["total_size"],
+            "uploaded_at": datetime.utcnow().isoformat() + 'Z',
+            "content_type": session.get("content_type"),
+        }
+
+    def abort(self, upload_id: str) -> None:
+        """放弃上传会话"""
+        session = self._load(upload_id)
+        self.minio_service.abort_multipart_upload(session["file_path"], session["bucket"], session["multipart_id"])
+        self._drop(upload_id)
+        logger.info(f"已放弃分片上传会话: {upload_id}")
+
+    def abort_expired(self) -> int:
+        """放弃已过期的会话，返回处理的数量"""
+        expired = self.redis_client.zrangebyscore(SESSION_EXPIRY_KEY, 0, time.time())
+        for upload_id in expired:
+            upload_id = upload_id.decode("utf-8") if isinstance(upload_id, bytes) else upload_id
+            raw = self.redis_client.get(self._key(upload_id))
+            try:
+                if raw:
+                    session = json.loads(raw)
+                    self.minio_service.abort_multipart_upload(
+                        session["file_path"], session["bucket"], session["multipart_id"]
+                    )
+            except Exception as e:
+                logger.warning(f"放弃过期分片上传失败: {upload_id}, 错误: {e}")
+            self._drop(upload_id)
+        if expired:
+            logger.info(f"已放弃 {len(expired)} 个过期的分片上传会话")
+        return len(expired)
+
+    def _describe(self, session: Dict[str, Any], parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        present = {part["part_number"] for part in parts}
+        return {
+            "upload_id": session["upload_id"],
+            "file_path": session["file_path"],
+            "bucket": session["bucket"],
+            "total_size": session["total_size"],
+            "part_size": session["part_size"],
+            "part_count": session["part_count"],
+            "uploaded_parts": sorted(present),
+            "missing_parts": [n for n in range(1, session["part_count"] + 1) if n not in present],
+            "uploaded_bytes": sum(part.get("size") or 0 for part in parts),
+            "expires_at": session.get("expires_at"),
+        }
+
+
+# 单例模式
+_manager_instance: Optional[ChunkedUploadManager] = None
+
+
+def get_chunked_upload_manager() -> ChunkedUploadManager:
+    """获取分片上传会话管理实例"""
+    global _manager_instance
+    if _manager_instance is None:
+        from services.common import state_manager
+        from services.common.config_loader import get_config
+        from .minio_service import get_minio_service
+        if state_manager.redis_client is None:
+            raise RuntimeError("Redis未连接，无法使用分片上传")
+        _manager_instance = ChunkedUploadManager(
+            get_minio_service(), state_manager.redis_client, get_config().get('chunked_upload', {}) or {}
+        )
+    return _manager_instance
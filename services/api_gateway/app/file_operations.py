@@ -11,15 +11,20 @@ import mimetypes
 import os
 import shutil
 from typing import Optional
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
+from minio.error import S3Error
 from pydantic import ValidationError
 
 from services.common.logger import get_logger
 from .minio_service import get_minio_service
+from .storage_reclaimer import get_storage_reclaimer
+from .chunked_upload import UploadSessionNotFoundError, get_chunked_upload_manager
 from .single_task_models import (
     FileUploadRequest, FileUploadResponse, FileOperationResponse,
-    FileListResponse, FileListItem, ErrorResponse
+    FileListResponse, FileListItem, ErrorResponse,
+    ChunkedUploadCreateRequest, ChunkedUploadSession, ChunkedUploadPartResponse
 )
 
 logger = get_logger('file_operations')
@@ -200,6 +205,131 @@ async def upload_file(
         raise HTTPException(status_code=500, detail=f"文件上传失败: {str(e)}")
 
 
+# MinIO 校验 Content-MD5 失败时返回的错误码，属于客户端数据错误
+_DIGEST_ERROR_CODES = ("BadDigest", "InvalidDigest")
+
+
+async def _run_chunked_upload(action: str, func, *args, **kwargs):
+    """在线程池中执行分片上传操作，并把异常转换为HTTP错误"""
+    try:
+        return await run_in_threadpool(func, *args, **kwargs)
+    except UploadSessionNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except S3Error as e:
+        if e.code in _DIGEST_ERROR_CODES:
+            raise HTTPException(status_code=400, detail=f"分片校验失败（Content-MD5 不匹配）: {e.code}")
+        logger.error(f"{action}失败: {e}")
+        raise HTTPException(status_code=500, detail=f"{action}失败: {str(e)}")
+    except Exception as e:
+        logger.error(f"{action}失败: {e}")
+        raise HTTPException(status_code=500, detail=f"{action}失败: {str(e)}")
+
+
+@router.post("/uploads", response_model=ChunkedUploadSession)
+async def create_chunked_upload(request: ChunkedUploadCreateRequest):
+    """
+    创建可续传的分片上传会话
+
+    Args:
+        request: 文件路径、总大小与可选的分片大小
+
+    Returns:
+        ChunkedUploadSession: 会话信息，客户端按 part_size 切分后并行上传各分片
+    """
+    logger.info(f"创建分片上传会话: {request.file_path}, 大小: {request.total_size} bytes")
+    manager = await _run_chunked_upload("创建分片上传会话", get_chunked_upload_manager)
+    session = await _run_chunked_upload(
+        "创建分片上传会话", manager.create,
+        file_path=request.file_path, total_size=request.total_size, bucket=request.bucket,
+        part_size=request.part_size, content_type=request.content_type,
+    )
+    return ChunkedUploadSession(**session)
+
+
+@router.get("/uploads/{upload_id}", response_model=ChunkedUploadSession)
+async def get_chunked_upload(upload_id: str):
+    """
+    查询分片上传会话，返回已上传与缺失的分片，用于中断后续传
+
+    Args:
+        upload_id: 上传会话ID
+
+    Returns:
+        ChunkedUploadSession: 会话信息
+    """
+    manager = await _run_chunked_upload("查询分片上传会话", get_chunked_upload_manager)
+    session = await _run_chunked_upload("查询分片上传会话", manager.get, upload_id)
+    return ChunkedUploadSession(**session)
+
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=ChunkedUploadPartResponse)
+async def upload_chunk(upload_id: str, part_number: int, request: Request):
+    """
+    上传一个分片（请求体为分片原始字节），可并行上传，同一分片可重传
+
+    请求头 Content-MD5（可选）由 MinIO 校验分片完整性，不匹配时返回 400。
+    请求体超过分片大小上限时返回 413（按实际读取的字节数判断，不依赖 Content-Length）。
+
+    Args:
+        upload_id: 上传会话ID
+        part_number: 分片号（从1开始）
+
+    Returns:
+        ChunkedUploadPartResponse: 分片ETag与大小
+    """
+    manager = await _run_chunked_upload("上传分片", get_chunked_upload_manager)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > manager.max_part_size:
+        raise HTTPException(status_code=413, detail="分片超过大小上限")
+    # 分块传输（chunked）等没有 Content-Length 的请求也要限制读入内存的大小
+    chunks = []
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > manager.max_part_size:
+            raise HTTPException(status_code=413, detail="分片超过大小上限")
+        chunks.append(chunk)
+    data = b"".join(chunks)
+    result = await _run_chunked_upload(
+        "上传分片", manager.upload_part, upload_id, part_number, data, request.headers.get("content-md5")
+    )
+    return ChunkedUploadPartResponse(**result)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse)
+async def complete_chunked_upload(upload_id: str):
+    """
+    分片齐全后在MinIO服务端合并为一个对象
+
+    Args:
+        upload_id: 上传会话ID
+
+    Returns:
+        FileUploadResponse: 上传结果，缺少分片时返回400并列出缺失的分片号
+    """
+    manager = await _run_chunked_upload("合并分片", get_chunked_upload_manager)
+    result = await _run_chunked_upload("合并分片", manager.complete, upload_id)
+    return FileUploadResponse(**result)
+
+
+@router.post("/uploads/{upload_id}/abort", response_model=FileOperationResponse)
+async def abort_chunked_upload(upload_id: str):
+    """
+    放弃分片上传会话，释放已上传的分片
+
+    Args:
+        upload_id: 上传会话ID
+
+    Returns:
+        FileOperationResponse: 操作结果
+    """
+    manager = await _run_chunked_upload("放弃分片上传", get_chunked_upload_manager)
+    await _run_chunked_upload("放弃分片上传", manager.abort, upload_id)
+    return FileOperationResponse(success=True, message=f"已放弃分片上传: {upload_id}")
+
+
 @router.get("/download/{file_path:path}")
 async def download_file(
     file_path: str,
@@ -249,6 +379,41 @@ async def download_file(
         raise HTTPException(status_code=500, detail=f"文件下载失败: {str(e)}")
 
 
+
+@router.get("/storage/gc")
+async def get_storage_gc_report():
+    """
+    查询最近一次共享存储回收报告
+
+    Returns:
+        回收报告（删除的任务目录、回收字节数等），尚未执行过回收时 report 为 null
+    """
+    return {"report": await run_in_threadpool(get_storage_reclaimer().get_last_report)}
+
+
+@router.post("/storage/gc")
+async def run_storage_gc(
+    dry_run: bool = Query(True, description="只统计可回收的目录，不实际删除")
+):
+    """
+    立即执行一轮共享存储回收
+
+    Args:
+        dry_run: 只统计不删除（默认）
+
+    Returns:
+        回收报告
+    """
+    try:
+        # 回收需要遍历并删除共享存储上的目录，放到线程池执行，不阻塞事件循环
+        report = await run_in_threadpool(get_storage_reclaimer().run_exclusive, dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"共享存储回收失败: {e}")
+        raise HTTPException(status_code=500, detail=f"共享存储回收失败: {str(e)}")
+    if report is None:
+        raise HTTPException(status_code=409, detail="其他进程正在执行共享存储回收")
+    return {"report": report}
+
 def get_file_operations_router():
     """获取文件操作路由器"""
     return router
\ No newline at end of file
@@ -0,0 +1,360 @@
+# services/api_gateway/app/gpu_admission.py
+# -*- coding: utf-8 -*-
+
+"""
+GPU 准入控制。
+
+GPU 任务在网关侧的待调度队列中等待，只有 GPU 有空闲容量时才真正投递到 Celery，
+避免 worker 子进程领取任务后在 gpu_lock 上空等、占住本可运行 CPU 任务的槽位。
+
+准入状态保存在 Redis（锁库）中，多个网关进程共享：
+- gpu_admission:pending  待调度任务ID列表（FIFO）
+- gpu_admission:payload  任务ID -> 调度所需的任务名与上下文
+- gpu_admission:inflight 已投递且未完成的任务ID -> 投递信息
+
+GPU 锁释放事件（Pub/Sub）、新任务提交与周期性对账都会触发一次调度。
+
+在途任务除 Celery 结果就绪外，还按 GPU 锁释放放行：对账时发现 GPU 锁被持有，就给在途任务
+记下 lock_seen_at；此后收到锁释放事件，或对账时锁已不存在（持有者被 SIGKILL/OOM 杀死、
+锁过期而没有释放事件），即认为其 GPU 阶段已结束并释放容量。超过 max_inflight_age 仍未结束的
+在途任务也会被释放，避免结果丢失时后续 GPU 任务永远等待。
+"""
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.common.logger import get_logger
+
+logger = get_logger('gpu_admission')
+
+# 默认受准入控制的 GPU 任务
+DEFAULT_GPU_TASKS = [
+    "faster_whisper.transcribe_audio",
+    "funasr.transcribe_audio",
+    "qwen3_asr.transcribe_audio",
+    "paddleocr.detect_subtitle_area",
+    "paddleocr.perform_ocr",
+    "audio_separator.separate_vocals",
+    "pyannote_audio.diarize_speakers",
+    "indextts.generate_speech",
+    "ffmpeg.crop_subtitle_images",
+]
+
+# 原子准入: 有容量时弹出队首并登记为在途
+# KEYS = pending, inflight, lock_key；ARGV = capacity, now
+# 本网关没有在途任务时还要求 GPU 锁空闲（锁被工作流中的其他 GPU 任务持有时继续等待）
+ADMIT_SCRIPT = """
+local inflight = redis.call("hlen", KEYS[2])
+if inflight >= tonumber(ARGV[1]) then
+    return false
+end
+if inflight == 0 and redis.call("exists", KEYS[3]) == 1 then
+    return false
+end
+local task_id = redis.call("lpop", KEYS[1])
+if not task_id then
+    return false
+end
+redis.call("hset", KEYS[2], task_id, '{"admitted_at":' .. ARGV[2] .. '}')
+return task_id
+"""
+
+
+class GpuAdmissionController:
+    """GPU 准入控制器"""
+
+    PENDING_KEY = "gpu_admission:pending"
+    PAYLOAD_KEY = "gpu_admission:payload"
+    INFLIGHT_KEY = "gpu_admission:inflight"
+
+    def __init__(self, redis_client, config: Dict[str, Any],
+                 dispatcher: Callable[[str, str, Dict[str, Any]], str],
+                 is_finished: Callable[[str], bool]):
+        """
+        初始化准入控制器
+
+        Args:
+            redis_client: Redis 客户端（decode_responses=True）
+            config: config.yml 中的 gpu_admission 配置段
+            dispatcher: 投递函数 (task_id, task_name, context) -> celery_task_id
+            is_finished: 判断 Celery 任务是否已结束的函数 (celery_task_id) -> bool
+        """
+        self.redis_client = redis_client
+        self.enabled = config.get('enabled', True)
+        self.capacity = max(1, int(config.get('capacity', 1)))
+        self.lock_key = config.get('lock_key', 'gpu_lock:0')
+        self.gpu_tasks = set(config.get('gpu_tasks') or DEFAULT_GPU_TASKS)
+        self.tick_interval = config.get('tick_interval', 2)
+        # 准入后未能在此时间内登记 Celery 任务ID（如网关进程崩溃）则重新排队
+        self.dispatch_timeout = config.get('dispatch_timeout', 60)
+        # 在途任务的最长占用时间（秒），超过后释放容量，0 表示不限制
+        self.max_inflight_age = config.get('max_inflight_age', 7200)
+
+        self.dispatcher = dispatcher
+        self.is_finished = is_finished
+
+        self._pump_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_gpu_task(self, task_name: str) -> bool:
+        """是否为需要准入控制的 GPU 任务"""
+        return self.enabled and self.redis_client is not None and task_name in self.gpu_tasks
+
+    def submit(self, task_id: str, task_name: str, context: Dict[str, Any]) -> int:
+        """
+        将 GPU 任务放入待调度队列，并立即尝试调度
+
+        Args:
+            task_id: 任务ID
+            task_name: 任务名称
+            context: 调度时传给任务的上下文
+
+        Returns:
+            int: 调度尝试后的排队位置（从1开始），0 表示已被投递
+        """
+        payload = json.dumps({"task_name": task_name, "context": context, "submitted_at": time.time()})
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self.PAYLOAD_KEY, task_id, payload)
+        pipe.rpush(self.PENDING_KEY, task_id)
+        pipe.execute()
+        logger.info(f"GPU任务进入准入队列: {task_name}, ID: {task_id}")
+
+        self.pump()
+        return self.get_position(task_id)
+
+    def submit_many(self, tasks: List[Tuple[str, str, Dict[str, Any]]]) -> Dict[str, int]:
+        """
+        批量放入待调度队列（一次管道写入），并立即尝试调度
+
+        Args:
+            tasks: [(task_id, task_name, context), ...]，按顺序排队
+
+        Returns:
+            Dict[str, int]: 任务ID -> 调度尝试后的排队位置，0 表示已被投递
+        """
+        if not tasks:
+            return {}
+        now = time.time()
+        pipe = self.redis_client.pipeline()
+        for task_id, task_name, context in tasks:
+            pipe.hset(self.PAYLOAD_KEY, task_id, json.dumps(
+                {"task_name": task_name, "context": context, "submitted_at": now}
+            ))
+            pipe.rpush(self.PENDING_KEY, task_id)
+        pipe.execute()
+        logger.info(f"GPU任务批量进入准入队列: {len(tasks)} 个")
+
+        self.pump()
+        pending = self.redis_client.lrange(self.PENDING_KEY, 0, -1)
+        positions: Dict[str, int] = {}
+        for index, task_id in enumerate(pending):
+            positions.setdefault(task_id, index + 1)
+        return {task_id: positions.get(task_id, 0) for task_id, _, _ in tasks}
+
+    def get_position(self, task_id: str) -> int:
+        """获取任务在待调度队列中的位置（从1开始），不在队列中返回0"""
+        pending = self.redis_client.lrange(self.PENDING_KEY, 0, -1)
+        try:
+            return pending.index(task_id) + 1
+        except ValueError:
+            return 0
+
+    def pump(self) -> List[str]:
+        """
+        在容量允许的范围内投递队首任务
+
+        Returns:
+            List[str]: 本次投递的任务ID
+        """
+        dispatched = []
+        with self._pump_lock:
+            while True:
+                task_id = self.redis_client.eval(
+                    ADMIT_SCRIPT, 3,
+                    self.PENDING_KEY, self.INFLIGHT_KEY, self.lock_key,
+                    self.capacity, time.time()
+                )
+                if not task_id:
+                    break
+                if self._dispatch(task_id):
+                    dispatched.append(task_id)
+        return dispatched
+
+    def _dispatch(self, task_id: str) -> bool:
+        raw = self.redis_client.hget(self.PAYLOAD_KEY, task_id)
+        if not raw:
+            # 已被取消
+            self.redis_client.hdel(self.INFLIGHT_KEY, task_id)
+            return False
+
+        payload = json.loads(raw)
+        task_name = payload["task_name"]
+        try:
+            celery_task_id = self.dispatcher(task_id, task_name, payload["context"])
+        except Exception as e:
+            logger.error(f"GPU任务投递失败: {task_name}, ID: {task_id}, 错误: {e}")
+            pipe = self.redis_client.pipeline()
+            pipe.hdel(self.INFLIGHT_KEY, task_id)
+            pipe.hdel(self.PAYLOAD_KEY, task_id)
+            pipe.execute()
+            return False
+
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self.INFLIGHT_KEY, task_id, json.dumps({
+            "task_name": task_name,
+            "celery_task_id": celery_task_id,
+            "admitted_at": time.time(),
+        }))
+        pipe.hdel(self.PAYLOAD_KEY, task_id)
+        pipe.execute()
+        wait_time = time.time() - payload.get("submitted_at", time.time())
+        logger.info(f"GPU任务已准入并投递: {task_name}, ID: {task_id}, 排队时间: {wait_time:.1f}秒")
+        return True
+
+    def reconcile(self) -> int:
+        """
+        对账在途任务：移除已结束或 GPU 阶段已结束的任务，重新排队投递中断的任务
+
+        Returns:
+            int: 释放的容量
+        """
+        released = 0
+        now = time.time()
+        inflight = self.redis_client.hgetall(self.INFLIGHT_KEY)
+        if not inflight:
+            return 0
+        lock_held = bool(self.redis_client.exists(self.lock_key))
+        for task_id, raw in inflight.items():
+            try:
+                info = json.loads(raw)
+            except ValueError:
+                info = {}
+            celery_task_id = info.get("celery_task_id")
+            if celery_task_id:
+                try:
+                    finished = self.is_finished(celery_task_id)
+                except Exception as e:
+                    logger.warning(f"查询任务状态失败: {task_id}, 错误: {e}")
+                    finished = False
+                if finished:
+                    self.redis_client.hdel(self.INFLIGHT_KEY, task_id)
+                    released += 1
+                elif info.get("lock_seen_at") and not lock_held:
+                    # 持锁后锁已不存在：正常释放或持有者崩溃后锁过期
+                    self._release_inflight(task_id, "GPU锁已释放或过期")
+                    released += 1
+                elif self.max_inflight_age and now - info.get("admitted_at", now) > self.max_inflight_age:
+                    self._release_inflight(task_id, f"在途超过 {self.max_inflight_age} 秒")
+                    released += 1
+                elif lock_held and not info.get("lock_seen_at"):
+                    info["lock_seen_at"] = now
+                    self.redis_client.hset(self.INFLIGHT_KEY, task_id, json.dumps(info))
+            elif now - info.get("admitted_at", now) > self.dispatch_timeout:
+                # 准入后投递中断（网关进程退出），放回队首
+                pipe = self.redis_client.pipeline()
+                pipe.hdel(self.INFLIGHT_KEY, task_id)
+                pipe.lpush(self.PENDING_KEY, task_id)
+                pipe.execute()
+                released += 1
+                logger.warning(f"GPU任务准入后未完成投递，重新排队: {task_id}")
+        return released
+
+    def on_lock_released(self) -> Optional[str]:
+        """
+        收到 GPU 锁释放事件：释放最早准入且已观察到持锁的在途任务
+
+        锁可能在释放时直接交接给排队中的其他任务，对账时未必能看到锁空闲，因此按事件释放。
+
+        Returns:
+            Optional[str]: 释放的任务ID
+        """
+        holders = []
+        for task_id, raw in self.redis_client.hgetall(self.INFLIGHT_KEY).items():
+            try:
+                info = json.loads(raw)
+            except ValueError:
+                continue
+            if info.get("lock_seen_at"):
+                holders.append((info.get("admitted_at", 0), task_id))
+        if not holders:
+            return None
+        task_id = min(holders)[1]
+        self._release_inflight(task_id, "收到GPU锁释放事件")
+        return task_id
+
+    def _release_inflight(self, task_id: str, reason: str) -> None:
+        self.redis_client.hdel(self.INFLIGHT_KEY, task_id)
+        logger.info(f"GPU任务释放准入容量: {task_id} ({reason})")
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        从待调度队列中移除任务
+
+        Returns:
+            bool: 任务仍在队列中并已移除返回True
+        """
+        pipe = self.redis_client.pipeline()
+        pipe.lrem(self.PENDING_KEY, 0, task_id)
+        pipe.hdel(self.PAYLOAD_KEY, task_id)
+        removed, _ = pipe.execute()
+        if removed:
+            logger.info(f"GPU任务已从准入队列移除: {task_id}")
+        return bool(removed)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取准入队列状态"""
+        pipe = self.redis_client.pipeline()
+        pipe.llen(self.PENDING_KEY)
+        pipe.hlen(self.INFLIGHT_KEY)
+        pending, inflight = pipe.execute()
+        return {
+            "enabled": self.enabled,
+            "capacity": self.capacity,
+            "pending": pending,
+            "inflight": inflight,
+        }
+
+    def start(self):
+        """启动后台调度线程（锁释放事件驱动 + 周期对账）"""
+        if self._thread or not self.enabled or self.redis_client is None:
+            return
+
+        def run():
+            pubsub = None
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(f"gpu_lock:{self.lock_key}")
+            except Exception as e:
+                logger.warning(f"订阅GPU锁释放事件失败，仅使用周期对账: {e}")
+                pubsub = None
+
+            while not self._stop_event.is_set():
+                try:
+                    if pubsub is not None:
+                        message = pubsub.get_message(timeout=self.tick_interval)
+                        if message and message.get("type") == "message":
+                            self.on_lock_released()
+                    else:
+                        self._stop_event.wait(self.tick_interval)
+                    self.reconcile()
+                    self.pump()
+                except Exception as e:
+                    logger.error(f"GPU准入调度异常: {e}")
+                    self._stop_event.wait(self.tick_interval)
+
+            if pubsub is not None:
+                pubsub.close()
+
+        self._thread = threading.Thread(target=run, name="gpu-admission", daemon=True)
+        self._thread.start()
+        logger.info(f"GPU准入调度线程已启动 (容量: {self.capacity}, 锁: {self.lock_key})")
+
+    def stop(self):
+        """停止后台调度线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick_interval + 1)
+            self._thread = None
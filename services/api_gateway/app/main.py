@@ -8,9 +8,10 @@ API Gateway的主应用文件。
 """
 from datetime import datetime
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 
 from services.common.logger import get_logger
+from services.common.metrics import generate_metrics
 
 logger = get_logger('main')
 
@@ -28,6 +29,9 @@ from .monitoring import monitoring_api
 # 导入新添加的模块
 from .file_operations import get_file_operations_router
 from .single_task_api import get_single_task_router
+from .single_task_executor import get_single_task_executor
+from .workflow_dag_api import get_workflow_dag_router
+from .storage_reclaimer import get_storage_reclaimer
 
 # 集成监控API路由
 monitoring_router = monitoring_api.get_router()
@@ -41,6 +45,10 @@ app.include_router(file_operations_router)
 single_task_router = get_single_task_router()
 app.include_router(single_task_router)
 
+# 集成DAG任务API路由
+workflow_dag_router = get_workflow_dag_router()
+app.include_router(workflow_dag_router)
+
 # --- 测试端点定义 ---
 
 @app.get("/test")
@@ -130,9 +138,28 @@ async def startup_event():
     except Exception as e:
         logger.error(f"监控服务初始化失败: {e}")
 
+    try:
+        # 启动GPU准入调度线程
+        get_single_task_executor().gpu_admission.start()
+    except Exception as e:
+        logger.error(f"GPU准入调度启动失败: {e}")
+
+    try:
+        # 启动共享存储回收线程
+        get_storage_reclaimer().start()
+    except Exception as e:
+        logger.error(f"共享存储回收启动失败: {e}")
+
     logger.info("API Gateway 初始化完成")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus 指标端点。"""
+    content, content_type = generate_metrics()
+    return Response(content=content, media_type=content_type)
+
+
 @app.get("/", include_in_schema=False)
 def root():
     """根路径，用于简单的健康检查。"""
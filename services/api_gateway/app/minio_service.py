@@ -319,6 +319,72 @@ class MinIOFileService:
             logger.error(f"检查文件存在性失败: {bucket}/{file_path}, 错误: {e}")
             return False
     
+    # ---- 分片上传（S3 multipart upload）----
+    # minio 客户端只在 put_object 内部使用分片上传，分片断点续传需直接调用其 multipart 接口
+
+    def create_multipart_upload(self, file_path: str, bucket: Optional[str] = None,
+                                content_type: Optional[str] = None) -> str:
+        """
+        创建分片上传
+
+        Returns:
+            str: MinIO 分片上传ID
+        """
+        bucket = bucket or self.default_bucket
+        if not self._bucket_exists(bucket):
+            self.client.make_bucket(bucket)
+            logger.info(f"创建新桶: {bucket}")
+        content_type = content_type or mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        return self.client._create_multipart_upload(bucket, file_path, {"Content-Type": content_type})
+
+    def upload_part(self, file_path: str, bucket: str, upload_id: str, part_number: int,
+                    data: bytes, content_md5: Optional[str] = None) -> str:
+        """
+        上传单个分片，同一分片号重复上传会覆盖
+
+        Args:
+            content_md5: 分片的 Content-MD5（base64），提供时由 MinIO 校验
+
+        Returns:
+            str: 分片 ETag
+        """
+        headers = {"Content-MD5": content_md5} if content_md5 else None
+        return self.client._upload_part(bucket, file_path, data, headers, upload_id, part_number)
+
+    def list_uploaded_parts(self, file_path: str, bucket: str, upload_id: str) -> List[Dict]:
+        """
+        列出分片上传中已存在的分片
+
+        Returns:
+            List[Dict]: [{"part_number", "etag", "size"}, ...]，按分片号排序
+        """
+        parts = []
+        marker = None
+        while True:
+            result = self.client._list_parts(bucket, file_path, upload_id, max_parts=1000,
+                                             part_number_marker=marker)
+            parts.extend(
+                {"part_number": part.part_number, "etag": part.etag, "size": part.size}
+                for part in result.parts
+            )
+            if not result.is_truncated:
+                break
+            marker = result.next_part_number_marker
+        return sorted(parts, key=lambda part: part["part_number"])
+
+    def complete_multipart_upload(self, file_path: str, bucket: str, upload_id: str,
+                                  parts: List[Dict]) -> None:
+        """在服务端合并分片为一个对象"""
+        from minio.datatypes import Part
+        self.client._complete_multipart_upload(
+            bucket, file_path, upload_id,
+            [Part(part["part_number"], part["etag"]) for part in parts],
+        )
+
+    def abort_multipart_upload(self, file_path: str, bucket: str, upload_id: str) -> None:
+        """放弃分片上传，释放已上传的分片"""
+        self.client._abort_multipart_upload(bucket, file_path, upload_id)
+
     def _bucket_exists(self, bucket: str) -> bool:
         """检查桶是否存在"""
         try:
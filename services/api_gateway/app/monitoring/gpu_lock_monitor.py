@@ -16,7 +16,7 @@ from datetime import datetime, timedelta
 
 from redis import Redis
 from services.common.config_loader import get_gpu_lock_monitor_config
-from services.common.locks import lock_manager, get_gpu_lock_status, get_gpu_lock_health_summary
+from services.common.locks import lock_manager, get_gpu_lock_status, get_gpu_lock_health_summary, is_lock_lease_active
 from services.common.logger import get_logger
 
 logger = get_logger('gpu_lock_monitor')
@@ -250,6 +250,11 @@ class GPULockMonitor:
             if not self.redis_client:
                 return False
 
+            # 持有者仍在续租说明任务还在运行，强制释放会导致两个任务争抢显存
+            if is_lock_lease_active(lock_key):
+                logger.warning(f"锁 {lock_key} 的持有者仍在续租，跳过强制释放")
+                return False
+
             # 获取当前锁信息
             lock_value = self.redis_client.get(lock_key)
             if lock_value:
@@ -5,13 +5,20 @@
 任务心跳管理器
 
 管理任务的心跳检测，用于监控任务状态和检测任务崩溃。
+
+所有任务的心跳由一个调度线程统一刷新：到期的心跳在同一个 Redis 管道中批量写入，
+心跳内容以 JSON 存储，监控端可以用一次 MGET 读取多个任务的心跳。
 """
 
+import ast
+import heapq
+import itertools
+import json
 import os
 import time
 import threading
 import logging
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, Iterable, List, Optional, Set
 from datetime import datetime, timedelta
 
 from redis import Redis
@@ -20,41 +27,221 @@ from services.common.logger import get_logger
 
 logger = get_logger('heartbeat_manager')
 
+HEARTBEAT_KEY_PREFIX = "task_heartbeat:"
+
+# 心跳写入失败后的重试间隔（秒）
+HEARTBEAT_RETRY_DELAY = 30
+
+
+def _heartbeat_key(task_id: str) -> str:
+    return f"{HEARTBEAT_KEY_PREFIX}{task_id}"
+
+
+def _init_lock_redis_client(owner: str) -> Optional[Redis]:
+    """初始化锁库Redis客户端"""
+    try:
+        from services.common.config_loader import get_redis_config
+
+        redis_config = get_redis_config()
+        redis_host = redis_config['host']
+        redis_port = redis_config['port']
+        redis_db = int(os.environ.get('REDIS_LOCK_DB', 2))
+
+        client = Redis(host=redis_host, port=redis_port, db=redis_db, decode_responses=True)
+        client.ping()
+        logger.info(f"{owner}成功连接到Redis")
+        return client
+    except ValueError as e:
+        logger.error(f"Redis配置错误: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"{owner}无法连接到Redis: {e}")
+        return None
+
+
+def build_heartbeat_payload(task_id: str, timestamp: float) -> str:
+    """构建心跳记录（JSON）"""
+    return json.dumps({
+        'task_id': task_id,
+        'timestamp': timestamp,
+        'datetime': datetime.fromtimestamp(timestamp).isoformat(),
+        'status': 'running'
+    })
+
+
+def parse_heartbeat_payload(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    解析心跳记录
+
+    兼容旧版本以 str(dict) 写入的记录，解析失败返回 None。
+    """
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        pass
+    try:
+        data = ast.literal_eval(raw)
+        return data if isinstance(data, dict) else None
+    except (ValueError, SyntaxError):
+        return None
+
+
+def read_heartbeats(redis_client: Redis, task_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    一次往返读取多个任务的心跳
+
+    Returns:
+        Dict[str, Optional[Dict]]: 任务ID -> 心跳记录（不存在为 None）
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+    values = redis_client.mget([_heartbeat_key(task_id) for task_id in task_ids])
+    return {task_id: parse_heartbeat_payload(raw) for task_id, raw in zip(task_ids, values)}
+
+
+class HeartbeatScheduler:
+    """心跳调度器 - 单线程按到期时间批量刷新所有任务的心跳"""
+
+    def __init__(self, redis_client: Optional[Redis], interval: float, timeout: int):
+        self.redis_client = redis_client
+        self.interval = interval
+        self.timeout = timeout
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._tasks: Dict[str, 'TaskHeartbeat'] = {}
+        # 每个任务当前有效的调度序号，堆中序号不匹配的条目（已注销或重复注册）直接丢弃
+        self._scheduled: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.stats = {'batches': 0, 'writes': 0, 'failures': 0}
+
+    def add(self, heartbeat: 'TaskHeartbeat'):
+        """加入调度并立即安排一次心跳"""
+        with self._condition:
+            self._tasks[heartbeat.task_id] = heartbeat
+            self._schedule(heartbeat.task_id, time.time())
+            self._ensure_thread()
+            self._condition.notify()
+
+    def remove(self, task_id: str):
+        """移出调度（堆中残留条目在到期时被忽略）"""
+        with self._condition:
+            self._tasks.pop(task_id, None)
+            self._scheduled.pop(task_id, None)
+
+    def _schedule(self, task_id: str, due_time: float):
+        """安排下一次心跳（需持有锁）"""
+        seq = next(self._counter)
+        self._scheduled[task_id] = seq
+        heapq.heappush(self._heap, (due_time, seq, task_id))
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="heartbeat-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """停止调度线程"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _pop_due(self) -> List['TaskHeartbeat']:
+        """等待并取出所有到期的心跳（需持有锁）"""
+        while self._running:
+            now = time.time()
+            if self._heap and self._heap[0][0] <= now:
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    _, seq, task_id = heapq.heappop(self._heap)
+                    if self._scheduled.get(task_id) == seq:
+                        due.append(self._tasks[task_id])
+                if due:
+                    return due
+                continue
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._condition.wait(timeout)
+        return []
+
+    def _run(self):
+        logger.info("心跳调度线程启动")
+        while True:
+            with self._condition:
+                due = self._pop_due()
+                if not due:
+                    break
+
+            timestamp = time.time()
+            delay = self.interval if self.flush(due, timestamp) else HEARTBEAT_RETRY_DELAY
+
+            with self._condition:
+                for heartbeat in due:
+                    if self._tasks.get(heartbeat.task_id) is heartbeat:
+                        self._schedule(heartbeat.task_id, timestamp + delay)
+        logger.info("心跳调度线程结束")
+
+    def flush(self, heartbeats: List['TaskHeartbeat'], timestamp: float) -> bool:
+        """
+        在一个管道中写入一批心跳
+
+        Returns:
+            bool: 写入成功返回True
+        """
+        if not self.redis_client or not heartbeats:
+            return False
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for heartbeat in heartbeats:
+                pipe.set(heartbeat.heartbeat_key, build_heartbeat_payload(heartbeat.task_id, timestamp),
+                         ex=self.timeout)
+            pipe.execute()
+        except Exception as e:
+            self.stats['failures'] += 1
+            logger.error(f"批量更新心跳失败（{len(heartbeats)} 个任务）: {e}")
+            return False
+
+        for heartbeat in heartbeats:
+            heartbeat.last_heartbeat_time = timestamp
+        self.stats['batches'] += 1
+        self.stats['writes'] += len(heartbeats)
+        return True
+
 
 class TaskHeartbeat:
     """单个任务的心跳管理"""
 
-    def __init__(self, task_id: str, config: Dict[str, Any]):
+    def __init__(self, task_id: str, config: Dict[str, Any],
+                 redis_client: Optional[Redis] = None,
+                 scheduler: Optional[HeartbeatScheduler] = None):
         self.task_id = task_id
         self.config = config
-        self.redis_client = self._init_redis_client()
-        self.heartbeat_key = f"task_heartbeat:{task_id}"
+        self.redis_client = redis_client if redis_client is not None else self._init_redis_client()
+        self.heartbeat_key = _heartbeat_key(task_id)
         self.running = False
-        self.heartbeat_thread = None
         self.last_heartbeat_time = None
+        if scheduler is None:
+            heartbeat_config = config.get('heartbeat', {})
+            scheduler = HeartbeatScheduler(
+                self.redis_client,
+                heartbeat_config.get('interval', 60),
+                heartbeat_config.get('timeout', 300)
+            )
+        self.scheduler = scheduler
 
     def _init_redis_client(self) -> Optional[Redis]:
         """初始化Redis客户端"""
-        try:
-            from services.common.config_loader import get_redis_config
-            
-            redis_config = get_redis_config()
-            redis_host = redis_config['host']
-            redis_port = redis_config['port']
-            redis_db = int(os.environ.get('REDIS_LOCK_DB', 2))
-
-            client = Redis(host=redis_host, port=redis_port, db=redis_db, decode_responses=True)
-            client.ping()
-            return client
-        except ValueError as e:
-            logger.error(f"Redis配置错误: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"任务 {self.task_id} 无法连接到Redis: {e}")
-            return None
+        return _init_lock_redis_client(f"任务 {self.task_id} ")
 
     def start_heartbeat(self):
-        """启动心跳线程"""
+        """加入心跳调度"""
         if not self.redis_client:
             logger.error(f"任务 {self.task_id} Redis客户端未初始化，无法启动心跳")
             return
@@ -64,70 +251,21 @@ class TaskHeartbeat:
             return
 
         self.running = True
-        self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
-        self.heartbeat_thread.start()
+        self.scheduler.add(self)
         logger.info(f"任务 {self.task_id} 心跳已启动")
 
     def stop_heartbeat(self):
-        """停止心跳线程"""
+        """移出心跳调度"""
         if not self.running:
             return
 
         self.running = False
-        if self.heartbeat_thread and self.heartbeat_thread.is_alive():
-            self.heartbeat_thread.join(timeout=5)
+        self.scheduler.remove(self.task_id)
 
         # 清理心跳记录
         self._cleanup_heartbeat()
         logger.info(f"任务 {self.task_id} 心跳已停止")
 
-    def _heartbeat_loop(self):
-        """心跳循环"""
-        logger.info(f"任务 {self.task_id} 心跳循环开始")
-
-        heartbeat_interval = self.config.get('heartbeat', {}).get('interval', 60)
-        heartbeat_timeout = self.config.get('heartbeat', {}).get('timeout', 300)
-
-        while self.running:
-            try:
-                # 更新心跳
-                current_time = time.time()
-                self._update_heartbeat(current_time)
-                self.last_heartbeat_time = current_time
-
-                # 等待下一次心跳
-                time.sleep(heartbeat_interval)
-
-            except Exception as e:
-                logger.error(f"任务 {self.task_id} 心跳更新失败: {e}")
-                time.sleep(30)  # 异常情况下等待更长时间
-
-        logger.info(f"任务 {self.task_id} 心跳循环结束")
-
-    def _update_heartbeat(self, timestamp: float):
-        """更新心跳记录"""
-        if not self.redis_client:
-            return
-
-        try:
-            heartbeat_timeout = self.config.get('heartbeat', {}).get('timeout', 300)
-            heartbeat_data = {
-                'task_id': self.task_id,
-                'timestamp': timestamp,
-                'datetime': datetime.fromtimestamp(timestamp).isoformat(),
-                'status': 'running'
-            }
-
-            # 设置心跳记录，带过期时间
-            self.redis_client.setex(
-                self.heartbeat_key,
-                heartbeat_timeout,
-                str(heartbeat_data)
-            )
-
-        except Exception as e:
-            logger.error(f"任务 {self.task_id} 更新心跳失败: {e}")
-
     def _cleanup_heartbeat(self):
         """清理心跳记录"""
         if not self.redis_client:
@@ -150,27 +288,30 @@ class TaskHeartbeat:
             logger.error(f"任务 {self.task_id} 检查心跳状态失败: {e}")
             return False
 
+    def build_info(self, heartbeat_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """根据已读取的心跳记录构建心跳信息"""
+        if heartbeat_data is not None:
+            return {
+                'task_id': self.task_id,
+                'heartbeat_exists': True,
+                'heartbeat_data': heartbeat_data,
+                'last_update': self.last_heartbeat_time,
+                'is_running': self.running
+            }
+        return {
+            'task_id': self.task_id,
+            'heartbeat_exists': False,
+            'is_running': self.running
+        }
+
     def get_heartbeat_info(self) -> Dict[str, Any]:
         """获取心跳信息"""
         if not self.redis_client:
             return {'error': 'Redis客户端未初始化'}
 
         try:
-            heartbeat_data = self.redis_client.get(self.heartbeat_key)
-            if heartbeat_data:
-                return {
-                    'task_id': self.task_id,
-                    'heartbeat_exists': True,
-                    'heartbeat_data': eval(heartbeat_data),  # 注意：实际应该用JSON解析
-                    'last_update': self.last_heartbeat_time,
-                    'is_running': self.running
-                }
-            else:
-                return {
-                    'task_id': self.task_id,
-                    'heartbeat_exists': False,
-                    'is_running': self.running
-                }
+            heartbeat_data = parse_heartbeat_payload(self.redis_client.get(self.heartbeat_key))
+            return self.build_info(heartbeat_data)
         except Exception as e:
             logger.error(f"任务 {self.task_id} 获取心跳信息失败: {e}")
             return {'error': str(e)}
@@ -182,6 +323,12 @@ class TaskHeartbeatManager:
     def __init__(self):
         self.config = get_gpu_lock_monitor_config()
         self.redis_client = self._init_redis_client()
+        heartbeat_config = self.config.get('heartbeat', {})
+        self.scheduler = HeartbeatScheduler(
+            self.redis_client,
+            heartbeat_config.get('interval', 60),
+            heartbeat_config.get('timeout', 300)
+        )
         self.active_heartbeats: Dict[str, TaskHeartbeat] = {}
         self.heartbeat_stats = {
             'total_tasks': 0,
@@ -193,24 +340,7 @@ class TaskHeartbeatManager:
 
     def _init_redis_client(self) -> Optional[Redis]:
         """初始化Redis客户端"""
-        try:
-            from services.common.config_loader import get_redis_config
-            
-            redis_config = get_redis_config()
-            redis_host = redis_config['host']
-            redis_port = redis_config['port']
-            redis_db = int(os.environ.get('REDIS_LOCK_DB', 2))
-
-            client = Redis(host=redis_host, port=redis_port, db=redis_db, decode_responses=True)
-            client.ping()
-            logger.info("任务心跳管理器成功连接到Redis")
-            return client
-        except ValueError as e:
-            logger.error(f"Redis配置错误: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"任务心跳管理器无法连接到Redis: {e}")
-            return None
+        return _init_lock_redis_client("任务心跳管理器")
 
     def register_task(self, task_id: str) -> Optional[TaskHeartbeat]:
         """注册任务并启动心跳"""
@@ -219,7 +349,8 @@ class TaskHeartbeatManager:
             return self.active_heartbeats[task_id]
 
         try:
-            heartbeat = TaskHeartbeat(task_id, self.config)
+            # 所有任务共享管理器的 Redis 连接与调度线程
+            heartbeat = TaskHeartbeat(task_id, self.config, self.redis_client, self.scheduler)
             heartbeat.start_heartbeat()
             self.active_heartbeats[task_id] = heartbeat
             self.heartbeat_stats['total_tasks'] += 1
@@ -257,8 +388,7 @@ class TaskHeartbeatManager:
         else:
             # 检查是否有遗留的心跳记录
             if self.redis_client:
-                heartbeat_key = f"task_heartbeat:{task_id}"
-                heartbeat_exists = self.redis_client.exists(heartbeat_key)
+                heartbeat_exists = self.redis_client.exists(_heartbeat_key(task_id))
                 if heartbeat_exists:
                     return {
                         'task_id': task_id,
@@ -274,6 +404,19 @@ class TaskHeartbeatManager:
                 'status': 'not_found'
             }
 
+    def _read_active_heartbeats(self) -> Dict[str, Optional[Dict[str, Any]]]:
+        """一次往返读取所有已注册任务的心跳"""
+        if not self.redis_client:
+            return {task_id: None for task_id in self.active_heartbeats}
+        return read_heartbeats(self.redis_client, list(self.active_heartbeats))
+
+    def _scan_heartbeat_task_ids(self) -> Set[str]:
+        """扫描Redis中所有心跳记录对应的任务ID"""
+        return {
+            key[len(HEARTBEAT_KEY_PREFIX):]
+            for key in self.redis_client.scan_iter(match=f"{HEARTBEAT_KEY_PREFIX}*", count=500)
+        }
+
     def check_all_heartbeats(self) -> Dict[str, Any]:
         """检查所有任务的心跳状态"""
         results = {
@@ -285,12 +428,20 @@ class TaskHeartbeatManager:
         }
 
         # 检查活跃任务
+        try:
+            heartbeats = self._read_active_heartbeats()
+        except Exception as e:
+            logger.error(f"批量读取心跳失败: {e}")
+            return results
+
         dead_tasks = []
-        for task_id, heartbeat in self.active_heartbeats.items():
-            heartbeat_info = heartbeat.get_heartbeat_info()
-            results['active_tasks'][task_id] = heartbeat_info
+        for task_id, heartbeat_data in heartbeats.items():
+            heartbeat = self.active_heartbeats.get(task_id)
+            if heartbeat is None:
+                continue
+            results['active_tasks'][task_id] = heartbeat.build_info(heartbeat_data)
 
-            if not heartbeat.is_alive():
+            if heartbeat_data is None:
                 dead_tasks.append(task_id)
 
         results['dead_tasks'] = dead_tasks
@@ -298,10 +449,7 @@ class TaskHeartbeatManager:
         # 检查孤立的心跳记录
         if self.redis_client:
             try:
-                # 获取所有心跳键
-                heartbeat_keys = self.redis_client.keys("task_heartbeat:*")
-                for key in heartbeat_keys:
-                    task_id = key.replace("task_heartbeat:", "")
+                for task_id in self._scan_heartbeat_task_ids():
                     if task_id not in self.active_heartbeats:
                         results['orphaned_tasks'].append(task_id)
             except Exception as e:
@@ -311,10 +459,13 @@ class TaskHeartbeatManager:
 
     def cleanup_dead_tasks(self):
         """清理死任务"""
-        dead_tasks = []
-        for task_id, heartbeat in self.active_heartbeats.items():
-            if not heartbeat.is_alive():
-                dead_tasks.append(task_id)
+        try:
+            heartbeats = self._read_active_heartbeats()
+        except Exception as e:
+            logger.error(f"批量读取心跳失败: {e}")
+            return
+
+        dead_tasks = [task_id for task_id, heartbeat_data in heartbeats.items() if heartbeat_data is None]
 
         for task_id in dead_tasks:
             logger.warning(f"清理死任务: {task_id}")
@@ -327,19 +478,17 @@ class TaskHeartbeatManager:
             return
 
         try:
-            # 获取所有心跳键
-            heartbeat_keys = self.redis_client.keys("task_heartbeat:*")
-            cleaned_count = 0
-
-            for key in heartbeat_keys:
-                task_id = key.replace("task_heartbeat:", "")
-                if task_id not in self.active_heartbeats:
-                    self.redis_client.delete(key)
-                    cleaned_count += 1
+            orphaned_keys = [
+                _heartbeat_key(task_id)
+                for task_id in self._scan_heartbeat_task_ids()
+                if task_id not in self.active_heartbeats
+            ]
+
+            if orphaned_keys:
+                self.redis_client.delete(*orphaned_keys)
+                for key in orphaned_keys:
                     logger.info(f"清理孤立心跳记录: {key}")
-
-            if cleaned_count > 0:
-                logger.info(f"清理了 {cleaned_count} 个孤立心跳记录")
+                logger.info(f"清理了 {len(orphaned_keys)} 个孤立心跳记录")
 
         except Exception as e:
             logger.error(f"清理孤立心跳记录失败: {e}")
@@ -349,6 +498,9 @@ class TaskHeartbeatManager:
         stats = self.heartbeat_stats.copy()
         stats['current_active_tasks'] = len(self.active_heartbeats)
         stats['uptime'] = time.time() - stats['start_time']
+        stats['heartbeat_batches'] = self.scheduler.stats['batches']
+        stats['heartbeat_writes'] = self.scheduler.stats['writes']
+        stats['heartbeat_failures'] += self.scheduler.stats['failures']
 
         # 计算故障率
         if stats['total_tasks'] > 0:
@@ -370,6 +522,7 @@ class TaskHeartbeatManager:
                 logger.error(f"停止任务 {task_id} 心跳失败: {e}")
 
         self.active_heartbeats.clear()
+        self.scheduler.stop()
         logger.info("任务心跳管理器已关闭")
 
 
@@ -7,14 +7,25 @@
 提供单个工作流节点执行和状态查询的API接口。
 """
 
+import asyncio
 from typing import Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
 import uuid
 
 from services.common.logger import get_logger
 from .single_task_executor import get_single_task_executor
+from .task_event_stream import (
+    format_sse,
+    get_task_event_hub,
+    is_finished_snapshot,
+    is_terminal_event,
+)
+from services.common.workflow_dag import get_workflow_dag_scheduler
 from .single_task_models import (
+    BatchTaskRequest,
+    BatchTaskResponse,
     SingleTaskRequest,
     SingleTaskResponse,
     TaskStatusResponse,
@@ -29,6 +40,9 @@ logger = get_logger('single_task_api')
 # 创建路由器
 router = APIRouter(prefix="/v1/tasks", tags=["Single Task Operations"])
 
+# SSE 连接无事件时的保活间隔（秒）
+EVENT_STREAM_KEEPALIVE = 15
+
 # 任务分类映射（用于文档展示，非强校验）
 TASK_CATEGORY_MAPPING = {
     "funasr": ["funasr.transcribe_audio"],
@@ -95,6 +109,14 @@ async def create_single_task(request: SingleTaskRequest):
                 "reuse_info": reuse_info
             }
 
+        if mode == "admission_pending":
+            return {
+                "task_id": task_id,
+                "status": "pending",
+                "message": "任务已进入GPU准入队列，GPU空闲后开始执行",
+                "queue_position": execution_result.get("queue_position")
+            }
+
         celery_task_id = execution_result.get("celery_task_id")
         logger.info(f"单任务创建成功: {task_id}, Celery Task ID: {celery_task_id}")
         return {
@@ -113,6 +135,45 @@ async def create_single_task(request: SingleTaskRequest):
         raise HTTPException(status_code=500, detail=f"创建单任务失败: {str(e)}")
 
 
+@router.post("/batch", response_model=BatchTaskResponse)
+def create_batch_tasks(request: BatchTaskRequest):
+    """
+    批量创建并执行单任务
+
+    整批校验后，新任务的状态记录一次管道写入，Celery 签名共用一个 broker 连接投递；
+    任务ID已有状态的任务按单任务流程处理（复用判定）。单项失败不影响其他任务。
+    同步端点：FastAPI 在线程池中执行，批量提交期间不阻塞事件循环。
+
+    Args:
+        request: 批量任务请求参数
+
+    Returns:
+        BatchTaskResponse: 与请求顺序一致的逐项结果
+    """
+    logger.info(f"批量创建任务: {len(request.tasks)} 个")
+    try:
+        items = get_single_task_executor().execute_batch([
+            {
+                "task_name": task.task_name,
+                "task_id": task.task_id,
+                "input_data": task.input_data,
+                "callback_url": task.callback,
+            }
+            for task in request.tasks
+        ])
+    except Exception as e:
+        logger.error(f"批量创建任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"批量创建任务失败: {str(e)}")
+
+    failed = sum(1 for item in items if item["status"] in ("rejected", "failed"))
+    return BatchTaskResponse(
+        total=len(items),
+        accepted=len(items) - failed,
+        failed=failed,
+        items=items,
+    )
+
+
 @router.get("/{task_id}/status", response_model=TaskStatusResponse)
 async def get_task_status(task_id: str):
     """
@@ -155,6 +216,62 @@ async def get_task_status(task_id: str):
         raise HTTPException(status_code=500, detail=f"查询任务状态失败: {str(e)}")
 
 
+def _workflow_settled(task_id: str) -> bool:
+    """DAG 任务全部节点结束（非 DAG 任务视为已结束）"""
+    dag_status = get_workflow_dag_scheduler().get_status(task_id)
+    return not dag_status or dag_status.get("status") != "running"
+
+
+@router.get("/{task_id}/events")
+async def stream_task_events(task_id: str, request: Request):
+    """
+    以 SSE 推送任务状态与处理进度
+
+    连接建立时先推送一次当前状态（snapshot），之后推送节点状态变化（stage）
+    与处理进度（progress），任务结束后关闭连接。事件来自 Redis 发布订阅，不轮询状态。
+
+    Args:
+        task_id: 任务ID
+
+    Returns:
+        StreamingResponse: text/event-stream
+    """
+    executor = get_single_task_executor()
+    hub = get_task_event_hub()
+
+    # 先订阅再读取快照，避免两者之间的事件丢失
+    queue = hub.subscribe(task_id)
+    status_info = executor.get_task_status(task_id)
+    if status_info.get("status") == "not_found":
+        hub.unsubscribe(task_id, queue)
+        raise HTTPException(status_code=404, detail=f"任务不存在: {task_id}")
+
+    async def event_stream():
+        try:
+            yield format_sse("snapshot", status_info)
+            if is_finished_snapshot(status_info) and _workflow_settled(task_id):
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield format_sse(event.get("type", "message"), event)
+                if is_terminal_event(event) and _workflow_settled(task_id):
+                    return
+        finally:
+            hub.unsubscribe(task_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{task_id}/result")
 async def get_task_result(task_id: str):
     """
@@ -177,7 +294,7 @@ async def get_task_result(task_id: str):
         executor = get_single_task_executor()
         
         # 获取任务状态
-        status_info = executor.get_task_status(task_id)
+        status_info = executor.get_task_status(task_id, resolve_refs=True)
         
         # 检查任务是否存在
         if status_info.get("status") == "not_found":
@@ -332,16 +449,14 @@ async def cancel_task(task_id: str):
         if current_status not in ["pending", "running"]:
             raise HTTPException(status_code=400, detail=f"任务状态不允许取消: {current_status}")
         
-        # 注意：这里只是更新状态标记为cancelled
-        # 实际的Celery任务取消需要更复杂的逻辑
-        executor._update_task_status(task_id, "cancelled")
-        
-        logger.info(f"任务已取消: {task_id}")
+        # 通知运行中的 worker 终止推理进程并释放GPU锁，未开始的任务不再执行
+        cancel_result = executor.cancel_task(task_id)
         
         return {
             "task_id": task_id,
             "status": "cancelled",
-            "message": "任务已成功取消"
+            "message": "任务已成功取消",
+            "revoked": cancel_result["revoked"]
         }
         
     except HTTPException:
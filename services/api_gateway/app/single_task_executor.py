@@ -30,8 +30,13 @@ from services.common.state_manager import (
     update_workflow_state,
 )
 from services.common import state_manager
+from services.common.config_loader import get_config
+from services.common.locks import redis_client as lock_redis_client
+from services.common.workflow_dag import build_dag_spec, get_workflow_dag_scheduler
+from services.common.task_cancellation import clear_cancel, clear_cancel_many, request_cancel
 
 from .minio_service import get_minio_service
+from .gpu_admission import GpuAdmissionController
 from .callback_manager import get_callback_manager
 from .single_task_models import (
     SingleTaskRequest,
@@ -59,6 +64,14 @@ class SingleTaskExecutor:
         # 获取MinIO服务和Callback管理器
         self.minio_service = get_minio_service()
         self.callback_manager = get_callback_manager()
+
+        # GPU 准入控制：GPU 任务在网关排队，GPU 空闲时才投递
+        self.gpu_admission = GpuAdmissionController(
+            lock_redis_client,
+            get_config().get('gpu_admission', {}) or {},
+            dispatcher=self._dispatch_admitted_task,
+            is_finished=lambda celery_task_id: AsyncResult(celery_task_id, app=self.celery_app).ready(),
+        )
         
         logger.info("单任务执行器初始化完成")
     
@@ -120,6 +133,9 @@ class SingleTaskExecutor:
                     "context": reuse_result["context"]
                 }
 
+        # 同一 task_id 重新提交时清除上一次的取消标记
+        clear_cancel(task_id)
+
         # 创建任务状态记录（累积写入现有阶段）
         self._create_task_record(task_id, context, "pending")
 
@@ -130,17 +146,19 @@ class SingleTaskExecutor:
             context["status"] = "pending"
         
         try:
-            # 构建Celery任务签名
-            task_signature = self._build_task_signature(task_name, context)
-            
-            # 异步执行任务
-            celery_result = task_signature.apply_async()
-            celery_task_id = celery_result.id
-            
-            # 更新任务状态为running
-            self._update_task_status(task_id, "running", {"celery_task_id": celery_task_id})
-            
-            logger.info(f"单任务提交成功: {task_name}, ID: {task_id}, Celery Task ID: {celery_task_id}")
+            if self.gpu_admission.is_gpu_task(task_name):
+                # GPU 任务进入准入队列，由准入控制器在 GPU 空闲时投递
+                queue_position = self.gpu_admission.submit(task_id, task_name, context)
+                if queue_position > 0:
+                    self._update_task_status(task_id, "pending", {"admission_queue_position": queue_position})
+                    logger.info(f"单任务进入GPU准入队列: {task_name}, ID: {task_id}, 位置: {queue_position}")
+                    return {
+                        "mode": "admission_pending",
+                        "queue_position": queue_position
+                    }
+                return {"mode": "scheduled"}
+
+            celery_task_id = self._dispatch_task(task_id, task_name, context)
             return {
                 "mode": "scheduled",
                 "celery_task_id": celery_task_id
@@ -152,6 +170,290 @@ class SingleTaskExecutor:
             logger.error(f"单任务执行失败: {task_name}, ID: {task_id}, 错误: {e}")
             raise
     
+    def execute_batch(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批量执行单任务
+
+        先整体校验，再按是否已有状态分流：
+        - 任务ID已有状态的任务走 execute_task（复用判定、合并已有阶段）
+        - 新任务一次管道写入状态记录；非 GPU 任务预先分配 Celery 任务ID，状态直接写为 running，
+          共用一个 broker 连接投递；GPU 任务批量进入准入队列
+
+        Args:
+            tasks: [{"task_name", "task_id", "input_data", "callback_url"}, ...]，task_id 为空时自动生成
+
+        Returns:
+            List[Dict]: 与 tasks 顺序一致的逐项结果（见 BatchTaskItem）
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(tasks)
+        valid: List[int] = []
+        seen = set()
+        provided_ids = set()
+        tasks = [dict(task) for task in tasks]
+        for index, task in enumerate(tasks):
+            if task.get("task_id"):
+                provided_ids.add(task["task_id"])
+            else:
+                task["task_id"] = f"task-{str(uuid.uuid4())}"
+            task_name, task_id = task.get("task_name"), task["task_id"]
+            callback_url = task.get("callback_url")
+            error = None
+            if not self._validate_task_name(task_name):
+                error = f"无效的任务名称格式: {task_name}"
+            elif callback_url and not self.callback_manager.validate_callback_url(callback_url):
+                error = "无效的callback URL格式"
+            elif (task_id, task_name) in seen:
+                error = "批次内重复的 task_id 与 task_name"
+            if error:
+                results[index] = {"index": index, "task_id": task_id, "task_name": task_name,
+                                  "status": "rejected", "error": error}
+                continue
+            seen.add((task_id, task_name))
+            valid.append(index)
+
+        # 自动生成的任务ID不可能已有状态，只检查调用方指定的
+        existing = self._existing_task_ids(provided_ids)
+        fresh = []
+        for index in valid:
+            task = tasks[index]
+            if task["task_id"] not in existing:
+                fresh.append(index)
+                continue
+            try:
+                execution_result = self.execute_task(
+                    task_name=task["task_name"], task_id=task["task_id"],
+                    input_data=task.get("input_data") or {}, callback_url=task.get("callback_url"),
+                )
+                results[index] = self._batch_item(index, task, execution_result)
+            except Exception as e:
+                results[index] = {"index": index, "task_id": task["task_id"], "task_name": task["task_name"],
+                                  "status": "failed", "error": str(e)}
+
+        if fresh:
+            self._submit_fresh_tasks([(index, tasks[index]) for index in fresh], results)
+
+        logger.info(
+            f"批量任务处理完成: 共 {len(tasks)} 个, 新任务 {len(fresh)} 个, "
+            f"已有状态 {len(valid) - len(fresh)} 个, 校验失败 {len(tasks) - len(valid)} 个"
+        )
+        return results
+
+    def _existing_task_ids(self, task_ids: set) -> set:
+        """已有节点状态的任务ID（一次扫描状态库）"""
+        client = getattr(state_manager, "redis_client", None)
+        if client is None or not task_ids:
+            return set()
+        existing = set()
+        try:
+            for key in client.scan_iter(match="*:*:*", count=1000):
+                task_id = (key.decode("utf-8") if isinstance(key, bytes) else key).split(":", 1)[0]
+                if task_id in task_ids:
+                    existing.add(task_id)
+        except Exception as e:
+            # 无法判断时全部按已有状态处理，走单任务流程
+            logger.warning(f"扫描已有任务状态失败: {e}")
+            return set(task_ids)
+        return existing
+
+    def _submit_fresh_tasks(self, items: List[tuple], results: List[Optional[Dict[str, Any]]]) -> None:
+        """新任务：批量写入状态记录并投递"""
+        contexts = {}
+        celery_task_ids = {}
+        for index, task in items:
+            context = self._create_task_context(
+                task["task_id"], task["task_name"], task.get("input_data") or {}, task.get("callback_url")
+            )
+            if self.gpu_admission.is_gpu_task(task["task_name"]):
+                context["status"] = "pending"
+            else:
+                celery_task_ids[index] = str(uuid.uuid4())
+                context["status"] = "running"
+                context["celery_task_id"] = celery_task_ids[index]
+            contexts[index] = context
+
+        clear_cancel_many([task["task_id"] for _, task in items])
+        # 状态先于投递写入，worker 开始执行时状态已存在
+        state_manager.create_workflow_states([WorkflowContext(**contexts[index]) for index, _ in items])
+
+        errors: Dict[int, str] = {}
+        try:
+            # 共用一个 broker 连接投递全部签名
+            with self.celery_app.producer_or_acquire() as producer:
+                for index, task in items:
+                    if index not in celery_task_ids:
+                        continue
+                    try:
+                        self._build_task_signature(task["task_name"], contexts[index]).apply_async(
+                            task_id=celery_task_ids[index], producer=producer
+                        )
+                        results[index] = {
+                            "index": index, "task_id": task["task_id"], "task_name": task["task_name"],
+                            "status": "pending", "message": "任务已创建并开始执行",
+                            "celery_task_id": celery_task_ids[index],
+                        }
+                    except Exception as e:
+                        logger.error(f"批量任务投递失败: {task['task_name']}, ID: {task['task_id']}, 错误: {e}")
+                        errors[index] = str(e)
+        except Exception as e:
+            logger.error(f"批量任务获取broker连接失败: {e}")
+            for index in celery_task_ids:
+                if results[index] is None:
+                    errors.setdefault(index, f"任务投递失败: {e}")
+
+        failed = [(index, task, errors[index]) for index, task in items if index in errors]
+        if failed:
+            failed_contexts = []
+            for index, task, error in failed:
+                contexts[index].update({"status": "failed", "error": error})
+                contexts[index].pop("celery_task_id", None)
+                failed_contexts.append(WorkflowContext(**contexts[index]))
+                results[index] = {"index": index, "task_id": task["task_id"], "task_name": task["task_name"],
+                                  "status": "failed", "error": error}
+            state_manager.create_workflow_states(failed_contexts)
+
+        gpu_items = [(index, task) for index, task in items if index not in celery_task_ids]
+        if gpu_items:
+            positions = self.gpu_admission.submit_many(
+                [(task["task_id"], task["task_name"], contexts[index]) for index, task in gpu_items]
+            )
+            for index, task in gpu_items:
+                position = positions.get(task["task_id"], 0)
+                results[index] = {
+                    "index": index, "task_id": task["task_id"], "task_name": task["task_name"],
+                    "status": "pending",
+                    "message": "任务已进入GPU准入队列，GPU空闲后开始执行" if position else "任务已创建并开始执行",
+                    "queue_position": position or None,
+                }
+
+    @staticmethod
+    def _batch_item(index: int, task: Dict[str, Any], execution_result: Dict[str, Any]) -> Dict[str, Any]:
+        """execute_task 的结果转为批量结果项"""
+        mode = execution_result.get("mode")
+        item = {"index": index, "task_id": task["task_id"], "task_name": task["task_name"], "status": "pending"}
+        if mode == "reuse_completed":
+            item.update(status="completed", message="任务已命中缓存并完成回调")
+        elif mode == "reuse_pending":
+            item["message"] = "任务已存在执行中，等待完成后回调"
+        elif mode == "admission_pending":
+            item.update(message="任务已进入GPU准入队列，GPU空闲后开始执行",
+                        queue_position=execution_result.get("queue_position"))
+        else:
+            item.update(message="任务已创建并开始执行", celery_task_id=execution_result.get("celery_task_id"))
+        return item
+
+    def execute_workflow(self, task_id: str, nodes: List[Dict[str, Any]],
+                         callback_url: Optional[str] = None,
+                         upload_intermediate: bool = False) -> Dict[str, Any]:
+        """
+        执行 DAG 任务：登记全部节点，投递根节点
+
+        下游节点由上游节点所在的 worker 在上游结束时投递（见 services.common.workflow_dag）。
+        DAG 节点不经过 GPU 准入队列，GPU 节点在 worker 端由 GPU 锁串行化。
+
+        Args:
+            task_id: 任务唯一标识符
+            nodes: 节点定义列表
+            callback_url: 全部节点结束后的回调URL
+            upload_intermediate: 中间节点产物是否也上传MinIO
+
+        Returns:
+            Dict: DAG 状态
+        """
+        for node in nodes:
+            if not self._validate_task_name(node.get("task_name")):
+                raise ValueError(f"无效的任务名称格式: {node.get('task_name')}")
+
+        spec = build_dag_spec(nodes, callback_url=callback_url, upload_intermediate=upload_intermediate)
+        logger.info(f"开始执行DAG任务: {task_id}, 节点顺序: {spec['order']}")
+        clear_cancel(task_id)
+
+        for task_name in spec["order"]:
+            context = self._create_task_context(task_id, task_name, spec["nodes"][task_name]["input_data"])
+            context["input_params"]["workflow_dag"] = {
+                "upload_to_minio": spec["nodes"][task_name]["upload_to_minio"]
+            }
+            self._create_task_record(task_id, context, "pending")
+
+        scheduler = get_workflow_dag_scheduler()
+        scheduler.register(task_id, spec)
+        dispatched = scheduler.start(task_id)
+        logger.info(f"DAG任务根节点已投递: {task_id}, 节点: {dispatched}")
+        return scheduler.get_status(task_id, spec)
+
+    def cancel_task(self, task_id: str) -> Dict[str, Any]:
+        """
+        取消任务
+
+        - 写入取消标记：运行中的 worker 终止推理子进程树（或常驻推理进程）后任务失败，
+          GPU 锁随任务异常在 gpu_lock 的 finally 中释放；排队等锁的任务拿到锁后立即放弃
+        - 从网关 GPU 准入队列移除尚未投递的任务
+        - revoke 已投递的 Celery 任务，尚未开始执行的不会再执行
+        - DAG 任务不再投递后续节点
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            Dict: {'task_id', 'revoked': [...], 'admission_removed': bool}
+        """
+        request_cancel(task_id)
+
+        admission_removed = self.gpu_admission.cancel(task_id)
+
+        celery_task_ids = set()
+        state = self._get_task_state(task_id, resolve_refs=False) or {}
+        if state.get("celery_task_id"):
+            celery_task_ids.add(state["celery_task_id"])
+        dag_status = get_workflow_dag_scheduler().get_status(task_id)
+        if dag_status:
+            celery_task_ids.update(
+                node["celery_task_id"] for node in dag_status["nodes"].values()
+                if node["celery_task_id"] and node["status"] == "RUNNING"
+            )
+        if celery_task_ids:
+            # 不使用 terminate：强杀 pool 进程会跳过 GPU 锁释放，运行中的任务由取消标记协作退出
+            self.celery_app.control.revoke(sorted(celery_task_ids))
+
+        self._update_task_status(task_id, "cancelled")
+        logger.info(f"任务已取消: {task_id}, revoke: {sorted(celery_task_ids)}, 移出准入队列: {admission_removed}")
+        return {
+            "task_id": task_id,
+            "revoked": sorted(celery_task_ids),
+            "admission_removed": admission_removed,
+        }
+
+    def _dispatch_task(self, task_id: str, task_name: str, context: Dict[str, Any]) -> str:
+        """
+        构建签名并投递到 Celery，更新任务状态为 running
+
+        Returns:
+            str: Celery任务ID
+        """
+        # 构建Celery任务签名
+        task_signature = self._build_task_signature(task_name, context)
+
+        # 异步执行任务
+        celery_result = task_signature.apply_async()
+        celery_task_id = celery_result.id
+
+        # 更新任务状态为running
+        self._update_task_status(task_id, "running", {"celery_task_id": celery_task_id})
+
+        logger.info(f"单任务提交成功: {task_name}, ID: {task_id}, Celery Task ID: {celery_task_id}")
+        return celery_task_id
+
+    def _dispatch_admitted_task(self, task_id: str, task_name: str, context: Dict[str, Any]) -> str:
+        """准入控制器回调：投递已获准入的 GPU 任务，失败时标记任务失败"""
+        # 排队期间其他节点可能已写入新阶段，以最新状态为准
+        context_from_state = self._get_task_state(task_id)
+        if context_from_state and not context_from_state.get("error"):
+            context = context_from_state
+        try:
+            return self._dispatch_task(task_id, task_name, context)
+        except Exception as e:
+            self._update_task_status(task_id, "failed", {"error": str(e)})
+            raise
+
     def handle_task_completion(self, task_id: str, celery_task_id: str):
         """
         处理任务完成后的逻辑
@@ -202,19 +504,21 @@ class SingleTaskExecutor:
         except Exception as e:
             logger.error(f"处理任务完成时出错: {task_id}, 错误: {e}")
     
-    def get_task_status(self, task_id: str) -> Dict[str, Any]:
+    def get_task_status(self, task_id: str, resolve_refs: bool = False) -> Dict[str, Any]:
         """
         获取任务状态
         
         Args:
             task_id: 任务ID
+            resolve_refs: 是否读取外置的大字段；为 False 时 result 中的大字段保留为引用
+                          {"$state_ref", "bytes"}，完整内容通过 /result 获取
             
         Returns:
             Dict: 任务状态信息
         """
         try:
             # 从Redis获取任务状态
-            state = self._get_task_state(task_id)
+            state = self._get_task_state(task_id, resolve_refs=resolve_refs)
             
             if not state:
                 return {
@@ -304,7 +608,7 @@ class SingleTaskExecutor:
         try:
             context["status"] = status
             task_name = context.get("input_params", {}).get("task_name")
-            existing_state = self._get_task_state(task_id)
+            existing_state = self._get_task_state(task_id, resolve_refs=False)
 
             if existing_state and not existing_state.get("error"):
                 merged_state = deepcopy(existing_state)
@@ -416,7 +720,7 @@ class SingleTaskExecutor:
                 cb_status = "failed"
             finally:
                 try:
-                    state = self._get_task_state(task_id) or {}
+                    state = self._get_task_state(task_id, resolve_refs=False) or {}
                     state["callback_status"] = cb_status
                     workflow_context = WorkflowContext(**state)
                     update_workflow_state(workflow_context, skip_side_effects=True)
@@ -428,8 +732,8 @@ class SingleTaskExecutor:
     def _update_task_status(self, task_id: str, status: str, additional_data: Optional[Dict] = None):
         """更新任务状态"""
         try:
-            # 获取现有状态
-            state = self._get_task_state(task_id)
+            # 获取现有状态（外置字段保留为引用写回）
+            state = self._get_task_state(task_id, resolve_refs=False)
             if not state:
                 raise ValueError(f"任务不存在: {task_id}")
             
@@ -463,9 +767,9 @@ class SingleTaskExecutor:
             logger.error(f"更新任务状态失败: {task_id}, 错误: {e}")
             raise
     
-    def _get_task_state(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """获取任务状态"""
-        return get_workflow_state(task_id)
+    def _get_task_state(self, task_id: str, resolve_refs: bool = True) -> Optional[Dict[str, Any]]:
+        """获取任务状态，resolve_refs 为 False 时不读取外置的大字段"""
+        return get_workflow_state(task_id, resolve_refs=resolve_refs)
 
     def _build_deletion_plan(self, task_id: str, state: Dict[str, Any]) -> Dict[str, Any]:
         """构建删除计划，包括本地目录、Redis键和MinIO前缀"""
@@ -614,7 +918,7 @@ class SingleTaskExecutor:
         """
         删除任务数据：本地目录、Redis 状态、MinIO 对象
         """
-        state = self._get_task_state(task_id)
+        state = self._get_task_state(task_id, resolve_refs=False)
         if not state or state.get("status") == "not_found" or state.get("error"):
             raise ValueError(f"任务不存在: {task_id}")
 
@@ -622,6 +926,10 @@ class SingleTaskExecutor:
         if not force and current_status in ("pending", "running"):
             raise PermissionError("任务执行中，未开启 force，不允许删除")
 
+        # 强制删除排队中的 GPU 任务时，先将其移出准入队列
+        if self.gpu_admission.is_gpu_task(state.get("input_params", {}).get("task_name", "")):
+            self.gpu_admission.cancel(task_id)
+
         plan = self._build_deletion_plan(task_id, state)
         results: List[ResourceDeletionItem] = []
 
@@ -785,7 +1093,7 @@ class SingleTaskExecutor:
         """如果需要则发送callback"""
         try:
             # 获取任务的callback URL
-            state = self._get_task_state(task_id)
+            state = self._get_task_state(task_id, resolve_refs=False)
             if not state:
                 return
             
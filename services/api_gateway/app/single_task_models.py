@@ -18,6 +18,7 @@ class TaskStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class SingleTaskRequest(BaseModel):
@@ -107,6 +108,36 @@ class FileListResponse(BaseModel):
     total_count: int = Field(..., description="文件总数")
 
 
+class ChunkedUploadCreateRequest(BaseModel):
+    """分片上传会话创建请求"""
+    file_path: str = Field(..., description="文件在MinIO中的路径")
+    bucket: Optional[str] = Field("yivideo", description="文件桶名称")
+    total_size: int = Field(..., gt=0, description="文件总大小（字节）")
+    part_size: Optional[int] = Field(None, description="分片大小（字节），默认使用配置值")
+    content_type: Optional[str] = Field(None, description="文件MIME类型")
+
+
+class ChunkedUploadSession(BaseModel):
+    """分片上传会话"""
+    upload_id: str = Field(..., description="上传会话ID")
+    file_path: str = Field(..., description="文件路径")
+    bucket: str = Field(..., description="文件桶")
+    total_size: int = Field(..., description="文件总大小")
+    part_size: int = Field(..., description="分片大小，最后一片为剩余大小")
+    part_count: int = Field(..., description="分片数，分片号从1开始")
+    uploaded_parts: List[int] = Field(..., description="已上传的分片号")
+    missing_parts: List[int] = Field(..., description="尚未上传的分片号")
+    uploaded_bytes: int = Field(..., description="已上传字节数")
+    expires_at: Optional[str] = Field(None, description="会话过期时间，有分片上传时顺延")
+
+
+class ChunkedUploadPartResponse(BaseModel):
+    """分片上传结果"""
+    part_number: int = Field(..., description="分片号")
+    etag: str = Field(..., description="分片ETag")
+    size: int = Field(..., description="分片大小")
+
+
 class DeletionResource(str, Enum):
     """删除资源类型"""
     LOCAL_DIRECTORY = "local_directory"
@@ -150,6 +181,58 @@ class TaskDeletionResult(BaseModel):
     timestamp: str = Field(..., description="处理完成时间戳，ISO 8601")
 
 
+class WorkflowNodeRequest(BaseModel):
+    """DAG 节点定义"""
+    task_name: str = Field(..., description="工作流节点名称，同一 DAG 内唯一")
+    input_data: Dict[str, Any] = Field(default_factory=dict, description="节点输入数据，可用 ${{ stages.<task_name>.output.<field> }} 引用上游输出")
+    depends_on: List[str] = Field(default_factory=list, description="显式依赖的上游节点（引用上游输出时可省略）")
+
+
+class WorkflowDagRequest(BaseModel):
+    """DAG 任务请求模型"""
+    task_id: Optional[str] = Field(None, description="任务唯一标识符，如不提供将自动生成")
+    callback: Optional[str] = Field(None, description="全部节点结束后回调的URL")
+    upload_intermediate: bool = Field(False, description="中间节点产物是否也上传MinIO，默认只上传汇点节点产物")
+    nodes: List[WorkflowNodeRequest] = Field(..., min_length=1, description="DAG 节点列表")
+
+
+class WorkflowDagResponse(BaseModel):
+    """DAG 任务状态响应模型"""
+    task_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="DAG 整体状态: running/completed/failed")
+    message: str = Field(..., description="状态消息")
+    nodes: Dict[str, Dict[str, Any]] = Field(..., description="各节点状态: WAITING/RUNNING/SUCCESS/FAILED/SKIPPED")
+
+
+# 单次批量提交的任务数上限
+BATCH_MAX_TASKS = 1000
+
+
+class BatchTaskRequest(BaseModel):
+    """批量任务请求模型"""
+    tasks: List[SingleTaskRequest] = Field(..., min_length=1, max_length=BATCH_MAX_TASKS, description="任务请求列表，按顺序处理")
+
+
+class BatchTaskItem(BaseModel):
+    """批量任务中单个任务的提交结果"""
+    index: int = Field(..., description="在请求列表中的位置")
+    task_id: Optional[str] = Field(None, description="任务ID")
+    task_name: str = Field(..., description="工作流节点名称")
+    status: str = Field(..., description="提交结果: pending/completed/rejected/failed")
+    message: Optional[str] = Field(None, description="状态消息")
+    error: Optional[str] = Field(None, description="校验或投递失败原因")
+    celery_task_id: Optional[str] = Field(None, description="Celery任务ID")
+    queue_position: Optional[int] = Field(None, description="GPU准入队列位置")
+
+
+class BatchTaskResponse(BaseModel):
+    """批量任务响应模型"""
+    total: int = Field(..., description="请求任务数")
+    accepted: int = Field(..., description="已受理的任务数")
+    failed: int = Field(..., description="校验或投递失败的任务数")
+    items: List[BatchTaskItem] = Field(..., description="逐项结果，与请求顺序一致")
+
+
 # 错误响应模型
 class ErrorResponse(BaseModel):
     """错误响应模型"""
@@ -0,0 +1,384 @@
+# services/api_gateway/app/storage_reclaimer.py
+# -*- coding: utf-8 -*-
+
+"""
+共享存储回收。
+
+每个任务在 /share/workflows/{task_id} 下写入节点输出与临时文件（temp_path_utils 的 tmp/、
+path_builder.build_temp_path 的 temp/），此前只能通过 delete_directory 手动删除。
+网关后台线程按以下规则定期回收：
+
+1. 运行中的任务（存在未结束的节点状态）与最近仍有写入的目录从不删除
+2. 已结束任务的临时目录超过 temp_retention_hours 即删除；其中可续跑的断点检查点
+   （如 faster_whisper 长音频分块检查点）保留，随任务目录按保留时长删除，失败任务在保留期内重试仍可续跑
+3. 任务目录按任务结果（completed/failed/cancelled，状态已过期为 unknown）的保留时长删除
+4. 总占用仍超过 max_total_gb 时，从最久未写入的已结束任务开始删除直到低于配额
+
+多个网关进程通过状态库中的锁保证同一时刻只有一个进程执行回收，最近一次报告保存在
+storage_gc:last_report，回收字节数同时计入 yivideo_storage_reclaimed_bytes_total 指标。
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from services.common.logger import get_logger
+from services.common.metrics import STORAGE_RECLAIMED_BYTES
+from services.common.path_builder import LOCAL_STORAGE_ROOT
+from services.common.state_codec import decode_value, is_blob_key
+
+logger = get_logger('storage_reclaimer')
+
+GC_LOCK_KEY = "storage_gc:lock"
+GC_REPORT_KEY = "storage_gc:last_report"
+
+# 任务内的临时目录（temp_path_utils / path_builder.build_temp_path）
+TEMP_DIR_NAMES = ("tmp", "temp")
+
+# 临时目录中需随任务目录保留的断点检查点（faster_whisper 长音频分块检查点）
+RESUMABLE_TEMP_PREFIXES = ("faster_whisper_chunks_",)
+
+TERMINAL_NODE_STATUSES = ("completed", "failed", "cancelled")
+TERMINAL_STAGE_STATUSES = ("SUCCESS", "FAILED")
+
+DEFAULT_RETENTION_HOURS = {"completed": 24, "failed": 72, "cancelled": 24, "unknown": 72}
+
+
+def _decode(value: Any) -> Any:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _escape_glob(value: str) -> str:
+    return "".join(f"\\{ch}" if ch in "*?[]\\" else ch for ch in value)
+
+
+def classify_workflow(states: List[Dict[str, Any]]) -> str:
+    """
+    根据节点状态判断任务所处阶段
+
+    Returns:
+        str: active / completed / failed / cancelled / unknown（无状态，通常已过期）
+    """
+    if not states:
+        return "unknown"
+    outcome = "completed"
+    for state in states:
+        node_status = state.get("status")
+        stage_statuses = [
+            str((stage or {}).get("status") or "").upper()
+            for stage in (state.get("stages") or {}).values()
+        ]
+        finished = node_status in TERMINAL_NODE_STATUSES or any(
+            status in TERMINAL_STAGE_STATUSES for status in stage_statuses
+        )
+        if not finished:
+            return "active"
+        if node_status == "cancelled":
+            outcome = "cancelled"
+        elif outcome != "cancelled" and (node_status == "failed" or "FAILED" in stage_statuses):
+            outcome = "failed"
+    return outcome
+
+
+def scan_directory(path: str) -> Dict[str, float]:
+    """
+    统计目录占用与最近写入时间（不跟随符号链接）
+
+    Returns:
+        Dict: {"bytes": 总字节数, "files": 文件数, "last_modified": 最近修改时间戳}
+    """
+    total = 0
+    files = 0
+    last_modified = os.lstat(path).st_mtime
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    last_modified = max(last_modified, stat.st_mtime)
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += stat.st_size
+                        files += 1
+        except OSError:
+            continue
+    return {"bytes": total, "files": files, "last_modified": last_modified}
+
+
+class StorageReclaimer:
+    """共享存储回收器"""
+
+    def __init__(self, redis_client, config: Dict[str, Any],
+                 state_loader: Optional[Callable[[List[str]], Dict[str, List[Dict[str, Any]]]]] = None):
+        """
+        Args:
+            redis_client: 状态库客户端（节点状态所在的库）
+            config: config.yml 中的 storage_gc 配置段
+            state_loader: 批量读取节点状态的函数 (task_ids) -> {task_id: [节点状态]}，默认扫描状态库
+        """
+        self.redis_client = redis_client
+        self.enabled = config.get('enabled', True)
+        self.root = config.get('root', LOCAL_STORAGE_ROOT)
+        self.interval = float(config.get('interval_minutes', 60)) * 60
+        self.retention_hours = {**DEFAULT_RETENTION_HOURS, **(config.get('retention_hours') or {})}
+        self.temp_retention = float(config.get('temp_retention_hours', 6)) * 3600
+        self.max_total_bytes = int(float(config.get('max_total_gb', 0)) * 1024 ** 3)
+        self.min_idle = float(config.get('min_idle_minutes', 30)) * 60
+        self.state_loader = state_loader or self._load_states
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_states(self, task_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """一次扫描状态库，按任务ID归集节点状态（键格式 {task_id}:{node}:{func}）"""
+        wanted = set(task_ids)
+        keys_by_task: Dict[str, List[str]] = {}
+        # 单个任务（删除前复查）只匹配该任务的键
+        pattern = f"{_escape_glob(task_ids[0])}:*:*" if len(task_ids) == 1 else "*:*:*"
+        for key in self.redis_client.scan_iter(match=pattern, count=1000):
+            key = _decode(key)
+            task_id = key.split(":", 1)[0]
+            if task_id in wanted and not is_blob_key(key):
+                keys_by_task.setdefault(task_id, []).append(key)
+
+        states: Dict[str, List[Dict[str, Any]]] = {}
+        for task_id, keys in keys_by_task.items():
+            for raw in self.redis_client.mget(keys):
+                if not raw:
+                    continue
+                try:
+                    states.setdefault(task_id, []).append(decode_value(raw))
+                except ValueError:
+                    continue
+        return states
+
+    def _workflow_status(self, task_id: str) -> str:
+        return classify_workflow(self.state_loader([task_id]).get(task_id, []))
+
+    def _remove(self, path: str, dry_run: bool) -> bool:
+        if dry_run:
+            return True
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger.warning(f"删除目录失败: {path}, 错误: {e}")
+            return False
+
+    def _remove_temp(self, temp_path: str, usage: Dict[str, float], dry_run: bool) -> Optional[int]:
+        """
+        删除临时目录，保留其中的断点检查点
+
+        Returns:
+            Optional[int]: 回收的字节数，未删除任何内容时返回 None
+        """
+        try:
+            names = os.listdir(temp_path)
+        except OSError:
+            return None
+        if not any(name.startswith(RESUMABLE_TEMP_PREFIXES) for name in names):
+            return int(usage["bytes"]) if self._remove(temp_path, dry_run) else None
+
+        freed = 0
+        removed = False
+        for name in names:
+            if name.startswith(RESUMABLE_TEMP_PREFIXES):
+                continue
+            path = os.path.join(temp_path, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                size = scan_directory(path)["bytes"]
+            else:
+                size = os.lstat(path).st_size
+            if self._remove(path, dry_run):
+                freed += size
+                removed = True
+        return int(freed) if removed else None
+
+    def run_once(self, dry_run: bool = False, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        执行一轮回收
+
+        Args:
+            dry_run: 只统计不删除
+            now: 当前时间戳（测试用）
+
+        Returns:
+            Dict: 回收报告
+        """
+        now = now or time.time()
+        started = time.time()
+        report: Dict[str, Any] = {
+            "dry_run": dry_run,
+            "root": self.root,
+            "workflows_scanned": 0,
+            "skipped_active": 0,
+            "deleted_workflows": [],
+            "deleted_temp_dirs": 0,
+            "freed_bytes": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+        }
+        if not os.path.isdir(self.root):
+            logger.warning(f"共享存储目录不存在，跳过回收: {self.root}")
+            return report
+
+        task_dirs = {}
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    task_dirs[entry.name] = entry.path
+        states = self.state_loader(list(task_dirs))
+
+        candidates = []
+        total_bytes = 0
+        for task_id, path in task_dirs.items():
+            usage = scan_directory(path)
+            total_bytes += usage["bytes"]
+            report["workflows_scanned"] += 1
+            status = classify_workflow(states.get(task_id, []))
+            idle = now - usage["last_modified"]
+            if status == "active" or idle < self.min_idle:
+                report["skipped_active"] += 1
+                continue
+            candidates.append({"task_id": task_id, "path": path, "status": status, "idle": idle, **usage})
+        report["bytes_before"] = total_bytes
+
+        def delete_workflow(candidate: Dict[str, Any], reason: str) -> None:
+            nonlocal total_bytes
+            # 删除前再确认一次，避免扫描期间同一任务ID被重新提交
+            if not dry_run and self._workflow_status(candidate["task_id"]) == "active":
+                report["skipped_active"] += 1
+                candidate["active"] = True
+                return
+            if self._remove(candidate["path"], dry_run):
+                candidate["deleted"] = True
+                total_bytes -= candidate["bytes"]
+                report["freed_bytes"] += candidate["bytes"]
+                report["deleted_workflows"].append(
+                    {"task_id": candidate["task_id"], "status": candidate["status"],
+                     "bytes": candidate["bytes"], "reason": reason}
+                )
+                if not dry_run:
+                    STORAGE_RECLAIMED_BYTES.labels(reason=reason).inc(candidate["bytes"])
+
+        # 按任务结果的保留时长
+        for candidate in candidates:
+            retention = float(self.retention_hours.get(candidate["status"], DEFAULT_RETENTION_HOURS["unknown"])) * 3600
+            if candidate["idle"] >= retention:
+                delete_workflow(candidate, "retention")
+
+        # 保留的已结束任务中，过期的临时目录
+        for candidate in candidates:
+            if candidate.get("deleted") or candidate.get("active"):
+                continue
+            for name in TEMP_DIR_NAMES:
+                temp_path = os.path.join(candidate["path"], name)
+                if not os.path.isdir(temp_path) or os.path.islink(temp_path):
+                    continue
+                usage = scan_directory(temp_path)
+                if now - usage["last_modified"] < self.temp_retention:
+                    continue
+                freed = self._remove_temp(temp_path, usage, dry_run)
+                if freed is None:
+                    continue
+                total_bytes -= freed
+                candidate["bytes"] -= freed
+                report["freed_bytes"] += freed
+                report["deleted_temp_dirs"] += 1
+                if not dry_run:
+                    STORAGE_RECLAIMED_BYTES.labels(reason="temp").inc(freed)
+
+        # 超出配额时从最久未写入的任务开始删除
+        if self.max_total_bytes and total_bytes > self.max_total_bytes:
+            for candidate in sorted(candidates, key=lambda c: c["idle"], reverse=True):
+                if total_bytes <= self.max_total_bytes:
+                    break
+                if not candidate.get("deleted") and not candidate.get("active"):
+                    delete_workflow(candidate, "quota")
+            if total_bytes > self.max_total_bytes:
+                logger.warning(
+                    f"共享存储仍超出配额: {total_bytes / 1024 ** 3:.2f}GB > "
+                    f"{self.max_total_bytes / 1024 ** 3:.2f}GB（其余为运行中或最近写入的任务）"
+                )
+
+        report["bytes_after"] = total_bytes
+        report["duration"] = round(time.time() - started, 3)
+        report["finished_at"] = time.time()
+        logger.info(
+            f"共享存储回收{'（试运行）' if dry_run else ''}完成: 扫描 {report['workflows_scanned']} 个任务目录, "
+            f"删除 {len(report['deleted_workflows'])} 个任务目录与 {report['deleted_temp_dirs']} 个临时目录, "
+            f"回收 {report['freed_bytes'] / 1024 ** 2:.1f}MB, 跳过运行中 {report['skipped_active']} 个"
+        )
+        return report
+
+    def run_exclusive(self, dry_run: bool = False) -> Optional[Dict[str, Any]]:
+        """在多个网关进程间互斥地执行一轮回收，未拿到锁时返回 None"""
+        token = f"{os.getpid()}:{time.time()}"
+        if not self.redis_client.set(GC_LOCK_KEY, token, nx=True, ex=max(60, int(self.interval))):
+            return None
+        try:
+            report = self.run_once(dry_run=dry_run)
+            if not dry_run:
+                self.redis_client.set(GC_REPORT_KEY, json.dumps(report, ensure_ascii=False))
+            return report
+        finally:
+            if _decode(self.redis_client.get(GC_LOCK_KEY)) == token:
+                self.redis_client.delete(GC_LOCK_KEY)
+
+    def get_last_report(self) -> Optional[Dict[str, Any]]:
+        """最近一次回收报告"""
+        raw = self.redis_client.get(GC_REPORT_KEY) if self.redis_client is not None else None
+        return json.loads(raw) if raw else None
+
+    def start(self):
+        """启动后台回收线程"""
+        if self._thread or not self.enabled or self.redis_client is None:
+            return
+
+        def run():
+            while not self._stop_event.wait(self.interval):
+                try:
+                    self.run_exclusive()
+                except Exception as e:
+                    logger.error(f"共享存储回收异常: {e}")
+
+        self._thread = threading.Thread(target=run, name="storage-reclaimer", daemon=True)
+        self._thread.start()
+        logger.info(f"共享存储回收线程已启动 (目录: {self.root}, 间隔: {self.interval / 60:.0f}分钟)")
+
+    def stop(self):
+        """停止后台回收线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+# 单例模式
+_reclaimer_instance: Optional[StorageReclaimer] = None
+
+
+def get_storage_reclaimer() -> StorageReclaimer:
+    """获取共享存储回收器实例"""
+    global _reclaimer_instance
+    if _reclaimer_instance is None:
+        from services.common import state_manager
+        from services.common.config_loader import get_config
+        _reclaimer_instance = StorageReclaimer(
+            state_manager.redis_client, get_config().get('storage_gc', {}) or {}
+        )
+    return _reclaimer_instance
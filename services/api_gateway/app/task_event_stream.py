@@ -0,0 +1,168 @@
+# services/api_gateway/app/task_event_stream.py
+# -*- coding: utf-8 -*-
+
+"""
+任务事件推送（SSE）。
+
+网关进程内只保持一个 Redis 模式订阅（task_events:*），监听线程按 task_id 把事件
+分发给各 SSE 连接的 asyncio 队列；客户端数量增加不会增加 Redis 读取。
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from services.common.logger import get_logger
+from services.common.task_events import TASK_EVENT_CHANNEL_PREFIX
+
+logger = get_logger('task_event_stream')
+
+# 节点结束状态
+TERMINAL_NODE_STATUSES = ("completed", "failed", "cancelled")
+TERMINAL_STAGE_STATUSES = ("SUCCESS", "FAILED")
+
+
+def _decode(value: Any) -> Any:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def is_finished_snapshot(status_info: Dict[str, Any]) -> bool:
+    """状态快照中的节点已结束"""
+    result = status_info.get("result") or {}
+    return (
+        status_info.get("status") in TERMINAL_NODE_STATUSES
+        or (result.get("status") or "").upper() in TERMINAL_STAGE_STATUSES
+    )
+
+
+def format_sse(event_type: str, data: Dict[str, Any]) -> str:
+    """格式化为 SSE 消息"""
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def is_terminal_event(event: Dict[str, Any]) -> bool:
+    """节点结束（成功、失败或取消）或 DAG 全部结束的事件"""
+    if event.get("type") == "workflow":
+        return True
+    if event.get("type") != "stage":
+        return False
+    return (
+        (event.get("stage_status") or "").upper() in TERMINAL_STAGE_STATUSES
+        or event.get("node_status") == "cancelled"
+    )
+
+
+class TaskEventHub:
+    """任务事件分发中心"""
+
+    def __init__(self, redis_client, queue_size: int = 256):
+        """
+        Args:
+            redis_client: Redis 客户端（任意 DB，Pub/Sub 与 DB 无关）
+            queue_size: 每个连接的事件缓冲，慢客户端溢出时丢弃最旧的事件
+        """
+        self.redis_client = redis_client
+        self.queue_size = queue_size
+        self._listeners: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """注册一个连接，返回接收事件的队列（需在事件循环中调用）"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._listeners.setdefault(task_id, set()).add(entry)
+        self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            entries = self._listeners.get(task_id)
+            if not entries:
+                return
+            for entry in [e for e in entries if e[1] is queue]:
+                entries.discard(entry)
+            if not entries:
+                del self._listeners[task_id]
+
+    def dispatch(self, channel: str, data: str) -> int:
+        """
+        把一条频道消息分发给订阅该任务的连接
+
+        Returns:
+            int: 收到事件的连接数
+        """
+        task_id = channel[len(TASK_EVENT_CHANNEL_PREFIX) + 1:]
+        with self._lock:
+            entries = list(self._listeners.get(task_id, ()))
+        if not entries:
+            return 0
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.warning(f"无法解析任务事件: {channel}")
+            return 0
+        for loop, queue in entries:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.unsubscribe(task_id, queue)
+        return len(entries)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._listen, name="task-event-hub", daemon=True)
+            self._thread.start()
+
+    def _listen(self) -> None:
+        logger.info("任务事件监听线程启动")
+        pubsub = None
+        while self._running:
+            try:
+                if pubsub is None:
+                    pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.psubscribe(f"{TASK_EVENT_CHANNEL_PREFIX}:*")
+                message = pubsub.get_message(timeout=1.0)
+                if message and message.get('type') == 'pmessage':
+                    self.dispatch(_decode(message['channel']), _decode(message['data']))
+            except Exception as e:
+                logger.error(f"任务事件监听异常，1秒后重连: {e}")
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+                pubsub = None
+                time.sleep(1)
+        if pubsub is not None:
+            pubsub.close()
+        logger.info("任务事件监听线程停止")
+
+    def stop(self) -> None:
+        self._running = False
+
+
+# 单例模式
+_hub_instance: Optional[TaskEventHub] = None
+
+
+def get_task_event_hub() -> TaskEventHub:
+    """获取任务事件分发中心实例"""
+    global _hub_instance
+    if _hub_instance is None:
+        from services.common import state_manager
+        _hub_instance = TaskEventHub(state_manager.redis_client)
+    return _hub_instance
@@ -0,0 +1,74 @@
+# services/api_gateway/app/workflow_dag_api.py
+# -*- coding: utf-8 -*-
+
+"""
+DAG 任务API端点。
+
+一次提交多个节点及其依赖关系，上游节点完成后下游节点自动投递。
+"""
+
+import uuid
+from fastapi import APIRouter, HTTPException
+
+from services.common.logger import get_logger
+from services.common.workflow_dag import WorkflowDagError, get_workflow_dag_scheduler
+from .single_task_executor import get_single_task_executor
+from .single_task_models import WorkflowDagRequest, WorkflowDagResponse
+
+logger = get_logger('workflow_dag_api')
+
+# 创建路由器
+router = APIRouter(prefix="/v1/workflows", tags=["Workflow DAG Operations"])
+
+
+@router.post("", response_model=WorkflowDagResponse)
+async def create_workflow(request: WorkflowDagRequest):
+    """
+    创建 DAG 任务
+
+    节点通过 ${{ stages.<task_name>.output.<field> }} 引用上游输出，
+    互不依赖的分支（如说话人分离与语音转录）并行执行。
+
+    Args:
+        request: DAG 任务请求
+
+    Returns:
+        WorkflowDagResponse: 各节点初始状态
+    """
+    task_id = request.task_id or str(uuid.uuid4())
+    logger.info(f"收到DAG任务请求: {task_id}, 节点数: {len(request.nodes)}")
+
+    try:
+        executor = get_single_task_executor()
+        status_info = executor.execute_workflow(
+            task_id=task_id,
+            nodes=[node.model_dump() for node in request.nodes],
+            callback_url=request.callback,
+            upload_intermediate=request.upload_intermediate,
+        )
+        return WorkflowDagResponse(message="DAG任务已创建，根节点开始执行", **status_info)
+
+    except (WorkflowDagError, ValueError) as e:
+        logger.error(f"DAG参数验证失败: {e}")
+        raise HTTPException(status_code=400, detail=f"参数验证失败: {str(e)}")
+    except Exception as e:
+        logger.error(f"创建DAG任务失败: {e}")
+        raise HTTPException(status_code=500, detail=f"创建DAG任务失败: {str(e)}")
+
+
+@router.get("/{task_id}", response_model=WorkflowDagResponse)
+async def get_workflow_status(task_id: str):
+    """
+    查询 DAG 任务各节点状态
+
+    节点结果通过 /v1/tasks/{task_id}/result 或回调获取。
+    """
+    status_info = get_workflow_dag_scheduler().get_status(task_id)
+    if not status_info:
+        raise HTTPException(status_code=404, detail=f"DAG任务不存在: {task_id}")
+    return WorkflowDagResponse(message="DAG状态获取成功", **status_info)
+
+
+def get_workflow_dag_router():
+    """获取 DAG 任务路由器"""
+    return router
@@ -18,6 +18,7 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 
 from services.common.context import WorkflowContext, StageExecution
+from services.common.metrics import observe_stage
 from services.common.minio_url_convention import apply_minio_url_convention
 
 
@@ -145,6 +146,7 @@ class BaseNodeExecutor(ABC):
             此方法不应被子类覆盖。
         """
         start_time = time.time()
+        error = None
 
         try:
             # 1. 验证输入
@@ -170,6 +172,7 @@ class BaseNodeExecutor(ABC):
 
         except Exception as e:
             # 异常处理：记录错误信息
+            error = e
             duration = time.time() - start_time
             stage_result = StageExecution(
                 status="FAILED",
@@ -182,6 +185,7 @@ class BaseNodeExecutor(ABC):
             self.context.stages[self.stage_name] = stage_result
             self.context.error = f"{self.stage_name} failed: {str(e)}"
 
+        observe_stage(self.stage_name, duration, error)
         return self.context
 
     def format_output(self, raw_output: Dict[str, Any]) -> Dict[str, Any]:
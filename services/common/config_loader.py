@@ -107,6 +107,13 @@ def get_gpu_lock_config() -> Dict[str, Any]:
             - max_poll_interval: 最大轮询间隔（秒）
             - use_event_driven: 是否启用事件驱动机制（Redis Pub/Sub）
             - fallback_timeout: 事件驱动回退超时时间（秒）
+            - use_queue: 是否启用公平排队（FIFO + 优先级，释放即交接）
+            - default_priority: 排队默认优先级（0-9，越小越优先）
+            - priority_classes: 按任务名称指定的优先级
+            - queue_waiter_ttl: 等待者存活期（秒），超过未续期视为已崩溃
+            - queue_refresh_interval: 等待者续期间隔（秒）
+            - lease_renewal: 持锁期间是否自动续租
+            - lease_renewal_interval: 续租间隔（秒），None 表示 lock_timeout 的三分之一
     """
     config = _read_config_file()
     if not config:
@@ -146,7 +153,14 @@ def _get_default_gpu_lock_config() -> Dict[str, Any]:
         'exponential_backoff': True,   # 启用指数退避
         'max_poll_interval': 5,        # 最大轮询间隔（秒）- 避免过长等待
         'use_event_driven': True,      # 启用事件驱动机制（Redis Pub/Sub）
-        'fallback_timeout': 30         # 事件驱动回退超时时间（秒）
+        'fallback_timeout': 30,        # 事件驱动回退超时时间（秒）
+        'use_queue': False,            # 公平排队（FIFO + 优先级）
+        'default_priority': 5,         # 排队默认优先级（0-9，越小越优先）
+        'priority_classes': {},        # 任务名称 -> 优先级
+        'queue_waiter_ttl': 30,        # 等待者存活期（秒）
+        'queue_refresh_interval': 5,   # 等待者续期间隔（秒）
+        'lease_renewal': True,         # 持锁期间自动续租
+        'lease_renewal_interval': None # 续租间隔（秒），None 表示 lock_timeout / 3
     }
 
 
@@ -313,6 +327,46 @@ def _validate_gpu_lock_config(config: Dict[str, Any]) -> Dict[str, Any]:
             logger.warning(f"fallback_timeout 值 '{fallback_timeout}' 不合法，使用默认值 30")
             validated_config['fallback_timeout'] = 30
 
+    # 验证排队配置
+    if 'use_queue' in validated_config and not isinstance(validated_config['use_queue'], bool):
+        logger.warning(f"use_queue 值 '{validated_config['use_queue']}' 不合法，使用默认值 False")
+        validated_config['use_queue'] = False
+
+    if 'default_priority' in validated_config:
+        default_priority = validated_config['default_priority']
+        if not isinstance(default_priority, int) or not 0 <= default_priority <= 9:
+            logger.warning(f"default_priority 值 '{default_priority}' 不合法，使用默认值 5")
+            validated_config['default_priority'] = 5
+
+    if 'priority_classes' in validated_config and not isinstance(validated_config['priority_classes'], dict):
+        logger.warning(f"priority_classes 值 '{validated_config['priority_classes']}' 不合法，使用空配置")
+        validated_config['priority_classes'] = {}
+
+    if 'queue_refresh_interval' in validated_config:
+        refresh_interval = validated_config['queue_refresh_interval']
+        if not isinstance(refresh_interval, (int, float)) or refresh_interval <= 0:
+            logger.warning(f"queue_refresh_interval 值 '{refresh_interval}' 不合法，使用默认值 5")
+            validated_config['queue_refresh_interval'] = 5
+
+    if 'queue_waiter_ttl' in validated_config:
+        waiter_ttl = validated_config['queue_waiter_ttl']
+        min_ttl = validated_config.get('queue_refresh_interval', 5) * 2
+        if not isinstance(waiter_ttl, (int, float)) or waiter_ttl < min_ttl:
+            logger.warning(f"queue_waiter_ttl 值 '{waiter_ttl}' 过小，至少为续期间隔的两倍: {min_ttl}")
+            validated_config['queue_waiter_ttl'] = max(30, min_ttl)
+
+    # 验证续租配置
+    if 'lease_renewal' in validated_config and not isinstance(validated_config['lease_renewal'], bool):
+        logger.warning(f"lease_renewal 值 '{validated_config['lease_renewal']}' 不合法，使用默认值 True")
+        validated_config['lease_renewal'] = True
+
+    lease_interval = validated_config.get('lease_renewal_interval')
+    if lease_interval is not None:
+        lock_timeout = validated_config.get('lock_timeout', 600)
+        if not isinstance(lease_interval, (int, float)) or lease_interval <= 0 or lease_interval >= lock_timeout:
+            logger.warning(f"lease_renewal_interval 值 '{lease_interval}' 不合法，须大于0且小于 lock_timeout，改为自动计算")
+            validated_config['lease_renewal_interval'] = None
+
     return validated_config
 
 
@@ -4,8 +4,11 @@ import requests
 import time
 from minio import Minio
 from urllib.parse import urlparse
+from services.common.local_artifacts import get_local_artifact_registry
 from services.common.logger import get_logger
+from services.common.metrics import track_transfer
 from services.common.minio_url_utils import is_minio_url, normalize_minio_url
+from services.common.task_cancellation import current_task_id
 
 logger = get_logger('file_service')
 
@@ -27,6 +30,7 @@ class UnifiedFileService:
         self.default_bucket = default_bucket
         self.max_retries = max_retries
 
+    @track_transfer("download")
     def download_file(self, file_url: str, local_path: str, retries: int = None) -> str:
         """
         下载文件到指定的本地路径
@@ -128,6 +132,36 @@ class UnifiedFileService:
             logger.info(f"文件已存在本地: {file_path}")
             return file_path
         
+        # MinIO对象优先复用任务内已有的本地副本，多个节点同时需要时只下载一次
+        object_ref = self._get_object_ref(file_path)
+        if object_ref:
+            bucket_name, object_name = object_ref
+            return get_local_artifact_registry().fetch(
+                current_task_id(), bucket_name, object_name,
+                download=lambda: self._download_with_retries(file_path, local_dir, retries),
+                etag_getter=lambda: self.minio_client.stat_object(bucket_name, object_name).etag,
+                local_dir=local_dir,
+            )
+        return self._download_with_retries(file_path, local_dir, retries)
+
+    def _get_object_ref(self, file_path: str):
+        """MinIO地址对应的 (bucket, object)，普通HTTP地址返回None"""
+        try:
+            if is_minio_url(file_path):
+                parsed_url = urlparse(normalize_minio_url(file_path))
+            elif not file_path.startswith(('http://', 'https://')):
+                parsed_url = urlparse(f"minio://{self.default_bucket}/{file_path}")
+            else:
+                return None
+        except ValueError:
+            return None
+        object_name = parsed_url.path.lstrip('/')
+        if not parsed_url.netloc or not object_name:
+            return None
+        return parsed_url.netloc, object_name
+
+    def _download_with_retries(self, file_path: str, local_dir: str, retries: int) -> str:
+        """按地址类型下载远程文件（带重试机制）"""
         # 尝试下载文件，带重试机制
         last_error = None
         for attempt in range(retries):
@@ -190,6 +224,7 @@ class UnifiedFileService:
         # 所有重试都失败
         raise FileNotFoundError(f"文件下载失败: {file_path}, 最后错误: {last_error}")
 
+    @track_transfer("download")
     def _download_http_file(self, url: str, local_dir: str) -> str:
         """下载HTTP文件"""
         os.makedirs(local_dir, exist_ok=True)
@@ -206,6 +241,7 @@ class UnifiedFileService:
         logger.info(f"HTTP文件下载成功: {url} -> {local_file_path}")
         return local_file_path
 
+    @track_transfer("download")
     def _download_minio_file(self, minio_url: str, local_dir: str) -> str:
         """
         下载MinIO文件.
@@ -224,6 +260,7 @@ class UnifiedFileService:
         logger.info(f"MinIO文件下载成功: {minio_url} -> {local_file_path}")
         return local_file_path
 
+    @track_transfer("upload")
     def upload_to_minio(self, local_file_path: str, object_name: str, bucket_name: str = None) -> str:
         """
         上传文件到MinIO
@@ -247,7 +284,11 @@ class UnifiedFileService:
         
         # logger.info(f"开始上传文件到MinIO: {local_file_path} -> {bucket_name}/{object_name}")
         
-        self.minio_client.fput_object(bucket_name, object_name, local_file_path)
+        result = self.minio_client.fput_object(bucket_name, object_name, local_file_path)
+        # 登记本地副本，同一任务的下游节点可直接使用
+        get_local_artifact_registry().record(
+            current_task_id(), bucket_name, object_name, local_file_path, getattr(result, 'etag', None)
+        )
         
         # 构建MinIO URL - 使用保存的主机和端口信息
         minio_endpoint = f"{self.minio_host}:{self.minio_port}"
@@ -0,0 +1,259 @@
+# services/common/local_artifacts.py
+# -*- coding: utf-8 -*-
+
+"""
+任务内本地产物登记。
+
+同一任务的节点共享 /share/workflows/{task_id}，上游节点的输出在上传 MinIO 后仍留在本地，
+下游节点拿到的却是 MinIO URL，每个节点都会重新下载一份。本模块在状态库中按任务登记
+"MinIO 对象 -> 本地副本"：
+
+- 上传或下载完成时登记本地路径、大小、修改时间与对象 ETag
+- 解析 MinIO URL 时，本地副本仍存在、大小与修改时间未变、且对象 ETag 一致才直接复用
+- 多个节点同时需要同一对象时，只有拿到下载锁的节点下载，其余节点等待其登记后复用
+- 复用的副本以硬链接（跨文件系统时复制）放到调用方的下载目录，各节点清理自己的目录互不影响
+
+登记表 local_artifact:{task_id}（Hash，字段为 bucket/object），保留时间与节点状态一致。
+Redis 不可用或没有当前任务时退化为普通下载。
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Callable, Optional
+
+from services.common.logger import get_logger
+
+logger = get_logger('local_artifacts')
+
+ARTIFACT_KEY_PREFIX = "local_artifact"
+ARTIFACT_LOCK_PREFIX = "local_artifact_lock"
+# 与节点状态保留时间一致
+ARTIFACT_TTL_SECONDS = 24 * 60 * 60
+
+
+def _redis():
+    # 延迟导入：state_manager 导入时会连接 Redis
+    from services.common import state_manager
+    return state_manager.redis_client
+
+
+class LocalArtifactRegistry:
+    """任务内 MinIO 对象的本地副本登记表"""
+
+    def __init__(self, redis_client=None, enabled: bool = True, verify_etag: bool = True,
+                 wait_timeout: float = 600.0, poll_interval: float = 0.5, lock_ttl: int = 1800):
+        """
+        Args:
+            redis_client: 状态库客户端，默认使用 state_manager.redis_client
+            enabled: 关闭时 fetch 直接下载、record 不登记
+            verify_etag: 复用前是否比对对象当前 ETag（一次 HEAD 请求）
+            wait_timeout: 等待其他节点下载同一对象的最长时间（秒），超时后自行下载
+            poll_interval: 等待期间检查登记表的间隔（秒）
+            lock_ttl: 下载锁过期时间（秒），持锁节点异常退出后由过期释放
+        """
+        self._redis_client = redis_client
+        self.enabled = enabled
+        self.verify_etag = verify_etag
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.lock_ttl = lock_ttl
+
+    @property
+    def redis_client(self):
+        return self._redis_client if self._redis_client is not None else _redis()
+
+    @staticmethod
+    def _key(task_id: str) -> str:
+        return f"{ARTIFACT_KEY_PREFIX}:{task_id}"
+
+    @staticmethod
+    def _field(bucket: str, object_name: str) -> str:
+        return f"{bucket}/{object_name}"
+
+    def record(self, task_id: Optional[str], bucket: str, object_name: str,
+               local_path: str, etag: Optional[str] = None) -> None:
+        """登记对象的本地副本，失败只记录日志"""
+        if not self.enabled or not task_id:
+            return
+        client = self.redis_client
+        if client is None:
+            return
+        try:
+            stat = os.stat(local_path)
+            entry = {
+                "path": os.path.abspath(local_path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "etag": etag,
+            }
+            key = self._key(task_id)
+            client.hset(key, self._field(bucket, object_name), json.dumps(entry))
+            client.expire(key, ARTIFACT_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"登记本地副本失败: {bucket}/{object_name}, 错误: {e}")
+
+    def lookup(self, task_id: Optional[str], bucket: str, object_name: str,
+               etag: Optional[str] = None) -> Optional[str]:
+        """
+        查找可复用的本地副本
+
+        Args:
+            etag: 对象当前 ETag，提供时与登记值比对
+
+        Returns:
+            Optional[str]: 校验通过的本地路径，否则 None（校验失败的登记会被删除）
+        """
+        if not self.enabled or not task_id:
+            return None
+        client = self.redis_client
+        if client is None:
+            return None
+        field = self._field(bucket, object_name)
+        try:
+            raw = client.hget(self._key(task_id), field)
+            if not raw:
+                return None
+            entry = json.loads(raw)
+            path = entry.get("path")
+            try:
+                stat = os.stat(path)
+            except (OSError, TypeError):
+                stat = None
+            valid = (
+                stat is not None
+                and stat.st_size == entry.get("size")
+                and stat.st_mtime_ns == entry.get("mtime_ns")
+                and not (etag and entry.get("etag") and _strip_etag(etag) != _strip_etag(entry["etag"]))
+            )
+            if not valid:
+                client.hdel(self._key(task_id), field)
+                logger.info(f"本地副本已失效，重新下载: {field}")
+                return None
+            return path
+        except Exception as e:
+            logger.warning(f"查询本地副本失败: {field}, 错误: {e}")
+            return None
+
+    def fetch(self, task_id: Optional[str], bucket: str, object_name: str,
+              download: Callable[[], str], etag_getter: Optional[Callable[[], Optional[str]]] = None,
+              local_dir: Optional[str] = None) -> str:
+        """
+        获取对象的本地路径：优先复用已登记的副本，同一对象在任务内只下载一次
+
+        Args:
+            download: 实际下载函数，返回本地路径
+            etag_getter: 读取对象当前 ETag 的函数
+            local_dir: 调用方的下载目录，复用的副本放到该目录下
+
+        Returns:
+            str: 本地路径
+        """
+        if not self.enabled or not task_id:
+            return download()
+        client = self.redis_client
+        if client is None:
+            return download()
+
+        etag = None
+        if self.verify_etag and etag_getter is not None:
+            try:
+                etag = etag_getter()
+            except Exception as e:
+                # 对象不可访问时交给下载流程报告错误
+                logger.debug(f"读取对象ETag失败: {bucket}/{object_name}, 错误: {e}")
+
+        field = self._field(bucket, object_name)
+        path = self.lookup(task_id, bucket, object_name, etag)
+        if path:
+            logger.info(f"复用任务内本地副本: {field} -> {path}")
+            return _place_in_dir(path, local_dir)
+
+        lock_key = f"{ARTIFACT_LOCK_PREFIX}:{task_id}:{field}"
+        token = uuid.uuid4().hex
+        deadline = time.time() + self.wait_timeout
+        while True:
+            try:
+                acquired = client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+            except Exception as e:
+                logger.warning(f"获取下载锁失败，直接下载: {field}, 错误: {e}")
+                return download()
+
+            if acquired:
+                try:
+                    # 等锁期间其他节点可能已完成下载
+                    path = self.lookup(task_id, bucket, object_name, etag)
+                    if path:
+                        return _place_in_dir(path, local_dir)
+                    path = download()
+                    self.record(task_id, bucket, object_name, path, etag)
+                    return path
+                finally:
+                    self._release(lock_key, token)
+
+            # 其他节点正在下载同一对象，等待其登记
+            while time.time() < deadline and client.exists(lock_key):
+                time.sleep(self.poll_interval)
+            path = self.lookup(task_id, bucket, object_name, etag)
+            if path:
+                logger.info(f"复用其他节点下载的副本: {field} -> {path}")
+                return _place_in_dir(path, local_dir)
+            if time.time() >= deadline:
+                logger.warning(f"等待其他节点下载超时，自行下载: {field}")
+                return download()
+
+    def _release(self, lock_key: str, token: str) -> None:
+        try:
+            client = self.redis_client
+            current = client.get(lock_key)
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+                client.delete(lock_key)
+        except Exception as e:
+            logger.warning(f"释放下载锁失败: {lock_key}, 错误: {e}")
+
+
+def _strip_etag(etag: str) -> str:
+    return str(etag).strip('"')
+
+
+def _place_in_dir(path: str, local_dir: Optional[str]) -> str:
+    """把副本放到 local_dir 下（硬链接，失败时复制），已在该目录下则原样返回"""
+    if not local_dir:
+        return path
+    local_dir = os.path.abspath(local_dir)
+    if os.path.dirname(os.path.abspath(path)) == local_dir:
+        return path
+    os.makedirs(local_dir, exist_ok=True)
+    target = os.path.join(local_dir, os.path.basename(path))
+    if os.path.exists(target) and os.path.samefile(path, target):
+        return target
+    temp_path = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        os.link(path, temp_path)
+    except OSError:
+        shutil.copy2(path, temp_path)
+    os.replace(temp_path, target)
+    return target
+
+
+# 单例模式
+_registry_instance: Optional[LocalArtifactRegistry] = None
+
+
+def get_local_artifact_registry() -> LocalArtifactRegistry:
+    """获取本地产物登记表实例（config.yml local_artifacts）"""
+    global _registry_instance
+    if _registry_instance is None:
+        try:
+            from services.common.config_loader import get_config
+            config = (get_config() or {}).get('local_artifacts', {}) or {}
+        except Exception:
+            config = {}
+        _registry_instance = LocalArtifactRegistry(
+            enabled=config.get('enabled', True),
+            verify_etag=config.get('verify_etag', True),
+            wait_timeout=float(config.get('wait_timeout', 600)),
+        )
+    return _registry_instance
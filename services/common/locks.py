@@ -3,7 +3,8 @@
 
 """
 GPU锁架构V3：智能锁机制
-结合V1和V2的优点，支持动态调整策略和指数退避轮询
+结合V1和V2的优点，支持动态调整策略和指数退避轮询；
+可选公平排队模式（FIFO + 优先级），释放时直接交接给队首等待者
 """
 
 import os
@@ -13,6 +14,7 @@ import time
 import threading
 import random
 import json
+import uuid
 from typing import Dict, Any, Optional, List, Callable
 from enum import Enum
 
@@ -21,6 +23,8 @@ from redis import Redis
 # 导入配置加载器以支持运行时配置
 from services.common.config_loader import get_gpu_lock_config, get_redis_config
 from services.common.logger import get_logger
+from services.common.metrics import GPU_LOCK_HOLD, GPU_LOCK_WAIT, node_label, outcome_of
+from services.common.task_cancellation import raise_if_cancelled
 
 logger = get_logger('locks')
 
@@ -45,6 +49,7 @@ class LockMechanism(Enum):
     POLLING = "polling"  # 轮询机制
     EVENT_DRIVEN = "event_driven"  # 事件驱动
     HYBRID = "hybrid"  # 混合机制
+    QUEUED = "queued"  # 公平排队（FIFO + 优先级）
 
 # --- Lua 脚本定义 ---
 # 原子释放锁脚本 - 确保只有锁的持有者才能释放锁
@@ -57,6 +62,124 @@ else
 end
 """
 
+# 续租脚本 - 仅当锁仍由自己持有时延长过期时间，并刷新租约标记
+RENEW_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    redis.call("expire", KEYS[1], ARGV[2])
+    redis.call("set", KEYS[2], ARGV[3], "EX", ARGV[4])
+    return 1
+else
+    return 0
+end
+"""
+
+# --- 排队锁 Lua 脚本 ---
+# 等待队列为有序集合，score = 优先级 * 1e12 + 到达序号（越小越先获得锁），
+# 元数据哈希保存 "锁超时|锁值"，存活有序集合保存等待者的存活截止时间（等待者定期续期，崩溃后自动剔除）。
+# 锁空闲时由 grant_next 原子地把锁直接设置为队首等待者的锁值，并向其专属列表推送授权通知，
+# 等待者阻塞在 BLPOP 上，释放与交接之间没有轮询间隙。
+QUEUE_GRANT_LUA = """
+local function grant_next(lock_key, queue_key, meta_key, alive_key, grant_prefix, now)
+    if redis.call("exists", lock_key) == 1 then
+        return false
+    end
+    while true do
+        local head = redis.call("zrange", queue_key, 0, 0)[1]
+        if not head then
+            return false
+        end
+        local meta = redis.call("hget", meta_key, head)
+        local deadline = tonumber(redis.call("zscore", alive_key, head))
+        redis.call("zrem", queue_key, head)
+        redis.call("hdel", meta_key, head)
+        redis.call("zrem", alive_key, head)
+        if meta and deadline and deadline >= now then
+            local sep = string.find(meta, "|", 1, true)
+            local lock_timeout = tonumber(string.sub(meta, 1, sep - 1))
+            local lock_value = string.sub(meta, sep + 1)
+            redis.call("set", lock_key, lock_value, "EX", lock_timeout)
+            local grant_key = grant_prefix .. head
+            redis.call("rpush", grant_key, lock_value)
+            redis.call("expire", grant_key, lock_timeout)
+            return head
+        end
+    end
+end
+"""
+
+# 入队: KEYS = lock, queue, meta, alive, seq, grant
+#       ARGV = ticket, lock_value, priority, now, lock_timeout, waiter_ttl, grant_prefix
+# 返回 1 表示入队后立即获得锁
+ENQUEUE_WAITER_SCRIPT = QUEUE_GRANT_LUA + """
+local seq = redis.call("incr", KEYS[5])
+redis.call("zadd", KEYS[2], tonumber(ARGV[3]) * 1000000000000 + seq, ARGV[1])
+redis.call("hset", KEYS[3], ARGV[1], ARGV[5] .. "|" .. ARGV[2])
+redis.call("zadd", KEYS[4], tonumber(ARGV[4]) + tonumber(ARGV[6]), ARGV[1])
+if grant_next(KEYS[1], KEYS[2], KEYS[3], KEYS[4], ARGV[7], tonumber(ARGV[4])) == ARGV[1] then
+    redis.call("del", KEYS[6])
+    return 1
+end
+return 0
+"""
+
+# 续期: KEYS = lock, queue, meta, alive
+#       ARGV = ticket, now, waiter_ttl, grant_prefix
+# 同时兜底处理锁因超时或强制删除而空闲、未经交接的情况；返回 1 表示仍在排队
+REFRESH_WAITER_SCRIPT = QUEUE_GRANT_LUA + """
+if redis.call("zscore", KEYS[2], ARGV[1]) then
+    redis.call("zadd", KEYS[4], "XX", tonumber(ARGV[2]) + tonumber(ARGV[3]), ARGV[1])
+end
+grant_next(KEYS[1], KEYS[2], KEYS[3], KEYS[4], ARGV[4], tonumber(ARGV[2]))
+if redis.call("zscore", KEYS[2], ARGV[1]) then
+    return 1
+end
+return 0
+"""
+
+# 放弃排队: KEYS = queue, meta, alive, grant；ARGV = ticket
+# 返回 1 表示放弃前已被授予锁（调用方实际持有锁）
+CANCEL_WAITER_SCRIPT = """
+redis.call("zrem", KEYS[1], ARGV[1])
+redis.call("hdel", KEYS[2], ARGV[1])
+redis.call("zrem", KEYS[3], ARGV[1])
+if redis.call("lpop", KEYS[4]) then
+    return 1
+end
+return 0
+"""
+
+# 释放并交接: KEYS = lock, queue, meta, alive；ARGV = lock_value, now, grant_prefix
+RELEASE_AND_HANDOFF_SCRIPT = QUEUE_GRANT_LUA + """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    redis.call("del", KEYS[1])
+    grant_next(KEYS[1], KEYS[2], KEYS[3], KEYS[4], ARGV[3], tonumber(ARGV[2]))
+    return 1
+else
+    return 0
+end
+"""
+
+
+def _new_lock_value(task_name: str) -> str:
+    """
+    生成本次持锁的锁值
+
+    同名任务（例如多个实例共用同一个被装饰函数名）必须能区分各自的持有，
+    获取、续租、释放都以这个值校验所有权。
+    """
+    return f"locked_by_{task_name}:{uuid.uuid4().hex}"
+
+
+def _queue_keys(lock_key: str) -> Dict[str, str]:
+    """排队锁使用的 Redis 键"""
+    return {
+        'queue': f"{lock_key}:queue",
+        'meta': f"{lock_key}:queue:meta",
+        'alive': f"{lock_key}:queue:alive",
+        'seq': f"{lock_key}:queue:seq",
+        'grant_prefix': f"{lock_key}:grant:",
+    }
+
 # --- 全局Pub/Sub管理器 ---
 class PubSubManager:
     """Redis Pub/Sub管理器 - 提供事件驱动的锁释放通知"""
@@ -222,11 +345,14 @@ class SmartGpuLockManager:
             'total_execution_time': 0.0,
             'execution_count': 0,
             'event_driven_acquisitions': 0,  # 事件驱动获取次数
-            'polling_acquisitions': 0  # 轮询获取次数
+            'polling_acquisitions': 0,  # 轮询获取次数
+            'queued_acquisitions': 0,  # 排队获取次数
+            'lease_lost': 0  # 续租时发现锁已丢失的次数
         }
         self.lock_history = []  # 锁历史记录
         self.max_history_size = 100  # 最大历史记录数
         self.event_waiters = {}  # 等待锁释放的事件: lock_key -> threading.Event
+        self._held = threading.local()  # 当前线程持有的锁值: lock_key -> lock_value
         
         # 异常统计
         self.exception_stats = {
@@ -236,6 +362,20 @@ class SmartGpuLockManager:
             "ownership_violations": 0,
         }
 
+    def _remember_lock_value(self, lock_key: str, lock_value: str):
+        if not hasattr(self._held, 'values'):
+            self._held.values = {}
+        self._held.values[lock_key] = lock_value
+
+    def held_lock_value(self, lock_key: str) -> Optional[str]:
+        """
+        当前线程持有该锁时的锁值（续租与释放时用于校验所有权）
+
+        Returns:
+            Optional[str]: 当前线程未持有时返回 None
+        """
+        return getattr(self._held, 'values', {}).get(lock_key)
+
     def _acquire_lock_internal(self, task_name: str, lock_key: str, config: Dict[str, Any], start_time: float) -> bool:
         """
         内部锁获取逻辑
@@ -263,9 +403,18 @@ class SmartGpuLockManager:
         retry_count = 0
         current_wait_time = initial_poll_interval
 
-        mechanism = LockMechanism.EVENT_DRIVEN if use_event_driven else LockMechanism.POLLING
+        use_queue = config.get('use_queue', False)  # 是否使用公平排队
+
+        if use_queue:
+            mechanism = LockMechanism.QUEUED
+        else:
+            mechanism = LockMechanism.EVENT_DRIVEN if use_event_driven else LockMechanism.POLLING
         logger.info(f"任务 {task_name} 开始获取锁 '{lock_key}' (机制: {mechanism.value}, 最大等待: {max_wait_time}秒)")
 
+        # 公平排队机制
+        if use_queue:
+            return self._acquire_lock_queued(task_name, lock_key, config, start_time)
+
         # 使用事件驱动机制
         if use_event_driven and pub_sub_manager.pub_sub:
             return self._acquire_lock_event_driven(task_name, lock_key, config, start_time)
@@ -359,6 +508,125 @@ class SmartGpuLockManager:
                 if lock_key in self.event_waiters:
                     del self.event_waiters[lock_key]
 
+    def _acquire_lock_queued(self, task_name: str, lock_key: str, config: Dict[str, Any], start_time: float) -> bool:
+        """
+        公平排队的锁获取逻辑
+
+        等待者按 (优先级, 到达顺序) 排队。锁释放时由释放脚本原子地交接给队首，
+        等待者阻塞在自己的授权列表上（BLPOP），无需轮询。
+        等待期间定期续期，崩溃的等待者会在存活期过后被跳过。
+
+        Args:
+            task_name: 任务名称
+            lock_key: 锁键
+            config: 配置（queue_priority/queue_waiter_ttl/queue_refresh_interval）
+            start_time: 开始时间
+
+        Returns:
+            bool: 是否成功获取锁
+        """
+        max_wait_time = config.get('max_wait_time', 6000)
+        lock_timeout = int(config.get('lock_timeout', 9000))
+        priority = max(0, min(9, int(config.get('queue_priority', 5))))
+        waiter_ttl = config.get('queue_waiter_ttl', 30)
+        refresh_interval = config.get('queue_refresh_interval', 5)
+
+        keys = _queue_keys(lock_key)
+        ticket = f"{task_name}:{uuid.uuid4().hex}"
+        lock_value = _new_lock_value(task_name)
+        grant_key = f"{keys['grant_prefix']}{ticket}"
+
+        def enqueue() -> bool:
+            return redis_client.eval(
+                ENQUEUE_WAITER_SCRIPT, 6,
+                lock_key, keys['queue'], keys['meta'], keys['alive'], keys['seq'], grant_key,
+                ticket, lock_value, priority, time.time(), lock_timeout, waiter_ttl, keys['grant_prefix']
+            ) == 1
+
+        def on_acquired(how: str) -> bool:
+            self._remember_lock_value(lock_key, lock_value)
+            self.lock_stats['successful_acquisitions'] += 1
+            self.lock_stats['queued_acquisitions'] += 1
+            self.lock_stats['last_lock_time'] = time.time()
+            self.lock_stats['last_lock_holder'] = task_name
+            wait_duration = time.time() - start_time
+            logger.info(f"任务 {task_name} 通过排队{how}获取锁 '{lock_key}' (优先级: {priority}, 等待时间: {wait_duration:.2f}秒)")
+            return True
+
+        try:
+            self.lock_stats['total_attempts'] += 1
+            if enqueue():
+                return on_acquired("立即")
+
+            while True:
+                remaining = max_wait_time - (time.time() - start_time)
+                if remaining <= 0:
+                    break
+
+                if redis_client.blpop(grant_key, timeout=max(0.1, min(remaining, refresh_interval))):
+                    return on_acquired("交接")
+
+                still_queued = redis_client.eval(
+                    REFRESH_WAITER_SCRIPT, 4,
+                    lock_key, keys['queue'], keys['meta'], keys['alive'],
+                    ticket, time.time(), waiter_ttl, keys['grant_prefix']
+                )
+                if not still_queued and redis_client.llen(grant_key) == 0:
+                    # 续期不及时被视为失效而移出队列，重新排队
+                    logger.warning(f"任务 {task_name} 的排队凭证已失效，重新排队")
+                    self.lock_stats['total_attempts'] += 1
+                    if enqueue():
+                        return on_acquired("立即")
+
+            # 超时放弃排队；若放弃前恰好被授予锁则视为获取成功
+            if redis_client.eval(
+                CANCEL_WAITER_SCRIPT, 4,
+                keys['queue'], keys['meta'], keys['alive'], grant_key, ticket
+            ) == 1:
+                return on_acquired("交接")
+        except Exception as e:
+            logger.error(f"任务 {task_name} 排队获取锁时发生异常: {e}")
+            try:
+                if redis_client.eval(
+                    CANCEL_WAITER_SCRIPT, 4,
+                    keys['queue'], keys['meta'], keys['alive'], grant_key, ticket
+                ) == 1:
+                    # 已被授予但本地出错，释放锁交给下一个等待者
+                    self.release_lock(task_name, lock_key, "error", lock_value=lock_value)
+            except Exception:
+                pass
+            return False
+
+        self.lock_stats['timeouts'] += 1
+        wait_duration = time.time() - start_time
+        logger.error(f"任务 {task_name} 排队获取锁 '{lock_key}' 超时 (等待时间: {wait_duration:.2f}秒)")
+        return False
+
+    def get_queue_status(self, lock_key: str) -> Dict[str, Any]:
+        """
+        获取排队锁的等待队列状态
+
+        Args:
+            lock_key: 锁键
+
+        Returns:
+            Dict[str, Any]: 队列深度与按顺序排列的等待者
+        """
+        if not redis_client:
+            return {'depth': 0, 'waiters': []}
+
+        keys = _queue_keys(lock_key)
+        entries = redis_client.zrange(keys['queue'], 0, -1, withscores=True)
+        waiters = [
+            {
+                'ticket': ticket,
+                'task_name': ticket.rsplit(':', 1)[0],
+                'priority': int(score // 1000000000000),
+            }
+            for ticket, score in entries
+        ]
+        return {'depth': len(waiters), 'waiters': waiters}
+
     def _acquire_lock_polling(self, task_name: str, lock_key: str, config: Dict[str, Any], start_time: float) -> bool:
         """
         轮询机制的锁获取逻辑
@@ -426,11 +694,12 @@ class SmartGpuLockManager:
             bool: 是否成功获取锁
         """
         try:
-            lock_value = redis_client.get(lock_key)
-            if not lock_value:
+            current_value = redis_client.get(lock_key)
+            if not current_value:
                 # 尝试获取锁
-                lock_value = f"locked_by_{task_name}"
+                lock_value = _new_lock_value(task_name)
                 if redis_client.set(lock_key, lock_value, nx=True, ex=lock_timeout):
+                    self._remember_lock_value(lock_key, lock_value)
                     self.lock_stats['successful_acquisitions'] += 1
                     self.lock_stats['last_lock_time'] = time.time()
                     self.lock_stats['last_lock_holder'] = task_name
@@ -465,7 +734,8 @@ class SmartGpuLockManager:
         if len(self.lock_history) > self.max_history_size:
             self.lock_history.pop(0)
 
-    def release_lock(self, task_name: str, lock_key: str, release_reason: str = "normal") -> bool:
+    def release_lock(self, task_name: str, lock_key: str, release_reason: str = "normal",
+                     lock_value: Optional[str] = None) -> bool:
         """
         释放锁
 
@@ -473,6 +743,7 @@ class SmartGpuLockManager:
             task_name: 任务名称
             lock_key: 锁键
             release_reason: 释放原因 (normal/timeout/forced)
+            lock_value: 获取锁时的锁值，None 表示使用当前线程获取到的锁值
 
         Returns:
             bool: 是否成功释放
@@ -481,9 +752,22 @@ class SmartGpuLockManager:
             return False
 
         try:
-            # 使用 Lua 脚本保证原子性
-            lock_value = f"locked_by_{task_name}"
-            result = redis_client.eval(RELEASE_LOCK_SCRIPT, 1, lock_key, lock_value)
+            # 使用 Lua 脚本保证原子性，释放后立即把锁交接给排队队首（无排队者时等同于普通释放）
+            if lock_value is None:
+                lock_value = self.held_lock_value(lock_key)
+            if lock_value is None:
+                logger.warning(f"任务 {task_name} 未持有锁 '{lock_key}'，无法释放")
+                self.exception_stats["ownership_violations"] += 1
+                return False
+            keys = _queue_keys(lock_key)
+            result = redis_client.eval(
+                RELEASE_AND_HANDOFF_SCRIPT, 4,
+                lock_key, keys['queue'], keys['meta'], keys['alive'],
+                lock_value, time.time(), keys['grant_prefix']
+            )
+
+            if self.held_lock_value(lock_key) == lock_value:
+                del self._held.values[lock_key]
 
             if result == 1:
                 logger.info(f"任务 {task_name} 释放锁 '{lock_key}' (原因: {release_reason})")
@@ -651,6 +935,112 @@ class SmartGpuLockManager:
         return success
 
 
+class LockLeaseWatchdog:
+    """
+    锁租约看门狗
+
+    持锁期间在后台线程中定期续租，使 lock_timeout 可以设置得较短（持有者崩溃后尽快过期），
+    又不会让仍在运行的长任务丢锁。每次续租同时刷新 "{lock_key}:lease" 标记，
+    监控器据此判断持有者仍然存活，不做强制释放。
+    """
+
+    def __init__(self, task_name: str, lock_key: str, lock_timeout: int, interval: Optional[float] = None,
+                 lock_value: Optional[str] = None):
+        """
+        Args:
+            task_name: 任务名称
+            lock_key: 锁键
+            lock_timeout: 每次续租后的锁超时时间（秒）
+            interval: 续租间隔（秒），None 表示 lock_timeout 的三分之一
+            lock_value: 获取锁时的锁值，None 表示当前线程通过 lock_manager 获取到的锁值
+        """
+        self.task_name = task_name
+        self.lock_key = lock_key
+        self.lock_value = lock_value or lock_manager.held_lock_value(lock_key)
+        if not self.lock_value:
+            raise ValueError(f"任务 {task_name} 未持有锁 '{lock_key}'，无法续租")
+        self.lease_key = f"{lock_key}:lease"
+        self.lock_timeout = int(lock_timeout)
+        self.interval = interval if interval else max(1.0, self.lock_timeout / 3)
+        self.renewals = 0
+        self.lost = False
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def renew(self) -> bool:
+        """
+        续租一次
+
+        Returns:
+            bool: 锁仍由自己持有并已续租返回True
+        """
+        # 租约标记的有效期覆盖两个续租周期，看门狗停止后很快失效
+        lease_ttl = max(1, int(self.interval * 2))
+        result = redis_client.eval(
+            RENEW_LOCK_SCRIPT, 2,
+            self.lock_key, self.lease_key,
+            self.lock_value, self.lock_timeout, self.task_name, lease_ttl
+        )
+        if result == 1:
+            self.renewals += 1
+            return True
+        return False
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.renew():
+                    self.lost = True
+                    lock_manager.lock_stats['lease_lost'] += 1
+                    logger.error(f"任务 {self.task_name} 的锁 '{self.lock_key}' 已不再由其持有，停止续租")
+                    return
+                logger.debug(f"任务 {self.task_name} 续租锁 '{self.lock_key}' ({self.lock_timeout}秒)")
+            except Exception as e:
+                # 瞬时 Redis 故障不终止看门狗，下个周期重试
+                logger.warning(f"任务 {self.task_name} 续租锁 '{self.lock_key}' 失败: {e}")
+
+    def start(self) -> "LockLeaseWatchdog":
+        """启动看门狗线程，并立即写入一次租约标记"""
+        try:
+            self.renew()
+        except Exception as e:
+            logger.warning(f"任务 {self.task_name} 初次续租锁 '{self.lock_key}' 失败: {e}")
+        self._thread = threading.Thread(
+            target=self._run, name=f"gpu-lock-lease-{self.task_name}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止续租并清除租约标记（应在释放锁之前调用）"""
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        try:
+            redis_client.delete(self.lease_key)
+        except Exception as e:
+            logger.warning(f"清除租约标记 '{self.lease_key}' 失败: {e}")
+
+
+def is_lock_lease_active(lock_key: str = "gpu_lock:0") -> bool:
+    """
+    检查锁持有者是否仍在续租
+
+    Args:
+        lock_key: 锁键
+
+    Returns:
+        bool: 存在未过期的租约标记返回True
+    """
+    if not redis_client:
+        return False
+    try:
+        return bool(redis_client.exists(f"{lock_key}:lease"))
+    except Exception as e:
+        logger.error(f"检查锁租约失败: {e}")
+        return False
+
+
 # 全局锁管理器实例
 lock_manager = SmartGpuLockManager()
 
@@ -660,7 +1050,8 @@ def gpu_lock(lock_key: str = "gpu_lock:0",
               poll_interval: int = None,
               max_wait_time: int = None,
               event_driven: bool = None,
-              fallback_timeout: int = None):
+              fallback_timeout: int = None,
+              priority: int = None):
     """
     GPU锁装饰器 - 事件驱动 + 智能轮询混合机制
 
@@ -677,6 +1068,7 @@ def gpu_lock(lock_key: str = "gpu_lock:0",
         max_wait_time: 最大等待时间
         event_driven: 是否使用事件驱动 (None表示使用配置文件设置)
         fallback_timeout: 事件驱动回退超时时间
+        priority: 排队模式下的优先级类别（0-9，越小越优先；None表示按 priority_classes/default_priority 配置）
     """
     def decorator(func):
         @functools.wraps(func)
@@ -709,6 +1101,12 @@ def gpu_lock(lock_key: str = "gpu_lock:0",
             actual_max_wait_time = max_wait_time if max_wait_time is not None else config.get('max_wait_time', 300)
             actual_event_driven = event_driven if event_driven is not None else config.get('use_event_driven', True)
             actual_fallback_timeout = fallback_timeout if fallback_timeout is not None else config.get('fallback_timeout', 30)
+            if priority is not None:
+                actual_priority = priority
+            else:
+                actual_priority = (config.get('priority_classes') or {}).get(
+                    task_name, config.get('default_priority', 5)
+                )
 
             # 构建锁配置
             lock_config = {
@@ -718,17 +1116,42 @@ def gpu_lock(lock_key: str = "gpu_lock:0",
                 'exponential_backoff': config.get('exponential_backoff', True),
                 'max_poll_interval': config.get('max_poll_interval', 5),
                 'use_event_driven': actual_event_driven,
-                'fallback_timeout': actual_fallback_timeout
+                'fallback_timeout': actual_fallback_timeout,
+                'use_queue': config.get('use_queue', False),
+                'queue_priority': actual_priority,
+                'queue_waiter_ttl': config.get('queue_waiter_ttl', 30),
+                'queue_refresh_interval': config.get('queue_refresh_interval', 5),
+                'lease_renewal': config.get('lease_renewal', True),
+                'lease_renewal_interval': config.get('lease_renewal_interval')
             }
 
             # 确定锁机制
-            mechanism = LockMechanism.EVENT_DRIVEN if actual_event_driven else LockMechanism.POLLING
+            if lock_config['use_queue']:
+                mechanism = LockMechanism.QUEUED
+            else:
+                mechanism = LockMechanism.EVENT_DRIVEN if actual_event_driven else LockMechanism.POLLING
             logger.info(f"任务 {task_name} 开始获取锁 '{lock_key}' (机制: {mechanism.value}, 超时: {actual_max_wait_time}秒)")
 
             # 使用混合机制获取锁
-            if lock_manager.acquire_lock_with_smart_polling(task_name, lock_key, lock_config):
+            wait_start_time = time.time()
+            acquired = lock_manager.acquire_lock_with_smart_polling(task_name, lock_key, lock_config)
+            GPU_LOCK_WAIT.labels(
+                node=node_label(task_name), outcome="success" if acquired else "timeout"
+            ).observe(time.time() - wait_start_time)
+            if acquired:
                 task_start_time = time.time()
+                task_error = None
+                lock_value = lock_manager.held_lock_value(lock_key)
+                # 持锁期间自动续租，避免长任务运行中锁过期
+                watchdog = None
+                if lock_config['lease_renewal']:
+                    watchdog = LockLeaseWatchdog(
+                        task_name, lock_key, actual_timeout, lock_config['lease_renewal_interval'], lock_value
+                    ).start()
                 try:
+                    # 排队等锁期间任务可能已被取消，直接放弃执行并释放锁
+                    raise_if_cancelled()
+
                     # 成功获取锁，执行任务
                     logger.info(f"任务 {task_name} 开始执行")
 
@@ -745,9 +1168,14 @@ def gpu_lock(lock_key: str = "gpu_lock:0",
 
                     return result
                 except Exception as e:
+                    task_error = e
                     logger.error(f"任务 {task_name} 执行失败: {e}")
                     raise
                 finally:
+                    GPU_LOCK_HOLD.labels(
+                        node=node_label(task_name), outcome=outcome_of(task_error)
+                    ).observe(time.time() - task_start_time)
+
                     # 第一层: GPU 显存清理
                     try:
                         from services.common.gpu_memory_manager import log_gpu_memory_state, force_cleanup_gpu_memory
@@ -757,16 +1185,22 @@ def gpu_lock(lock_key: str = "gpu_lock:0",
                     except Exception as cleanup_e:
                         logger.warning(f"任务 {task_name} GPU显存清理失败: {cleanup_e}")
 
+                    # 显存清理完成后停止续租，随后释放锁
+                    if watchdog:
+                        watchdog.stop()
+
                     # 第二层: 正常锁释放
                     lock_released = False
                     try:
-                        lock_released = lock_manager.release_lock(task_name, lock_key, "normal")
+                        lock_released = lock_manager.release_lock(task_name, lock_key, "normal", lock_value=lock_value)
                     except Exception as release_error:
                         logger.critical(f"正常释放锁失败: {release_error}", exc_info=True)
                         lock_manager.exception_stats["normal_release_failures"] += 1
 
-                    # 第三层: 应急强制释放
-                    if not lock_released:
+                    # 第三层: 应急强制释放（租约已丢失说明锁已属于其他任务，不能删除）
+                    if not lock_released and watchdog and watchdog.lost:
+                        logger.error(f"任务 {task_name} 运行期间锁 '{lock_key}' 已被他人持有，跳过应急释放")
+                    elif not lock_released:
                         try:
                             logger.warning(f"使用应急方式释放锁 {lock_key}")
                             redis_client.delete(lock_key)
@@ -835,7 +1269,8 @@ def get_gpu_lock_status(lock_key: str = "gpu_lock:0") -> Dict[str, Any]:
             "timestamp": time.time(),
             "health": health,
             "statistics": lock_manager.get_statistics(),
-            "recent_history": lock_manager.get_lock_history(limit=5)
+            "recent_history": lock_manager.get_lock_history(limit=5),
+            "queue": lock_manager.get_queue_status(lock_key)
         }
 
         # 添加锁的元信息
@@ -0,0 +1,235 @@
+# services/common/metrics.py
+# -*- coding: utf-8 -*-
+
+"""
+运行指标。
+
+记录节点执行、GPU 锁等待/持有、MinIO 传输、子进程执行与状态写入的耗时直方图和计数器，
+标签为节点名与结果（success/failed/timeout/cancelled）。
+
+- worker: worker_ready 时在主进程启动 HTTP 指标端口（config.yml metrics.worker_port，
+  与 prometheus_config 中的抓取目标一致）；Celery prefork 子进程通过
+  PROMETHEUS_MULTIPROC_DIR 多进程模式汇总
+- 网关: /metrics 端点
+
+prometheus_client 为可选依赖，未安装时所有记录操作为空操作。
+"""
+
+import functools
+import os
+import re
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from services.common.logger import get_logger
+from services.common.task_cancellation import TaskCancelledError
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+        multiprocess,
+        start_http_server,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = get_logger('metrics')
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+if PROMETHEUS_AVAILABLE and os.environ.get(MULTIPROC_DIR_ENV):
+    # 多进程模式下指标写入该目录，网关等非 Celery 进程不会经过 worker_init
+    os.makedirs(os.environ[MULTIPROC_DIR_ENV], exist_ok=True)
+
+# 覆盖毫秒级状态写入到小时级推理
+DURATION_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class _NoopMetric:
+    """prometheus_client 未安装时的占位指标"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+
+def _histogram(name: str, documentation: str, labelnames):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, buckets=DURATION_BUCKETS)
+
+
+def _counter(name: str, documentation: str, labelnames):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+STAGE_DURATION = _histogram('yivideo_stage_duration_seconds', '节点执行耗时', ['node', 'outcome'])
+STAGE_TOTAL = _counter('yivideo_stage_total', '节点执行次数', ['node', 'outcome'])
+GPU_LOCK_WAIT = _histogram('yivideo_gpu_lock_wait_seconds', 'GPU锁等待耗时', ['node', 'outcome'])
+GPU_LOCK_HOLD = _histogram('yivideo_gpu_lock_hold_seconds', 'GPU锁持有耗时', ['node', 'outcome'])
+FILE_TRANSFER_DURATION = _histogram('yivideo_file_transfer_seconds', 'MinIO文件传输耗时', ['direction', 'outcome'])
+FILE_TRANSFER_BYTES = _counter('yivideo_file_transfer_bytes_total', 'MinIO文件传输字节数', ['direction'])
+SUBPROCESS_DURATION = _histogram('yivideo_subprocess_duration_seconds', '子进程执行耗时', ['node', 'outcome'])
+STATE_WRITE_DURATION = _histogram('yivideo_state_write_seconds', '状态写入耗时', ['operation', 'outcome'])
+STORAGE_RECLAIMED_BYTES = _counter('yivideo_storage_reclaimed_bytes_total', '共享存储回收字节数', ['reason'])
+
+
+def outcome_of(error: Optional[BaseException]) -> str:
+    """异常对应的结果标签"""
+    if error is None:
+        return "success"
+    if isinstance(error, TaskCancelledError):
+        return "cancelled"
+    if isinstance(error, subprocess.TimeoutExpired):
+        return "timeout"
+    return "failed"
+
+
+def node_label(name: Optional[str]) -> str:
+    """规整节点标签，去掉分段序号等动态后缀，避免标签基数膨胀"""
+    if not name:
+        return "unknown"
+    return re.sub(r"[_\-.]?\d+$", "", name) or name
+
+
+@contextmanager
+def timed(histogram, counter=None, **labels):
+    """
+    记录代码块耗时，结果标签按是否抛出异常确定
+
+    Example:
+        with timed(STATE_WRITE_DURATION, operation="update"):
+            ...
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        outcome = outcome_of(error)
+        histogram.labels(outcome=outcome, **labels).observe(time.perf_counter() - started)
+        if counter is not None:
+            counter.labels(outcome=outcome, **labels).inc()
+
+
+def observe_stage(node: str, seconds: float, error: Optional[BaseException] = None) -> None:
+    """记录一次节点执行"""
+    outcome = outcome_of(error)
+    STAGE_DURATION.labels(node=node_label(node), outcome=outcome).observe(seconds)
+    STAGE_TOTAL.labels(node=node_label(node), outcome=outcome).inc()
+
+
+def track_transfer(direction: str):
+    """
+    记录文件传输耗时与字节数的装饰器
+
+    download 方向按返回的本地路径统计大小，upload 方向按第一个参数（本地文件路径）统计。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with timed(FILE_TRANSFER_DURATION, direction=direction):
+                result = func(self, *args, **kwargs)
+            local_path = result if direction == "download" else (args[0] if args else None)
+            try:
+                if isinstance(local_path, str) and os.path.isfile(local_path):
+                    FILE_TRANSFER_BYTES.labels(direction=direction).inc(os.path.getsize(local_path))
+            except OSError:
+                pass
+            return result
+        return wrapper
+    return decorator
+
+
+# ========================================
+# 指标导出
+# ========================================
+
+def _registry():
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """
+    生成 Prometheus 文本格式的指标
+
+    Returns:
+        Tuple[bytes, str]: (内容, Content-Type)
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client not installed\n", CONTENT_TYPE_LATEST
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> bool:
+    """在当前进程启动指标 HTTP 端口"""
+    if not PROMETHEUS_AVAILABLE:
+        logger.info("prometheus_client 未安装，跳过指标端口")
+        return False
+    try:
+        start_http_server(port, registry=_registry())
+        logger.info(f"指标端口已启动: :{port}/metrics")
+        return True
+    except OSError as e:
+        logger.warning(f"指标端口启动失败: {port}, 错误: {e}")
+        return False
+
+
+def _get_metrics_config() -> dict:
+    try:
+        from services.common.config_loader import get_config
+        return (get_config() or {}).get('metrics', {}) or {}
+    except Exception:
+        return {}
+
+
+# ========================================
+# Celery 信号：worker 指标端口与多进程文件
+# ========================================
+try:
+    from celery.signals import worker_init, worker_process_shutdown, worker_ready
+
+    @worker_init.connect(weak=False)
+    def _reset_multiproc_dir(**_):
+        # 主进程启动时清理上次运行遗留的指标文件
+        multiproc_dir = os.environ.get(MULTIPROC_DIR_ENV)
+        if PROMETHEUS_AVAILABLE and multiproc_dir:
+            shutil.rmtree(multiproc_dir, ignore_errors=True)
+            os.makedirs(multiproc_dir, exist_ok=True)
+
+    @worker_ready.connect(weak=False)
+    def _start_worker_metrics_server(**_):
+        config = _get_metrics_config()
+        if config.get('enabled', True):
+            start_metrics_server(int(config.get('worker_port', 8080)))
+
+    @worker_process_shutdown.connect(weak=False)
+    def _mark_process_dead(pid=None, **_):
+        if PROMETHEUS_AVAILABLE and os.environ.get(MULTIPROC_DIR_ENV):
+            multiprocess.mark_process_dead(pid or os.getpid())
+except ImportError:
+    pass
@@ -106,6 +106,9 @@ class ProgressBar:
         
         # [FIX] 输出进度条到 stderr
         print(progress_info, end='', flush=True, file=sys.stderr)
+
+        # 推送进度事件（仅在任务上下文中）
+        self._publish_event(percent)
         
         # 如果完成，换行
         if self.current >= self.total:
@@ -114,6 +117,27 @@ class ProgressBar:
             # [FIX] 输出完成信息到 stderr
             print(f"\n✅ {self.task_name}完成: {self.current}项，耗时: {self._format_time(elapsed)}，平均速率: {final_rate:.1f}/s", file=sys.stderr)
     
+    def _publish_event(self, percent: int):
+        """向任务事件频道推送当前进度"""
+        from services.common.task_cancellation import current_task_id
+        task_id = current_task_id()
+        if not task_id:
+            return
+        from services.common.task_events import publish_task_event
+
+        elapsed = time.time() - self.start_time
+        rate = self.current / elapsed if elapsed > 0 else 0
+        eta = (self.total - self.current) / rate if rate > 0 and self.current < self.total else 0
+        publish_task_event(task_id, "progress", {
+            "name": self.task_name,
+            "current": self.current,
+            "total": self.total,
+            "percent": percent,
+            "rate": round(rate, 2),
+            "eta": round(eta, 1),
+            "extras": dict(self.extras),
+        })
+
     def _format_time(self, seconds: float) -> str:
         """格式化时间显示"""
         if seconds < 60:
@@ -0,0 +1,427 @@
+# services/common/resident_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+常驻推理进程
+
+为每次任务都启动新推理子进程的服务提供长驻进程：模型在进程内按键缓存，
+后续任务直接复用，只在第一次使用时付出导入与加载的代价。
+
+- 通信: multiprocessing.connection 的 AF_UNIX 本地通道（带 authkey），不经过 stdout，
+  推理库的打印输出不会污染结果
+- 进程: 通过 subprocess 启动（python -m services.common.resident_worker），
+  不受 Celery prefork 子进程 "daemonic processes are not allowed to have children" 的限制
+- 空闲: 服务端每个空闲周期调用处理器的 on_idle() 淘汰长时间未用的模型；
+  进程整体空闲超过 process_idle_timeout 后自行退出，释放显存
+- 崩溃: 任务执行中进程崩溃时重启并重试一次；restart_window 内重启超过 max_restarts 次后
+  暂停使用常驻进程，调用方可回退到一次性子进程模式
+
+服务端目标为 "包.模块:工厂函数"，工厂接收 options 字典并返回处理器对象，处理器需实现
+handle(payload) -> result，可选实现 on_idle()。
+"""
+
+import collections
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from services.common.logger import get_logger
+from services.common.task_cancellation import (
+    CANCEL_POLL_INTERVAL,
+    TaskCancelledError,
+    current_task_id,
+    is_cancel_requested,
+)
+
+logger = get_logger('resident_worker')
+
+# 服务端进程参数通过环境变量传递
+ENV_ADDRESS = "RESIDENT_WORKER_ADDRESS"
+ENV_AUTHKEY = "RESIDENT_WORKER_AUTHKEY"
+ENV_TARGET = "RESIDENT_WORKER_TARGET"
+ENV_OPTIONS = "RESIDENT_WORKER_OPTIONS"
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class ResidentWorkerError(RuntimeError):
+    """常驻进程不可用（启动失败、崩溃或超时）"""
+
+
+class ResidentJobError(RuntimeError):
+    """任务在常驻进程内执行失败，进程本身仍可用"""
+
+    def __init__(self, message: str, error_type: str = "", remote_traceback: str = ""):
+        super().__init__(message)
+        self.error_type = error_type
+        self.remote_traceback = remote_traceback
+
+
+def release_gpu_memory():
+    """回收 Python 对象并释放 PyTorch 缓存的显存（未安装 torch 时只做垃圾回收）"""
+    import gc
+
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class ModelCache:
+    """按键缓存已加载的模型，LRU 容量限制 + 空闲淘汰"""
+
+    def __init__(self, loader: Callable[[Hashable], Any], max_models: int = 1,
+                 idle_ttl: Optional[float] = None,
+                 unloader: Optional[Callable[[Hashable, Any], None]] = None):
+        """
+        Args:
+            loader: 加载函数 key -> model
+            max_models: 同时驻留的模型数
+            idle_ttl: 模型空闲多久（秒）后淘汰，None 表示不按空闲淘汰
+            unloader: 淘汰时的清理回调 (key, model)
+        """
+        self.loader = loader
+        self.max_models = max(1, max_models)
+        self.idle_ttl = idle_ttl
+        self.unloader = unloader
+        self._entries: "collections.OrderedDict[Hashable, List[Any]]" = collections.OrderedDict()
+        self.stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+
+    def get(self, key: Hashable) -> Tuple[Any, bool]:
+        """
+        获取模型，未缓存时加载
+
+        Returns:
+            (model, 是否命中缓存)
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] = time.monotonic()
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0], True
+
+        # 先腾出位置再加载，避免新旧模型同时占用显存
+        while len(self._entries) >= self.max_models:
+            self._evict(next(iter(self._entries)))
+
+        model = self.loader(key)
+        self._entries[key] = [model, time.monotonic()]
+        self.stats['loads'] += 1
+        return model, False
+
+    def evict_idle(self, now: Optional[float] = None) -> List[Hashable]:
+        """淘汰空闲超过 idle_ttl 的模型"""
+        if self.idle_ttl is None:
+            return []
+        now = time.monotonic() if now is None else now
+        expired = [key for key, (_, last_used) in self._entries.items() if now - last_used >= self.idle_ttl]
+        for key in expired:
+            self._evict(key)
+        return expired
+
+    def clear(self):
+        """淘汰所有模型"""
+        for key in list(self._entries):
+            self._evict(key)
+
+    def keys(self) -> List[Hashable]:
+        return list(self._entries)
+
+    def _evict(self, key: Hashable):
+        model, _ = self._entries.pop(key)
+        self.stats['evictions'] += 1
+        logger.info(f"淘汰常驻模型: {key}")
+        if self.unloader:
+            try:
+                self.unloader(key, model)
+            except Exception as e:
+                logger.warning(f"模型清理失败: {key}, {e}")
+
+
+class ResidentWorkerClient:
+    """常驻进程客户端 - 负责启动、派发任务、崩溃重启"""
+
+    def __init__(self, name: str, target: str, options: Optional[Dict[str, Any]] = None,
+                 startup_timeout: float = 120, max_restarts: int = 3, restart_window: float = 600,
+                 env: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            name: 进程名称（用于日志与套接字文件名）
+            target: 服务端处理器工厂 "包.模块:函数"
+            options: 传给工厂的参数（需可 JSON 序列化）
+            startup_timeout: 等待服务端建立通道的时间（秒）
+            max_restarts: restart_window 内允许的崩溃重启次数
+            restart_window: 崩溃统计窗口（秒）
+            env: 额外的环境变量
+        """
+        self.name = name
+        self.target = target
+        self.options = options or {}
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.env = env or {}
+
+        self._process: Optional[subprocess.Popen] = None
+        self._conn = None
+        self._address: Optional[str] = None
+        self._lock = threading.Lock()
+        self._crashes: "collections.deque[float]" = collections.deque()
+        self._disabled_until = 0.0
+        self.stats = {'jobs': 0, 'starts': 0, 'crashes': 0}
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process else None
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def is_available(self) -> bool:
+        """是否允许使用常驻进程（未因频繁崩溃而暂停）"""
+        return time.monotonic() >= self._disabled_until
+
+    def submit(self, payload: Any, timeout: Optional[float] = None) -> Any:
+        """
+        派发任务并等待结果
+
+        Args:
+            payload: 任务参数（可 pickle）
+            timeout: 等待结果的时间（秒），超时后终止常驻进程
+
+        Returns:
+            处理器返回的结果
+
+        Raises:
+            ResidentJobError: 任务执行失败（进程仍可用）
+            ResidentWorkerError: 进程不可用、崩溃重试后仍失败或超时
+        """
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_started()
+                try:
+                    self._conn.send(('job', payload))
+                    if not self._wait_for_result(timeout):
+                        self._terminate()
+                        raise ResidentWorkerError(f"常驻进程 {self.name} 执行超时 ({timeout}秒)")
+                    status, data = self._conn.recv()
+                except (EOFError, OSError) as e:
+                    self._record_crash(e)
+                    if attempt == 0:
+                        logger.warning(f"常驻进程 {self.name} 在任务执行中退出，重启后重试")
+                        continue
+                    raise ResidentWorkerError(f"常驻进程 {self.name} 重启后仍然崩溃: {e}") from e
+
+                self.stats['jobs'] += 1
+                if status == 'ok':
+                    return data
+                raise ResidentJobError(data.get('message', ''), data.get('type', ''), data.get('traceback', ''))
+
+    def _wait_for_result(self, timeout: Optional[float]) -> bool:
+        """
+        等待任务结果，在 Celery 任务中执行时定期检查取消标记
+
+        任务被取消时终止常驻进程（模型随之卸载，下次任务重新启动）并抛出 TaskCancelledError。
+        """
+        task_id = current_task_id()
+        if not task_id:
+            return self._conn.poll(timeout)
+
+        deadline = time.time() + timeout if timeout else None
+        while True:
+            wait_slice = CANCEL_POLL_INTERVAL
+            if deadline is not None:
+                wait_slice = max(0.0, min(wait_slice, deadline - time.time()))
+            if self._conn.poll(wait_slice):
+                return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            if is_cancel_requested(task_id):
+                logger.warning(f"任务 {task_id} 已取消，终止常驻进程 {self.name}")
+                self._terminate()
+                raise TaskCancelledError(f"任务已取消: {task_id}")
+
+    def stop(self, timeout: float = 10):
+        """通知常驻进程退出"""
+        with self._lock:
+            if self._conn is not None and self.is_alive():
+                try:
+                    self._conn.send(('stop', None))
+                    self._process.wait(timeout=timeout)
+                except Exception:
+                    pass
+            self._terminate()
+
+    def _ensure_started(self):
+        if self.is_alive() and self._conn is not None:
+            return
+        if not self.is_available():
+            raise ResidentWorkerError(f"常驻进程 {self.name} 崩溃过于频繁，暂停使用")
+        if self._process is not None:
+            # 空闲退出（返回码 0）不计入崩溃
+            returncode = self._process.poll()
+            if returncode not in (None, 0):
+                self._record_crash(RuntimeError(f"returncode={returncode}"))
+                if not self.is_available():
+                    raise ResidentWorkerError(f"常驻进程 {self.name} 崩溃过于频繁，暂停使用")
+            self._terminate()
+        self._start()
+
+    def _start(self):
+        self._address = os.path.join(tempfile.gettempdir(), f"yivideo-{self.name}-{uuid.uuid4().hex[:12]}.sock")
+        authkey = os.urandom(16)
+
+        env = os.environ.copy()
+        env.update(self.env)
+        env[ENV_ADDRESS] = self._address
+        env[ENV_AUTHKEY] = authkey.hex()
+        env[ENV_TARGET] = self.target
+        env[ENV_OPTIONS] = json.dumps(self.options)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get('PYTHONPATH')]))
+
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "services.common.resident_worker"],
+            cwd=str(PROJECT_ROOT),
+            env=env,
+        )
+        self.stats['starts'] += 1
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise ResidentWorkerError(f"常驻进程 {self.name} 启动失败，返回码 {self._process.returncode}")
+            if os.path.exists(self._address):
+                try:
+                    self._conn = Client(self._address, family='AF_UNIX', authkey=authkey)
+                    logger.info(f"常驻进程 {self.name} 已启动 (PID: {self._process.pid})")
+                    return
+                except (ConnectionRefusedError, FileNotFoundError):
+                    pass
+            time.sleep(0.05)
+
+        self._terminate()
+        raise ResidentWorkerError(f"常驻进程 {self.name} 启动超时 ({self.startup_timeout}秒)")
+
+    def _record_crash(self, error: Exception):
+        now = time.monotonic()
+        self.stats['crashes'] += 1
+        self._crashes.append(now)
+        while self._crashes and now - self._crashes[0] > self.restart_window:
+            self._crashes.popleft()
+        logger.error(f"常驻进程 {self.name} 崩溃: {error} (窗口内 {len(self._crashes)} 次)")
+        self._terminate()
+        if len(self._crashes) > self.max_restarts:
+            self._disabled_until = now + self.restart_window
+            self._crashes.clear()
+
+    def _terminate(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                pass
+        self._process = None
+        if self._address and os.path.exists(self._address):
+            try:
+                os.unlink(self._address)
+            except OSError:
+                pass
+
+
+def load_target(target: str) -> Callable[[Dict[str, Any]], Any]:
+    """解析 "包.模块:函数" 形式的目标"""
+    module_name, _, attr = target.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def serve(conn, handler: Any, idle_poll_interval: float = 5.0,
+          process_idle_timeout: Optional[float] = None) -> None:
+    """
+    服务端主循环
+
+    Args:
+        conn: 与客户端的连接
+        handler: 处理器（handle(payload)，可选 on_idle()）
+        idle_poll_interval: 空闲检查间隔（秒）
+        process_idle_timeout: 进程空闲多久（秒）后退出，None 表示不退出
+    """
+    on_idle = getattr(handler, 'on_idle', None)
+    last_job = time.monotonic()
+
+    while True:
+        if not conn.poll(idle_poll_interval):
+            if on_idle:
+                on_idle()
+            if process_idle_timeout and time.monotonic() - last_job >= process_idle_timeout:
+                logger.info("常驻进程空闲超时，退出")
+                return
+            continue
+
+        try:
+            op, payload = conn.recv()
+        except EOFError:
+            return
+        if op == 'stop':
+            return
+
+        try:
+            conn.send(('ok', handler.handle(payload)))
+        except Exception as e:
+            conn.send(('error', {
+                'type': type(e).__name__,
+                'message': str(e),
+                'traceback': traceback.format_exc(),
+            }))
+        last_job = time.monotonic()
+
+
+def main() -> int:
+    """常驻进程入口"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[%(asctime)s] [%(levelname)s] %(name)s: %(message)s',
+        stream=sys.stderr
+    )
+    address = os.environ[ENV_ADDRESS]
+    authkey = bytes.fromhex(os.environ[ENV_AUTHKEY])
+    options = json.loads(os.environ.get(ENV_OPTIONS) or "{}")
+
+    listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    try:
+        conn = listener.accept()
+        handler = load_target(os.environ[ENV_TARGET])(options)
+        serve(
+            conn,
+            handler,
+            idle_poll_interval=options.get('idle_poll_interval', 5.0),
+            process_idle_timeout=options.get('process_idle_timeout'),
+        )
+    finally:
+        listener.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# services/common/state_codec.py
+# -*- coding: utf-8 -*-
+
+"""
+节点状态编码。
+
+节点状态原先以 model_dump_json() 文本存入 Redis，OCR/ASR 阶段的输出包含很长的分段列表，
+每次读取都要整体传输并解析。本模块提供：
+
+- 紧凑二进制编码：魔数头 + msgpack（未安装时为 JSON）正文，超过阈值时 zlib 压缩
+- 大字段外置：阶段输出中编码后超过阈值的字段单独存放，状态中只保留引用
+  {"$state_ref": 键, "bytes": 大小}，按内容摘要命名，内容不变时不重复写入
+- 兼容读取：没有魔数头的值按旧 JSON 格式解析
+
+外置字段的键为 {task_id}:state_blob:{digest}，与节点键同属 {task_id}:*:* 模式，
+删除任务时一并删除，读取节点状态时需按 is_blob_key 跳过。
+
+msgpack 为可选依赖。
+"""
+
+import hashlib
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from services.common.logger import get_logger
+
+logger = get_logger('state_codec')
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+# 旧 JSON 状态不会以 NUL 开头
+MAGIC = b"\x00YS"
+FORMAT_VERSION = 1
+FLAG_MSGPACK = 0x01
+FLAG_ZLIB = 0x02
+
+STATE_BLOB_NODE = "state_blob"
+STATE_REF_KEY = "$state_ref"
+
+
+@dataclass
+class StateCodecSettings:
+    """状态编码配置（config.yml state_storage）"""
+    # json: 与旧版本相同的 JSON 文本；binary: 二进制编码
+    encoding: str = "json"
+    # 编码后超过该大小才压缩（字节）
+    compress_min_bytes: int = 2048
+    # zlib 压缩级别
+    compress_level: int = 1
+    # 阶段输出字段编码后超过该大小时外置（字节），0 表示不外置
+    offload_min_bytes: int = 0
+
+    @property
+    def binary(self) -> bool:
+        return self.encoding == "binary"
+
+
+def encode_value(value: Any, settings: StateCodecSettings) -> bytes:
+    """按配置编码，value 需为 JSON 兼容数据"""
+    if not settings.binary:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    flags = 0
+    if MSGPACK_AVAILABLE:
+        payload = msgpack.packb(value, use_bin_type=True)
+        flags |= FLAG_MSGPACK
+    else:
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if settings.compress_min_bytes and len(payload) >= settings.compress_min_bytes:
+        compressed = zlib.compress(payload, settings.compress_level)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= FLAG_ZLIB
+    return MAGIC + bytes((FORMAT_VERSION, flags)) + payload
+
+
+def decode_value(raw: Any) -> Any:
+    """解码 encode_value 的结果，兼容旧 JSON 文本"""
+    if isinstance(raw, str):
+        return json.loads(raw)
+    raw = bytes(raw)
+    if not raw.startswith(MAGIC):
+        return json.loads(raw)
+    version, flags = raw[len(MAGIC)], raw[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"不支持的状态编码版本: {version}")
+    payload = raw[len(MAGIC) + 2:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    if flags & FLAG_MSGPACK:
+        if not MSGPACK_AVAILABLE:
+            raise ValueError("状态为 msgpack 编码，但未安装 msgpack")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return json.loads(payload)
+
+
+def blob_key(task_id: str, encoded: bytes) -> str:
+    """外置字段的键（按内容摘要）"""
+    digest = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    return f"{task_id}:{STATE_BLOB_NODE}:{digest}"
+
+
+def is_blob_key(key: Any) -> bool:
+    """是否为外置字段键（扫描节点状态时跳过）"""
+    if isinstance(key, bytes):
+        key = key.decode("utf-8")
+    parts = key.split(":", 2)
+    return len(parts) == 3 and parts[1] == STATE_BLOB_NODE
+
+
+def is_state_ref(value: Any) -> bool:
+    return isinstance(value, dict) and STATE_REF_KEY in value
+
+
+def offload_large_fields(data: Dict[str, Any], settings: StateCodecSettings) -> Dict[str, bytes]:
+    """
+    把阶段输出中的大字段替换为引用（原地修改 data）
+
+    Returns:
+        Dict[str, bytes]: 需要写入的外置字段 {键: 编码后的值}，已是引用的字段也包含在内（值为 b""），
+        用于刷新其过期时间
+    """
+    blobs: Dict[str, bytes] = {}
+    task_id = data.get("workflow_id")
+    if not settings.offload_min_bytes or not task_id:
+        return blobs
+    for stage in (data.get("stages") or {}).values():
+        output = (stage or {}).get("output") if isinstance(stage, dict) else None
+        if not isinstance(output, dict):
+            continue
+        for field, value in output.items():
+            if is_state_ref(value):
+                blobs.setdefault(value[STATE_REF_KEY], b"")
+                continue
+            if not isinstance(value, (list, dict, str)):
+                continue
+            encoded = encode_value(value, settings)
+            if len(encoded) < settings.offload_min_bytes:
+                continue
+            key = blob_key(task_id, encoded)
+            blobs[key] = encoded
+            output[field] = {STATE_REF_KEY: key, "bytes": len(encoded)}
+    return blobs
+
+
+def resolve_refs(state: Dict[str, Any], blobs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    用外置字段内容替换状态中的引用（原地修改 state）
+
+    Args:
+        blobs: {键: 原始值}，缺失（已过期）的引用保持原样并记录日志
+    """
+    for stage in (state.get("stages") or {}).values():
+        output = (stage or {}).get("output") if isinstance(stage, dict) else None
+        if not isinstance(output, dict):
+            continue
+        for field, value in output.items():
+            if not is_state_ref(value):
+                continue
+            raw = blobs.get(value[STATE_REF_KEY])
+            if raw is None:
+                logger.warning(f"外置状态字段不存在或已过期: {field} -> {value[STATE_REF_KEY]}")
+                continue
+            output[field] = decode_value(raw)
+    return state
+
+
+def collect_refs(state: Dict[str, Any]) -> list:
+    """状态中引用的外置字段键"""
+    keys = []
+    for stage in (state.get("stages") or {}).values():
+        output = (stage or {}).get("output") if isinstance(stage, dict) else None
+        if isinstance(output, dict):
+            keys.extend(v[STATE_REF_KEY] for v in output.values() if is_state_ref(v))
+    return keys
+
+
+# 单例模式
+_settings_instance: Optional[StateCodecSettings] = None
+
+
+def get_state_codec_settings() -> StateCodecSettings:
+    """获取状态编码配置"""
+    global _settings_instance
+    if _settings_instance is None:
+        try:
+            from services.common.config_loader import get_config
+            config = (get_config() or {}).get('state_storage', {}) or {}
+        except Exception:
+            config = {}
+        encoding = str(config.get('encoding', 'json')).lower()
+        if encoding not in ("json", "binary"):
+            logger.warning(f"未知的状态编码 {encoding}，使用 json")
+            encoding = "json"
+        _settings_instance = StateCodecSettings(
+            encoding=encoding,
+            compress_min_bytes=int(config.get('compress_min_bytes', 2048)),
+            compress_level=int(config.get('compress_level', 1)),
+            offload_min_bytes=int(config.get('offload_min_bytes', 0)),
+        )
+    return _settings_instance
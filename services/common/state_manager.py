@@ -30,6 +30,9 @@ except ImportError:
     get_callback_manager = None
 # 导入在Stage 1中创建的标准化上下文
 from services.common.context import WorkflowContext
+from services.common import state_codec
+from services.common.task_events import publish_stage_event
+from services.common.metrics import STATE_WRITE_DURATION, timed
 
 # --- 日志和Redis连接配置 ---
 # 日志已统一管理，使用 services.common.logger
@@ -74,7 +77,7 @@ def _is_auto_upload_enabled() -> bool:
 
 
 # --- 核心功能 ---
-def _upload_files_to_minio(context: WorkflowContext) -> None:
+def _upload_files_to_minio(context: WorkflowContext, stage_names: Optional[List[str]] = None) -> None:
     """
     自动检测并上传工作流中的文件到MinIO
 
@@ -85,6 +88,7 @@ def _upload_files_to_minio(context: WorkflowContext) -> None:
 
     Args:
         context: 工作流上下文对象
+        stage_names: 只上传这些阶段的输出，为 None 时上传全部阶段
     """
     try:
         from services.common.file_service import get_file_service
@@ -98,6 +102,8 @@ def _upload_files_to_minio(context: WorkflowContext) -> None:
         for stage_name, stage in context.stages.items():
             if stage.status != 'SUCCESS' or not stage.output:
                 continue
+            if stage_names is not None and stage_name not in stage_names:
+                continue
 
             # 自动检测所有路径字段（而非硬编码列表）
             file_keys = []
@@ -274,6 +280,46 @@ def _upload_files_to_minio(context: WorkflowContext) -> None:
     except Exception as e:
         logger.error(f"文件上传过程出错: {e}", exc_info=True)
 
+def _get_upload_stage_names(context: WorkflowContext) -> Optional[List[str]]:
+    """
+    计算需要上传的阶段
+
+    DAG 节点的上下文中带有上游阶段，只上传节点自身的输出；
+    中间节点（有下游消费者）的产物留在共享存储，不上传。
+    """
+    input_params = context.input_params or {}
+    dag_info = input_params.get("workflow_dag")
+    if dag_info is None:
+        return None
+    if not dag_info.get("upload_to_minio", True):
+        return []
+    return [input_params.get("task_name")]
+
+
+def _get_worker_node_status(context: WorkflowContext) -> Optional[str]:
+    """
+    worker 写入时需要覆盖的节点状态
+
+    已取消的任务保持 cancelled，避免 worker 回写的上下文把状态改回 running；
+    DAG 节点结束时标记为 completed/failed。其余情况返回 None。
+    """
+    from services.common.task_cancellation import is_cancel_requested
+    if is_cancel_requested(context.workflow_id):
+        return "cancelled"
+    if "workflow_dag" not in (context.input_params or {}):
+        return None
+    from services.common.workflow_dag import node_status_for_stage
+    return node_status_for_stage(context)
+
+
+def _advance_workflow_dag(context: WorkflowContext) -> None:
+    """DAG 节点结束后投递就绪的下游节点"""
+    if "workflow_dag" not in (context.input_params or {}):
+        return
+    from services.common.workflow_dag import handle_stage_finished
+    handle_stage_finished(context)
+
+
 def _check_and_trigger_callback(context: WorkflowContext) -> None:
     """
     检查是否需要触发callback
@@ -452,6 +498,51 @@ def _merge_states(states: List[Dict[str, Any]], workflow_id: str) -> Dict[str, A
     merged.setdefault("workflow_id", workflow_id)
     return merged
 
+def _encode_node_state(node_context: WorkflowContext) -> tuple[bytes, Dict[str, bytes]]:
+    """按 state_storage 配置编码节点状态，返回 (状态值, 外置字段)"""
+    settings = state_codec.get_state_codec_settings()
+    if not settings.binary and not settings.offload_min_bytes:
+        return node_context.model_dump_json().encode("utf-8"), {}
+    data = node_context.model_dump(mode="json")
+    blobs = state_codec.offload_large_fields(data, settings)
+    return state_codec.encode_value(data, settings), blobs
+
+
+def _write_node_state(key: str, node_context: WorkflowContext, operation: str) -> None:
+    """写入节点状态与外置字段，外置字段内容未变时只刷新过期时间"""
+    value, blobs = _encode_node_state(node_context)
+    with timed(STATE_WRITE_DURATION, operation=operation):
+        if blobs:
+            blob_keys = list(blobs)
+            pipe = redis_client.pipeline(transaction=False)
+            for blob_key in blob_keys:
+                pipe.expire(blob_key, NODE_TTL_SECONDS)
+            exists = pipe.execute()
+            pipe = redis_client.pipeline(transaction=False)
+            for blob_key, found in zip(blob_keys, exists):
+                if found:
+                    continue
+                if blobs[blob_key]:
+                    pipe.setex(blob_key, NODE_TTL_SECONDS, blobs[blob_key])
+                else:
+                    logger.warning(f"状态引用的外置字段已不存在: {blob_key}")
+            pipe.setex(key, NODE_TTL_SECONDS, value)
+            pipe.execute()
+        else:
+            # 使用setex原子地设置键、值和过期时间
+            redis_client.setex(key, NODE_TTL_SECONDS, value)
+
+
+def _resolve_state_refs(states: List[Dict[str, Any]]) -> None:
+    """一次读取所有外置字段并替换状态中的引用"""
+    keys = sorted({key for state in states for key in state_codec.collect_refs(state)})
+    if not keys:
+        return
+    blobs = dict(zip(keys, redis_client.mget(keys)))
+    for state in states:
+        state_codec.resolve_refs(state, blobs)
+
+
 def create_workflow_state(context: WorkflowContext) -> None:
     """
     在Redis中创建一个新的工作流状态记录。
@@ -472,12 +563,39 @@ def create_workflow_state(context: WorkflowContext) -> None:
         return
 
     key = _get_node_key(node_context.workflow_id, task_name)
-    state_json = node_context.model_dump_json()
-
-    # 使用setex原子地设置键、值和过期时间
-    redis_client.setex(key, NODE_TTL_SECONDS, state_json)
+    _write_node_state(key, node_context, "create")
+    publish_stage_event(node_context.model_dump())
     logger.info(f"已为 workflow_id='{node_context.workflow_id}' 创建节点状态，TTL为 {NODE_TTL_DAYS} 天。")
 
+def create_workflow_states(contexts: List[WorkflowContext]) -> None:
+    """
+    在一次管道写入中批量创建节点状态。
+
+    用于批量提交的新任务：写入前不存在状态，也就没有事件订阅者，不发布节点事件。
+
+    Args:
+        contexts (List[WorkflowContext]): 要持久化的工作流上下文对象列表。
+    """
+    if not redis_client:
+        logger.error("Redis未连接，无法批量创建工作流状态。")
+        return
+    if not contexts:
+        return
+
+    pipe = redis_client.pipeline(transaction=False)
+    for context in contexts:
+        node_context = _build_node_view(context)
+        task_name = (node_context.input_params or {}).get("task_name")
+        value, blobs = _encode_node_state(node_context)
+        for blob_key, blob in blobs.items():
+            if blob:
+                pipe.setex(blob_key, NODE_TTL_SECONDS, blob)
+        pipe.setex(_get_node_key(node_context.workflow_id, task_name), NODE_TTL_SECONDS, value)
+
+    with timed(STATE_WRITE_DURATION, operation="create_batch"):
+        pipe.execute()
+    logger.info(f"已批量创建 {len(contexts)} 个节点状态，TTL为 {NODE_TTL_DAYS} 天。")
+
 def update_workflow_state(context: WorkflowContext, skip_side_effects: bool = False) -> None:
     """
     更新Redis中已存在的工作流状态记录。
@@ -495,7 +613,7 @@ def update_workflow_state(context: WorkflowContext, skip_side_effects: bool = Fa
     # 自动上传文件到MinIO（尊重配置开关），可按需跳过副作用
     if not skip_side_effects:
         if _is_auto_upload_enabled():
-            _upload_files_to_minio(context)
+            _upload_files_to_minio(context, _get_upload_stage_names(context))
         else:
             logger.info("auto_upload_to_minio 已关闭，跳过上传。")
 
@@ -507,23 +625,32 @@ def update_workflow_state(context: WorkflowContext, skip_side_effects: bool = Fa
         logger.error("task_name 缺失，无法更新节点状态。")
         return
 
-    key = _get_node_key(node_context.workflow_id, task_name)
-    state_json = node_context.model_dump_json()
+    node_status = _get_worker_node_status(context) if not skip_side_effects else None
+    if node_status:
+        node_context = WorkflowContext(**{
+            **node_context.model_dump(),
+            "status": node_status,
+            "updated_at": datetime.now().isoformat(),
+        })
 
-    # 使用setex刷新TTL
-    redis_client.setex(key, NODE_TTL_SECONDS, state_json)
+    key = _get_node_key(node_context.workflow_id, task_name)
+    # setex 刷新TTL
+    _write_node_state(key, node_context, "update")
+    publish_stage_event(node_context.model_dump())
     
     # 检查是否需要触发callback
     if not skip_side_effects:
         _check_and_trigger_callback(context)
+        _advance_workflow_dag(context)
     logger.info(f"已更新 workflow_id='{context.workflow_id}' 的状态。")
 
-def get_workflow_state(workflow_id: str) -> Dict[str, Any]:
+def get_workflow_state(workflow_id: str, resolve_refs: bool = True) -> Dict[str, Any]:
     """
     从Redis中检索一个工作流的状态。
 
     Args:
         workflow_id (str): 要查询的工作流ID。
+        resolve_refs (bool): 是否读取外置的大字段；只关心状态时传 False，输出中保留引用。
 
     Returns:
         Dict[str, Any]: 代表工作流状态的字典。如果找不到，则返回一个错误信息。
@@ -534,14 +661,19 @@ def get_workflow_state(workflow_id: str) -> Dict[str, Any]:
 
     states: List[Dict[str, Any]] = []
     try:
-        for key in redis_client.scan_iter(match=f"{workflow_id}:*:*"):
-            state_json = redis_client.get(key)
-            if not state_json:
+        keys = [
+            key for key in redis_client.scan_iter(match=f"{workflow_id}:*:*")
+            if not state_codec.is_blob_key(key)
+        ]
+        for key, raw in zip(keys, redis_client.mget(keys) if keys else []):
+            if not raw:
                 continue
             try:
-                states.append(json.loads(state_json))
+                states.append(state_codec.decode_value(raw))
             except Exception as e:
                 logger.error(f"解析Redis节点状态失败: {key}, 错误: {e}")
+        if resolve_refs:
+            _resolve_state_refs(states)
     except Exception as e:
         logger.error(f"扫描Redis节点状态失败: workflow_id='{workflow_id}', 错误: {e}")
         return {"error": f"Workflow with id '{workflow_id}' not found."}
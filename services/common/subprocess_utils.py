@@ -15,6 +15,15 @@ from typing import List, Dict, Any, Optional, Union, Callable
 from pathlib import Path
 
 from services.common.logger import get_logger
+from services.common.metrics import SUBPROCESS_DURATION, node_label, outcome_of
+from services.common.task_cancellation import (
+    CANCEL_POLL_INTERVAL,
+    TASK_ID_ENV,
+    TaskCancelledError,
+    current_task_id,
+    is_cancel_requested,
+    terminate_process_tree,
+)
 
 logger = get_logger('subprocess_utils')
 
@@ -64,6 +73,36 @@ def stream_output(pipe, output_list: List[str], prefix: str, logger_func: Callab
             pass
 
 
+def _wait_or_cancel(process: subprocess.Popen, timeout: Optional[float], start_time: float,
+                    task_id: Optional[str], log_prefix: str) -> None:
+    """
+    等待子进程结束
+
+    Raises:
+        subprocess.TimeoutExpired: 超时（进程仍在运行，由调用方终止）
+        TaskCancelledError: 任务被取消（进程树已终止）
+    """
+    if not task_id:
+        process.wait(timeout=timeout)
+        return
+
+    deadline = start_time + timeout if timeout else None
+    while True:
+        wait_slice = CANCEL_POLL_INTERVAL
+        if deadline is not None:
+            wait_slice = max(0.0, min(wait_slice, deadline - time.time()))
+        try:
+            process.wait(timeout=wait_slice)
+            return
+        except subprocess.TimeoutExpired:
+            if deadline is not None and time.time() >= deadline:
+                raise
+        if is_cancel_requested(task_id):
+            logger.warning(f"[{log_prefix}] 任务 {task_id} 已取消，终止子进程树 (pid={process.pid})")
+            terminate_process_tree(process)
+            raise TaskCancelledError(f"任务已取消: {task_id}")
+
+
 def run_with_popen(
     cmd: Union[str, List[str]],
     *,
@@ -102,6 +141,8 @@ def run_with_popen(
         SubprocessResult: 执行结果对象，兼容subprocess.CompletedProcess
     """
     start_time = time.time()
+    metric_node = node_label(stage_name or log_prefix)
+    observed = False
     
     # 准备命令
     if isinstance(cmd, str):
@@ -113,6 +154,10 @@ def run_with_popen(
     process_env = os.environ.copy()
     if env:
         process_env.update(env)
+    # 子进程中的进度事件归属到当前任务
+    task_id = current_task_id()
+    if task_id:
+        process_env.setdefault(TASK_ID_ENV, task_id)
     
     # 准备stdout/stderr处理
     stdout_pipe = subprocess.PIPE if capture_output or real_time_logging else None
@@ -127,6 +172,10 @@ def run_with_popen(
         log_prefix = stage_name
     
     logger.info(f"[{log_prefix}] 开始执行命令: {' '.join(cmd) if isinstance(cmd, list) else cmd}")
+
+    # 子进程自成进程组，取消或超时时连同其派生的进程一起终止
+    if os.name == 'posix':
+        kwargs.setdefault('start_new_session', True)
     
     try:
         # 启动子进程
@@ -164,20 +213,12 @@ def run_with_popen(
                 stderr_thread.start()
                 threads.append(stderr_thread)
         
-        # 等待进程完成
+        # 等待进程完成，在 Celery 任务中执行时定期检查取消标记
         try:
-            process.wait(timeout=timeout)
+            _wait_or_cancel(process, timeout, start_time, task_id, log_prefix)
         except subprocess.TimeoutExpired:
             logger.error(f"[{log_prefix}] 进程执行超时({timeout}秒)，开始终止...")
-            process.terminate()
-            
-            # 等待一段时间后强制杀死
-            try:
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                logger.error(f"[{log_prefix}] 强制终止进程...")
-                process.kill()
-                process.wait()
+            terminate_process_tree(process, grace_period=5)
             
             execution_time = time.time() - start_time
             logger.error(f"[{log_prefix}] 进程超时终止，耗时: {execution_time:.3f}s")
@@ -212,6 +253,11 @@ def run_with_popen(
             execution_time=execution_time
         )
         
+        SUBPROCESS_DURATION.labels(
+            node=metric_node, outcome="success" if process.returncode == 0 else "failed"
+        ).observe(execution_time)
+        observed = True
+        
         # 记录执行结果
         if process.returncode == 0:
             logger.info(f"[{log_prefix}] 进程执行成功，耗时: {execution_time:.3f}s")
@@ -237,6 +283,8 @@ def run_with_popen(
         
     except Exception as e:
         execution_time = time.time() - start_time
+        if not observed:
+            SUBPROCESS_DURATION.labels(node=metric_node, outcome=outcome_of(e)).observe(execution_time)
         logger.error(f"[{log_prefix}] 执行过程中发生异常: {e}")
         logger.error(f"[{log_prefix}] 已收集的输出: stdout={len(stdout_lines)}行, stderr={len(stderr_lines)}行")
         
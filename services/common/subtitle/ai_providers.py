@@ -20,6 +20,7 @@ import logging
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 from services.common.logger import get_logger
+from services.common.subtitle.http_session_pool import HTTPSessionPool, get_http_session_pool
 
 logger = get_logger(__name__)
 
@@ -51,6 +52,8 @@ class AIProviderBase(ABC):
         self.temperature = config.get('temperature', 0.1)
         self.enable_request_dump = False
         self.request_dump_tag = None
+        self.timeout = config.get('timeout', 300)
+        self.http_pool: HTTPSessionPool = config.get('http_pool') or get_http_session_pool()
 
     def _get_api_key(self) -> str:
         """从环境变量或配置中获取API密钥"""
@@ -136,15 +139,15 @@ class AIProviderBase(ABC):
         pass
 
     async def _make_http_request(self, url: str, headers: Dict[str, str],
-                                data: Dict[str, Any], timeout: int = 300) -> Dict[str, Any]:
+                                data: Dict[str, Any], timeout: Optional[int] = None) -> Dict[str, Any]:
         """
-        通用的HTTP请求方法
+        通用的HTTP请求方法，复用连接池中的会话（keep-alive）
 
         Args:
             url: 请求URL
             headers: 请求头
             data: 请求数据
-            timeout: 超时时间（秒）
+            timeout: 超时时间（秒），默认使用提供商配置的 timeout
 
         Returns:
             Dict: 响应数据
@@ -152,10 +155,11 @@ class AIProviderBase(ABC):
         try:
             if self.enable_request_dump:
                 self._dump_llm_request(url, headers, data)
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            return await self.http_pool.post_json(
+                url, headers, data,
+                timeout=self.timeout if timeout is None else timeout,
+                owner=self,
+            )
 
         except aiohttp.ClientError as e:
             logger.error(f"HTTP请求失败: {e}")
@@ -164,6 +168,10 @@ class AIProviderBase(ABC):
             logger.error("HTTP请求超时")
             raise
 
+    async def aclose(self) -> None:
+        """释放本提供商对当前事件循环池化会话的引用，最后一个使用者释放时才关闭会话"""
+        await self.http_pool.release(self)
+
 
 class DeepSeekProvider(AIProviderBase):
     """DeepSeek AI服务提供商"""
@@ -556,4 +564,7 @@ async def get_ai_response(provider_name: str, messages: List[Dict[str, str]],
     """
     factory = AIProviderFactory()
     provider = factory.create_provider(provider_name, config or {})
-    return await provider.chat_completion(messages)
+    try:
+        return await provider.chat_completion(messages)
+    finally:
+        await provider.aclose()
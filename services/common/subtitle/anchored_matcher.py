@@ -0,0 +1,175 @@
+"""
+锚点分段序列对齐
+
+对整篇转录做词级对齐时，difflib.SequenceMatcher 在高频词（the、的 等）上的最长匹配搜索
+接近平方复杂度，两小时视频（2 万词以上）会成为主要耗时。
+
+AnchoredSequenceMatcher 提供与 SequenceMatcher 相同的 get_opcodes()/ratio() 接口：
+1. 去掉公共前缀与后缀
+2. 在两侧各只出现一次的 n 元词组作为候选锚点，按最长递增子序列选出保序的锚点链
+3. 锚点之间的小间隙递归处理，间隙足够小（或找不到锚点）时交给 SequenceMatcher
+
+较短的序列（两侧长度乘积不超过 direct_limit）在去前后缀之前就整体交给 SequenceMatcher，
+结果与原实现完全一致；长序列的耗时随长度近似线性增长。
+"""
+
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from typing import Dict, List, Sequence, Tuple
+
+Opcode = Tuple[str, int, int, int, int]
+
+# 两侧长度乘积不超过该值时直接使用 SequenceMatcher
+DIRECT_ALIGN_LIMIT = 40000
+# 锚点 n 元词组长度：单个高频词难以唯一，三元组在真实文本中大多唯一
+ANCHOR_NGRAM = 3
+
+
+class AnchoredSequenceMatcher:
+    """锚点分段的序列对齐器，接口与 difflib.SequenceMatcher 的 get_opcodes()/ratio() 一致"""
+
+    def __init__(self, a: Sequence, b: Sequence,
+                 direct_limit: int = DIRECT_ALIGN_LIMIT, ngram: int = ANCHOR_NGRAM):
+        """
+        Args:
+            a: 原始序列（元素需可哈希）
+            b: 目标序列
+            direct_limit: 直接交给 SequenceMatcher 的规模上限（两侧长度乘积）
+            ngram: 锚点词组长度
+        """
+        self.a = a
+        self.b = b
+        self.direct_limit = direct_limit
+        self.ngram = max(1, ngram)
+        self._opcodes = None
+
+    def get_opcodes(self) -> List[Opcode]:
+        """返回把 a 变为 b 的操作列表，格式同 SequenceMatcher.get_opcodes()"""
+        if self._opcodes is None:
+            raw: List[Opcode] = []
+            if len(self.a) * len(self.b) <= self.direct_limit:
+                # 先去前后缀会改变 SequenceMatcher 在重复元素上的取舍，小规模时整体直接对齐以保持结果一致
+                self._align_direct(0, len(self.a), 0, len(self.b), raw)
+            else:
+                self._align(0, len(self.a), 0, len(self.b), raw)
+            self._opcodes = _merge_opcodes(raw)
+        return self._opcodes
+
+    def ratio(self) -> float:
+        """相似度 2*M/T，M 为匹配元素数，T 为两侧总长"""
+        total = len(self.a) + len(self.b)
+        if not total:
+            return 1.0
+        matched = sum(i2 - i1 for tag, i1, i2, _, _ in self.get_opcodes() if tag == "equal")
+        return 2.0 * matched / total
+
+    def _align(self, alo: int, ahi: int, blo: int, bhi: int, out: List[Opcode]) -> None:
+        a, b = self.a, self.b
+
+        # 公共前缀
+        start_a, start_b = alo, blo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start_a:
+            out.append(("equal", start_a, alo, start_b, blo))
+
+        # 公共后缀（最后输出）
+        end_a, end_b = ahi, bhi
+        while ahi > alo and bhi > blo and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+
+        if alo < ahi or blo < bhi:
+            if alo == ahi:
+                out.append(("insert", alo, alo, blo, bhi))
+            elif blo == bhi:
+                out.append(("delete", alo, ahi, blo, blo))
+            elif (ahi - alo) * (bhi - blo) <= self.direct_limit:
+                self._align_direct(alo, ahi, blo, bhi, out)
+            else:
+                anchors = self._find_anchors(alo, ahi, blo, bhi)
+                if not anchors:
+                    # 高度重复的片段没有唯一锚点，只能整体对齐
+                    self._align_direct(alo, ahi, blo, bhi, out)
+                else:
+                    cursor_a, cursor_b = alo, blo
+                    for i, j in anchors:
+                        self._align(cursor_a, i, cursor_b, j, out)
+                        out.append(("equal", i, i + self.ngram, j, j + self.ngram))
+                        cursor_a, cursor_b = i + self.ngram, j + self.ngram
+                    self._align(cursor_a, ahi, cursor_b, bhi, out)
+
+        if ahi < end_a:
+            out.append(("equal", ahi, end_a, bhi, end_b))
+
+    def _align_direct(self, alo: int, ahi: int, blo: int, bhi: int, out: List[Opcode]) -> None:
+        matcher = SequenceMatcher(None, self.a[alo:ahi], self.b[blo:bhi], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            out.append((tag, alo + i1, alo + i2, blo + j1, blo + j2))
+
+    def _find_anchors(self, alo: int, ahi: int, blo: int, bhi: int) -> List[Tuple[int, int]]:
+        """两侧各只出现一次的 n 元词组，按最长递增子序列选出互不重叠的保序锚点"""
+        n = self.ngram
+        unique_a = _unique_ngrams(self.a, alo, ahi, n)
+        if not unique_a:
+            return []
+        unique_b = _unique_ngrams(self.b, blo, bhi, n)
+        pairs = sorted((i, unique_b[key]) for key, i in unique_a.items() if key in unique_b)
+        anchors = []
+        end_a = end_b = -1
+        for i, j in _longest_increasing(pairs):
+            if i >= end_a and j >= end_b:
+                anchors.append((i, j))
+                end_a, end_b = i + n, j + n
+        return anchors
+
+
+def _unique_ngrams(seq: Sequence, lo: int, hi: int, n: int) -> Dict[tuple, int]:
+    """区间内只出现一次的 n 元词组 -> 起始位置"""
+    positions: Dict[tuple, int] = {}
+    repeated = set()
+    for i in range(lo, hi - n + 1):
+        key = tuple(seq[i:i + n])
+        if key in positions:
+            repeated.add(key)
+        else:
+            positions[key] = i
+    for key in repeated:
+        del positions[key]
+    return positions
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """按 a 位置排序的配对中，b 位置严格递增的最长子序列（patience sorting，O(n log n)）"""
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[pos] = j
+            tail_index[pos] = index
+        previous[index] = tail_index[pos - 1] if pos > 0 else -1
+    result = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        result.append(pairs[index])
+        index = previous[index]
+    result.reverse()
+    return result
+
+
+def _merge_opcodes(opcodes: List[Opcode]) -> List[Opcode]:
+    """合并相邻的同类操作（锚点与间隙边界处的 equal 等）"""
+    merged: List[Opcode] = []
+    for opcode in opcodes:
+        if merged and merged[-1][0] == opcode[0]:
+            tag, i1, _, j1, _ = merged[-1]
+            merged[-1] = (tag, i1, opcode[2], j1, opcode[4])
+        else:
+            merged.append(opcode)
+    return merged
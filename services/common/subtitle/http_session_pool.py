@@ -0,0 +1,294 @@
+"""
+AI/LLM HTTP 连接池
+
+为 AI 服务提供商提供按事件循环复用的 aiohttp 会话，避免每次请求都重新建立 TCP/TLS 连接：
+- 每个事件循环持有一个 ClientSession（aiohttp 会话不能跨事件循环使用）
+- TCPConnector 提供按主机的连接数限制、keep-alive 与 DNS 缓存
+- 通过 TraceConfig 统计新建连接与复用连接次数
+"""
+
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from services.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class HTTPPoolConfig:
+    """HTTP 连接池配置"""
+    limit: int = 100  # 连接池总连接数上限
+    limit_per_host: int = 20  # 单主机连接数上限
+    keepalive_timeout: float = 60.0  # 空闲连接保活时间（秒）
+    ttl_dns_cache: int = 300  # DNS 缓存时间（秒）
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "keepalive_timeout": self.keepalive_timeout,
+            "ttl_dns_cache": self.ttl_dns_cache,
+        }
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]) -> "HTTPPoolConfig":
+        return cls(
+            limit=int(config_dict.get("limit", 100)),
+            limit_per_host=int(config_dict.get("limit_per_host", 20)),
+            keepalive_timeout=float(config_dict.get("keepalive_timeout", 60.0)),
+            ttl_dns_cache=int(config_dict.get("ttl_dns_cache", 300)),
+        )
+
+
+class _LoopSession:
+    """单个事件循环上的池化会话及其使用者"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession):
+        self.loop_ref = weakref.ref(loop)
+        self.session = session
+        self.owners: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        self.guard = None
+
+    def is_stale(self) -> bool:
+        loop = self.loop_ref()
+        return loop is None or loop.is_closed() or self.session.closed
+
+
+class HTTPSessionPool:
+    """按事件循环复用 aiohttp 会话的连接池
+
+    会话按事件循环 id 登记；每个会话同时注册一个异步生成器守卫，
+    事件循环关闭前（asyncio.run 的 shutdown_asyncgens 阶段）守卫会自动关闭会话并注销登记，
+    因此每个 Celery 任务各自 asyncio.run 也不会遗留连接器与套接字。
+    """
+
+    def __init__(self, config: Optional[HTTPPoolConfig] = None):
+        """
+        初始化连接池
+
+        Args:
+            config: 连接池配置，为 None 时使用默认配置
+        """
+        self.config = config or HTTPPoolConfig()
+        self._sessions: Dict[int, _LoopSession] = {}
+        self._lock = threading.RLock()
+        self._stats = {
+            "sessions_created": 0,
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._incr("requests")
+
+        async def on_connection_create_end(session, ctx, params):
+            self._incr("connections_created")
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._incr("connections_reused")
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def _incr(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.config.limit,
+            limit_per_host=self.config.limit_per_host,
+            keepalive_timeout=self.config.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.config.ttl_dns_cache,
+        )
+        self._incr("sessions_created")
+        return aiohttp.ClientSession(
+            connector=connector,
+            trace_configs=[self._build_trace_config()],
+        )
+
+    async def _teardown_guard(self, loop_id: int, session: aiohttp.ClientSession):
+        """事件循环关闭前由 shutdown_asyncgens 触发 finally，关闭会话并注销登记"""
+        try:
+            yield
+        finally:
+            with self._lock:
+                entry = self._sessions.get(loop_id)
+                if entry is not None and entry.session is session:
+                    self._sessions.pop(loop_id, None)
+            if not session.closed:
+                await session.close()
+
+    def _register_teardown(self, loop: asyncio.AbstractEventLoop, entry: _LoopSession) -> None:
+        guard = self._teardown_guard(id(loop), entry.session)
+        # 首次 __anext__ 会把生成器登记到事件循环的 asyncgen 钩子中
+        asyncio.ensure_future(guard.__anext__(), loop=loop)
+        entry.guard = guard
+
+    def get_session(self, owner: Any = None) -> aiohttp.ClientSession:
+        """
+        获取当前事件循环对应的会话，不存在或已关闭时自动创建
+
+        Args:
+            owner: 会话使用者（通常是提供商实例），登记后可通过 release 释放
+
+        Returns:
+            aiohttp.ClientSession: 可复用的会话
+
+        Raises:
+            RuntimeError: 不在事件循环中调用时
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.discard_closed_loops()
+            entry = self._sessions.get(id(loop))
+            if entry is None or entry.loop_ref() is not loop or entry.session.closed:
+                entry = _LoopSession(loop, self._create_session())
+                self._sessions[id(loop)] = entry
+                self._register_teardown(loop, entry)
+            if owner is not None:
+                entry.owners.add(owner)
+            return entry.session
+
+    async def post_json(self, url: str, headers: Dict[str, str],
+                        data: Dict[str, Any], timeout: int = 300,
+                        owner: Any = None) -> Dict[str, Any]:
+        """
+        使用池化会话发送 JSON POST 请求
+
+        Args:
+            url: 请求URL
+            headers: 请求头
+            data: 请求数据
+            timeout: 超时时间（秒）
+            owner: 会话使用者，见 get_session
+
+        Returns:
+            Dict: 响应数据
+
+        Raises:
+            aiohttp.ClientError: HTTP请求失败
+            asyncio.TimeoutError: 请求超时
+        """
+        session = self.get_session(owner)
+        async with session.post(
+            url,
+            headers=headers,
+            json=data,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def release(self, owner: Any) -> None:
+        """
+        释放使用者对当前事件循环会话的引用
+
+        只有当该会话的最后一个使用者释放后才会真正关闭会话，
+        同一循环上其他仍在使用的提供商不受影响。
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._sessions.get(id(loop))
+            if entry is None or entry.loop_ref() is not loop:
+                return
+            entry.owners.discard(owner)
+            if len(entry.owners) > 0:
+                return
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        强制关闭当前事件循环对应的会话
+
+        会中断该循环上所有使用者的请求，仅应在事件循环结束前调用。
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._sessions.get(id(loop))
+            if entry is None or entry.loop_ref() is not loop:
+                return
+            self._sessions.pop(id(loop), None)
+        # 守卫随后在循环关闭时执行 finally，发现会话已注销且关闭后直接返回
+        if not entry.session.closed:
+            await entry.session.close()
+
+    def discard_closed_loops(self) -> int:
+        """
+        丢弃已关闭事件循环上残留的会话
+
+        正常情况下守卫会在循环关闭前完成清理；这里兜底处理未经 asyncio.run
+        管理、直接关闭的事件循环。已关闭的循环无法再执行 session.close()，只解除引用。
+
+        Returns:
+            int: 丢弃的会话数量
+        """
+        with self._lock:
+            stale = [loop_id for loop_id, entry in self._sessions.items() if entry.is_stale()]
+            for loop_id in stale:
+                self._sessions.pop(loop_id, None)
+        return len(stale)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池统计信息
+
+        Returns:
+            Dict: 包含请求数、新建/复用连接数与连接复用率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["active_sessions"] = sum(
+                1 for entry in self._sessions.values() if not entry.is_stale()
+            )
+        total = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = round(stats["connections_reused"] / total, 4) if total else 0.0
+        return stats
+
+
+_default_pool: Optional[HTTPSessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_http_session_pool() -> HTTPSessionPool:
+    """
+    获取进程级默认连接池（单例）
+
+    配置读取自 config.yml 的 ai_providers.http_pool 段。
+
+    Returns:
+        HTTPSessionPool: 默认连接池
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                from services.common.config_loader import get_config
+
+                pool_config = (get_config().get("ai_providers") or {}).get("http_pool") or {}
+                _default_pool = HTTPSessionPool(HTTPPoolConfig.from_dict(pool_config))
+                logger.info(f"AI HTTP连接池已初始化: {_default_pool.config.to_dict()}")
+    return _default_pool
+
+
+async def close_http_session_pool() -> None:
+    """
+    强制关闭默认连接池在当前事件循环上的会话
+
+    asyncio.run 管理的事件循环会自动清理；仅在手动管理事件循环时于循环结束前调用一次。
+    """
+    if _default_pool is not None:
+        await _default_pool.close()
@@ -0,0 +1,331 @@
+"""
+LLM 响应持久化缓存
+
+按内容寻址缓存 LLM 响应，避免工作流重跑或重复处理同一素材时再次付费调用：
+- 缓存键由 (provider, model, system prompt 哈希, user prompt 哈希, temperature) 组成
+- 本地 SQLite 文件存储，支持 TTL 过期与按条目数/字节数的 LRU 淘汰
+- 默认仅缓存低温度（temperature <= max_cacheable_temperature，与各提供商默认的 0.1 一致）的调用；
+  温度是缓存键的一部分，不同温度的响应互不复用
+- 提供命中/未命中统计与旁路开关（配置 bypass 或环境变量 LLM_CACHE_BYPASS）
+
+调用方应只在响应通过业务校验后再写入缓存，避免把无效响应固化下来。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from services.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class LLMCacheConfig:
+    """LLM 响应缓存配置"""
+    enabled: bool = True
+    path: str = "/app/tmp/llm_cache/llm_responses.sqlite3"
+    ttl_seconds: int = 7 * 24 * 3600  # 0 表示永不过期
+    max_entries: int = 50000
+    max_bytes: int = 512 * 1024 * 1024
+    max_cacheable_temperature: float = 0.1
+    bypass: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "max_cacheable_temperature": self.max_cacheable_temperature,
+            "bypass": self.bypass,
+        }
+
+    @classmethod
+    def from_dict(cls, config_dict: Dict[str, Any]) -> "LLMCacheConfig":
+        default = cls()
+        return cls(
+            enabled=bool(config_dict.get("enabled", default.enabled)),
+            path=config_dict.get("path", default.path),
+            ttl_seconds=int(config_dict.get("ttl_seconds", default.ttl_seconds)),
+            max_entries=int(config_dict.get("max_entries", default.max_entries)),
+            max_bytes=int(config_dict.get("max_bytes", default.max_bytes)),
+            max_cacheable_temperature=float(
+                config_dict.get("max_cacheable_temperature", default.max_cacheable_temperature)
+            ),
+            bypass=bool(config_dict.get("bypass", default.bypass)),
+        )
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """基于 SQLite 的 LLM 响应缓存"""
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS llm_responses ("
+        " cache_key TEXT PRIMARY KEY,"
+        " provider TEXT NOT NULL,"
+        " model TEXT NOT NULL,"
+        " response TEXT NOT NULL,"
+        " size_bytes INTEGER NOT NULL,"
+        " created_at REAL NOT NULL,"
+        " expires_at REAL,"
+        " last_access_at REAL NOT NULL)"
+    )
+
+    def __init__(self, config: Optional[LLMCacheConfig] = None):
+        """
+        初始化缓存
+
+        Args:
+            config: 缓存配置，为 None 时使用默认配置
+        """
+        self.config = config or LLMCacheConfig()
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "expired": 0,
+            "bypassed": 0,
+            "errors": 0,
+        }
+
+    # --- 键与可缓存判定 ---
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_prompt: Optional[str],
+                 user_prompt: str, temperature: float) -> str:
+        """
+        生成内容寻址缓存键
+
+        Returns:
+            str: sha256 十六进制缓存键
+        """
+        parts = [
+            str(provider or ""),
+            str(model or ""),
+            _sha256(system_prompt or ""),
+            _sha256(user_prompt),
+            repr(float(temperature)),
+        ]
+        return _sha256("\x1f".join(parts))
+
+    def is_bypassed(self) -> bool:
+        """配置或环境变量要求绕过缓存时返回 True"""
+        env_value = os.getenv("LLM_CACHE_BYPASS", "")
+        return self.config.bypass or env_value.lower() in ("1", "true", "yes", "on")
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """只有启用缓存且温度不高于可缓存上限的调用才会被缓存"""
+        if not self.config.enabled:
+            return False
+        try:
+            return float(temperature) <= self.config.max_cacheable_temperature
+        except (TypeError, ValueError):
+            return False
+
+    # --- 存储 ---
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.config.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(self._SCHEMA)
+                    conn.execute(
+                        "CREATE INDEX IF NOT EXISTS idx_llm_responses_access"
+                        " ON llm_responses (last_access_at)"
+                    )
+                    conn.commit()
+                    self._initialized = True
+        return conn
+
+    def _ensure_dir(self) -> None:
+        cache_dir = os.path.dirname(self.config.path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _incr(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def get(self, provider: str, model: str, system_prompt: Optional[str],
+            user_prompt: str, temperature: float) -> Optional[str]:
+        """
+        查询缓存
+
+        Returns:
+            Optional[str]: 命中时返回缓存的响应文本，否则返回 None
+        """
+        if not self.is_cacheable(temperature):
+            return None
+        if self.is_bypassed():
+            self._incr("bypassed")
+            return None
+
+        cache_key = self.make_key(provider, model, system_prompt, user_prompt, temperature)
+        now = time.time()
+        try:
+            self._ensure_dir()
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT response, expires_at FROM llm_responses WHERE cache_key = ?",
+                    (cache_key,),
+                ).fetchone()
+                if row is None:
+                    self._incr("misses")
+                    return None
+                response, expires_at = row
+                if expires_at is not None and expires_at <= now:
+                    conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                    conn.commit()
+                    self._incr("expired")
+                    self._incr("misses")
+                    return None
+                conn.execute(
+                    "UPDATE llm_responses SET last_access_at = ? WHERE cache_key = ?",
+                    (now, cache_key),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self._incr("errors")
+            logger.warning(f"读取LLM响应缓存失败: {e}")
+            return None
+
+        self._incr("hits")
+        logger.debug(f"LLM响应缓存命中: {provider}/{model} key={cache_key[:12]}")
+        return response
+
+    def set(self, provider: str, model: str, system_prompt: Optional[str],
+            user_prompt: str, temperature: float, response: str) -> bool:
+        """
+        写入缓存（仅在响应已通过校验后调用）
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if not response or not self.is_cacheable(temperature) or self.is_bypassed():
+            return False
+
+        cache_key = self.make_key(provider, model, system_prompt, user_prompt, temperature)
+        now = time.time()
+        expires_at = now + self.config.ttl_seconds if self.config.ttl_seconds > 0 else None
+        size_bytes = len(response.encode("utf-8"))
+        try:
+            self._ensure_dir()
+            conn = self._connect()
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses"
+                    " (cache_key, provider, model, response, size_bytes, created_at, expires_at, last_access_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cache_key, str(provider), str(model), response, size_bytes, now, expires_at, now),
+                )
+                self._evict(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self._incr("errors")
+            logger.warning(f"写入LLM响应缓存失败: {e}")
+            return False
+
+        self._incr("writes")
+        return True
+
+    def invalidate(self, provider: str, model: str, system_prompt: Optional[str],
+                   user_prompt: str, temperature: float) -> None:
+        """删除指定调用的缓存（缓存内容未通过校验时使用）"""
+        cache_key = self.make_key(provider, model, system_prompt, user_prompt, temperature)
+        try:
+            self._ensure_dir()
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+                conn.commit()
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self._incr("errors")
+            logger.warning(f"删除LLM响应缓存失败: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """清理过期条目，并按最近访问时间淘汰超出条目数/字节数上限的条目"""
+        expired = conn.execute(
+            "DELETE FROM llm_responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        if expired:
+            self._incr("expired", expired)
+
+        count, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_responses"
+        ).fetchone()
+        if count <= self.config.max_entries and total_bytes <= self.config.max_bytes:
+            return
+
+        evicted = 0
+        rows = conn.execute(
+            "SELECT cache_key, size_bytes FROM llm_responses ORDER BY last_access_at ASC"
+        ).fetchall()
+        for cache_key, size_bytes in rows:
+            if count <= self.config.max_entries and total_bytes <= self.config.max_bytes:
+                break
+            conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (cache_key,))
+            count -= 1
+            total_bytes -= size_bytes
+            evicted += 1
+        if evicted:
+            self._incr("evictions", evicted)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict: 命中/未命中/写入/淘汰计数与命中率
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_default_cache: Optional[LLMResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """
+    获取进程级默认缓存（单例）
+
+    配置读取自 config.yml 的 ai_providers.response_cache 段。
+
+    Returns:
+        LLMResponseCache: 默认缓存实例
+    """
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                from services.common.config_loader import get_config
+
+                cache_config = (get_config().get("ai_providers") or {}).get("response_cache") or {}
+                _default_cache = LLMResponseCache(LLMCacheConfig.from_dict(cache_config))
+                logger.info(f"LLM响应缓存已初始化: {_default_cache.config.to_dict()}")
+    return _default_cache
@@ -4,6 +4,7 @@
 提供完整的字幕优化流程，包括加载、分段、LLM优化、合并和时间戳重建。
 """
 
+from .concurrency import AdaptiveConcurrencyLimiter, get_shared_limiter
 from .config import (
     DebugConfig,
     LLMConfig,
@@ -43,6 +44,8 @@ __all__ = [
     "LLMOptimizer",
     "TimestampReconstructor",
     "DebugLogger",
+    "AdaptiveConcurrencyLimiter",
+    "get_shared_limiter",
     # 数据模型
     "OptimizationResult",
     "OptimizationStatus",
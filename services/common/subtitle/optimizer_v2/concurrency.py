@@ -0,0 +1,334 @@
+"""自适应并发控制
+
+基于AIMD（加性增、乘性减）的LLM调用并发限制器，在同一worker进程内的所有LLM调用间共享：
+- 调用成功时窗口加性增长（每个窗口周期约+1）
+- 遇到429限流或超时时窗口乘性收缩，并遵守 Retry-After 暂停放行
+- 等待者按到达顺序放行，可查询当前窗口与排队深度
+
+Classes:
+    AdaptiveConcurrencyLimiter: AIMD并发限制器
+
+Functions:
+    get_shared_limiter: 获取进程内按名称与参数共享的限制器
+"""
+
+import asyncio
+import collections
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import aiohttp
+
+
+class _Waiter:
+    """排队等待者"""
+
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+class _Slot:
+    """已获取的并发槽位，作为异步上下文管理器在退出时根据结果调整窗口"""
+
+    def __init__(self, limiter: "AdaptiveConcurrencyLimiter"):
+        self._limiter = limiter
+        self.started_at = 0.0
+
+    async def __aenter__(self) -> "_Slot":
+        await self._limiter._acquire()
+        self.started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if exc is None:
+            self._limiter._release(self.started_at, success=True)
+        elif AdaptiveConcurrencyLimiter.is_overload_error(exc):
+            self._limiter._release(
+                self.started_at,
+                overloaded=True,
+                retry_after=AdaptiveConcurrencyLimiter.parse_retry_after(exc),
+            )
+        else:
+            self._limiter._release(self.started_at)
+        return False
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD并发限制器
+
+    线程安全，可跨事件循环共享（每个 Celery 任务各自 asyncio.run 时依然共用同一窗口）。
+
+    Attributes:
+        min_limit: 窗口下限
+        max_limit: 窗口上限
+        increase_step: 每个窗口周期的加性增长量
+        decrease_factor: 过载时的乘性收缩系数
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 3,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+        default_retry_after: float = 1.0,
+    ):
+        """初始化限制器
+
+        Args:
+            initial_limit: 初始窗口
+            min_limit: 窗口下限
+            max_limit: 窗口上限
+            increase_step: 每个窗口周期的加性增长量
+            decrease_factor: 过载时的乘性收缩系数（0-1）
+            default_retry_after: 429响应未携带 Retry-After 时的暂停秒数
+
+        Raises:
+            ValueError: 参数无效
+        """
+        if min_limit <= 0:
+            raise ValueError(f"窗口下限必须大于0: {min_limit}")
+        if max_limit < min_limit:
+            raise ValueError(f"窗口上限不能小于下限: {max_limit} < {min_limit}")
+        if not 0.0 < decrease_factor < 1.0:
+            raise ValueError(f"收缩系数必须在0-1之间: {decrease_factor}")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.default_retry_after = default_retry_after
+
+        self._window = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = collections.deque()
+        self._paused_until = 0.0
+        self._resume_timer: Optional[threading.Timer] = None
+        self._last_decrease_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "acquired": 0,
+            "successes": 0,
+            "overloads": 0,
+            "decreases": 0,
+        }
+
+    # --- 对外接口 ---
+
+    def slot(self) -> _Slot:
+        """获取并发槽位
+
+        用法::
+
+            async with limiter.slot():
+                response = await provider.call(...)
+
+        Returns:
+            异步上下文管理器
+        """
+        return _Slot(self)
+
+    @property
+    def limit(self) -> int:
+        """当前生效的并发窗口"""
+        with self._lock:
+            return int(self._window)
+
+    @property
+    def in_flight(self) -> int:
+        """正在执行的调用数"""
+        with self._lock:
+            return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """排队等待的调用数"""
+        with self._lock:
+            return len(self._waiters)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取限制器统计信息
+
+        Returns:
+            包含当前窗口、在途数、排队深度与计数的字典
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "window": round(self._window, 3),
+                "limit": int(self._window),
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            })
+        return stats
+
+    @staticmethod
+    def is_overload_error(exc: BaseException) -> bool:
+        """判断异常是否表示提供商过载（429限流或超时）"""
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status == 429 or exc.status == 503
+        return isinstance(exc, (asyncio.TimeoutError, aiohttp.ServerTimeoutError))
+
+    @staticmethod
+    def parse_retry_after(exc: BaseException) -> Optional[float]:
+        """从异常携带的响应头中解析 Retry-After（秒数或HTTP日期）
+
+        Returns:
+            需要暂停的秒数，无法解析时返回 None
+        """
+        headers = getattr(exc, "headers", None)
+        if not headers:
+            return None
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError, IndexError):
+            return None
+
+    # --- 内部实现 ---
+
+    def _can_admit(self, now: float) -> bool:
+        return self._in_flight < int(self._window) and now >= self._paused_until
+
+    def _dispatch(self) -> None:
+        """按到达顺序放行等待者（需持有锁）"""
+        now = time.monotonic()
+        while self._waiters and self._can_admit(now):
+            waiter = self._waiters.popleft()
+            if waiter.future.done() or waiter.loop.is_closed():
+                continue
+            waiter.granted = True
+            self._in_flight += 1
+            self._stats["acquired"] += 1
+            waiter.loop.call_soon_threadsafe(self._resolve, waiter.future)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(True)
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self._can_admit(time.monotonic()):
+                self._in_flight += 1
+                self._stats["acquired"] += 1
+                return
+            waiter = _Waiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        try:
+            while True:
+                with self._lock:
+                    if waiter.granted:
+                        return
+                    pause = self._paused_until - time.monotonic()
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(waiter.future),
+                        timeout=pause if pause > 0 else None,
+                    )
+                except asyncio.TimeoutError:
+                    # Retry-After 暂停结束，尝试放行队首
+                    with self._lock:
+                        self._dispatch()
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._dispatch()
+                else:
+                    try:
+                        self._waiters.remove(waiter)
+                    except ValueError:
+                        pass
+            raise
+
+    def _release(
+        self,
+        started_at: float,
+        success: bool = False,
+        overloaded: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if success:
+                self._stats["successes"] += 1
+                self._window = min(
+                    float(self.max_limit),
+                    self._window + self.increase_step / max(self._window, 1.0),
+                )
+            elif overloaded:
+                self._stats["overloads"] += 1
+                # 同一批在途请求只收缩一次，避免一次限流把窗口压到最低
+                if started_at >= self._last_decrease_at:
+                    self._window = max(float(self.min_limit), self._window * self.decrease_factor)
+                    self._last_decrease_at = now
+                    self._stats["decreases"] += 1
+                pause = retry_after if retry_after is not None else self.default_retry_after
+                if now + pause > self._paused_until:
+                    self._paused_until = now + pause
+                    self._arm_resume_timer(pause)
+            self._dispatch()
+
+    def _arm_resume_timer(self, pause: float) -> None:
+        """暂停结束时放行队首（需持有锁）
+
+        暂停期间在途调用可能全部结束，之后不再有 _release 触发放行；无超时等待的排队者
+        也不会自行醒来，因此由定时器在暂停结束时调用 _dispatch。限制器跨事件循环共享，
+        使用线程定时器而不是某个事件循环的 call_later（该循环可能先于暂停结束而关闭）。
+        """
+        if self._resume_timer is not None:
+            self._resume_timer.cancel()
+        timer = threading.Timer(pause, self._resume)
+        timer.daemon = True
+        self._resume_timer = timer
+        timer.start()
+
+    def _resume(self) -> None:
+        with self._lock:
+            self._resume_timer = None
+            self._dispatch()
+
+
+_shared_limiters: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], AdaptiveConcurrencyLimiter] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def get_shared_limiter(name: str, **kwargs: Any) -> AdaptiveConcurrencyLimiter:
+    """获取进程内按名称共享的限制器
+
+    按名称与参数共享：名称与 kwargs 都相同的调用返回同一实例，参数变化（如关闭自适应、
+    调整并发上限）时创建新的限制器，不会沿用首次创建时的参数。
+
+    Args:
+        name: 限制器名称（通常为提供商名称）
+        **kwargs: 传给 AdaptiveConcurrencyLimiter 的参数
+
+    Returns:
+        AdaptiveConcurrencyLimiter实例
+    """
+    key = (name, tuple(sorted(kwargs.items())))
+    with _shared_limiters_lock:
+        limiter = _shared_limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(**kwargs)
+            _shared_limiters[key] = limiter
+        return limiter
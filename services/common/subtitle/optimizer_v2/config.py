@@ -63,7 +63,9 @@ class SubtitleOptimizerConfig:
     Attributes:
         segment_size: 分段大小（字幕行数）
         overlap_lines: 重叠行数
-        max_concurrent: 最大并发数
+        max_concurrent: 初始并发数（关闭自适应并发时即固定并发数）
+        adaptive_concurrency: 是否启用AIMD自适应并发
+        max_concurrent_ceiling: 自适应并发窗口上限
         max_retries: 最大重试次数
         retry_backoff_base: 重试退避基数
         diff_threshold: 差异阈值（用于检测修改）
@@ -74,6 +76,8 @@ class SubtitleOptimizerConfig:
     segment_size: int = 100
     overlap_lines: int = 20
     max_concurrent: int = 3
+    adaptive_concurrency: bool = True
+    max_concurrent_ceiling: int = 16
     max_retries: int = 3
     retry_backoff_base: int = 1
     diff_threshold: float = 0.3
@@ -91,6 +95,10 @@ class SubtitleOptimizerConfig:
             raise ValueError(f"重叠行数必须小于分段大小: {self.overlap_lines} >= {self.segment_size}")
         if self.max_concurrent <= 0:
             raise ValueError(f"最大并发数必须大于0: {self.max_concurrent}")
+        if self.max_concurrent_ceiling < self.max_concurrent:
+            raise ValueError(
+                f"并发窗口上限不能小于初始并发数: {self.max_concurrent_ceiling} < {self.max_concurrent}"
+            )
         if self.max_retries < 0:
             raise ValueError(f"最大重试次数不能为负数: {self.max_retries}")
         if self.retry_backoff_base < 0:
@@ -100,12 +108,23 @@ class SubtitleOptimizerConfig:
         if self.max_overlap_expand < 0:
             raise ValueError(f"最大重叠扩展行数不能为负数: {self.max_overlap_expand}")
 
+    def get_limiter_options(self) -> Dict[str, Any]:
+        """构建并发限制器参数，关闭自适应时窗口固定为 max_concurrent"""
+        ceiling = self.max_concurrent_ceiling if self.adaptive_concurrency else self.max_concurrent
+        return {
+            "initial_limit": self.max_concurrent,
+            "min_limit": 1 if self.adaptive_concurrency else self.max_concurrent,
+            "max_limit": ceiling,
+        }
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
         return {
             "segment_size": self.segment_size,
             "overlap_lines": self.overlap_lines,
             "max_concurrent": self.max_concurrent,
+            "adaptive_concurrency": self.adaptive_concurrency,
+            "max_concurrent_ceiling": self.max_concurrent_ceiling,
             "max_retries": self.max_retries,
             "retry_backoff_base": self.retry_backoff_base,
             "diff_threshold": self.diff_threshold,
@@ -124,6 +143,10 @@ class SubtitleOptimizerConfig:
             segment_size=config_dict.get("segment_size", 100),
             overlap_lines=config_dict.get("overlap_lines", 20),
             max_concurrent=config_dict.get("max_concurrent", 3),
+            adaptive_concurrency=config_dict.get("adaptive_concurrency", True),
+            max_concurrent_ceiling=config_dict.get(
+                "max_concurrent_ceiling", max(16, config_dict.get("max_concurrent", 3))
+            ),
             max_retries=config_dict.get("max_retries", 3),
             retry_backoff_base=config_dict.get("retry_backoff_base", 1),
             diff_threshold=config_dict.get("diff_threshold", 0.3),
@@ -19,6 +19,11 @@ from services.common.subtitle.optimizer_v2.models import (
 )
 from services.common.subtitle.optimizer_v2.llm_providers import LLMProvider, LLMProviderFactory
 from services.common.subtitle.optimizer_v2.config import LLMConfig
+from services.common.subtitle.optimizer_v2.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    get_shared_limiter,
+)
+from services.common.subtitle.llm_response_cache import LLMResponseCache, get_llm_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +46,8 @@ class LLMOptimizer:
         provider: AI提供商实例
         config: LLM配置
         retry_config: 重试配置
+        cache: LLM响应缓存
+        limiter: 自适应并发限制器（同一worker内按提供商共享）
     """
 
     def __init__(
@@ -48,6 +55,9 @@ class LLMOptimizer:
         provider: Optional[LLMProvider] = None,
         llm_config: Optional[LLMConfig] = None,
         retry_config: Optional[LLMOptimizerConfig] = None,
+        cache: Optional[LLMResponseCache] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        limiter_options: Optional[Dict[str, Any]] = None,
     ):
         """初始化LLM优化器
 
@@ -55,9 +65,13 @@ class LLMOptimizer:
             provider: LLM提供商实例，如果为None则使用默认配置创建
             llm_config: LLM配置
             retry_config: 重试配置
+            cache: LLM响应缓存，如果为None则使用进程级默认缓存
+            limiter: 并发限制器，如果为None则使用按提供商共享的限制器
+            limiter_options: 共享限制器的参数（参数不同则使用不同的限制器）
         """
         self.llm_config = llm_config or LLMConfig()
         self.retry_config = retry_config or LLMOptimizerConfig()
+        self.cache = cache or get_llm_response_cache()
 
         if provider is None:
             provider_config = {
@@ -69,6 +83,12 @@ class LLMOptimizer:
         else:
             self.provider = provider
 
+        # 与 subtitle_line_translator / subtitle_text_optimizer 使用相同的提供商名称作为缓存键
+        self.provider_name = getattr(self.provider, "provider_name", None) or self.provider.__class__.__name__
+        self.limiter = limiter or get_shared_limiter(
+            f"llm:{self.provider_name}", **(limiter_options or {})
+        )
+
     def _build_system_prompt(self) -> str:
         """构建System Prompt
 
@@ -316,6 +336,37 @@ class LLMOptimizer:
         """
         system_prompt = self._build_system_prompt()
         user_prompt = self._build_user_prompt(task, context_before, context_after)
+        cache_args = (
+            self.provider_name,
+            getattr(self.provider, "model", ""),
+            system_prompt,
+            user_prompt,
+            self.llm_config.temperature,
+        )
+
+        # SQLite 读写是阻塞调用，放到线程中执行，避免阻塞事件循环上的其他并发段
+        cached_response = await asyncio.to_thread(self.cache.get, *cache_args)
+        if cached_response is not None:
+            try:
+                optimized_lines = self._parse_response(cached_response, task)
+                is_valid, error_msg = self._validate_id_range(optimized_lines, task)
+                if not is_valid:
+                    raise ValueError(f"验证失败: {error_msg}")
+                logger.info(f"任务 {task.task_id} 命中LLM响应缓存")
+                return OptimizationResult(
+                    task_id=task.task_id,
+                    status=OptimizationStatus.COMPLETED,
+                    optimized_lines=optimized_lines,
+                    metadata={
+                        "attempts": 0,
+                        "cached": True,
+                        "original_segments": len(task.segments),
+                        "optimized_lines": len(optimized_lines),
+                    },
+                )
+            except ValueError as e:
+                logger.warning(f"任务 {task.task_id} 缓存响应无效，重新调用LLM: {e}")
+                await asyncio.to_thread(self.cache.invalidate, *cache_args)
 
         last_error = None
 
@@ -326,13 +377,14 @@ class LLMOptimizer:
                     f"尝试 {attempt + 1}/{self.retry_config.max_retries}"
                 )
 
-                # 调用LLM
-                response = await self.provider.call(
-                    prompt=user_prompt,
-                    system_prompt=system_prompt,
-                    max_tokens=self.llm_config.max_tokens,
-                    temperature=self.llm_config.temperature,
-                )
+                # 调用LLM（经共享并发窗口放行，限流/超时会收缩窗口）
+                async with self.limiter.slot():
+                    response = await self.provider.call(
+                        prompt=user_prompt,
+                        system_prompt=system_prompt,
+                        max_tokens=self.llm_config.max_tokens,
+                        temperature=self.llm_config.temperature,
+                    )
 
                 # 解析响应
                 optimized_lines = self._parse_response(response, task)
@@ -342,6 +394,9 @@ class LLMOptimizer:
                 if not is_valid:
                     raise ValueError(f"验证失败: {error_msg}")
 
+                # 只缓存通过校验的响应
+                await asyncio.to_thread(self.cache.set, *cache_args, response)
+
                 logger.info(
                     f"任务 {task.task_id} 优化成功，"
                     f"生成 {len(optimized_lines)} 行"
@@ -366,6 +421,10 @@ class LLMOptimizer:
 
                 # 如果不是最后一次尝试，则等待后重试
                 if attempt < self.retry_config.max_retries - 1:
+                    if AdaptiveConcurrencyLimiter.is_overload_error(e):
+                        # 限流/超时由共享限制器统一暂停放行（含 Retry-After），无需各自退避
+                        logger.info(f"提供商过载，等待并发窗口放行后重试: {self.limiter.get_stats()}")
+                        continue
                     delay = self._calculate_backoff_delay(attempt)
                     logger.info(f"等待 {delay:.1f} 秒后重试...")
                     await asyncio.sleep(delay)
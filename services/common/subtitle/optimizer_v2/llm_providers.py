@@ -17,7 +17,7 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlsplit, parse_qsl, urlencode, urlunsplit
 
-import aiohttp
+from services.common.subtitle.http_session_pool import HTTPSessionPool, get_http_session_pool
 
 
 class LLMProvider(ABC):
@@ -31,8 +31,11 @@ class LLMProvider(ABC):
         model: 模型名称
         max_tokens: 最大token数
         temperature: 温度参数
+        provider_name: 提供商名称（与 ai_providers 配置中的名称一致，用作缓存与限流的键）
     """
 
+    PROVIDER_NAME: str = ""
+
     def __init__(self, config: Dict[str, Any]):
         """初始化LLM提供商
 
@@ -40,12 +43,15 @@ class LLMProvider(ABC):
             config: 提供商配置，包含api_key, model, max_tokens等
         """
         self.config = config
+        self.provider_name = self.PROVIDER_NAME or self.__class__.__name__
         self.api_key = self._get_api_key()
         self.model = config.get("model", "")
         self.max_tokens = config.get("max_tokens", 4096)
         self.temperature = config.get("temperature", 0.1)
         self.enable_request_dump = config.get("enable_request_dump", False)
         self.request_dump_tag = config.get("request_dump_tag")
+        self.timeout = config.get("timeout", 300)
+        self.http_pool: HTTPSessionPool = config.get("http_pool") or get_http_session_pool()
 
     def _get_api_key(self) -> str:
         """从环境变量或配置中获取API密钥
@@ -154,15 +160,17 @@ class LLMProvider(ABC):
             pass  # 忽略转储失败
 
     async def _make_http_request(
-        self, url: str, headers: Dict[str, str], data: Dict[str, Any], timeout: int = 300
+        self, url: str, headers: Dict[str, str], data: Dict[str, Any], timeout: Optional[int] = None
     ) -> Dict[str, Any]:
         """发送HTTP POST请求
 
+        复用连接池中按事件循环缓存的会话，避免每次请求重复建立TCP/TLS连接。
+
         Args:
             url: 请求URL
             headers: 请求头
             data: 请求数据
-            timeout: 超时时间（秒）
+            timeout: 超时时间（秒），默认使用配置中的timeout
 
         Returns:
             响应数据字典
@@ -174,12 +182,18 @@ class LLMProvider(ABC):
         if self.enable_request_dump:
             self._dump_request(url, headers, data)
 
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=timeout)
-        ) as session:
-            async with session.post(url, headers=headers, json=data) as response:
-                response.raise_for_status()
-                return await response.json()
+        return await self.http_pool.post_json(
+            url, headers, data,
+            timeout=self.timeout if timeout is None else timeout,
+            owner=self,
+        )
+
+    async def aclose(self) -> None:
+        """释放本提供商对当前事件循环池化会话的引用
+
+        会话由同一循环上的所有提供商共享，只有最后一个使用者释放时才会关闭。
+        """
+        await self.http_pool.release(self)
 
     @abstractmethod
     async def call(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
@@ -215,6 +229,7 @@ class GeminiProvider(LLMProvider):
     """
 
     DEFAULT_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
+    PROVIDER_NAME = "gemini"
     DEFAULT_MODEL = "gemini-pro"
 
     def __init__(self, config: Dict[str, Any]):
@@ -308,6 +323,7 @@ class DeepSeekProvider(LLMProvider):
     """
 
     DEFAULT_API_URL = "https://api.deepseek.com/chat/completions"
+    PROVIDER_NAME = "deepseek"
     DEFAULT_MODEL = "deepseek-chat"
 
     def __init__(self, config: Dict[str, Any]):
@@ -416,7 +432,9 @@ class LLMProviderFactory:
             )
 
         provider_class = cls._providers[provider_name]
-        return provider_class(config)
+        provider = provider_class(config)
+        provider.provider_name = provider_name
+        return provider
 
     @classmethod
     def get_supported_providers(cls) -> List[str]:
@@ -80,7 +80,10 @@ class SubtitleOptimizerV2:
             LLM优化器实例
         """
         if self._llm_optimizer is None:
-            self._llm_optimizer = LLMOptimizer(llm_config=self.config.llm)
+            self._llm_optimizer = LLMOptimizer(
+                llm_config=self.config.llm,
+                limiter_options=self.config.get_limiter_options(),
+            )
         return self._llm_optimizer
 
     def load_from_file(self, file_path: str) -> "SubtitleOptimizerV2":
@@ -203,7 +206,8 @@ class SubtitleOptimizerV2:
         """
         并发优化所有分段
 
-        使用 asyncio.Semaphore 控制并发数，避免同时发送过多请求。
+        所有分段同时提交，实际并发由LLM优化器的共享AIMD限制器控制：
+        成功时窗口增长，遇到429/超时时收缩并遵守 Retry-After。
 
         Args:
             segment_tasks: 分段任务列表
@@ -211,43 +215,42 @@ class SubtitleOptimizerV2:
         Returns:
             各段的优化结果列表
         """
-        semaphore = asyncio.Semaphore(self.config.max_concurrent)
-
         async def optimize_with_limit(task: Any) -> OptimizationResult:
-            async with semaphore:
-                # 记录请求日志
-                if self.debug_logger.is_enabled():
-                    self.debug_logger.log_request(
-                        task_id=task.task_id,
-                        segment_idx=int(task.task_id.split("_")[-1]),
-                        prompt=f"优化 {len(task.segments)} 个字幕段",
-                        model=self.config.llm.model,
-                    )
+            # 记录请求日志
+            if self.debug_logger.is_enabled():
+                self.debug_logger.log_request(
+                    task_id=task.task_id,
+                    segment_idx=int(task.task_id.split("_")[-1]),
+                    prompt=f"优化 {len(task.segments)} 个字幕段",
+                    model=self.config.llm.model,
+                )
 
-                result = await self.llm_optimizer.optimize_segment(task)
+            result = await self.llm_optimizer.optimize_segment(task)
 
-                # 记录响应日志
-                if self.debug_logger.is_enabled():
-                    self.debug_logger.log_response(
-                        task_id=task.task_id,
-                        segment_idx=int(task.task_id.split("_")[-1]),
-                        response=f"生成 {len(result.optimized_lines)} 行",
-                    )
+            # 记录响应日志
+            if self.debug_logger.is_enabled():
+                self.debug_logger.log_response(
+                    task_id=task.task_id,
+                    segment_idx=int(task.task_id.split("_")[-1]),
+                    response=f"生成 {len(result.optimized_lines)} 行",
+                )
 
-                # 记录错误日志
-                if result.error_message and self.debug_logger.is_enabled():
-                    self.debug_logger.log_error(
-                        task_id=task.task_id,
-                        segment_idx=int(task.task_id.split("_")[-1]),
-                        error=Exception(result.error_message),
-                    )
+            # 记录错误日志
+            if result.error_message and self.debug_logger.is_enabled():
+                self.debug_logger.log_error(
+                    task_id=task.task_id,
+                    segment_idx=int(task.task_id.split("_")[-1]),
+                    error=Exception(result.error_message),
+                )
 
-                return result
+            return result
 
         # 并发执行所有任务
         tasks = [optimize_with_limit(task) for task in segment_tasks]
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
+        logger.info(f"LLM并发窗口状态: {self.llm_optimizer.limiter.get_stats()}")
+
         # 处理异常结果
         processed_results: List[OptimizationResult] = []
         for i, result in enumerate(results):
@@ -265,6 +268,15 @@ class SubtitleOptimizerV2:
 
         return processed_results
 
+    async def aclose(self) -> None:
+        """
+        释放LLM提供商对当前事件循环池化HTTP会话的引用
+
+        同一循环上仍有其他使用者时会话保持打开；asyncio.run 结束时连接池也会自动清理。
+        """
+        if self._llm_optimizer is not None:
+            await self._llm_optimizer.provider.aclose()
+
     def _build_output(
         self, word_timestamps_list: List[List[Any]]
     ) -> Dict[str, Any]:
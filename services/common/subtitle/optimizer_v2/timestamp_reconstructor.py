@@ -7,9 +7,9 @@
 """
 
 import logging
-from difflib import SequenceMatcher
 from typing import Dict, List, Optional, Tuple, Any
 
+from services.common.subtitle.anchored_matcher import AnchoredSequenceMatcher
 from services.common.subtitle.optimizer_v2.models import (
     SubtitleSegment,
     OptimizedLine,
@@ -67,7 +67,7 @@ class TimestampReconstructor:
         """
         查找稳定词（LCS最长公共子序列）
 
-        使用SequenceMatcher找到原始文本和优化后文本之间的最长公共子序列，
+        使用锚点分段对齐找到原始文本和优化后文本之间的公共子序列，
         这些未变化的词被视为"稳定词"，其时间戳将被保留作为锚点。
 
         Args:
@@ -87,8 +87,8 @@ class TimestampReconstructor:
         optimized_words = self._tokenize(optimized_text)
         optimized_word_list = [self._normalize_word(w) for w in optimized_words]
 
-        # 使用SequenceMatcher找到匹配块
-        matcher = SequenceMatcher(None, original_word_list, optimized_word_list, autojunk=False)
+        # 按锚点分段找到匹配块（长段落近似线性，短段落与SequenceMatcher一致）
+        matcher = AnchoredSequenceMatcher(original_word_list, optimized_word_list)
 
         stable_words = []
         for tag, i1, i2, j1, j2 in matcher.get_opcodes():
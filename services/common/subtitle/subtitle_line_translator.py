@@ -14,6 +14,7 @@ from services.common.config_loader import get_config
 from .prompt_loader import PromptLoader
 from .ai_providers_config import AIProvidersConfig
 from .subtitle_text_optimizer import SubtitleTextOptimizer
+from .llm_response_cache import LLMResponseCache, get_llm_response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,8 @@ class SubtitleLineTranslator:
         self,
         provider: Optional[str] = None,
         config: Optional[Dict[str, Any]] = None,
-        dump_tag: Optional[str] = None
+        dump_tag: Optional[str] = None,
+        cache: Optional[LLMResponseCache] = None
     ):
         config_data = config or get_config().get("ai_providers", {})
         self.config = AIProvidersConfig(config_data)
@@ -33,6 +35,7 @@ class SubtitleLineTranslator:
         self.prompt_loader = PromptLoader()
         self.dump_tag = dump_tag
         self._config_data = config_data
+        self.cache = cache or get_llm_response_cache()
 
     def translate_lines(
         self,
@@ -82,15 +85,26 @@ class SubtitleLineTranslator:
 
         empty_allowed = self._should_allow_empty_output(budgets)
 
+        # 注入 ai_call 时不走缓存；缓存仅在首次尝试读取，且只写入通过校验的输出
+        cache_args = None
+        if ai_call is None:
+            cache_args = self._get_cache_args(system_prompt, user_prompt, provider)
+
         last_error = ""
         last_output = ""
         for attempt in range(1, retry_limit + 1):
-            output_text = self._call_ai(
-                system_prompt,
-                user_prompt,
-                provider=provider,
-                ai_call=ai_call
-            )
+            output_text = None
+            from_cache = False
+            if cache_args and attempt == 1:
+                output_text = self.cache.get(*cache_args)
+                from_cache = output_text is not None
+            if output_text is None:
+                output_text = self._call_ai(
+                    system_prompt,
+                    user_prompt,
+                    provider=provider,
+                    ai_call=ai_call
+                )
             output_text = output_text if output_text is not None else ""
             last_output = output_text
             if not output_text:
@@ -111,9 +125,13 @@ class SubtitleLineTranslator:
             error = self._validate_output_lines(lines, budgets)
             if error:
                 last_error = error
+                if from_cache:
+                    self.cache.invalidate(*cache_args)
                 logger.warning("逐行翻译校验失败: %s, 尝试重试: %s/%s", error, attempt, retry_limit)
                 continue
 
+            if cache_args and not from_cache:
+                self.cache.set(*cache_args, output_text)
             translated_segments = self._apply_translated_lines(segments, lines)
             return {
                 "success": True,
@@ -144,6 +162,22 @@ class SubtitleLineTranslator:
         )
         return optimizer._call_ai(system_prompt, user_prompt)
 
+    def _get_cache_args(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        provider: Optional[str] = None
+    ) -> tuple:
+        provider_name = provider or self.provider_name
+        provider_config = self.config.get_provider_config(provider_name)
+        return (
+            provider_name,
+            provider_config.get("model", ""),
+            system_prompt,
+            user_prompt,
+            provider_config.get("temperature", 0.1),
+        )
+
     def _build_budgets(
         self,
         segments: List[Dict[str, Any]],
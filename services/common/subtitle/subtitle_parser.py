@@ -8,7 +8,7 @@
 import re
 import os
 import json
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, Optional, Union, Iterable, Iterator
 from dataclasses import dataclass
 import logging
 
@@ -138,6 +138,10 @@ class SRTParser:
 
     # SRT时间戳正则表达式
     TIME_PATTERN = re.compile(r'(\d{1,2}:\d{2}:\d{2}[,\.]\d{3})\s*-->\s*(\d{1,2}:\d{2}:\d{2}[,\.]\d{3})')
+    # 与 TIME_PATTERN 匹配范围相同，直接捕获时/分/秒/毫秒，一次匹配得到起止时间
+    TIME_FIELDS_PATTERN = re.compile(
+        r'(\d{1,2}):(\d{2}):(\d{2})[,\.](\d{3})\s*-->\s*(\d{1,2}):(\d{2}):(\d{2})[,\.](\d{3})'
+    )
 
     def __init__(self):
         """初始化SRT解析器"""
@@ -162,9 +166,8 @@ class SRTParser:
 
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                entries = self._validate_and_sort_entries(list(self.iter_entries(f)))
 
-            entries = self.parse_text(content)
             logger.info(f"成功解析SRT文件: {file_path}，共 {len(entries)} 条字幕")
             return entries
 
@@ -202,6 +205,56 @@ class SRTParser:
         logger.debug(f"解析SRT文本完成，共 {len(entries)} 条字幕")
         return entries
 
+    def iter_entries(self, lines: Iterable[str]) -> Iterator[SubtitleEntry]:
+        """
+        增量解析SRT行流，逐条产出字幕条目
+
+        按行累积字幕块，遇到空白行即解析并产出，不需要一次载入整个文件。
+        分块规则与 parse_text 一致；产出顺序即文件顺序，不做排序和重新编号。
+
+        Args:
+            lines: 行迭代器（如打开的文件对象）
+
+        Yields:
+            SubtitleEntry: 解析成功的字幕条目
+        """
+        block_lines: List[str] = []
+        for line in lines:
+            if line.endswith('\n'):
+                line = line[:-1]
+            if line.strip():
+                block_lines.append(line)
+                continue
+            if block_lines:
+                entry = self._parse_block('\n'.join(block_lines).strip())
+                block_lines = []
+                if entry:
+                    yield entry
+
+        if block_lines:
+            entry = self._parse_block('\n'.join(block_lines).strip())
+            if entry:
+                yield entry
+
+    def iter_file(self, file_path: str) -> Iterator[SubtitleEntry]:
+        """
+        以流式方式逐条读取SRT字幕文件
+
+        Args:
+            file_path: SRT文件路径
+
+        Yields:
+            SubtitleEntry: 解析成功的字幕条目
+
+        Raises:
+            FileNotFoundError: 文件不存在
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"SRT文件不存在: {file_path}")
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from self.iter_entries(f)
+
     def _parse_block(self, block: str) -> Optional[SubtitleEntry]:
         """
         解析单个字幕块
@@ -228,15 +281,15 @@ class SRTParser:
 
             # 第二行：时间戳
             time_line = lines[1].strip()
-            time_match = self.TIME_PATTERN.match(time_line)
+            time_match = self.TIME_FIELDS_PATTERN.match(time_line)
 
             if not time_match:
                 logger.warning(f"时间戳格式不正确: {time_line}")
                 return None
 
-            start_time_str, end_time_str = time_match.groups()
-            start_time = SubtitleEntry._srt_time_to_seconds(start_time_str)
-            end_time = SubtitleEntry._srt_time_to_seconds(end_time_str)
+            sh, sm, ss, sms, eh, em, es, ems = map(int, time_match.groups())
+            start_time = sh * 3600 + sm * 60 + ss + sms / 1000
+            end_time = eh * 3600 + em * 60 + es + ems / 1000
 
             if start_time > end_time: # 允许相等
                 logger.warning(f"时间戳无效: 开始时间 > 结束时间 ({start_time} > {end_time})")
@@ -12,6 +12,7 @@ from typing import Any, Dict, List, Optional
 from services.common.config_loader import get_config
 
 from .ai_providers import AIProviderFactory
+from .llm_response_cache import LLMResponseCache, get_llm_response_cache
 from .prompt_loader import PromptLoader
 from .ai_providers_config import AIProvidersConfig
 from .subtitle_extractor import SubtitleExtractor
@@ -26,7 +27,8 @@ class SubtitleTextOptimizer:
         self,
         provider: Optional[str] = None,
         config: Optional[Dict[str, Any]] = None,
-        dump_tag: Optional[str] = None
+        dump_tag: Optional[str] = None,
+        cache: Optional[LLMResponseCache] = None
     ):
         config_data = config or get_config().get("ai_providers", {})
         self.config = AIProvidersConfig(config_data)
@@ -34,6 +36,7 @@ class SubtitleTextOptimizer:
         self.prompt_loader = PromptLoader()
         self.extractor = SubtitleExtractor()
         self.dump_tag = dump_tag
+        self.cache = cache or get_llm_response_cache()
 
     def optimize_text(
         self,
@@ -54,7 +57,13 @@ class SubtitleTextOptimizer:
                 return {"success": False, "error": "字幕文本为空"}
 
             system_prompt = self.prompt_loader.load_prompt(prompt_file_path)
-            optimized_text = self._call_ai(system_prompt, merged_text)
+            cache_args = self.get_cache_args(system_prompt, merged_text)
+            optimized_text = self.cache.get(*cache_args)
+            cache_hit = optimized_text is not None
+            if not cache_hit:
+                optimized_text = self._call_ai(system_prompt, merged_text)
+                if optimized_text:
+                    self.cache.set(*cache_args, optimized_text)
 
             return {
                 "success": True,
@@ -64,6 +73,7 @@ class SubtitleTextOptimizer:
                     "segments_count": len(segments),
                     "input_chars": len(merged_text),
                     "output_chars": len(optimized_text),
+                    "cache_hit": cache_hit,
                     "processing_time": round(time.time() - start_time, 2)
                 }
             }
@@ -75,6 +85,17 @@ class SubtitleTextOptimizer:
         texts = [str(segment.get("text", "")).strip() for segment in segments]
         return " ".join(texts)
 
+    def get_cache_args(self, system_prompt: str, user_text: str) -> tuple:
+        """构建 LLM 响应缓存键参数 (provider, model, system, user, temperature)"""
+        provider_config = self.config.get_provider_config(self.provider_name)
+        return (
+            self.provider_name,
+            provider_config.get("model", ""),
+            system_prompt,
+            user_text,
+            provider_config.get("temperature", 0.1),
+        )
+
     def _call_ai(self, system_prompt: str, user_text: str) -> str:
         provider_config = self.config.get_provider_config(self.provider_name)
         provider = AIProviderFactory.create_provider(self.provider_name, provider_config)
@@ -84,10 +105,16 @@ class SubtitleTextOptimizer:
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_text}
         ]
-        return asyncio.run(
-            provider.chat_completion(
-                messages,
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature
-            )
-        )
+
+        async def _run() -> str:
+            try:
+                return await provider.chat_completion(
+                    messages,
+                    max_tokens=self.config.max_tokens,
+                    temperature=self.config.temperature
+                )
+            finally:
+                # asyncio.run 结束时会关闭事件循环，需在此之前释放池化会话
+                await provider.aclose()
+
+        return asyncio.run(_run())
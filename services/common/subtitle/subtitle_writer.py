@@ -0,0 +1,203 @@
+"""
+字幕快速写出模块
+
+面向批量导出的 SRT/JSON 写出快速路径：
+- 时间戳批量格式化：NumPy 整数运算一次算出时/分/秒/毫秒，结果与逐条 _format_srt_time 完全一致
+- SRT 文本整体拼接后单次缓冲写入
+- JSON 支持紧凑输出，可用 orjson 时自动使用
+"""
+
+import json
+from typing import Any, Dict, List, Sequence
+
+from services.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 尝试导入可选加速库
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+# 两位/三位数字查表，避免逐条 f-string 格式化
+_TWO_DIGITS = [f"{i:02d}" for i in range(100)]
+_THREE_DIGITS = [f"{i:03d}" for i in range(1000)]
+
+# 写出缓冲区大小（字节）
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _split_time_components(seconds: Sequence[float]):
+    """
+    批量拆分时间分量，语义与 SubtitleEntry._seconds_to_srt_time 相同：
+    hours=int(s//3600), minutes=int((s%3600)//60), secs=int(s%60), millis=int((s%1)*1000)
+
+    Returns:
+        (hours, minutes, secs, millis) 四个整数列表
+    """
+    if NUMPY_AVAILABLE:
+        values = np.asarray(seconds, dtype=np.float64)
+        hours = np.floor_divide(values, 3600).astype(np.int64)
+        minutes = np.floor_divide(np.mod(values, 3600), 60).astype(np.int64)
+        secs = np.mod(values, 60).astype(np.int64)
+        millis = (np.mod(values, 1) * 1000).astype(np.int64)
+        return hours.tolist(), minutes.tolist(), secs.tolist(), millis.tolist()
+
+    hours, minutes, secs, millis = [], [], [], []
+    for value in seconds:
+        value = float(value)
+        hours.append(int(value // 3600))
+        minutes.append(int((value % 3600) // 60))
+        secs.append(int(value % 60))
+        millis.append(int((value % 1) * 1000))
+    return hours, minutes, secs, millis
+
+
+def format_srt_times(seconds: Sequence[float]) -> List[str]:
+    """
+    批量将秒数格式化为 SRT 时间格式（HH:MM:SS,mmm）
+
+    Args:
+        seconds: 秒数序列
+
+    Returns:
+        List[str]: 与输入一一对应的 SRT 时间字符串
+    """
+    if len(seconds) == 0:
+        return []
+
+    hours, minutes, secs, millis = _split_time_components(seconds)
+    two, three = _TWO_DIGITS, _THREE_DIGITS
+    result = []
+    for h, m, s, ms in zip(hours, minutes, secs, millis):
+        hour_str = two[h] if 0 <= h < 100 else f"{h:02d}"
+        minute_str = two[m] if 0 <= m < 100 else f"{m:02d}"
+        sec_str = two[s] if 0 <= s < 100 else f"{s:02d}"
+        milli_str = three[ms] if 0 <= ms < 1000 else f"{ms:03d}"
+        result.append(f"{hour_str}:{minute_str}:{sec_str},{milli_str}")
+    return result
+
+
+def build_srt_text(segments: List[Dict[str, Any]], with_speaker: bool = False) -> str:
+    """
+    将 segments 构建为完整 SRT 文本
+
+    Args:
+        segments: 包含 start/end/text（可选 speaker）的字幕片段列表
+        with_speaker: 是否在文本前添加 [speaker] 标记
+
+    Returns:
+        str: SRT 文本，格式与逐条写出完全一致
+    """
+    count = len(segments)
+    if count == 0:
+        return ""
+
+    times = format_srt_times(
+        [segment['start'] for segment in segments] + [segment['end'] for segment in segments]
+    )
+    starts, ends = times[:count], times[count:]
+
+    parts = []
+    for i, segment in enumerate(segments):
+        text = segment['text'].strip()
+        if with_speaker:
+            text = f"[{segment.get('speaker', 'UNKNOWN')}] {text}"
+        parts.append(f"{i + 1}\n{starts[i]} --> {ends[i]}\n{text}\n\n")
+    return "".join(parts)
+
+
+def dumps_json(data: Any, compact: bool = False) -> str:
+    """
+    序列化 JSON（保留非 ASCII 字符）
+
+    非紧凑模式与 json.dumps(indent=2) 输出逐字节一致；紧凑模式在 orjson 可用时使用 orjson。
+
+    Args:
+        data: 待序列化对象
+        compact: True 时输出无缩进、无多余空白的紧凑 JSON
+
+    Returns:
+        str: JSON 文本
+    """
+    if not compact:
+        return json.dumps(data, ensure_ascii=False, indent=2)
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except TypeError:
+            # orjson 不支持的类型（如非字符串键、超大整数）回退到标准库
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_text_file(path: str, content: str, encoding: str = "utf-8") -> None:
+    """
+    以单次缓冲写入的方式写出文本文件
+
+    Args:
+        path: 输出路径
+        content: 文本内容
+        encoding: 文件编码
+    """
+    with open(path, "w", encoding=encoding, buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(content)
+
+
+def write_srt_segments(
+    path: str,
+    segments: List[Dict[str, Any]],
+    with_speaker: bool = False,
+    encoding: str = "utf-8",
+) -> None:
+    """
+    将 segments 写出为 SRT 文件（批量格式化 + 单次写入）
+
+    Args:
+        path: 输出路径
+        segments: 字幕片段列表
+        with_speaker: 是否带说话人标记
+        encoding: 文件编码
+    """
+    write_text_file(path, build_srt_text(segments, with_speaker=with_speaker), encoding=encoding)
+
+
+def write_json_file(path: str, data: Any, compact: bool = False,
+                    encoding: str = "utf-8") -> None:
+    """
+    写出 JSON 文件
+
+    Args:
+        path: 输出路径
+        data: 待序列化对象
+        compact: 是否紧凑输出
+        encoding: 文件编码
+    """
+    write_text_file(path, dumps_json(data, compact=compact), encoding=encoding)
+
+
+def build_srt_time_ranges(segments: List[Dict[str, Any]]) -> List[str]:
+    """
+    批量生成 "start --> end" 形式的 SRT 时间区间字符串
+
+    Args:
+        segments: 包含 start/end 的字幕片段列表
+
+    Returns:
+        List[str]: 与 segments 一一对应的时间区间字符串
+    """
+    count = len(segments)
+    times = format_srt_times(
+        [segment['start'] for segment in segments] + [segment['end'] for segment in segments]
+    )
+    return [f"{times[i]} --> {times[count + i]}" for i in range(count)]
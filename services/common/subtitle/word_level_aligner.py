@@ -6,9 +6,9 @@
 
 import logging
 import re
-from difflib import SequenceMatcher
 from typing import Any, Dict, List, Optional, Tuple, Union
 
+from services.common.subtitle.anchored_matcher import AnchoredSequenceMatcher
 from services.common.subtitle.segmenter import MultilingualSubtitleSegmenter
 
 logger = logging.getLogger(__name__)
@@ -35,7 +35,8 @@ def align_words_to_text(
     normalized_original = [_normalize_token(token) for token in original_tokens]
     normalized_target = [_normalize_token(token) for token in optimized_tokens]
 
-    matcher = SequenceMatcher(None, normalized_original, normalized_target, autojunk=False)
+    # 长转录按锚点分段对齐，短序列与 SequenceMatcher 结果一致
+    matcher = AnchoredSequenceMatcher(normalized_original, normalized_target)
     confidence = matcher.ratio()
     if confidence < min_ratio:
         error = f"对齐置信度过低: {confidence:.2f}"
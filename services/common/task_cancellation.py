@@ -0,0 +1,164 @@
+# services/common/task_cancellation.py
+# -*- coding: utf-8 -*-
+
+"""
+任务取消。
+
+网关取消任务时在状态库写入取消标记（task_cancel:{task_id}）。worker 端：
+- 每个 Celery 任务开始时记录当前 task_id（task_prerun 信号，worker 为 prefork，一个进程同时只执行一个任务）；
+- run_with_popen / 常驻推理进程在等待期间轮询取消标记，发现后终止整个子进程组并抛出 TaskCancelledError；
+- gpu_lock 获取锁后、执行任务前检查取消标记，异常沿正常路径传播，GPU 锁在 finally 中释放。
+
+尚未开始执行的 Celery 任务由网关 revoke，worker 收到后直接丢弃。
+"""
+
+import os
+import signal
+import subprocess
+from typing import List, Optional
+
+from services.common.logger import get_logger
+
+logger = get_logger('task_cancellation')
+
+CANCEL_KEY_PREFIX = "task_cancel"
+# 取消标记与节点状态保留时间一致
+CANCEL_TTL_SECONDS = 24 * 60 * 60
+# 等待子进程时检查取消标记的间隔（秒）
+CANCEL_POLL_INTERVAL = 1.0
+# run_with_popen 通过该环境变量把当前任务ID传给推理子进程
+TASK_ID_ENV = "YIVIDEO_TASK_ID"
+
+
+class TaskCancelledError(Exception):
+    """任务已被取消"""
+
+
+def _cancel_key(task_id: str) -> str:
+    return f"{CANCEL_KEY_PREFIX}:{task_id}"
+
+
+def _redis():
+    # 延迟导入：state_manager 导入时会连接 Redis
+    from services.common import state_manager
+    return state_manager.redis_client
+
+
+def request_cancel(task_id: str, reason: str = "用户取消") -> None:
+    """写入取消标记"""
+    client = _redis()
+    if client is None:
+        raise RuntimeError("Redis未连接，无法取消任务")
+    client.setex(_cancel_key(task_id), CANCEL_TTL_SECONDS, reason)
+    logger.info(f"已写入取消标记: {task_id} ({reason})")
+
+
+def clear_cancel(task_id: str) -> None:
+    """清除取消标记（同一 task_id 重新提交时调用）"""
+    client = _redis()
+    if client is not None:
+        client.delete(_cancel_key(task_id))
+
+
+def clear_cancel_many(task_ids: List[str]) -> None:
+    """批量清除取消标记（一次删除）"""
+    client = _redis()
+    if client is not None and task_ids:
+        client.delete(*{_cancel_key(task_id) for task_id in task_ids})
+
+
+def is_cancel_requested(task_id: Optional[str]) -> bool:
+    """任务是否已被取消，Redis 不可用时视为未取消"""
+    if not task_id:
+        return False
+    try:
+        client = _redis()
+        return bool(client is not None and client.exists(_cancel_key(task_id)))
+    except Exception as e:
+        logger.warning(f"读取取消标记失败: {task_id}, 错误: {e}")
+        return False
+
+
+# ========================================
+# 当前进程正在执行的任务
+# ========================================
+_current_task_id: Optional[str] = None
+
+
+def bind_task(task_id: Optional[str]) -> None:
+    """记录当前进程正在执行的任务"""
+    global _current_task_id
+    _current_task_id = task_id
+
+
+def current_task_id() -> Optional[str]:
+    """当前任务ID，子进程中从环境变量读取"""
+    return _current_task_id or os.environ.get(TASK_ID_ENV)
+
+
+def raise_if_cancelled(task_id: Optional[str] = None) -> None:
+    """
+    任务已取消时抛出 TaskCancelledError
+
+    Args:
+        task_id: 任务ID，默认为当前进程正在执行的任务
+    """
+    task_id = task_id or _current_task_id
+    if is_cancel_requested(task_id):
+        raise TaskCancelledError(f"任务已取消: {task_id}")
+
+
+def terminate_process_tree(process: subprocess.Popen, grace_period: float = 5.0) -> None:
+    """
+    终止子进程及其派生的全部进程
+
+    子进程以 start_new_session 启动时自成进程组，向整个进程组发送信号，
+    推理脚本再派生的 ffmpeg 等进程一并退出。
+    """
+    pgid = None
+    if os.name == 'posix':
+        try:
+            pgid = os.getpgid(process.pid)
+        except ProcessLookupError:
+            pass
+        if pgid != process.pid:
+            # 未自成进程组时只终止子进程本身，避免误杀 worker 所在进程组
+            pgid = None
+
+    def send(sig):
+        try:
+            if pgid:
+                os.killpg(pgid, sig)
+            elif process.poll() is None:
+                process.send_signal(sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    send(signal.SIGTERM)
+    try:
+        process.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        pass
+    # 子进程退出后进程组中可能还有未响应 SIGTERM 的后代
+    send(getattr(signal, 'SIGKILL', signal.SIGTERM))
+    process.wait()
+
+
+# ========================================
+# Celery 信号：记录当前任务
+# ========================================
+try:
+    from celery.signals import task_postrun, task_prerun
+
+    @task_prerun.connect(weak=False)
+    def _bind_task_on_prerun(args=None, kwargs=None, **_):
+        context = (kwargs or {}).get('context')
+        if context is None and args:
+            context = args[0]
+        bind_task(context.get('workflow_id') if isinstance(context, dict) else None)
+
+    @task_postrun.connect(weak=False)
+    def _unbind_task_on_postrun(**_):
+        bind_task(None)
+except ImportError:
+    pass
@@ -0,0 +1,78 @@
+# services/common/task_events.py
+# -*- coding: utf-8 -*-
+
+"""
+任务事件发布。
+
+节点状态写入（state_manager）与处理进度（progress_logger）发生时，向 Redis 频道
+task_events:{task_id} 发布事件，网关通过一个模式订阅连接把事件推送给 SSE 客户端，
+状态推送的开销随事件数量而不是客户端数量增长。
+
+事件格式（JSON）:
+    {"type": "stage", "task_id", "task_name", "node_status", "stage_status", "error", "timestamp"}
+    {"type": "progress", "task_id", "name", "current", "total", "percent", "rate", "eta", "timestamp"}
+    {"type": "workflow", "task_id", "status", "nodes", "timestamp"}   DAG 全部节点结束
+
+发布失败只记录日志，不影响任务执行。
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional
+
+from services.common.logger import get_logger
+
+logger = get_logger('task_events')
+
+TASK_EVENT_CHANNEL_PREFIX = "task_events"
+
+
+def task_event_channel(task_id: str) -> str:
+    """任务事件频道名"""
+    return f"{TASK_EVENT_CHANNEL_PREFIX}:{task_id}"
+
+
+def _redis():
+    # 延迟导入：state_manager 导入时会连接 Redis
+    from services.common import state_manager
+    return state_manager.redis_client
+
+
+def publish_task_event(task_id: Optional[str], event_type: str, data: Dict[str, Any]) -> None:
+    """
+    发布任务事件
+
+    Args:
+        task_id: 任务ID，为空时忽略
+        event_type: 事件类型 stage/progress/workflow
+        data: 事件内容
+    """
+    if not task_id:
+        return
+    try:
+        client = _redis()
+        if client is None:
+            return
+        event = {"type": event_type, "task_id": task_id, "timestamp": time.time(), **data}
+        client.publish(task_event_channel(task_id), json.dumps(event, ensure_ascii=False, default=str))
+    except Exception as e:
+        logger.debug(f"发布任务事件失败: {task_id}/{event_type}, 错误: {e}")
+
+
+def publish_stage_event(node_state: Dict[str, Any]) -> None:
+    """
+    发布节点状态变化
+
+    Args:
+        node_state: 单节点视图（WorkflowContext.model_dump()）
+    """
+    input_params = node_state.get("input_params") or {}
+    task_name = input_params.get("task_name")
+    stage = (node_state.get("stages") or {}).get(task_name) or {}
+    publish_task_event(node_state.get("workflow_id"), "stage", {
+        "task_name": task_name,
+        "node_status": node_state.get("status"),
+        "stage_status": stage.get("status"),
+        "error": stage.get("error") or node_state.get("error"),
+        "duration": stage.get("duration"),
+    })
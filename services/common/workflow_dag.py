@@ -0,0 +1,454 @@
+# services/common/workflow_dag.py
+# -*- coding: utf-8 -*-
+
+"""
+工作流 DAG 调度。
+
+一次提交多个节点，节点之间通过 ${{ stages.<task_name>.output.<field> }} 引用上游输出
+（也可用 depends_on 显式声明依赖）。网关只投递无依赖的根节点；每个节点在 worker 中结束时
+（state_manager.update_workflow_state）推进 DAG，依赖全部成功的下游节点立即投递，
+互不依赖的分支并行执行。
+
+同一 DAG 的所有节点共享 task_id 与 /share/workflows/{task_id}，下游节点直接读取上游写在
+共享存储上的本地文件；默认只有汇点（没有下游的节点）上传 MinIO，中间产物留在本地。
+
+Redis 键（状态库，TTL 与节点状态一致）:
+    workflow_dag:{task_id}             DAG 定义
+    workflow_dag:{task_id}:dispatched  已投递节点 -> Celery 任务ID（HSETNX 防止重复投递）
+    workflow_dag:{task_id}:finished    已结束节点 -> SUCCESS / FAILED / SKIPPED
+"""
+
+import json
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from services.common import state_manager
+from services.common.context import WorkflowContext
+from services.common.logger import get_logger
+from services.common.parameter_resolver import PARAM_REGEX, resolve_parameters
+from services.common.task_cancellation import is_cancel_requested
+from services.common.task_events import publish_task_event
+
+logger = get_logger('workflow_dag')
+
+DAG_KEY_PREFIX = "workflow_dag"
+
+NODE_SUCCESS = "SUCCESS"
+NODE_FAILED = "FAILED"
+NODE_SKIPPED = "SKIPPED"
+
+# finished 哈希中记录 DAG 整体回调已发送的字段
+_SETTLED_FIELD = "__settled__"
+
+
+class WorkflowDagError(ValueError):
+    """DAG 定义不合法"""
+
+
+def _spec_key(task_id: str) -> str:
+    return f"{DAG_KEY_PREFIX}:{task_id}"
+
+
+def _dispatched_key(task_id: str) -> str:
+    return f"{DAG_KEY_PREFIX}:{task_id}:dispatched"
+
+
+def _finished_key(task_id: str) -> str:
+    return f"{DAG_KEY_PREFIX}:{task_id}:finished"
+
+
+def _decode(value: Any) -> Any:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def extract_stage_references(value: Any) -> Set[str]:
+    """递归提取参数中引用的上游阶段名"""
+    if isinstance(value, str):
+        return {match.group(1) for match in PARAM_REGEX.finditer(value)}
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        refs: Set[str] = set()
+        for item in value:
+            refs |= extract_stage_references(item)
+        return refs
+    return set()
+
+
+def build_dag_spec(nodes: List[Dict[str, Any]], callback_url: Optional[str] = None,
+                   upload_intermediate: bool = False) -> Dict[str, Any]:
+    """
+    校验节点列表并生成 DAG 定义
+
+    Args:
+        nodes: [{'task_name': ..., 'input_data': {...}, 'depends_on': [...]}, ...]
+        callback_url: DAG 全部结束后的回调地址
+        upload_intermediate: 中间节点的产物是否也上传 MinIO
+
+    Returns:
+        Dict: {'nodes': {task_name: {...}}, 'order': 拓扑序, 'callback_url': ...}
+
+    Raises:
+        WorkflowDagError: 节点重复、依赖不存在或存在环
+    """
+    if not nodes:
+        raise WorkflowDagError("DAG 至少需要一个节点")
+
+    spec_nodes: Dict[str, Dict[str, Any]] = {}
+    for node in nodes:
+        task_name = node.get('task_name')
+        if not task_name:
+            raise WorkflowDagError("节点缺少 task_name")
+        if task_name in spec_nodes:
+            # 节点状态按 task_id + task_name 存储，同一 DAG 内不能重复
+            raise WorkflowDagError(f"节点重复: {task_name}")
+        input_data = node.get('input_data') or {}
+        depends_on = set(node.get('depends_on') or []) | extract_stage_references(input_data)
+        spec_nodes[task_name] = {'input_data': input_data, 'depends_on': sorted(depends_on)}
+
+    for task_name, node in spec_nodes.items():
+        for dep in node['depends_on']:
+            if dep == task_name:
+                raise WorkflowDagError(f"节点不能依赖自身: {task_name}")
+            if dep not in spec_nodes:
+                raise WorkflowDagError(f"节点 {task_name} 依赖的 {dep} 不在 DAG 中")
+
+    # Kahn 拓扑排序，剩余节点即成环
+    children = {name: [] for name in spec_nodes}
+    indegree = {name: len(node['depends_on']) for name, node in spec_nodes.items()}
+    for task_name, node in spec_nodes.items():
+        for dep in node['depends_on']:
+            children[dep].append(task_name)
+    queue = deque(name for name in spec_nodes if indegree[name] == 0)
+    order = []
+    while queue:
+        name = queue.popleft()
+        order.append(name)
+        for child in children[name]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    if len(order) != len(spec_nodes):
+        cycle = sorted(name for name in spec_nodes if indegree[name] > 0)
+        raise WorkflowDagError(f"DAG 存在环: {cycle}")
+
+    for task_name, node in spec_nodes.items():
+        node['upload_to_minio'] = upload_intermediate or not children[task_name]
+
+    return {'nodes': spec_nodes, 'order': order, 'callback_url': callback_url}
+
+
+def _ancestors(spec: Dict[str, Any], task_name: str) -> Set[str]:
+    nodes = spec['nodes']
+    seen: Set[str] = set()
+    stack = list(nodes[task_name]['depends_on'])
+    while stack:
+        name = stack.pop()
+        if name not in seen:
+            seen.add(name)
+            stack.extend(nodes[name]['depends_on'])
+    return seen
+
+
+def _default_dispatcher(task_name: str, context: Dict[str, Any]) -> str:
+    """投递到节点所属服务的队列，返回 Celery 任务ID"""
+    celery_app = _get_celery_app()
+    task_sig = celery_app.signature(
+        task_name,
+        kwargs={'context': context},
+        options={'queue': f"{task_name.split('.')[0]}_queue"},
+        immutable=True,
+    )
+    return task_sig.apply_async().id
+
+
+_celery_app = None
+
+
+def _get_celery_app():
+    global _celery_app
+    if _celery_app is None:
+        # 延迟导入：celery_config 在缺少 Redis 配置时会直接退出进程
+        from celery import Celery
+        from services.common.celery_config import BROKER_URL, BACKEND_URL
+        _celery_app = Celery('workflow_dag', broker=BROKER_URL, backend=BACKEND_URL)
+    return _celery_app
+
+
+class WorkflowDagScheduler:
+    """DAG 调度器，网关提交与 worker 推进共用"""
+
+    def __init__(self, redis_client=None, dispatcher: Optional[Callable[[str, Dict[str, Any]], str]] = None):
+        """
+        Args:
+            redis_client: Redis 客户端，默认使用状态库连接
+            dispatcher: 投递函数 (task_name, context) -> Celery 任务ID
+        """
+        self._redis = redis_client
+        self.dispatcher = dispatcher or _default_dispatcher
+
+    @property
+    def redis(self):
+        return self._redis if self._redis is not None else state_manager.redis_client
+
+    # ---------- 读写 ----------
+
+    def register(self, task_id: str, spec: Dict[str, Any]) -> None:
+        """保存 DAG 定义并清空上一次提交的调度记录"""
+        pipe = self.redis.pipeline()
+        pipe.setex(_spec_key(task_id), state_manager.NODE_TTL_SECONDS, json.dumps(spec, ensure_ascii=False))
+        pipe.delete(_dispatched_key(task_id), _finished_key(task_id))
+        pipe.execute()
+
+    def load(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.redis.get(_spec_key(task_id))
+        return json.loads(raw) if raw else None
+
+    def _hash(self, key: str) -> Dict[str, str]:
+        return {_decode(k): _decode(v) for k, v in (self.redis.hgetall(key) or {}).items()}
+
+    def _mark_finished(self, task_id: str, task_name: str, status: str) -> None:
+        pipe = self.redis.pipeline()
+        pipe.hset(_finished_key(task_id), task_name, status)
+        pipe.expire(_finished_key(task_id), state_manager.NODE_TTL_SECONDS)
+        pipe.execute()
+
+    def _claim(self, task_id: str, task_name: str) -> bool:
+        """抢占投递权，多个上游同时结束时只有一个 worker 投递下游节点"""
+        claimed = self.redis.hsetnx(_dispatched_key(task_id), task_name, "")
+        self.redis.expire(_dispatched_key(task_id), state_manager.NODE_TTL_SECONDS)
+        return bool(claimed)
+
+    # ---------- 调度 ----------
+
+    def start(self, task_id: str) -> List[str]:
+        """投递所有根节点，返回已投递的节点"""
+        spec = self.load(task_id)
+        if not spec:
+            raise WorkflowDagError(f"DAG 不存在: {task_id}")
+        return self._advance(task_id, spec)
+
+    def on_node_finished(self, task_id: str, task_name: str, status: str) -> List[str]:
+        """
+        节点结束后推进 DAG
+
+        Args:
+            task_id: 任务ID
+            task_name: 结束的节点
+            status: 阶段状态 SUCCESS / FAILED
+
+        Returns:
+            List[str]: 本次投递的下游节点
+        """
+        spec = self.load(task_id)
+        if not spec or task_name not in spec['nodes']:
+            return []
+        self._mark_finished(task_id, task_name, NODE_SUCCESS if status == NODE_SUCCESS else NODE_FAILED)
+        return self._advance(task_id, spec)
+
+    def _advance(self, task_id: str, spec: Dict[str, Any]) -> List[str]:
+        nodes = spec['nodes']
+        dispatched = []
+        for task_name in spec['order']:
+            finished = self._hash(_finished_key(task_id))
+            if task_name in finished:
+                continue
+            dep_states = [finished.get(dep) for dep in nodes[task_name]['depends_on']]
+            if any(s in (NODE_FAILED, NODE_SKIPPED) for s in dep_states):
+                # 上游失败只阻断其后代，其他分支继续
+                self._skip(task_id, task_name, spec)
+            elif all(s == NODE_SUCCESS for s in dep_states) and self._claim(task_id, task_name):
+                if self._dispatch(task_id, task_name, spec):
+                    dispatched.append(task_name)
+
+        self._settle_if_done(task_id, spec)
+        return dispatched
+
+    def build_node_context(self, task_id: str, task_name: str, spec: Dict[str, Any],
+                           state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        生成节点的执行上下文
+
+        引用在投递时按上游实际输出解析，上游阶段一并放入 stages，
+        节点内 get_param_with_fallback 的 fallback_from_stage 同样可用。
+        """
+        node = spec['nodes'][task_name]
+        stages = {
+            name: stage for name, stage in (state.get('stages') or {}).items()
+            if name in _ancestors(spec, task_name)
+        }
+        input_data = resolve_parameters(node['input_data'], {'stages': stages})
+        stages[task_name] = {"status": "pending", "output": {}, "start_time": None, "end_time": None}
+        return {
+            "workflow_id": task_id,
+            "create_at": state.get('create_at') or datetime.now().isoformat(),
+            "input_params": {
+                "task_name": task_name,
+                "input_data": input_data,
+                "callback_url": None,
+                "workflow_dag": {"upload_to_minio": node['upload_to_minio']},
+            },
+            "shared_storage_path": state.get('shared_storage_path') or f"/share/workflows/{task_id}",
+            "stages": stages,
+            "status": "running",
+            "error": None,
+        }
+
+    def _dispatch(self, task_id: str, task_name: str, spec: Dict[str, Any]) -> bool:
+        state = state_manager.get_workflow_state(task_id)
+        if state.get('error') and not state.get('stages'):
+            state = {}
+        if is_cancel_requested(task_id):
+            self._write_node_failure(task_id, task_name, spec, state, "任务已取消", status="cancelled")
+            self._mark_finished(task_id, task_name, NODE_FAILED)
+            return False
+        try:
+            context = self.build_node_context(task_id, task_name, spec, state)
+            # 先写节点状态再投递，避免覆盖 worker 已写入的阶段状态
+            state_manager.update_workflow_state(
+                WorkflowContext(**{**context, "updated_at": datetime.now().isoformat()}),
+                skip_side_effects=True,
+            )
+            celery_task_id = self.dispatcher(task_name, context)
+        except Exception as e:
+            logger.error(f"DAG 节点投递失败: {task_id}/{task_name}, 错误: {e}")
+            self._write_node_failure(task_id, task_name, spec, state, f"节点投递失败: {e}")
+            self._mark_finished(task_id, task_name, NODE_FAILED)
+            return False
+
+        self.redis.hset(_dispatched_key(task_id), task_name, celery_task_id or "")
+        logger.info(f"DAG 节点已投递: {task_id}/{task_name}, Celery Task ID: {celery_task_id}")
+        return True
+
+    def _skip(self, task_id: str, task_name: str, spec: Dict[str, Any]) -> None:
+        failed_deps = [
+            dep for dep in spec['nodes'][task_name]['depends_on']
+            if self._hash(_finished_key(task_id)).get(dep) in (NODE_FAILED, NODE_SKIPPED)
+        ]
+        self._mark_finished(task_id, task_name, NODE_SKIPPED)
+        self._write_node_failure(task_id, task_name, spec, {}, f"上游节点未成功: {', '.join(failed_deps)}")
+        logger.info(f"DAG 节点跳过: {task_id}/{task_name}, 上游: {failed_deps}")
+
+    def _write_node_failure(self, task_id: str, task_name: str, spec: Dict[str, Any],
+                            state: Dict[str, Any], error: str, status: str = "failed") -> None:
+        context = {
+            "workflow_id": task_id,
+            "create_at": state.get('create_at') or datetime.now().isoformat(),
+            "input_params": {
+                "task_name": task_name,
+                "input_data": spec['nodes'][task_name]['input_data'],
+                "callback_url": None,
+            },
+            "shared_storage_path": f"/share/workflows/{task_id}",
+            "stages": {task_name: {"status": NODE_FAILED, "output": {}, "error": error}},
+            "status": status,
+            "error": error,
+            "updated_at": datetime.now().isoformat(),
+        }
+        state_manager.update_workflow_state(WorkflowContext(**context), skip_side_effects=True)
+
+    def _settle_if_done(self, task_id: str, spec: Dict[str, Any]) -> None:
+        """全部节点结束后发送一次 DAG 回调"""
+        finished = self._hash(_finished_key(task_id))
+        if any(name not in finished for name in spec['nodes']):
+            return
+        if not self.redis.hsetnx(_finished_key(task_id), _SETTLED_FIELD, "1"):
+            return
+
+        summary = self.get_status(task_id, spec)
+        logger.info(f"DAG 已结束: {task_id}, 状态: {summary['status']}")
+        publish_task_event(task_id, "workflow", {"status": summary['status'], "nodes": summary['nodes']})
+        callback_url = spec.get('callback_url')
+        if not callback_url or state_manager.get_callback_manager is None:
+            return
+        try:
+            state = state_manager.get_workflow_state(task_id)
+            stages = state.get('stages') or {}
+            summary['nodes'] = {
+                name: {**node, 'result': state_manager.build_single_node_result(name, stages[name])}
+                if name in stages else node
+                for name, node in summary['nodes'].items()
+            }
+            state_manager.get_callback_manager().send_result(task_id, summary, None, callback_url)
+        except Exception as e:
+            logger.error(f"DAG 回调发送失败: {task_id}, 错误: {e}", exc_info=True)
+
+    def get_status(self, task_id: str, spec: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        查询 DAG 各节点状态
+
+        Returns:
+            Dict: {'task_id', 'status', 'nodes': {task_name: {'status', 'depends_on', 'celery_task_id'}}}，
+                DAG 不存在时返回 None
+        """
+        spec = spec or self.load(task_id)
+        if not spec:
+            return None
+        dispatched = self._hash(_dispatched_key(task_id))
+        finished = self._hash(_finished_key(task_id))
+
+        nodes = {}
+        for task_name in spec['order']:
+            if task_name in finished:
+                status = finished[task_name]
+            elif task_name in dispatched:
+                status = "RUNNING"
+            else:
+                status = "WAITING"
+            nodes[task_name] = {
+                'status': status,
+                'depends_on': spec['nodes'][task_name]['depends_on'],
+                'celery_task_id': dispatched.get(task_name) or None,
+            }
+
+        statuses = {node['status'] for node in nodes.values()}
+        if statuses <= {NODE_SUCCESS}:
+            overall = "completed"
+        elif statuses & {"RUNNING", "WAITING"}:
+            overall = "running"
+        else:
+            overall = "failed"
+        return {'task_id': task_id, 'status': overall, 'nodes': nodes}
+
+
+def handle_stage_finished(context: WorkflowContext) -> None:
+    """
+    worker 端钩子：DAG 节点的阶段结束时推进 DAG
+
+    由 state_manager.update_workflow_state 调用，非 DAG 节点直接返回。
+    """
+    input_params = context.input_params or {}
+    if 'workflow_dag' not in input_params:
+        return
+    task_name = input_params.get('task_name')
+    stage = context.stages.get(task_name) if task_name else None
+    status = (stage.status or "").upper() if stage else ""
+    if status not in (NODE_SUCCESS, NODE_FAILED):
+        return
+    try:
+        get_workflow_dag_scheduler().on_node_finished(context.workflow_id, task_name, status)
+    except Exception as e:
+        logger.error(f"推进 DAG 失败: {context.workflow_id}/{task_name}, 错误: {e}", exc_info=True)
+
+
+def node_status_for_stage(context: WorkflowContext) -> Optional[str]:
+    """DAG 节点阶段结束时对应的节点状态（completed/failed），其余情况返回 None"""
+    input_params = context.input_params or {}
+    if 'workflow_dag' not in input_params:
+        return None
+    stage = context.stages.get(input_params.get('task_name') or "")
+    status = (stage.status or "").upper() if stage else ""
+    return {NODE_SUCCESS: "completed", NODE_FAILED: "failed"}.get(status)
+
+
+# 单例模式
+_scheduler_instance: Optional[WorkflowDagScheduler] = None
+
+
+def get_workflow_dag_scheduler() -> WorkflowDagScheduler:
+    """获取 DAG 调度器实例"""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = WorkflowDagScheduler()
+    return _scheduler_instance
@@ -24,6 +24,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 确保项目根目录在 sys.path 中（分窗分离模块位于项目包内）
+project_root = Path(__file__).resolve().parents[4]
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
 def write_output(output_file, data):
     """Writes the final data to the output JSON file."""
     try:
@@ -46,6 +51,9 @@ def main():
     parser.add_argument("--output_format", default="flac", help="Output format for separated files (e.g., 'flac', 'wav', 'mp3').")
     parser.add_argument("--log_level", default="INFO", help="Logging level for the separator.")
     parser.add_argument("--optimization_level", default=None, help="Vocal separation optimization level.")
+    parser.add_argument("--window_duration", type=float, default=0, help="Window length in seconds for windowed separation (0 disables).")
+    parser.add_argument("--window_overlap", type=float, default=5.0, help="Overlap in seconds between adjacent windows.")
+    parser.add_argument("--window_min_duration", type=float, default=0, help="Only use windowed separation for inputs at least this long.")
 
     args = parser.parse_args()
 
@@ -92,8 +100,33 @@ def main():
 
         logger.info(f"Model '{args.model_name}' loaded successfully.")
 
-        # 执行分离
-        output_files = separator.separate(args.audio_path)
+        # 执行分离：长音频按重叠窗口流式分离，峰值内存与时长无关
+        from services.workers.audio_separator_service.app.windowed_separation import (
+            separate_in_windows,
+            should_separate_in_windows,
+        )
+
+        windowed = should_separate_in_windows(
+            args.audio_path, args.output_format, args.window_duration, args.window_min_duration
+        )
+        if windowed:
+            def separate_window(window_path, window_dir):
+                separator.output_dir = window_dir
+                separator.model_instance.output_dir = window_dir
+                return [str(Path(window_dir) / f) for f in separator.separate(window_path)]
+
+            output_files = separate_in_windows(
+                args.audio_path,
+                args.output_dir,
+                separate_window,
+                window_duration=args.window_duration,
+                overlap_duration=args.window_overlap,
+                on_progress=lambda done, total, seconds: logger.info(
+                    f"Windowed separation progress: {done}/{total} windows, {seconds:.1f}s written"
+                ),
+            )
+        else:
+            output_files = separator.separate(args.audio_path)
         
         separation_time = time.time() - start_time
         logger.info(f"Separation complete in {separation_time:.2f} seconds.")
@@ -109,6 +142,7 @@ def main():
                 "separation_time": separation_time,
                 "model_used": args.model_name,
                 "model_type": args.model_type,
+                "windowed": windowed,
             },
             "output_files": output_files
         }
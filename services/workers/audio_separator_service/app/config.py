@@ -203,6 +203,55 @@ class AudioSeparatorConfig(BaseModel):
         description="质量模式人声分离参数"
     )
 
+    # ========================================
+    # 常驻分离进程配置
+    # ========================================
+    resident_worker: bool = Field(
+        default=False,
+        description="是否使用常驻分离进程（模型加载一次，后续任务复用；释放 gpu_lock 后模型仍占用显存，默认关闭）"
+    )
+
+    resident_max_models: int = Field(
+        default=1,
+        description="常驻进程同时驻留的模型数"
+    )
+
+    resident_model_idle_ttl: int = Field(
+        default=300,
+        description="模型空闲多久（秒）后从常驻进程中卸载，释放显存"
+    )
+
+    resident_process_idle_timeout: int = Field(
+        default=1800,
+        description="常驻进程空闲多久（秒）后自动退出"
+    )
+
+    resident_max_restarts: int = Field(
+        default=3,
+        description="10 分钟内允许的常驻进程崩溃重启次数，超过后回退到一次性子进程模式"
+    )
+
+    # ========================================
+    # 分窗流式分离配置
+    # ========================================
+    window_duration: float = Field(
+        default=300.0,
+        ge=0.0,
+        description="分窗分离的窗口长度（秒），0 表示始终整段分离"
+    )
+
+    window_overlap: float = Field(
+        default=5.0,
+        ge=0.0,
+        description="相邻窗口的重叠长度（秒），重叠区间交叉淡化"
+    )
+
+    window_min_duration: float = Field(
+        default=1200.0,
+        ge=0.0,
+        description="音频时长不低于该值（秒）时使用分窗分离"
+    )
+
     # ========================================
     # 文件管理配置
     # ========================================
@@ -37,6 +37,82 @@ class ModelManager:
         self.config: AudioSeparatorConfig = get_config()
         logger.info("ModelManager (subprocess mode) 初始化完成")
 
+    def separate_audio(
+        self,
+        audio_path: str,
+        model_name: str,
+        output_dir: str,
+        model_type: str,
+        workflow_id: Optional[str] = None,
+        use_vocal_optimization: bool = False,
+        vocal_optimization_level: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        执行音频分离：优先使用常驻分离进程，不可用时回退到一次性 subprocess。
+        """
+        if self.config.resident_worker:
+            from services.common.resident_worker import ResidentWorkerError
+            from .separator_server import get_separator_client
+
+            client = get_separator_client(self.config)
+            if client.is_available():
+                try:
+                    return self.separate_audio_resident(client, audio_path, model_name, output_dir, model_type)
+                except ResidentWorkerError as e:
+                    logger.warning(f"常驻分离进程不可用，回退到 subprocess 模式: {e}")
+
+        return self.separate_audio_subprocess(
+            audio_path,
+            model_name,
+            output_dir,
+            model_type,
+            workflow_id=workflow_id,
+            use_vocal_optimization=use_vocal_optimization,
+            vocal_optimization_level=vocal_optimization_level
+        )
+
+    def separate_audio_resident(
+        self,
+        client,
+        audio_path: str,
+        model_name: str,
+        output_dir: str,
+        model_type: str
+    ) -> Dict[str, str]:
+        """
+        在常驻分离进程中执行音频分离，模型已驻留时跳过加载。
+        """
+        from services.common.resident_worker import ResidentJobError
+
+        logger.info(f"开始处理音频 (常驻进程模式): {audio_path}")
+
+        if not Path(audio_path).exists():
+            raise FileNotFoundError(f"音频文件不存在: {audio_path}")
+
+        job = {
+            'audio_path': str(audio_path),
+            'model_name': model_name,
+            'model_type': model_type,
+            'output_dir': output_dir,
+            'output_format': self.config.output_format,
+            'window_duration': self.config.window_duration,
+            'window_overlap': self.config.window_overlap,
+            'window_min_duration': self.config.window_min_duration,
+        }
+        try:
+            result_data = client.submit(job, timeout=1800)
+        except ResidentJobError as e:
+            raise RuntimeError(f"推理失败: {e}") from e
+
+        statistics = result_data.get('statistics', {})
+        logger.info(
+            f"常驻进程分离完成: 耗时 {statistics.get('separation_time', 0):.2f}s, "
+            f"模型{'已驻留' if statistics.get('model_cached') else '新加载'} "
+            f"(加载耗时 {statistics.get('model_load_time', 0):.2f}s)"
+            f"{', 分窗分离' if statistics.get('windowed') else ''}"
+        )
+        return self._parse_output_files(result_data.get('output_files', []), output_dir)
+
     def separate_audio_subprocess(
         self,
         audio_path: str,
@@ -76,6 +152,10 @@ class ModelManager:
             "--model_name", model_name,
             "--model_type", model_type,
             "--output_dir", output_dir,
+            "--output_format", self.config.output_format,
+            "--window_duration", str(self.config.window_duration),
+            "--window_overlap", str(self.config.window_overlap),
+            "--window_min_duration", str(self.config.window_min_duration),
         ]
         
         if use_vocal_optimization and vocal_optimization_level:
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Audio Separator Service - 常驻分离进程
+功能：在常驻进程中按 (模型名称, 模型类型, 输出格式) 缓存已加载的 Separator，
+连续的分离任务只加载一次模型
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.common.resident_worker import (
+    ModelCache,
+    ResidentWorkerClient,
+    release_gpu_memory,
+)
+from services.workers.audio_separator_service.app.windowed_separation import (
+    separate_in_windows,
+    should_separate_in_windows,
+)
+
+logger = logging.getLogger(__name__)
+
+SERVER_TARGET = "services.workers.audio_separator_service.app.separator_server:create_handler"
+
+
+def _separate(separator, audio_path: str, output_dir: str) -> List[str]:
+    """使用已加载的 Separator 分离音频到指定目录，返回输出文件完整路径"""
+    # 模型实例在加载时复制了 output_dir，需要同步更新
+    separator.output_dir = output_dir
+    if getattr(separator, 'model_instance', None) is not None:
+        separator.model_instance.output_dir = output_dir
+    return [str(Path(output_dir) / f) for f in separator.separate(audio_path)]
+
+
+def _log_window_progress(done: int, total: int, seconds: float):
+    logger.info(f"分窗分离进度: {done}/{total} 个窗口, 已写出 {seconds:.1f}s")
+
+
+class SeparatorHandler:
+    """常驻进程内的分离任务处理器"""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.log_level = getattr(logging, str(options.get('log_level', 'INFO')).upper(), logging.INFO)
+        self.models = ModelCache(
+            self._load_separator,
+            max_models=options.get('max_models', 1),
+            idle_ttl=options.get('model_idle_ttl'),
+            unloader=lambda key, separator: release_gpu_memory(),
+        )
+
+    def _load_separator(self, key: Tuple[str, str, str]):
+        from audio_separator.separator import Separator
+
+        model_name, model_type, output_format = key
+        started = time.time()
+        separator = Separator(log_level=self.log_level, output_format=output_format)
+        separator.load_model(model_filename=model_name)
+        logger.info(f"Model '{model_name}' ({model_type}) loaded in {time.time() - started:.2f}s")
+        return separator
+
+    def handle(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行一次分离
+
+        Args:
+            job: audio_path/model_name/model_type/output_dir/output_format，
+                 可选 window_duration/window_overlap/window_min_duration 启用分窗分离
+
+        Returns:
+            与 audio_separator_infer.py 结果文件相同结构的字典
+        """
+        started = time.time()
+        if not Path(job['audio_path']).exists():
+            raise FileNotFoundError(f"Input audio file not found: {job['audio_path']}")
+        Path(job['output_dir']).mkdir(parents=True, exist_ok=True)
+
+        key = (job['model_name'], job['model_type'], job.get('output_format', 'flac'))
+        separator, cached = self.models.get(key)
+        load_time = time.time() - started
+
+        windowed = should_separate_in_windows(
+            job['audio_path'], job.get('output_format', 'flac'),
+            job.get('window_duration'), job.get('window_min_duration'),
+        )
+        if windowed:
+            output_files = separate_in_windows(
+                job['audio_path'],
+                job['output_dir'],
+                lambda window_path, window_dir: _separate(separator, window_path, window_dir),
+                window_duration=job['window_duration'],
+                overlap_duration=job.get('window_overlap', 5.0),
+                on_progress=_log_window_progress,
+            )
+        else:
+            output_files = _separate(separator, job['audio_path'], job['output_dir'])
+        if not output_files:
+            raise RuntimeError("Audio separation failed to produce any output files.")
+
+        return {
+            "success": True,
+            "statistics": {
+                "separation_time": time.time() - started,
+                "model_load_time": load_time,
+                "model_cached": cached,
+                "model_used": job['model_name'],
+                "model_type": job['model_type'],
+                "windowed": windowed,
+            },
+            "output_files": output_files,
+        }
+
+    def on_idle(self):
+        if self.models.evict_idle():
+            release_gpu_memory()
+
+
+def create_handler(options: Dict[str, Any]) -> SeparatorHandler:
+    """常驻进程处理器工厂"""
+    return SeparatorHandler(options)
+
+
+# ========================================
+# 进程内共享的常驻进程客户端
+# ========================================
+_client: Optional[ResidentWorkerClient] = None
+_client_lock = threading.Lock()
+
+
+def get_separator_client(config) -> ResidentWorkerClient:
+    """
+    获取常驻分离进程客户端（每个 worker 进程一个）
+
+    Args:
+        config: AudioSeparatorConfig
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ResidentWorkerClient(
+                "audio-separator",
+                SERVER_TARGET,
+                options={
+                    'log_level': config.log_level,
+                    'max_models': config.resident_max_models,
+                    'model_idle_ttl': config.resident_model_idle_ttl,
+                    'process_idle_timeout': config.resident_process_idle_timeout,
+                },
+                max_restarts=config.resident_max_restarts,
+            )
+        return _client
@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""
+Audio Separator 分窗流式分离
+
+将长音频按固定长度、首尾重叠的窗口逐个送入分离模型，重叠区间线性交叉淡化后
+直接追加写入各音轨的输出文件。内存与显存只与窗口长度有关，与音频总时长无关；
+每个窗口完成后输出文件即已包含到该位置为止的结果。
+
+soundfile 为可选依赖，窗口规划与交叉淡化只依赖 numpy。
+"""
+
+import logging
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+    sf = None
+
+logger = logging.getLogger(__name__)
+
+# 可以边分离边追加写入的输出格式
+STREAMABLE_FORMATS = ('flac', 'wav')
+
+# audio-separator 输出文件名中的音轨名，如 "input_(Vocals)_htdemucs.flac"
+STEM_PATTERN = re.compile(r"_\(([^)]+)\)")
+
+
+def plan_windows(total_frames: int, window_frames: int, overlap_frames: int) -> List[Tuple[int, int]]:
+    """
+    规划分离窗口
+
+    相邻窗口重叠 overlap_frames 帧，最后一个窗口截止到音频末尾。
+
+    Args:
+        total_frames: 音频总帧数
+        window_frames: 窗口长度（帧）
+        overlap_frames: 相邻窗口的重叠长度（帧），需小于窗口长度
+
+    Returns:
+        List[Tuple[int, int]]: 窗口区间 [(start, end), ...]
+    """
+    if total_frames <= 0:
+        return []
+    if window_frames <= 0 or total_frames <= window_frames:
+        return [(0, total_frames)]
+    if not 0 <= overlap_frames < window_frames:
+        raise ValueError(f"重叠长度必须小于窗口长度: overlap={overlap_frames}, window={window_frames}")
+
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window_frames, total_frames)
+        windows.append((start, end))
+        if end >= total_frames:
+            return windows
+        start = end - overlap_frames
+
+
+def crossfade(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+    """
+    线性交叉淡化两段等长音频
+
+    前后两个窗口分离的是同一段信号，两者相关，线性权重之和为1可保持幅度不变。
+
+    Args:
+        tail: 前一窗口的重叠部分 (frames, channels)
+        head: 后一窗口的重叠部分 (frames, channels)
+
+    Returns:
+        np.ndarray: 淡化后的音频
+    """
+    length = len(tail)
+    if length == 0:
+        return tail
+    fade_in = ((np.arange(length, dtype=np.float32) + 0.5) / length)[:, None]
+    return tail * (1.0 - fade_in) + head * fade_in
+
+
+class OverlapAddWriter:
+    """
+    单个音轨的重叠相加写入器
+
+    每个窗口的结果到达后，与上一窗口保留的尾部交叉淡化，写出确定的部分，
+    并保留与下一窗口重叠的尾部，内存中最多只有一个窗口加一个重叠区间的数据。
+    """
+
+    def __init__(self, sink):
+        """
+        Args:
+            sink: 带 write(ndarray) 方法的输出对象（如 soundfile.SoundFile）
+        """
+        self.sink = sink
+        self.frames_written = 0
+        self._tail: Optional[np.ndarray] = None
+
+    def push(self, block: np.ndarray, start: int, hold_frames: int) -> None:
+        """
+        追加一个窗口的分离结果
+
+        Args:
+            block: 窗口分离结果 (frames, channels)，位于输出时间轴 [start, start + len(block))
+            start: 窗口在输出时间轴上的起点（帧）
+            hold_frames: 与下一窗口重叠、暂不写出的尾部帧数，最后一个窗口为0
+        """
+        if self._tail is not None:
+            tail_end = self.frames_written + len(self._tail)
+            overlap = max(0, min(tail_end - start, len(self._tail), len(block)))
+            # 上一窗口尾部中早于本窗口起点的部分直接写出
+            self._write(self._tail[:len(self._tail) - overlap])
+            self._write(crossfade(self._tail[len(self._tail) - overlap:], block[:overlap]))
+            block = block[overlap:]
+            self._tail = None
+
+        hold_frames = max(0, min(hold_frames, len(block)))
+        self._write(block[:len(block) - hold_frames])
+        if hold_frames:
+            self._tail = block[len(block) - hold_frames:].copy()
+
+    def close(self) -> None:
+        """写出剩余的尾部"""
+        if self._tail is not None:
+            self._write(self._tail)
+            self._tail = None
+
+    def _write(self, data: np.ndarray) -> None:
+        if len(data):
+            self.sink.write(data)
+            self.frames_written += len(data)
+
+
+def _fit_length(block: np.ndarray, frames: int) -> np.ndarray:
+    """裁剪或补零到指定帧数（模型输出长度可能因填充与重采样有几帧偏差）"""
+    if len(block) >= frames:
+        return block[:frames]
+    return np.pad(block, ((0, frames - len(block)), (0, 0)))
+
+
+def _stem_name(path: str) -> str:
+    match = STEM_PATTERN.search(Path(path).stem)
+    return match.group(1) if match else Path(path).stem
+
+
+def _open_input(audio_path: str, work_dir: Path):
+    """打开输入音频，soundfile 不支持的格式先用 ffmpeg 转为 wav"""
+    try:
+        return sf.SoundFile(audio_path)
+    except RuntimeError:
+        converted = work_dir / "input.wav"
+        logger.info(f"soundfile 无法直接读取输入，使用 ffmpeg 转换: {audio_path}")
+        subprocess.run(
+            ["ffmpeg", "-y", "-v", "error", "-i", str(audio_path), "-c:a", "pcm_f32le", str(converted)],
+            check=True,
+        )
+        return sf.SoundFile(str(converted))
+
+
+def get_audio_duration(audio_path: str) -> Optional[float]:
+    """读取音频时长（秒），无法读取时返回 None"""
+    if SOUNDFILE_AVAILABLE:
+        try:
+            info = sf.info(audio_path)
+            return info.frames / info.samplerate
+        except RuntimeError:
+            pass
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(audio_path)],
+            capture_output=True, text=True, check=True,
+        )
+        return float(result.stdout.strip())
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+def should_separate_in_windows(
+    audio_path: str,
+    output_format: str,
+    window_duration: Optional[float],
+    min_duration: Optional[float],
+) -> bool:
+    """
+    判断是否使用分窗分离
+
+    Args:
+        audio_path: 输入音频路径
+        output_format: 输出格式
+        window_duration: 窗口长度（秒），为空或0表示不分窗
+        min_duration: 音频时长不低于该值（秒）时才分窗
+    """
+    if not window_duration or not SOUNDFILE_AVAILABLE:
+        return False
+    if str(output_format).lower() not in STREAMABLE_FORMATS:
+        logger.info(f"输出格式 {output_format} 不支持流式写入，使用整段分离")
+        return False
+    duration = get_audio_duration(audio_path)
+    return duration is not None and duration >= max(min_duration or 0, window_duration)
+
+
+def separate_in_windows(
+    audio_path: str,
+    output_dir: str,
+    separate_window: Callable[[str, str], List[str]],
+    window_duration: float = 300.0,
+    overlap_duration: float = 5.0,
+    on_progress: Optional[Callable[[int, int, float], None]] = None,
+) -> List[str]:
+    """
+    分窗流式分离
+
+    Args:
+        audio_path: 输入音频路径
+        output_dir: 输出目录，最终音轨文件名与整段分离时一致
+        separate_window: 分离单个窗口文件的函数 (window_path, window_output_dir) -> 输出文件列表，
+            输出格式决定最终文件格式，需为 STREAMABLE_FORMATS 之一
+        window_duration: 窗口长度（秒）
+        overlap_duration: 相邻窗口重叠长度（秒）
+        on_progress: 每个窗口写出后的回调 (已完成窗口数, 总窗口数, 已确定写出的秒数)
+
+    Returns:
+        List[str]: 各音轨输出文件路径
+    """
+    if not SOUNDFILE_AVAILABLE:
+        raise RuntimeError("分窗分离需要安装 soundfile")
+
+    output_path = Path(output_dir)
+    work_dir = output_path / f".windows_{Path(audio_path).stem}"
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    input_base = Path(audio_path).stem
+    writers: Dict[str, OverlapAddWriter] = {}
+    sinks: Dict[str, "sf.SoundFile"] = {}
+    output_files: Dict[str, str] = {}
+
+    try:
+        with _open_input(audio_path, work_dir) as source:
+            in_rate = source.samplerate
+            windows = plan_windows(
+                source.frames,
+                int(window_duration * in_rate),
+                int(overlap_duration * in_rate),
+            )
+            logger.info(
+                f"分窗分离: 时长 {source.frames / in_rate:.1f}s, {len(windows)} 个窗口 "
+                f"(窗口 {window_duration}s, 重叠 {overlap_duration}s)"
+            )
+
+            for index, (start, end) in enumerate(windows):
+                window_base = f"{input_base}.window{index:05d}"
+                window_path = work_dir / f"{window_base}.wav"
+                window_out = work_dir / f"out{index:05d}"
+                window_out.mkdir()
+
+                source.seek(start)
+                sf.write(str(window_path), source.read(end - start, dtype='float32', always_2d=True),
+                         in_rate, subtype='FLOAT')
+
+                next_start = windows[index + 1][0] if index + 1 < len(windows) else end
+                for stem_file in separate_window(str(window_path), str(window_out)):
+                    stem = _stem_name(stem_file)
+                    block, out_rate = sf.read(stem_file, dtype='float32', always_2d=True)
+                    # 模型可能以不同采样率输出，窗口边界按输出采样率换算
+                    ratio = out_rate / in_rate
+                    out_start, out_end = round(start * ratio), round(end * ratio)
+                    block = _fit_length(block, out_end - out_start)
+
+                    if stem not in writers:
+                        final_name = Path(stem_file).name.replace(window_base, input_base, 1)
+                        final_path = output_path / final_name
+                        sinks[stem] = sf.SoundFile(str(final_path), 'w', samplerate=out_rate,
+                                                   channels=block.shape[1])
+                        writers[stem] = OverlapAddWriter(sinks[stem])
+                        output_files[stem] = str(final_path)
+
+                    writers[stem].push(block, out_start, out_end - round(next_start * ratio))
+                    sinks[stem].flush()
+
+                shutil.rmtree(window_out, ignore_errors=True)
+                window_path.unlink()
+
+                if on_progress:
+                    on_progress(index + 1, len(windows), next_start / in_rate)
+
+        for writer in writers.values():
+            writer.close()
+    finally:
+        for sink in sinks.values():
+            sink.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return list(output_files.values())
@@ -240,7 +240,7 @@ class AudioSeparatorSeparateVocalsExecutor(BaseNodeExecutor):
         )
 
         model_manager = get_model_manager()
-        return model_manager.separate_audio_subprocess(
+        return model_manager.separate_audio(
             audio_path=audio_path,
             model_name=model_name,
             output_dir=output_dir,
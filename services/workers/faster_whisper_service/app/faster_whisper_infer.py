@@ -139,6 +139,37 @@ def parse_arguments() -> argparse.Namespace:
         help='VAD 参数 JSON 字符串'
     )
 
+    # ===== 长音频分块参数 =====
+    parser.add_argument(
+        '--long_audio',
+        action='store_true',
+        help='启用长音频分块转录（按 VAD 静音切分、并发转录、断点续传）'
+    )
+    parser.add_argument(
+        '--long_audio_min_duration',
+        type=float,
+        default=1800.0,
+        help='启用分块的最短音频时长，秒 (默认: 1800)'
+    )
+    parser.add_argument(
+        '--chunk_max_duration',
+        type=float,
+        default=600.0,
+        help='单块最大时长，秒 (默认: 600)'
+    )
+    parser.add_argument(
+        '--chunk_workers',
+        type=int,
+        default=2,
+        help='并发转录的块数 (默认: 2)'
+    )
+    parser.add_argument(
+        '--checkpoint_dir',
+        type=str,
+        default=None,
+        help='分块检查点目录，重试时从已完成的块继续'
+    )
+
     return parser.parse_args()
 
 
@@ -258,11 +289,24 @@ def execute_transcription(args: argparse.Namespace) -> Dict[str, Any]:
             os.environ['CUDA_VISIBLE_DEVICES'] = str(args.device_index)
             logger.info(f"设置 CUDA_VISIBLE_DEVICES={args.device_index}")
 
+        # 长音频模式先解码音频判断时长，并发转录需要模型开启多个 worker
+        audio = None
+        use_long_audio = False
+        if args.long_audio:
+            from faster_whisper.audio import decode_audio
+            from services.workers.faster_whisper_service.app.long_audio import SAMPLE_RATE
+
+            audio = decode_audio(str(audio_path), sampling_rate=SAMPLE_RATE)
+            audio_seconds = len(audio) / SAMPLE_RATE
+            use_long_audio = audio_seconds >= args.long_audio_min_duration
+            logger.info(f"音频时长: {audio_seconds:.1f}s, 长音频分块: {'启用' if use_long_audio else '不启用'}")
+
         # 创建模型实例
         model = WhisperModel(
             args.model_name,
             device=args.device,
             compute_type=args.compute_type,
+            num_workers=max(1, args.chunk_workers) if use_long_audio else 1,
             download_root=os.environ.get('HF_HOME'),
             local_files_only=False
         )
@@ -302,28 +346,44 @@ def execute_transcription(args: argparse.Namespace) -> Dict[str, Any]:
         # ===== 执行转录 =====
         logger.info("开始转录...")
         transcribe_start = time.time()
+        chunk_statistics = None
+
+        if use_long_audio:
+            from services.workers.faster_whisper_service.app.long_audio import transcribe_long_audio
+
+            segments_list, info_dict, chunk_statistics = transcribe_long_audio(
+                model,
+                audio,
+                str(audio_path),
+                transcribe_options,
+                serialize_segment,
+                serialize_transcription_info,
+                chunk_max_duration=args.chunk_max_duration,
+                workers=args.chunk_workers,
+                checkpoint_dir=args.checkpoint_dir,
+            )
+        else:
+            segments, info = model.transcribe(
+                audio if audio is not None else str(audio_path),
+                **transcribe_options
+            )
 
-        segments, info = model.transcribe(
-            str(audio_path),
-            **transcribe_options
-        )
+            # 收集所有 segments（注意：这是一个生成器）
+            segments_list = []
+            for segment in segments:
+                segment_dict = serialize_segment(segment)
+                segments_list.append(segment_dict)
 
-        # 收集所有 segments（注意：这是一个生成器）
-        segments_list = []
-        for segment in segments:
-            segment_dict = serialize_segment(segment)
-            segments_list.append(segment_dict)
+                # 实时日志（避免过多输出）
+                if len(segments_list) % 10 == 0:
+                    logger.info(f"已处理 {len(segments_list)} 个片段...")
 
-            # 实时日志（避免过多输出）
-            if len(segments_list) % 10 == 0:
-                logger.info(f"已处理 {len(segments_list)} 个片段...")
+            # ===== 序列化结果 =====
+            info_dict = serialize_transcription_info(info)
 
         transcribe_duration = time.time() - transcribe_start
         logger.info(f"转录完成！共 {len(segments_list)} 个片段，耗时: {transcribe_duration:.2f}s")
 
-        # ===== 序列化结果 =====
-        info_dict = serialize_transcription_info(info)
-
         execution_time = time.time() - start_time
 
         result = {
@@ -344,6 +404,8 @@ def execute_transcription(args: argparse.Namespace) -> Dict[str, Any]:
                 'language_probability': info_dict.get('language_probability'),
             }
         }
+        if chunk_statistics:
+            result['statistics']['long_audio'] = chunk_statistics
 
         logger.info("=" * 60)
         logger.info("转录成功！")
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""
+Faster Whisper 长音频分块转录
+
+在 VAD 检测到的静音处将长音频切分为若干块，并发转录后把片段与词级时间戳
+平移回原始时间轴。每个完成的块都会写入检查点，任务重试时跳过已完成的块。
+
+此模块由 faster_whisper_infer.py 在独立进程中调用，faster_whisper 仅在
+transcribe_long_audio 内部导入，其余函数不依赖推理库。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# faster-whisper 解码音频的采样率
+SAMPLE_RATE = 16000
+
+# 检查点清单文件名
+MANIFEST_FILE = "manifest.json"
+
+
+def plan_chunks(
+    speech_timestamps: Sequence[Dict[str, int]],
+    total_samples: int,
+    max_chunk_samples: int,
+    min_chunk_samples: int = 0,
+) -> List[Tuple[int, int]]:
+    """
+    根据 VAD 语音区间规划分块边界
+
+    切分点优先落在相邻语音区间之间静音段的中点；单个语音区间超过最大块长时在块长处硬切。
+    分块首尾相接覆盖整个音频，不丢弃任何样本。
+
+    Args:
+        speech_timestamps: 按时间排序的语音区间 [{'start': 样本, 'end': 样本}, ...]
+        total_samples: 音频总样本数
+        max_chunk_samples: 最大块长（样本）
+        min_chunk_samples: 最小块长（样本），过短的末尾块并入前一块
+
+    Returns:
+        List[Tuple[int, int]]: 分块区间 [(start, end), ...]
+    """
+    if total_samples <= 0:
+        return []
+    if max_chunk_samples <= 0 or total_samples <= max_chunk_samples:
+        return [(0, total_samples)]
+
+    chunks: List[Tuple[int, int]] = []
+    chunk_start = 0
+    last_cut: Optional[int] = None
+
+    for i, region in enumerate(speech_timestamps):
+        while region['end'] - chunk_start > max_chunk_samples:
+            if last_cut is not None and chunk_start < last_cut <= chunk_start + max_chunk_samples:
+                cut = last_cut
+            else:
+                # 块内没有可用的静音切分点
+                cut = chunk_start + max_chunk_samples
+            chunks.append((chunk_start, cut))
+            chunk_start = cut
+            last_cut = None
+
+        if i + 1 < len(speech_timestamps):
+            last_cut = (region['end'] + speech_timestamps[i + 1]['start']) // 2
+
+    chunks.append((chunk_start, total_samples))
+
+    if len(chunks) > 1 and chunks[-1][1] - chunks[-1][0] < min_chunk_samples:
+        tail = chunks.pop()
+        chunks[-1] = (chunks[-1][0], tail[1])
+
+    return chunks
+
+
+def offset_segments(segments: List[Dict[str, Any]], offset: float) -> List[Dict[str, Any]]:
+    """
+    将块内片段与词级时间戳平移到原始时间轴
+
+    Args:
+        segments: 序列化后的片段列表（原地修改）
+        offset: 块起点（秒）
+
+    Returns:
+        List[Dict[str, Any]]: 平移后的片段列表
+    """
+    for segment in segments:
+        for key in ('start', 'end'):
+            if segment.get(key) is not None:
+                segment[key] = round(segment[key] + offset, 3)
+        for word in segment.get('words') or []:
+            for key in ('start', 'end'):
+                if word.get(key) is not None:
+                    word[key] = round(word[key] + offset, 3)
+    return segments
+
+
+def stitch_segments(chunk_segments: Sequence[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    按块顺序拼接片段并重新编号
+
+    Args:
+        chunk_segments: 每块已平移到原始时间轴的片段列表
+
+    Returns:
+        List[Dict[str, Any]]: 拼接后的片段列表
+    """
+    stitched = []
+    for segments in chunk_segments:
+        for segment in segments:
+            segment['id'] = len(stitched) + 1
+            stitched.append(segment)
+    return stitched
+
+
+class ChunkCheckpoint:
+    """分块转录检查点 - 每块一个 JSON 文件，清单记录音频与参数指纹"""
+
+    def __init__(self, directory: str, fingerprint: Dict[str, Any]):
+        """
+        Args:
+            directory: 检查点目录
+            fingerprint: 音频与转录参数指纹，不一致时丢弃已有检查点
+        """
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def build_fingerprint(audio_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """根据音频文件状态与转录参数生成指纹"""
+        stat = os.stat(audio_path)
+        options_json = json.dumps(options, sort_keys=True, default=str)
+        return {
+            'audio_path': os.path.abspath(audio_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'options_hash': hashlib.md5(options_json.encode('utf-8')).hexdigest(),
+        }
+
+    def prepare(self) -> int:
+        """
+        校验清单，指纹不一致时清空目录
+
+        Returns:
+            int: 可复用的检查点数量
+        """
+        manifest_path = self.directory / MANIFEST_FILE
+        if manifest_path.exists():
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    if json.load(f) == self.fingerprint:
+                        return len(list(self.directory.glob("chunk_*.json")))
+            except (OSError, ValueError):
+                pass
+            logger.info(f"检查点指纹不匹配，丢弃旧检查点: {self.directory}")
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._write_json(manifest_path, self.fingerprint)
+        return 0
+
+    def _chunk_path(self, index: int, chunk: Tuple[int, int]) -> Path:
+        return self.directory / f"chunk_{index:05d}_{chunk[0]}_{chunk[1]}.json"
+
+    def load(self, index: int, chunk: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        """读取已完成块的结果，不存在或损坏时返回 None"""
+        path = self._chunk_path(index, chunk)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"检查点损坏，重新转录: {path} ({e})")
+            return None
+
+    def save(self, index: int, chunk: Tuple[int, int], data: Dict[str, Any]) -> None:
+        """原子写入块结果"""
+        self._write_json(self._chunk_path(index, chunk), data)
+
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def transcribe_long_audio(
+    model: Any,
+    audio: Any,
+    audio_path: str,
+    transcribe_options: Dict[str, Any],
+    serialize_segment: Callable[[Any], Dict[str, Any]],
+    serialize_info: Callable[[Any], Dict[str, Any]],
+    chunk_max_duration: float = 600.0,
+    workers: int = 1,
+    checkpoint_dir: Optional[str] = None,
+    speech_timestamps: Optional[Sequence[Dict[str, int]]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], Dict[str, Any]]:
+    """
+    VAD 分块并发转录
+
+    Args:
+        model: WhisperModel 实例（并发转录需以 num_workers >= workers 创建）
+        audio: 16kHz 单声道 float32 音频数组
+        audio_path: 音频文件路径（用于检查点指纹）
+        transcribe_options: model.transcribe 参数
+        serialize_segment: 片段序列化函数
+        serialize_info: TranscriptionInfo 序列化函数
+        chunk_max_duration: 最大块长（秒）
+        workers: 并发转录的块数
+        checkpoint_dir: 检查点目录，None 表示不保存检查点
+        speech_timestamps: 已知的语音区间（样本），None 表示用 faster_whisper 的 VAD 检测
+
+    Returns:
+        (segments, info, statistics)
+    """
+    options = dict(transcribe_options)
+    total_samples = len(audio)
+
+    if speech_timestamps is None:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        vad_parameters = options.get('vad_parameters') or {}
+        vad_options = VadOptions(**vad_parameters) if isinstance(vad_parameters, dict) else vad_parameters
+        speech_timestamps = get_speech_timestamps(audio, vad_options)
+    chunks = plan_chunks(
+        speech_timestamps,
+        total_samples,
+        int(chunk_max_duration * SAMPLE_RATE),
+        min_chunk_samples=int(min(30.0, chunk_max_duration / 4) * SAMPLE_RATE),
+    )
+    logger.info(f"长音频分块: 时长 {total_samples / SAMPLE_RATE:.1f}s, {len(chunks)} 块, 并发 {workers}")
+
+    checkpoint = None
+    if checkpoint_dir:
+        checkpoint = ChunkCheckpoint(
+            checkpoint_dir,
+            ChunkCheckpoint.build_fingerprint(audio_path, {
+                'options': options,
+                'chunk_max_duration': chunk_max_duration,
+            })
+        )
+        reusable = checkpoint.prepare()
+        if reusable:
+            logger.info(f"发现 {reusable} 个已完成块的检查点，从断点继续")
+
+    results: Dict[int, Dict[str, Any]] = {}
+    if checkpoint:
+        for index, chunk in enumerate(chunks):
+            cached = checkpoint.load(index, chunk)
+            if cached is not None:
+                results[index] = cached
+    resumed_chunks = len(results)
+
+    progress_lock = threading.Lock()
+
+    def run_chunk(index: int) -> Dict[str, Any]:
+        start, end = chunks[index]
+        chunk_start_time = time.time()
+        segments, info = model.transcribe(audio[start:end], **options)
+        offset = start / SAMPLE_RATE
+        chunk_result = {
+            'segments': offset_segments([serialize_segment(s) for s in segments], offset),
+            'info': serialize_info(info),
+        }
+        if checkpoint:
+            checkpoint.save(index, chunks[index], chunk_result)
+        with progress_lock:
+            results[index] = chunk_result
+            logger.info(
+                f"块 {index + 1}/{len(chunks)} 完成 ({start / SAMPLE_RATE:.1f}s-{end / SAMPLE_RATE:.1f}s), "
+                f"{len(chunk_result['segments'])} 个片段, 耗时 {time.time() - chunk_start_time:.1f}s, "
+                f"进度 {len(results)}/{len(chunks)}"
+            )
+        return chunk_result
+
+    pending = [index for index in range(len(chunks)) if index not in results]
+
+    # 未指定语言时先确定语言，保证各块使用同一语言转录
+    if not options.get('language'):
+        first_info = results[min(results)]['info'] if results else run_chunk(pending.pop(0))['info']
+        options['language'] = first_info.get('language')
+        logger.info(f"长音频语言: {options['language']}")
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for _ in executor.map(run_chunk, pending):
+                pass
+
+    ordered = [results[index] for index in range(len(chunks))]
+    segments = stitch_segments([item['segments'] for item in ordered])
+
+    first_info = ordered[0]['info'] if ordered else {}
+    info = {
+        'language': options.get('language') or first_info.get('language'),
+        'language_probability': first_info.get('language_probability'),
+        'duration': total_samples / SAMPLE_RATE,
+        'duration_after_vad': sum((item['info'].get('duration_after_vad') or 0) for item in ordered),
+        'all_language_probs': first_info.get('all_language_probs'),
+    }
+    statistics = {
+        'chunks': len(chunks),
+        'resumed_chunks': resumed_chunks,
+        'workers': workers,
+    }
+    return segments, info, statistics
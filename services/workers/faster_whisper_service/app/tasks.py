@@ -159,6 +159,7 @@ def _execute_transcription(
     word_timestamps = service_config.get('word_timestamps', True)
     vad_filter = service_config.get('vad_filter', False)
     vad_parameters = service_config.get('vad_parameters', None)
+    long_audio_config = service_config.get('long_audio', {}) or {}
 
     # ===== 准备输出路径 =====
     # 使用临时目录存储推理结果
@@ -168,6 +169,13 @@ def _execute_transcription(
     os.makedirs(temp_dir, exist_ok=True)
     output_file = Path(temp_dir) / f"faster_whisper_result_{int(time.time() * 1000)}.json"
 
+    # 长音频分块检查点目录：同一工作流内同一音频固定，任务重试时复用已完成的块
+    checkpoint_dir = None
+    if long_audio_config.get('enabled', False):
+        import hashlib
+        audio_hash = hashlib.md5(os.path.abspath(audio_path).encode('utf-8')).hexdigest()[:16]
+        checkpoint_dir = Path(temp_dir) / f"faster_whisper_chunks_{audio_hash}"
+
     logger.info(f"[{stage_name}] 准备通过 subprocess 执行转录")
     logger.info(f"[{stage_name}] 音频文件: {audio_path}")
     logger.info(f"[{stage_name}] 结果文件: {output_file}")
@@ -208,6 +216,15 @@ def _execute_transcription(
     if vad_parameters:
         cmd.extend(["--vad_parameters", json.dumps(vad_parameters)])
 
+    if checkpoint_dir is not None:
+        cmd.extend([
+            "--long_audio",
+            "--long_audio_min_duration", str(long_audio_config.get('min_duration', 1800)),
+            "--chunk_max_duration", str(long_audio_config.get('chunk_max_duration', 600)),
+            "--chunk_workers", str(long_audio_config.get('workers', 2)),
+            "--checkpoint_dir", str(checkpoint_dir),
+        ])
+
     # 日志命令
     cmd_str = ' '.join(cmd)
     logger.info(f"[{stage_name}] 执行命令: {cmd_str}")
@@ -302,6 +319,11 @@ def _execute_transcription(
             "enable_word_timestamps": word_timestamps
         }
 
+        # 转录成功后检查点不再需要
+        if checkpoint_dir is not None and checkpoint_dir.exists():
+            import shutil
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
         return result
 
     finally:
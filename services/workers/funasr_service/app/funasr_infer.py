@@ -268,13 +268,28 @@ def _needs_trust_remote_code(model_name: str | None) -> bool:
     return False
 
 
-def run_infer(args: argparse.Namespace, model_loader=None) -> Dict[str, Any]:
-    start_time = time.time()
-    if model_loader is None:
-        from funasr import AutoModel
-
-        model_loader = AutoModel
-
+# 决定模型实例的参数，常驻进程按这些参数缓存模型
+MODEL_ARG_NAMES = (
+    "model_name",
+    "device",
+    "trust_remote_code",
+    "remote_code",
+    "vad_model",
+    "punc_model",
+    "spk_model",
+    "model_revision",
+    "vad_model_revision",
+    "punc_model_revision",
+    "spk_model_revision",
+)
+
+
+def model_cache_key(args: argparse.Namespace) -> str:
+    """模型参数的规范化键，参数相同的请求可复用同一个模型实例。"""
+    return json.dumps({name: getattr(args, name, None) for name in MODEL_ARG_NAMES}, sort_keys=True)
+
+
+def build_model_kwargs(args: argparse.Namespace) -> Dict[str, Any]:
     model_kwargs = {
         "model": args.model_name,
         "device": args.device,
@@ -316,9 +331,19 @@ def run_infer(args: argparse.Namespace, model_loader=None) -> Dict[str, Any]:
         model_kwargs["tokenizer"] = "TokenListTokenizer"
         model_kwargs["tokenizer_conf"] = {"token_list": token_list}
         print("检测到 bpe.model 与 tokens.json 词表不一致，已切换 TokenListTokenizer")
+    return model_kwargs
+
 
+def load_model(args: argparse.Namespace, model_loader=None):
+    """按命令行参数构建 AutoModel（含 VAD/标点/说话人子模型）。"""
+    if model_loader is None:
+        from funasr import AutoModel
+
+        model_loader = AutoModel
+
+    model_kwargs = build_model_kwargs(args)
     try:
-        model = model_loader(**model_kwargs)
+        return model_loader(**model_kwargs)
     except AssertionError as exc:
         if (
             "is not registered" in str(exc)
@@ -328,11 +353,12 @@ def run_infer(args: argparse.Namespace, model_loader=None) -> Dict[str, Any]:
             remote_code_path = resolve_remote_code_path(args.model_name, None)
             if remote_code_path:
                 model_kwargs["remote_code"] = remote_code_path
-                model = model_loader(**model_kwargs)
-            else:
-                raise
-        else:
-            raise
+                return model_loader(**model_kwargs)
+        raise
+
+
+def transcribe(model, args: argparse.Namespace, start_time: float) -> Dict[str, Any]:
+    """使用已加载的模型转录并写出结果文件。"""
     generate_kwargs: Dict[str, Any] = {"input": [args.audio_path], "cache": {}}
 
     # 检测是否为英文 Paraformer 模型（不支持 language/use_itn 参数）
@@ -390,6 +416,12 @@ def run_infer(args: argparse.Namespace, model_loader=None) -> Dict[str, Any]:
     return payload
 
 
+def run_infer(args: argparse.Namespace, model_loader=None) -> Dict[str, Any]:
+    start_time = time.time()
+    model = load_model(args, model_loader=model_loader)
+    return transcribe(model, args, start_time)
+
+
 def main(argv: list[str] | None = None, model_loader=None) -> Dict[str, Any]:
     args = parse_args(argv)
     return run_infer(args, model_loader=model_loader)
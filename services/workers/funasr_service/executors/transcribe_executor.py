@@ -230,7 +230,7 @@ def _read_infer_output(output_file: str) -> Dict[str, Any]:
         return json.load(handle)
 
 
-def _run_infer(cmd: list[str], stage_name: str, cwd: str) -> Dict[str, Any]:
+def _run_infer_subprocess(cmd: list[str], stage_name: str, cwd: str) -> Dict[str, Any]:
     result = run_gpu_command(cmd, stage_name=stage_name, timeout=1800, cwd=cwd)
     if result.returncode != 0:
         raise RuntimeError(f"subprocess 失败: {result.stderr}")
@@ -238,6 +238,24 @@ def _run_infer(cmd: list[str], stage_name: str, cwd: str) -> Dict[str, Any]:
     return _read_infer_output(output_path)
 
 
+def _run_infer(cmd: list[str], stage_name: str, cwd: str) -> Dict[str, Any]:
+    """优先在常驻推理进程中执行（模型参数不变时复用已加载的模型），不可用时回退到一次性 subprocess。"""
+    service_config = CONFIG.get("funasr_service", {})
+    if service_config.get("resident_worker", False):
+        from services.common.resident_worker import ResidentJobError, ResidentWorkerError
+        from services.workers.funasr_service.app.funasr_server import get_funasr_client, run_resident_infer
+
+        client = get_funasr_client(service_config)
+        if client.is_available():
+            try:
+                return run_resident_infer(client, cmd[2:])
+            except ResidentWorkerError as e:
+                logger.warning(f"[{stage_name}] 常驻推理进程不可用，回退到 subprocess 模式: {e}")
+            except ResidentJobError as e:
+                raise RuntimeError(f"推理失败: {e}") from e
+    return _run_infer_subprocess(cmd, stage_name, cwd)
+
+
 @gpu_lock()
 def _run_infer_with_gpu_lock(cmd: list[str], stage_name: str, cwd: str) -> Dict[str, Any]:
     return _run_infer(cmd, stage_name, cwd)
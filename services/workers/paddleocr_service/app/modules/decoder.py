@@ -1,4 +1,6 @@
 # pipeline/modules/decoder.py
+import queue
+import threading
 import time
 from typing import Generator
 from typing import Tuple
@@ -18,6 +20,8 @@ class GPUDecoder:
     def __init__(self, config):
         self.config = config
         self.batch_size = config.get('batch_size', 32)
+        # 后台预取的批次数，0 表示关闭预取（逐批串行解码）
+        self.prefetch_batches = config.get('prefetch_batches', 0)
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         print(f"模块: GPU解码器已加载, 将在设备 {self.device} 上运行。")
 
@@ -34,6 +38,10 @@ class GPUDecoder:
             Generator[Tuple[torch.Tensor, np.ndarray], None, None]: 
             一个元组，包含 (批量帧的Tensor, 对应的时间戳Numpy数组)。
         """
+        if self.prefetch_batches > 0:
+            yield from self.decode_prefetch(video_path, fps, log_progress)
+            return
+
         container = None
         try:
             container = av.open(video_path)
@@ -119,6 +127,160 @@ class GPUDecoder:
         import gc
         gc.collect()
 
+    def decode_prefetch(self, video_path: str, fps: int = None, log_progress=False) -> Generator[Tuple[torch.Tensor, np.ndarray], None, None]:
+        """
+        预取模式解码：后台线程解码下一批帧，调用方同时处理当前批次。
+
+        帧直接写入预分配的批次缓冲区（CUDA 可用时为锁页内存，拷贝到显存可异步进行），
+        缓冲区在批次间循环复用，不再逐批 torch.stack。
+        注意：CPU 设备上产出的 Tensor 是复用缓冲区的视图，只在下一次迭代前有效，
+        需要跨批次保留的数据请自行拷贝。
+
+        Args:
+            video_path (str): 视频文件的路径。
+            fps (int, optional): 指定输出的帧率。如果为None，则使用视频的原始帧率。
+            log_progress (bool): 是否打印解码进度日志。
+
+        Yields:
+            Generator[Tuple[torch.Tensor, np.ndarray], None, None]:
+            一个元组，包含 (批量帧的Tensor, 对应的时间戳Numpy数组)。
+        """
+        container = None
+        try:
+            container = av.open(video_path)
+            stream = container.streams.video[0]
+            total_frames = stream.frames
+            if total_frames == 0:
+                total_frames = int(stream.duration * stream.time_base * stream.average_rate)
+        except Exception as e:
+            print(f"错误: 无法打开或解码视频文件: {video_path}. PyAV 错误: {e}")
+            if container:
+                container.close()
+            return
+
+        stream.thread_type = "AUTO"
+
+        if fps:
+            resampler = av.VideoResampler(format='rgb24', width=stream.width, height=stream.height, rate=fps)
+        else:
+            resampler = None
+
+        use_cuda = self.device == 'cuda'
+        frame_shape = (3, stream.height, stream.width)
+
+        # 预取 N 批需要 N+1 个缓冲区在后台填充，另 1 个由调用方持有
+        free_slots = queue.Queue()
+        for _ in range(self.prefetch_batches + 1):
+            buffer = torch.empty((self.batch_size,) + frame_shape, dtype=torch.uint8, pin_memory=use_cuda)
+            free_slots.put((buffer, None))
+        ready_batches = queue.Queue()
+        stop_event = threading.Event()
+        decode_stats = {'frames': 0, 'skipped': 0}
+
+        progress_bar = None
+        if log_progress:
+            progress_bar = create_progress_bar(total_frames, "视频解码(预取)", show_rate=True, show_eta=True)
+
+        def acquire_slot():
+            while not stop_event.is_set():
+                try:
+                    buffer, copy_done = free_slots.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if copy_done is not None:
+                    # 等待上一次异步拷贝完成后才能覆盖锁页缓冲区
+                    copy_done.synchronize()
+                return buffer
+            return None
+
+        def producer():
+            buffer = None
+            count = 0
+            timestamps = []
+            try:
+                for frame in container.decode(stream):
+                    if stop_event.is_set():
+                        return
+                    if resampler:
+                        try:
+                            frame = resampler.resample(frame)[0]
+                        except (Exception, IndexError):
+                            continue
+
+                    frame_np = frame.to_ndarray(format='rgb24')
+                    if frame_np.shape != (frame_shape[1], frame_shape[2], 3):
+                        decode_stats['skipped'] += 1
+                        continue
+
+                    if buffer is None:
+                        buffer = acquire_slot()
+                        if buffer is None:
+                            return
+                    buffer[count].copy_(torch.from_numpy(frame_np).permute(2, 0, 1))
+                    timestamps.append(frame.pts * stream.time_base)
+                    count += 1
+                    decode_stats['frames'] += 1
+
+                    if progress_bar:
+                        progress_bar.update(1)
+
+                    if count == self.batch_size:
+                        ready_batches.put((buffer, count, np.array(timestamps, dtype=np.float64)))
+                        buffer, count, timestamps = None, 0, []
+
+                if count:
+                    ready_batches.put((buffer, count, np.array(timestamps, dtype=np.float64)))
+            except Exception as e:
+                print(f"错误: 预取解码过程中出错: {e}")
+            finally:
+                ready_batches.put(None)
+                # 容器只由解码线程使用，也由它在退出时关闭；
+                # 调用方等待超时后不能替它关闭，否则会在 container.decode 进行中释放底层资源
+                try:
+                    container.close()
+                except Exception as e:
+                    print(f"警告: 容器关闭时出错: {e}")
+
+        decode_thread = threading.Thread(target=producer, name="decoder-prefetch", daemon=True)
+        decode_thread.start()
+
+        held = None
+        try:
+            while True:
+                item = ready_batches.get()
+                if held is not None:
+                    # 调用方已请求下一批，上一批缓冲区归还给解码线程
+                    free_slots.put(held)
+                    held = None
+                if item is None:
+                    break
+
+                buffer, count, timestamps_np = item
+                if use_cuda:
+                    batch_tensor = buffer[:count].to(self.device, non_blocking=True)
+                    copy_done = torch.cuda.Event()
+                    copy_done.record()
+                    held = (buffer, copy_done)
+                else:
+                    batch_tensor = buffer[:count]
+                    held = (buffer, None)
+
+                yield batch_tensor, timestamps_np
+                del batch_tensor
+        finally:
+            stop_event.set()
+            decode_thread.join(timeout=5)
+            if decode_thread.is_alive():
+                print("警告: 预取解码线程仍在解码当前帧，容器将在其退出后关闭")
+
+            if progress_bar:
+                progress_bar.finish(f"✅ 解码完成，总共 {decode_stats['frames']} 帧")
+            if decode_stats['skipped']:
+                print(f"警告: 跳过 {decode_stats['skipped']} 个尺寸与视频流不一致的帧")
+
+            if use_cuda:
+                torch.cuda.empty_cache()
+
     def sample_frames_precise(self, video_path: str, target_timestamps: list) -> list:
         """
         精准采样：使用seek定位到指定时间戳，只解码目标帧。
@@ -5,7 +5,6 @@ import numpy as np
 from services.common.logger import get_logger
 
 logger = get_logger('postprocessor')
-import difflib  # 用于文本相似度比较
 import logging
 import re
 from typing import Any
@@ -13,6 +12,8 @@ from typing import Dict
 from typing import List
 from typing import Tuple
 
+from services.workers.paddleocr_service.app.modules.text_similarity import TextSimilarityMatcher
+
 # 配置日志输出格式
 # 日志已统一管理，使用 services.common.logger
 
@@ -38,6 +39,8 @@ class SubtitlePostprocessor:
         self.min_duration_seconds = self.config.get('min_duration_seconds', 0.2)
         # [FIX] 将相似度阈值设为可配置，并降低默认值以容忍OCR波动
         self.similarity_threshold = self.config.get('similarity_threshold', 0.6)
+        # 相似度判定引擎（预过滤 + 缓存），结果与直接使用 SequenceMatcher 一致
+        self.similarity_matcher = TextSimilarityMatcher(self.config.get('similarity_cache_size', 4096))
         logger.info(f"Subtitle Postprocessor loaded (V3 - Multi-Mode). Thresholds: min_duration={self.min_duration_seconds}s, similarity={self.similarity_threshold}")
 
     def format_from_keyframes(self, segments: List[Dict], ocr_results: Dict[int, Tuple[str, Any]], fps: float) -> List[Dict[str, Any]]:
@@ -184,6 +187,7 @@ class SubtitlePostprocessor:
         # 3. 合并可能因小间隙而产生的重复字幕
         merged_subtitles = self._merge_duplicate_subtitles(final_subtitles)
         logger.info(f"Full-frame post-processing complete: {len(merged_subtitles)} subtitles generated.")
+        logger.debug(f"Text similarity stats: {self.similarity_matcher.stats}")
         return self._reassign_ids(merged_subtitles)
 
     def _clean_and_format_segments(self, segments: List[Dict], fps: float) -> List[Dict]:
@@ -295,7 +299,8 @@ class SubtitlePostprocessor:
         比较两个文本的相似度
         
         使用SequenceMatcher算法计算文本相似度，用于判断是否应该合并字幕。
-        相似度基于字符序列的匹配程度。
+        相似度基于字符序列的匹配程度，由 TextSimilarityMatcher 先做上界预过滤与缓存，
+        只有无法提前排除时才计算完整的 ratio。
         
         Args:
             text1: 第一个文本
@@ -305,10 +310,7 @@ class SubtitlePostprocessor:
         Returns:
             bool: 如果相似度超过阈值返回True，否则返回False
         """
-        if not text1 or not text2:
-            return False
-        # 使用difflib计算序列匹配相似度
-        return difflib.SequenceMatcher(None, text1.strip(), text2.strip()).ratio() >= threshold
+        return self.similarity_matcher.is_similar(text1, text2, threshold)
 
     def _reassign_ids(self, subtitles: List[Dict]) -> List[Dict]:
         """
@@ -0,0 +1,121 @@
+# services/workers/paddleocr_service/app/modules/text_similarity.py
+# 字幕文本相似度判定 - 带预过滤与缓存的 SequenceMatcher 快速路径
+import difflib
+from collections import OrderedDict
+from typing import Dict
+from typing import Tuple
+
+from services.common.logger import get_logger
+
+logger = get_logger('text_similarity')
+
+# 可选: rapidfuzz 提供 C 实现的最长公共子序列长度，用作精确上界
+try:
+    from rapidfuzz.distance import LCSseq
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+    LCSseq = None
+
+
+class TextSimilarityMatcher:
+    """
+    判定 SequenceMatcher(None, text1.strip(), text2.strip()).ratio() >= threshold，结果与直接计算完全一致
+
+    SequenceMatcher 的 ratio 为 2*M/T（M 为匹配字符数，T 为两串总长），按代价从低到高依次尝试：
+    - 缓存: 重复出现的 (text1, text2, threshold) 直接返回
+    - 完全相等: ratio 恒为 1.0
+    - 长度上界: M <= min(len1, len2)（即 real_quick_ratio）
+    - 字符多重集上界: M <= 两串字符计数交集（即 quick_ratio）
+    - LCS 上界: M <= 最长公共子序列长度（需安装 rapidfuzz）
+    只有所有上界都不低于阈值时才计算完整的 ratio。
+    比较参数顺序与原实现保持一致（ratio 不严格对称），并复用 seq2 的预处理结果。
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        Args:
+            cache_size: 判定结果缓存条数，0 表示不缓存
+        """
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str, float], bool]" = OrderedDict()
+        self._matcher = difflib.SequenceMatcher(None)
+        self._seq2 = None
+        self.stats: Dict[str, int] = {
+            'calls': 0,
+            'cache_hits': 0,
+            'equal': 0,
+            'length_rejects': 0,
+            'quick_rejects': 0,
+            'lcs_rejects': 0,
+            'full_ratio': 0,
+        }
+
+    def is_similar(self, text1: str, text2: str, threshold: float) -> bool:
+        """
+        判断两个文本的相似度是否达到阈值
+
+        Args:
+            text1: 第一个文本（对应 SequenceMatcher 的 a）
+            text2: 第二个文本（对应 SequenceMatcher 的 b）
+            threshold: 相似度阈值
+
+        Returns:
+            bool: 相似度不低于阈值返回True
+        """
+        if not text1 or not text2:
+            return False
+        self.stats['calls'] += 1
+
+        a = text1.strip()
+        b = text2.strip()
+        key = (a, b, threshold)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return cached
+
+        result = self._compute(a, b, threshold)
+        if self.cache_size > 0:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, a: str, b: str, threshold: float) -> bool:
+        if a == b:
+            # 包括两个都为空白串的情况，SequenceMatcher 此时 ratio 同样为 1.0
+            self.stats['equal'] += 1
+            return 1.0 >= threshold
+
+        total = len(a) + len(b)
+        if 2.0 * min(len(a), len(b)) / total < threshold:
+            self.stats['length_rejects'] += 1
+            return False
+
+        matcher = self._matcher
+        if b != self._seq2:
+            # 相邻比较中同一个 b 会反复出现，复用其 b2j 与字符计数
+            matcher.set_seq2(b)
+            self._seq2 = b
+        matcher.set_seq1(a)
+
+        if matcher.quick_ratio() < threshold:
+            self.stats['quick_rejects'] += 1
+            return False
+
+        if RAPIDFUZZ_AVAILABLE and 2.0 * LCSseq.similarity(a, b) / total < threshold:
+            self.stats['lcs_rejects'] += 1
+            return False
+
+        self.stats['full_ratio'] += 1
+        return matcher.ratio() >= threshold
+
+    def clear(self) -> None:
+        """清空缓存与统计"""
+        self._cache.clear()
+        self._seq2 = None
+        self._matcher.set_seqs('', '')
+        for key in self.stats:
+            self.stats[key] = 0
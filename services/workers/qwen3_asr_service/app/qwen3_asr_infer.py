@@ -28,7 +28,7 @@ class ForcedAlignEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--audio_path", required=True)
     parser.add_argument("--output_file", required=True)
@@ -39,7 +39,7 @@ def parse_args():
     parser.add_argument("--forced_aligner_model", default=None)
     parser.add_argument("--max_model_len", type=int, default=None)
     parser.add_argument("--gpu_memory_utilization", type=float, default=None)
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def build_infer_payload(text, language, time_stamps, audio_duration, transcribe_duration):
@@ -84,14 +84,33 @@ def _warn_ignore_params(params):
     print(f"警告: 推理接口不支持参数 {joined}，已忽略", file=sys.stderr)
 
 
-def main():
-    import soundfile as sf
-    from qwen_asr import Qwen3ASRModel
+# 决定模型实例的参数，常驻进程按这些参数缓存模型
+MODEL_ARG_NAMES = (
+    "model_name",
+    "backend",
+    "enable_word_timestamps",
+    "forced_aligner_model",
+    "max_model_len",
+    "gpu_memory_utilization",
+)
+
+
+def model_cache_key(args):
+    """模型参数的规范化键，参数相同的请求可复用同一个模型实例。"""
+    key = {name: getattr(args, name, None) for name in MODEL_ARG_NAMES}
+    if not key["enable_word_timestamps"]:
+        # 不输出时间戳时不加载对齐模型，对齐模型参数不影响模型实例
+        key["forced_aligner_model"] = None
+    return json.dumps(key, sort_keys=True)
+
+
+def load_model(args, model_loader=None):
+    """按命令行参数构建 Qwen3-ASR 模型（vLLM 引擎或 transformers）。"""
+    if model_loader is None:
+        from qwen_asr import Qwen3ASRModel
+
+        model_loader = Qwen3ASRModel
 
-    args = parse_args()
-    start = time.time()
-    audio, sr = sf.read(args.audio_path)
-    audio_duration = _calc_audio_duration(audio, sr)
     cuda_visible = os.environ.get("CUDA_VISIBLE_DEVICES")
     if cuda_visible:
         print(f"CUDA_VISIBLE_DEVICES={cuda_visible}")
@@ -106,14 +125,21 @@ def main():
         }
         if args.gpu_memory_utilization is not None:
             llm_kwargs["gpu_memory_utilization"] = args.gpu_memory_utilization
-        llm_kwargs, ignored = _filter_kwargs(Qwen3ASRModel.LLM, llm_kwargs)
+        llm_kwargs, ignored = _filter_kwargs(model_loader.LLM, llm_kwargs)
         _warn_ignore_params(ignored)
-        model = Qwen3ASRModel.LLM(**llm_kwargs)
-    else:
-        model = Qwen3ASRModel.from_pretrained(
-            args.model_name,
-            forced_aligner=args.forced_aligner_model if args.enable_word_timestamps else None,
-        )
+        return model_loader.LLM(**llm_kwargs)
+    return model_loader.from_pretrained(
+        args.model_name,
+        forced_aligner=args.forced_aligner_model if args.enable_word_timestamps else None,
+    )
+
+
+def transcribe(model, args, start):
+    """使用已加载的模型转录并写出结果文件。"""
+    import soundfile as sf
+
+    audio, sr = sf.read(args.audio_path)
+    audio_duration = _calc_audio_duration(audio, sr)
 
     transcribe_kwargs = {
         "audio": (audio, sr),
@@ -171,6 +197,15 @@ def main():
 
     with open(args.output_file, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2, cls=ForcedAlignEncoder)
+    # 与结果文件内容一致（ForcedAlign 对象已转换为字典）
+    return json.loads(json.dumps(payload, cls=ForcedAlignEncoder))
+
+
+def main(argv=None, model_loader=None):
+    args = parse_args(argv)
+    start = time.time()
+    model = load_model(args, model_loader=model_loader)
+    return transcribe(model, args, start)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Qwen3-ASR 常驻推理进程
+
+按模型参数（模型、后端、对齐模型、vLLM 引擎参数）缓存模型，参数不变的连续转录请求
+只启动一次 vLLM 引擎；任务参数与 qwen3_asr_infer.py 的命令行参数一致。
+"""
+
+import argparse
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from services.common.logger import get_logger
+from services.common.resident_worker import (
+    ModelCache,
+    ResidentWorkerClient,
+    release_gpu_memory,
+)
+from services.workers.qwen3_asr_service.app import qwen3_asr_infer
+
+logger = get_logger('qwen3_asr_server')
+
+SERVER_TARGET = "services.workers.qwen3_asr_service.app.qwen3_asr_server:create_handler"
+
+
+def _unload_model(key: str, model: Any):
+    """释放模型；vLLM 引擎还需销毁分布式状态才能归还显存"""
+    try:
+        from vllm.distributed.parallel_state import (
+            destroy_distributed_environment,
+            destroy_model_parallel,
+        )
+    except ImportError:
+        pass
+    else:
+        destroy_model_parallel()
+        destroy_distributed_environment()
+    release_gpu_memory()
+
+
+class Qwen3ASRHandler:
+    """常驻进程内的转录任务处理器"""
+
+    def __init__(self, options: Dict[str, Any], model_loader=None):
+        """
+        Args:
+            options: max_models/model_idle_ttl
+            model_loader: 提供 LLM/from_pretrained 的模型类，默认 qwen_asr.Qwen3ASRModel
+        """
+        self.model_loader = model_loader
+        self.models = ModelCache(
+            self._load_model,
+            max_models=options.get('max_models', 1),
+            idle_ttl=options.get('model_idle_ttl'),
+            unloader=_unload_model,
+        )
+
+    def _load_model(self, key: str):
+        # 缓存键包含构建模型所需的全部参数
+        model_args = argparse.Namespace(**json.loads(key))
+        started = time.time()
+        model = qwen3_asr_infer.load_model(model_args, model_loader=self.model_loader)
+        logger.info(f"Qwen3-ASR 模型已加载: {model_args.model_name}, 耗时 {time.time() - started:.2f}s")
+        return model
+
+    def handle(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行一次转录
+
+        Args:
+            job: {'argv': qwen3_asr_infer.py 命令行参数列表}
+
+        Returns:
+            {'payload': 与推理脚本结果文件相同的内容, 'statistics': {...}}
+        """
+        started = time.time()
+        args = qwen3_asr_infer.parse_args(job['argv'])
+        model, cached = self.models.get(qwen3_asr_infer.model_cache_key(args))
+        load_time = time.time() - started
+
+        payload = qwen3_asr_infer.transcribe(model, args, started)
+        return {
+            'payload': payload,
+            'statistics': {
+                'model_cached': cached,
+                'model_load_time': load_time,
+            },
+        }
+
+    def on_idle(self):
+        self.models.evict_idle()
+
+
+def create_handler(options: Dict[str, Any]) -> Qwen3ASRHandler:
+    """常驻进程处理器工厂"""
+    return Qwen3ASRHandler(options)
+
+
+# ========================================
+# 进程内共享的常驻进程客户端
+# ========================================
+_client: Optional[ResidentWorkerClient] = None
+_client_lock = threading.Lock()
+
+
+def get_qwen3_asr_client(service_config: Dict[str, Any]) -> ResidentWorkerClient:
+    """
+    获取常驻推理进程客户端（每个 worker 进程一个）
+
+    Args:
+        service_config: config.yml 中的 qwen3_asr_service 配置段
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ResidentWorkerClient(
+                "qwen3-asr",
+                SERVER_TARGET,
+                options={
+                    'max_models': service_config.get('resident_max_models', 1),
+                    'model_idle_ttl': service_config.get('resident_model_idle_ttl', 300),
+                    'process_idle_timeout': service_config.get('resident_process_idle_timeout', 1800),
+                },
+                max_restarts=service_config.get('resident_max_restarts', 3),
+            )
+        return _client
+
+
+def run_resident_infer(client: ResidentWorkerClient, argv: List[str], timeout: float = 1800) -> Dict[str, Any]:
+    """
+    在常驻进程中执行推理，返回推理结果
+
+    Raises:
+        ResidentWorkerError: 常驻进程不可用，调用方应回退到一次性子进程
+        ResidentJobError: 推理本身失败
+    """
+    result = client.submit({'argv': argv}, timeout=timeout)
+    statistics = result.get('statistics', {})
+    logger.info(
+        f"常驻进程转录完成: 模型{'已驻留' if statistics.get('model_cached') else '新加载'} "
+        f"(加载耗时 {statistics.get('model_load_time', 0):.2f}s)"
+    )
+    return result['payload']
@@ -12,6 +12,13 @@ from services.common.parameter_resolver import get_param_with_fallback
 from services.common.config_loader import CONFIG
 from services.common.file_service import get_file_service
 from services.common.subtitle.subtitle_merger import create_word_level_merger
+from services.common.subtitle.subtitle_writer import (
+    build_srt_time_ranges,
+    dumps_json,
+    write_json_file,
+    write_srt_segments,
+    write_text_file,
+)
 from services.common.path_builder import build_node_output_path, ensure_directory
 
 logger = get_logger(__name__)
@@ -316,11 +323,7 @@ class WServiceGenerateSubtitleFilesExecutor(BaseNodeExecutor):
         subtitle_filename = f"{base_filename}.srt"
         subtitle_path = os.path.join(subtitles_dir, subtitle_filename)
 
-        with open(subtitle_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(segments):
-                start_str = self._format_srt_time(segment['start'])
-                end_str = self._format_srt_time(segment['end'])
-                f.write(f"{i+1}\n{start_str} --> {end_str}\n{segment['text'].strip()}\n\n")
+        write_srt_segments(subtitle_path, segments)
 
         logger.info(f"基础 SRT 文件已生成: {subtitle_path}")
         return subtitle_path
@@ -340,15 +343,7 @@ class WServiceGenerateSubtitleFilesExecutor(BaseNodeExecutor):
         speaker_srt_filename = f"{base_filename}_with_speakers.srt"
         speaker_srt_path = os.path.join(subtitles_dir, speaker_srt_filename)
 
-        with open(speaker_srt_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(speaker_enhanced_segments):
-                start_str = self._format_srt_time(segment['start'])
-                end_str = self._format_srt_time(segment['end'])
-                speaker = segment.get("speaker", "UNKNOWN")
-                f.write(
-                    f"{i+1}\n{start_str} --> {end_str}\n"
-                    f"[{speaker}] {segment['text'].strip()}\n\n"
-                )
+        write_srt_segments(speaker_srt_path, speaker_enhanced_segments, with_speaker=True)
 
         logger.info(f"带说话人 SRT 文件已生成: {speaker_srt_path}")
         return speaker_srt_path
@@ -369,8 +364,7 @@ class WServiceGenerateSubtitleFilesExecutor(BaseNodeExecutor):
         word_timestamps_json_path = os.path.join(subtitles_dir, word_timestamps_filename)
 
         json_content = self._segments_to_word_timestamp_json(segments)
-        with open(word_timestamps_json_path, "w", encoding="utf-8") as f:
-            f.write(json_content)
+        write_text_file(word_timestamps_json_path, json_content)
 
         logger.info(f"词级时间戳 JSON 文件已生成: {word_timestamps_json_path}")
         return word_timestamps_json_path
@@ -407,12 +401,23 @@ class WServiceGenerateSubtitleFilesExecutor(BaseNodeExecutor):
             "segments": segments
         }
 
-        with open(json_subtitle_path, "w", encoding="utf-8") as f:
-            json.dump(json_subtitle_content, f, ensure_ascii=False, indent=2)
+        write_json_file(json_subtitle_path, json_subtitle_content, compact=self._use_compact_json())
 
         logger.info(f"JSON 字幕文件已生成: {json_subtitle_path}")
         return json_subtitle_path
 
+    def _use_compact_json(self) -> bool:
+        """
+        是否输出紧凑 JSON（节点参数 compact_json 优先，其次 wservice.compact_subtitle_json）。
+        """
+        compact = get_param_with_fallback(
+            "compact_json",
+            self.get_input_data(),
+            self.context,
+            default=CONFIG.get("wservice", {}).get("compact_subtitle_json", False)
+        )
+        return bool(compact)
+
     def _format_srt_time(self, seconds: float) -> str:
         """
         将秒数格式化为 SRT 时间格式。
@@ -445,16 +450,14 @@ class WServiceGenerateSubtitleFilesExecutor(BaseNodeExecutor):
             "segments": []
         }
 
+        srt_time_ranges = build_srt_time_ranges(segments)
         for i, segment in enumerate(segments):
             segment_data = {
                 "id": i + 1,
                 "start": segment["start"],
                 "end": segment["end"],
                 "text": segment["text"].strip(),
-                "srt_time": (
-                    f"{self._format_srt_time(segment['start'])} --> "
-                    f"{self._format_srt_time(segment['end'])}"
-                )
+                "srt_time": srt_time_ranges[i]
             }
 
             if "words" in segment and segment["words"]:
@@ -477,7 +480,7 @@ class WServiceGenerateSubtitleFilesExecutor(BaseNodeExecutor):
 
             result["segments"].append(segment_data)
 
-        return json.dumps(result, indent=2, ensure_ascii=False)
+        return dumps_json(result, compact=self._use_compact_json())
 
     def _load_segments_from_file(self, segments_file: str) -> List[Dict]:
         """
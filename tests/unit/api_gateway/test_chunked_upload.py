@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""可续传分片上传测试。"""
+
+import threading
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from minio.error import S3Error
+
+from services.api_gateway.app import file_operations
+from services.api_gateway.app.chunked_upload import (
+    MB,
+    ChunkedUploadManager,
+    UploadSessionNotFoundError,
+)
+
+
+class FakeMultipartStorage:
+    """内存中的分片上传，接口与 MinIOFileService 的分片方法一致"""
+
+    default_bucket = "yivideo"
+
+    def __init__(self):
+        self.uploads = {}
+        self.objects = {}
+        self.aborted = []
+        self.client = self
+
+    def create_multipart_upload(self, file_path, bucket=None, content_type=None):
+        upload_id = f"mp-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return upload_id
+
+    def upload_part(self, file_path, bucket, upload_id, part_number, data, content_md5=None):
+        self.uploads[upload_id][part_number] = data
+        return f"etag-{part_number}"
+
+    def list_uploaded_parts(self, file_path, bucket, upload_id):
+        return [{"part_number": n, "etag": f"etag-{n}", "size": len(data)}
+                for n, data in sorted(self.uploads[upload_id].items())]
+
+    def complete_multipart_upload(self, file_path, bucket, upload_id, parts):
+        chunks = self.uploads.pop(upload_id)
+        self.objects[(bucket, file_path)] = b"".join(chunks[p["part_number"]] for p in parts)
+
+    def abort_multipart_upload(self, file_path, bucket, upload_id):
+        self.uploads.pop(upload_id, None)
+        self.aborted.append(upload_id)
+
+    def presigned_get_object(self, bucket, file_path, expires=None):
+        return f"http://minio/{bucket}/{file_path}"
+
+
+@pytest.fixture
+def env():
+    storage = FakeMultipartStorage()
+    manager = ChunkedUploadManager(storage, fakeredis.FakeRedis(), {"default_part_size_mb": 5})
+    return manager, storage
+
+
+def test_parallel_parts_resume_and_complete(env):
+    manager, storage = env
+    payload = bytes(range(256)) * (12 * MB // 256) + b"tail"
+    session = manager.create("uploads/movie.mp4", len(payload))
+    assert session["part_count"] == 3
+    assert session["missing_parts"] == [1, 2, 3]
+
+    def part(n):
+        return payload[(n - 1) * session["part_size"]:n * session["part_size"]]
+
+    # 第一次只传了部分分片（并行、乱序）
+    threads = [threading.Thread(target=manager.upload_part, args=(session["upload_id"], n, part(n))) for n in (3, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    resumed = manager.get(session["upload_id"])
+    assert resumed["uploaded_parts"] == [1, 3]
+    assert resumed["missing_parts"] == [2]
+    with pytest.raises(ValueError):
+        manager.complete(session["upload_id"])
+    with pytest.raises(ValueError):
+        manager.upload_part(session["upload_id"], 2, part(2)[:-1])
+
+    manager.upload_part(session["upload_id"], 2, part(2))
+    result = manager.complete(session["upload_id"])
+
+    assert storage.objects[("yivideo", "uploads/movie.mp4")] == payload
+    assert result["size"] == len(payload)
+    assert result["content_type"] == "video/mp4"
+    with pytest.raises(UploadSessionNotFoundError):
+        manager.get(session["upload_id"])
+
+
+def test_expired_sessions_are_aborted(env):
+    manager, storage = env
+    session = manager.create("uploads/a.mp4", 6 * MB)
+    manager.upload_part(session["upload_id"], 1, b"x" * 5 * MB)
+    manager.session_ttl = -1
+    expired = manager.create("uploads/b.mp4", 6 * MB)
+
+    with pytest.raises(UploadSessionNotFoundError):
+        manager.upload_part(expired["upload_id"], 2, b"x" * MB)
+    assert manager.abort_expired() == 1
+    assert storage.aborted == ["mp-1"]
+    assert manager.get(session["upload_id"])["uploaded_parts"] == [1]
+
+
+def test_rejects_invalid_sessions(env):
+    manager, _ = env
+    with pytest.raises(ValueError):
+        manager.create("../etc/passwd", 100)
+    with pytest.raises(ValueError):
+        manager.create("uploads/a.mp4", 100, part_size=MB)
+
+
+def test_part_route_limits_body_and_maps_digest_errors(env, monkeypatch):
+    manager, storage = env
+    manager.max_part_size = 6 * MB
+    monkeypatch.setattr(file_operations, "get_chunked_upload_manager", lambda: manager)
+    app = FastAPI()
+    app.include_router(file_operations.router)
+    client = TestClient(app)
+    session = manager.create("uploads/a.mp4", 6 * MB)
+    url = f"/v1/files/uploads/{session['upload_id']}/parts/1"
+
+    # 分块传输没有 Content-Length，按实际读取的字节数限制
+    oversized = (b"x" * MB for _ in range(7))
+    assert client.put(url, content=oversized).status_code == 413
+
+    def bad_digest(*args):
+        raise S3Error(None, "BadDigest", "digest mismatch", None, None, None)
+
+    monkeypatch.setattr(storage, "upload_part", bad_digest)
+    response = client.put(url, content=b"x" * 5 * MB, headers={"Content-MD5": "AAAA"})
+    assert response.status_code == 400
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""GPU 准入控制测试。"""
+
+import fakeredis
+import pytest
+
+from services.api_gateway.app.gpu_admission import GpuAdmissionController
+
+LOCK_KEY = "gpu_lock:test"
+
+
+@pytest.fixture
+def env():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    dispatched = []
+    finished = set()
+
+    def dispatcher(task_id, task_name, context):
+        dispatched.append((task_id, context["n"]))
+        return f"celery-{task_id}"
+
+    controller = GpuAdmissionController(
+        redis_client,
+        {"capacity": 1, "lock_key": LOCK_KEY, "gpu_tasks": ["gpu.task"]},
+        dispatcher=dispatcher,
+        is_finished=lambda celery_task_id: celery_task_id in finished,
+    )
+    return controller, redis_client, dispatched, finished
+
+
+def test_tasks_are_dispatched_one_at_a_time_in_order(env):
+    controller, _, dispatched, finished = env
+
+    assert controller.submit("a", "gpu.task", {"n": 1}) == 0
+    assert controller.submit("b", "gpu.task", {"n": 2}) == 1
+    assert controller.submit("c", "gpu.task", {"n": 3}) == 2
+    assert dispatched == [("a", 1)]
+
+    # 在途任务未结束时不释放容量
+    controller.reconcile()
+    assert controller.pump() == []
+
+    finished.add("celery-a")
+    controller.reconcile()
+    assert controller.pump() == ["b"]
+    assert controller.get_status()["pending"] == 1
+    assert controller.get_position("c") == 1
+
+
+def test_held_gpu_lock_blocks_admission_and_cancel_removes_task(env):
+    controller, redis_client, dispatched, _ = env
+    redis_client.set(LOCK_KEY, "other_workflow_task")
+
+    assert controller.submit("a", "gpu.task", {"n": 1}) == 1
+    assert controller.submit("b", "gpu.task", {"n": 2}) == 2
+    assert dispatched == []
+
+    assert controller.cancel("a") is True
+    redis_client.delete(LOCK_KEY)
+    assert controller.pump() == ["b"]
+    assert controller.is_gpu_task("cpu.task") is False
+
+
+def test_interrupted_dispatch_is_requeued(env):
+    controller, redis_client, _, _ = env
+    controller.dispatch_timeout = 0
+    redis_client.hset(controller.INFLIGHT_KEY, "a", '{"admitted_at": 0}')
+
+    assert controller.reconcile() == 1
+    assert redis_client.lrange(controller.PENDING_KEY, 0, -1) == ["a"]
+
+
+def test_submit_many_queues_in_order(env):
+    controller, redis_client, dispatched, _ = env
+    redis_client.set(LOCK_KEY, "other_workflow_task")
+
+    positions = controller.submit_many([("a", "gpu.task", {"n": 1}), ("b", "gpu.task", {"n": 2})])
+
+    assert positions == {"a": 1, "b": 2}
+    assert dispatched == []
+    redis_client.delete(LOCK_KEY)
+    assert controller.submit_many([("c", "gpu.task", {"n": 3})]) == {"c": 2}
+    assert dispatched == [("a", 1)]
+
+
+def test_slot_freed_when_holder_dies_or_lock_is_released(env):
+    """结果永远不会就绪（worker 被杀）时，按 GPU 锁的释放/过期释放容量。"""
+    controller, redis_client, dispatched, _ = env
+    controller.submit("a", "gpu.task", {"n": 1})
+    controller.submit("b", "gpu.task", {"n": 2})
+    controller.submit("c", "gpu.task", {"n": 3})
+
+    # a 持锁运行后被 SIGKILL，锁在 lock_timeout 后过期，没有释放事件
+    redis_client.set(LOCK_KEY, "locked_by_a")
+    assert controller.reconcile() == 0
+    redis_client.delete(LOCK_KEY)
+    assert controller.reconcile() == 1
+    assert controller.pump() == ["b"]
+
+    # b 释放锁时直接交接给其他工作流的排队者，只能通过释放事件得知
+    redis_client.set(LOCK_KEY, "locked_by_b")
+    controller.reconcile()
+    redis_client.set(LOCK_KEY, "locked_by_other")
+    assert controller.on_lock_released() == "b"
+    assert controller.on_lock_released() is None
+    assert controller.get_status()["inflight"] == 0
+    assert [task_id for task_id, _ in dispatched] == ["a", "b"]
+
+
+def test_slot_freed_after_max_inflight_age(env):
+    controller, redis_client, _, _ = env
+    controller.max_inflight_age = 10
+    redis_client.hset(controller.INFLIGHT_KEY, "a", '{"celery_task_id": "celery-a", "admitted_at": 0}')
+
+    assert controller.reconcile() == 1
+    assert controller.get_status()["inflight"] == 0
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+"""任务心跳批量调度测试。"""
+
+import time
+
+import fakeredis
+
+from services.api_gateway.app.monitoring import heartbeat_manager as hb
+
+
+def test_scheduler_refreshes_all_tasks_in_batches():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    scheduler = hb.HeartbeatScheduler(redis_client, interval=0.05, timeout=30)
+    heartbeats = [hb.TaskHeartbeat(f"task-{i}", {}, redis_client, scheduler) for i in range(50)]
+    try:
+        for heartbeat in heartbeats:
+            heartbeat.start_heartbeat()
+        time.sleep(0.3)
+
+        assert scheduler.stats['writes'] >= 100
+        # 写入按批次合并，远少于逐任务写入次数
+        assert scheduler.stats['batches'] < scheduler.stats['writes'] / 5
+
+        heartbeats[0].stop_heartbeat()
+        records = hb.read_heartbeats(redis_client, [h.task_id for h in heartbeats])
+        assert records["task-0"] is None
+        assert records["task-1"]["status"] == "running"
+        assert records["task-1"]["task_id"] == "task-1"
+    finally:
+        scheduler.stop()
+
+
+def test_parse_heartbeat_payload_accepts_json_and_legacy_records():
+    payload = hb.build_heartbeat_payload("t", 1700000000.0)
+
+    assert hb.parse_heartbeat_payload(payload)["timestamp"] == 1700000000.0
+    assert hb.parse_heartbeat_payload(str({'task_id': 't', 'status': 'running'}))["task_id"] == "t"
+    assert hb.parse_heartbeat_payload("__import__('os')") is None
+    assert hb.parse_heartbeat_payload(None) is None
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""共享存储回收测试。"""
+
+import json
+import os
+
+import fakeredis
+
+from services.api_gateway.app.storage_reclaimer import StorageReclaimer
+
+NOW = 1_700_000_000.0
+HOUR = 3600
+
+
+def _make_workflow(root, task_id, size, age_hours, temp_age_hours=None):
+    path = root / task_id
+    (path / "nodes").mkdir(parents=True)
+    (path / "nodes" / "output.bin").write_bytes(b"x" * size)
+    if temp_age_hours is not None:
+        (path / "tmp").mkdir()
+        (path / "tmp" / "chunk.wav").write_bytes(b"t" * 100)
+        _set_mtime(path / "tmp", NOW - temp_age_hours * HOUR)
+    _set_mtime(path, NOW - age_hours * HOUR, skip="tmp")
+    return path
+
+
+def _set_mtime(path, timestamp, skip=None):
+    for current, dirs, files in os.walk(path, topdown=True):
+        if skip:
+            dirs[:] = [d for d in dirs if d != skip]
+        for name in files:
+            os.utime(os.path.join(current, name), (timestamp, timestamp))
+        os.utime(current, (timestamp, timestamp))
+
+
+def _reclaimer(root, redis_client, **config):
+    return StorageReclaimer(redis_client, {"root": str(root), **config})
+
+
+def _set_state(redis_client, task_id, status):
+    redis_client.set(f"{task_id}:ffmpeg:extract_audio", json.dumps({"task_id": task_id, "status": status}))
+
+
+def test_retention_by_status_keeps_running_and_recent(tmp_path):
+    redis_client = fakeredis.FakeRedis()
+    _make_workflow(tmp_path, "running", 1000, age_hours=100)
+    _make_workflow(tmp_path, "done-old", 2000, age_hours=30)
+    _make_workflow(tmp_path, "failed-old", 3000, age_hours=30)
+    _make_workflow(tmp_path, "done-recent", 4000, age_hours=0.1)
+    _make_workflow(tmp_path, "done-temp", 500, age_hours=2, temp_age_hours=10)
+    _set_state(redis_client, "running", "running")
+    _set_state(redis_client, "done-old", "completed")
+    _set_state(redis_client, "failed-old", "failed")
+    _set_state(redis_client, "done-recent", "completed")
+    _set_state(redis_client, "done-temp", "completed")
+
+    report = _reclaimer(tmp_path, redis_client).run_once(now=NOW)
+
+    assert sorted(os.listdir(tmp_path)) == ["done-recent", "done-temp", "failed-old", "running"]
+    assert not (tmp_path / "done-temp" / "tmp").exists()
+    assert (tmp_path / "done-temp" / "nodes" / "output.bin").exists()
+    assert [w["task_id"] for w in report["deleted_workflows"]] == ["done-old"]
+    assert report["deleted_temp_dirs"] == 1
+    assert report["freed_bytes"] == 2000 + 100
+    assert report["skipped_active"] == 2
+
+
+def test_quota_deletes_oldest_finished_first(tmp_path):
+    redis_client = fakeredis.FakeRedis()
+    _make_workflow(tmp_path, "running", 3000, age_hours=50)
+    _make_workflow(tmp_path, "oldest", 2000, age_hours=10)
+    _make_workflow(tmp_path, "older", 2000, age_hours=5)
+    _make_workflow(tmp_path, "newer", 2000, age_hours=2)
+    _set_state(redis_client, "running", "running")
+    for task_id in ("oldest", "older", "newer"):
+        _set_state(redis_client, task_id, "completed")
+
+    reclaimer = _reclaimer(tmp_path, redis_client, max_total_gb=6000 / 1024 ** 3)
+    dry_report = reclaimer.run_once(dry_run=True, now=NOW)
+    assert len(os.listdir(tmp_path)) == 4
+    assert [w["task_id"] for w in dry_report["deleted_workflows"]] == ["oldest", "older"]
+
+    report = reclaimer.run_once(now=NOW)
+
+    assert sorted(os.listdir(tmp_path)) == ["newer", "running"]
+    assert all(w["reason"] == "quota" for w in report["deleted_workflows"])
+    assert report["freed_bytes"] == 4000
+    assert report["bytes_after"] == 5000
+
+
+def test_run_exclusive_stores_report(tmp_path):
+    redis_client = fakeredis.FakeRedis()
+    _make_workflow(tmp_path, "expired", 100, age_hours=100)
+    reclaimer = _reclaimer(tmp_path, redis_client)
+
+    report = reclaimer.run_exclusive()
+
+    assert report["deleted_workflows"][0]["status"] == "unknown"
+    assert reclaimer.get_last_report()["freed_bytes"] == 100
+    # 其他进程持锁时不执行
+    redis_client.set("storage_gc:lock", "other")
+    assert reclaimer.run_exclusive() is None
+
+
+def test_temp_cleanup_keeps_resumable_checkpoints(tmp_path):
+    redis_client = fakeredis.FakeRedis()
+    path = _make_workflow(tmp_path, "failed-asr", 100, age_hours=10, temp_age_hours=10)
+    checkpoint = path / "tmp" / "faster_whisper_chunks_abc"
+    checkpoint.mkdir()
+    (checkpoint / "chunk_00000_0_160000.json").write_text("{}")
+    _set_mtime(path / "tmp", NOW - 10 * HOUR)
+    _set_state(redis_client, "failed-asr", "failed")
+
+    report = _reclaimer(tmp_path, redis_client).run_once(now=NOW)
+
+    assert sorted(os.listdir(path / "tmp")) == ["faster_whisper_chunks_abc"]
+    assert (checkpoint / "chunk_00000_0_160000.json").exists()
+    assert report["deleted_temp_dirs"] == 1
+    assert report["freed_bytes"] == 100
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""任务事件推送测试。"""
+
+import asyncio
+
+import fakeredis
+
+from services.api_gateway.app.task_event_stream import TaskEventHub, is_terminal_event
+from services.common import state_manager, task_cancellation
+from services.common.context import WorkflowContext
+from services.common.progress_logger import ProgressBar
+
+
+def _context(status):
+    return WorkflowContext(
+        workflow_id="evt-task",
+        input_params={"task_name": "paddleocr.perform_ocr", "input_data": {}},
+        shared_storage_path="/share/workflows/evt-task",
+        stages={"paddleocr.perform_ocr": {"status": status, "output": {}}},
+        status="running",
+    )
+
+
+async def _next_event(queue):
+    return await asyncio.wait_for(queue.get(), timeout=5)
+
+
+def test_state_writes_and_progress_are_pushed_to_subscribers(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(state_manager, "redis_client", client)
+
+    async def scenario():
+        hub = TaskEventHub(client)
+        queue = hub.subscribe("evt-task")
+        other = hub.subscribe("other-task")
+        # 等待监听线程完成模式订阅
+        while not client.pubsub_numpat():
+            await asyncio.sleep(0.05)
+
+        state_manager.update_workflow_state(_context("IN_PROGRESS"), skip_side_effects=True)
+        task_cancellation.bind_task("evt-task")
+        try:
+            ProgressBar(10, "OCR识别").update(10)
+        finally:
+            task_cancellation.bind_task(None)
+        state_manager.update_workflow_state(_context("SUCCESS"), skip_side_effects=True)
+
+        events = [await _next_event(queue) for _ in range(3)]
+        hub.stop()
+        return events, other.empty()
+
+    events, other_empty = asyncio.run(scenario())
+
+    assert [event["type"] for event in events] == ["stage", "progress", "stage"]
+    assert events[0]["stage_status"] == "IN_PROGRESS"
+    assert events[1]["percent"] == 100 and events[1]["name"] == "OCR识别"
+    assert not is_terminal_event(events[0])
+    assert is_terminal_event(events[2])
+    # 其他任务的连接收不到该任务的事件
+    assert other_empty
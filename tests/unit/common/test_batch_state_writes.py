@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"""批量提交的状态写入测试。"""
+
+import fakeredis
+
+from services.common import state_manager, task_cancellation
+from services.common.context import WorkflowContext
+
+
+def _context(task_id, task_name):
+    return WorkflowContext(
+        workflow_id=task_id,
+        input_params={"task_name": task_name, "input_data": {"video_path": f"/share/{task_id}.mp4"}},
+        shared_storage_path=f"/share/workflows/{task_id}",
+        stages={task_name: {"status": "pending", "output": {}}},
+        status="running",
+        celery_task_id=f"celery-{task_id}",
+    )
+
+
+def test_create_workflow_states_in_one_pipeline(monkeypatch):
+    redis_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(state_manager, "redis_client", redis_client)
+    redis_client.set("task_cancel:video-1", "用户取消")
+
+    task_cancellation.clear_cancel_many(["video-1", "video-2"])
+    state_manager.create_workflow_states([
+        _context("video-1", "ffmpeg.extract_audio"),
+        _context("video-1", "faster_whisper.transcribe_audio"),
+        _context("video-2", "ffmpeg.extract_audio"),
+    ])
+
+    assert not task_cancellation.is_cancel_requested("video-1")
+    state = state_manager.get_workflow_state("video-1")
+    assert set(state["stages"]) == {"ffmpeg.extract_audio", "faster_whisper.transcribe_audio"}
+    assert state["celery_task_id"] == "celery-video-1"
+    assert 0 < redis_client.ttl("video-2:ffmpeg:extract_audio") <= state_manager.NODE_TTL_SECONDS
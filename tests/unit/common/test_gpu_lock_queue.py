@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""GPU 锁公平排队模式测试。"""
+
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from services.common import locks
+
+LOCK_KEY = "gpu_lock:test"
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(locks, "redis_client", fakeredis.FakeRedis(server=server, decode_responses=True))
+    return locks.SmartGpuLockManager()
+
+
+def _config(**overrides):
+    config = {
+        "use_queue": True,
+        "max_wait_time": 10,
+        "lock_timeout": 60,
+        "queue_priority": 5,
+        "queue_waiter_ttl": 30,
+        "queue_refresh_interval": 5,
+    }
+    config.update(overrides)
+    return config
+
+
+def _start_waiter(manager, name, order, priority=5, **overrides):
+    def run():
+        if manager.acquire_lock_with_smart_polling(name, LOCK_KEY, _config(queue_priority=priority, **overrides)):
+            order.append((name, time.monotonic(), manager.held_lock_value(LOCK_KEY)))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_depth(manager, depth):
+    deadline = time.monotonic() + 5
+    while manager.get_queue_status(LOCK_KEY)["depth"] < depth:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_waiters_granted_by_priority_then_arrival(manager):
+    """同优先级按到达顺序，高优先级（数值小）插队到前面。"""
+    assert manager.acquire_lock_with_smart_polling("holder", LOCK_KEY, _config())
+
+    order = []
+    threads = []
+    for i, (name, priority) in enumerate([("asr_1", 5), ("asr_2", 5), ("ocr_1", 3)]):
+        threads.append(_start_waiter(manager, name, order, priority))
+        _wait_for_depth(manager, i + 1)
+
+    assert [w["task_name"] for w in manager.get_queue_status(LOCK_KEY)["waiters"]] == ["ocr_1", "asr_1", "asr_2"]
+
+    holder, holder_value = "holder", manager.held_lock_value(LOCK_KEY)
+    for expected in ["ocr_1", "asr_1", "asr_2"]:
+        released_at = time.monotonic()
+        assert manager.release_lock(holder, LOCK_KEY, lock_value=holder_value)
+        deadline = time.monotonic() + 5
+        while len(order) < ["ocr_1", "asr_1", "asr_2"].index(expected) + 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.005)
+        name, acquired_at, value = order[-1]
+        assert name == expected
+        # 释放即交接：锁已直接写成下一个等待者，无需等到续期/轮询间隔
+        assert acquired_at - released_at < 1.0
+        assert locks.redis_client.get(LOCK_KEY) == value
+        assert value.startswith(f"locked_by_{expected}:")
+        holder, holder_value = expected, value
+
+    for thread in threads:
+        thread.join(timeout=5)
+    assert manager.release_lock(holder, LOCK_KEY, lock_value=holder_value)
+    assert locks.redis_client.get(LOCK_KEY) is None
+    assert manager.get_statistics()["queued_acquisitions"] == 4
+
+
+def test_timed_out_waiter_leaves_queue(manager):
+    assert manager.acquire_lock_with_smart_polling("holder", LOCK_KEY, _config())
+
+    started = time.monotonic()
+    assert not manager.acquire_lock_with_smart_polling(
+        "late", LOCK_KEY, _config(max_wait_time=0.3, queue_refresh_interval=0.1)
+    )
+
+    assert time.monotonic() - started < 2
+    assert manager.get_queue_status(LOCK_KEY)["depth"] == 0
+    assert manager.release_lock("holder", LOCK_KEY)
+    assert locks.redis_client.get(LOCK_KEY) is None
+
+
+def test_dead_waiters_are_skipped_and_expired_lock_recovered(manager):
+    """崩溃的等待者被跳过；锁未经释放而消失时由续期兜底交接。"""
+    assert manager.acquire_lock_with_smart_polling("holder", LOCK_KEY, _config())
+    keys = locks._queue_keys(LOCK_KEY)
+    locks.redis_client.zadd(keys["queue"], {"ghost:1": 1})
+    locks.redis_client.hset(keys["meta"], "ghost:1", "60|locked_by_ghost")
+    locks.redis_client.zadd(keys["alive"], {"ghost:1": time.time() - 1})
+
+    order = []
+    thread = _start_waiter(manager, "live", order, queue_refresh_interval=0.2)
+    _wait_for_depth(manager, 2)
+    locks.redis_client.delete(LOCK_KEY)  # 模拟强制删除/超时过期
+
+    thread.join(timeout=10)
+    assert order and order[0][0] == "live"
+    assert locks.redis_client.get(LOCK_KEY) == order[0][2]
+    assert manager.get_queue_status(LOCK_KEY)["depth"] == 0
+
+
+def test_lease_watchdog_keeps_long_task_lock_alive(manager):
+    """任务运行时间超过 lock_timeout 时，看门狗续租使锁不过期。"""
+    assert manager.acquire_lock_with_smart_polling("long_job", LOCK_KEY, _config(lock_timeout=1))
+    lock_value = manager.held_lock_value(LOCK_KEY)
+    watchdog = locks.LockLeaseWatchdog("long_job", LOCK_KEY, lock_timeout=1, interval=0.2, lock_value=lock_value).start()
+    try:
+        time.sleep(1.5)
+        assert locks.redis_client.get(LOCK_KEY) == lock_value
+        assert locks.is_lock_lease_active(LOCK_KEY)
+        assert watchdog.renewals >= 3
+    finally:
+        watchdog.stop()
+
+    assert not locks.is_lock_lease_active(LOCK_KEY)
+    assert manager.release_lock("long_job", LOCK_KEY)
+
+
+def test_lease_watchdog_stops_when_lock_lost(manager):
+    assert manager.acquire_lock_with_smart_polling("job", LOCK_KEY, _config())
+    watchdog = locks.LockLeaseWatchdog(
+        "job", LOCK_KEY, lock_timeout=60, interval=0.1, lock_value=manager.held_lock_value(LOCK_KEY)
+    ).start()
+    locks.redis_client.set(LOCK_KEY, "locked_by_other")
+
+    watchdog._thread.join(timeout=2)
+
+    assert watchdog.lost
+    assert locks.redis_client.ttl(LOCK_KEY) == -1  # 不会给他人的锁续期
+    watchdog.stop()
+
+
+def test_same_task_name_holders_are_distinguished(manager):
+    """同名任务的不同实例各自持有独立的锁值，不能释放或续租对方的锁。"""
+    polling = _config(use_queue=False, use_event_driven=False)
+    assert manager.acquire_lock_with_smart_polling("_run_infer_with_gpu_lock", LOCK_KEY, polling)
+    first = manager.held_lock_value(LOCK_KEY)
+    locks.redis_client.delete(LOCK_KEY)  # 模拟锁过期后被另一个同名实例获取
+
+    other = {}
+
+    def run():
+        assert manager.acquire_lock_with_smart_polling("_run_infer_with_gpu_lock", LOCK_KEY, _config())
+        other["value"] = manager.held_lock_value(LOCK_KEY)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert other["value"] != first
+    stale = locks.LockLeaseWatchdog("_run_infer_with_gpu_lock", LOCK_KEY, lock_timeout=60, lock_value=first)
+    assert not stale.renew()
+    assert not manager.release_lock("_run_infer_with_gpu_lock", LOCK_KEY)
+    assert locks.redis_client.get(LOCK_KEY) == other["value"]
+    assert manager.release_lock("_run_infer_with_gpu_lock", LOCK_KEY, lock_value=other["value"])
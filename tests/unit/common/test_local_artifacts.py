@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""任务内本地副本复用测试。"""
+
+import threading
+
+import fakeredis
+
+from services.common.local_artifacts import LocalArtifactRegistry
+
+TASK_ID = "artifact-task"
+
+
+def _registry():
+    return LocalArtifactRegistry(fakeredis.FakeRedis(), poll_interval=0.05, wait_timeout=10)
+
+
+def test_uploaded_output_is_reused_until_it_changes(tmp_path):
+    registry = _registry()
+    produced = tmp_path / "upstream" / "audio.wav"
+    produced.parent.mkdir()
+    produced.write_bytes(b"pcm" * 100)
+    registry.record(TASK_ID, "yivideo", f"{TASK_ID}/audio.wav", str(produced), etag='"abc"')
+    downloads = []
+
+    def download():
+        downloads.append(1)
+        target = tmp_path / "downloaded.wav"
+        target.write_bytes(b"pcm" * 100)
+        return str(target)
+
+    node_dir = tmp_path / "node"
+    path = registry.fetch(TASK_ID, "yivideo", f"{TASK_ID}/audio.wav", download,
+                          etag_getter=lambda: "abc", local_dir=str(node_dir))
+
+    assert downloads == []
+    assert path == str(node_dir / "audio.wav")
+    assert (node_dir / "audio.wav").read_bytes() == produced.read_bytes()
+    # 对象已被覆盖（ETag 不同）时不再复用
+    registry.fetch(TASK_ID, "yivideo", f"{TASK_ID}/audio.wav", download, etag_getter=lambda: "other")
+    assert downloads == [1]
+    # 其他任务看不到该登记
+    assert registry.lookup("other-task", "yivideo", f"{TASK_ID}/audio.wav") is None
+
+
+def test_concurrent_nodes_download_once(tmp_path):
+    registry = _registry()
+    downloads = []
+    gate = threading.Event()
+
+    def download():
+        downloads.append(1)
+        gate.wait(1)
+        target = tmp_path / "shared" / "video.mp4"
+        target.parent.mkdir(exist_ok=True)
+        target.write_bytes(b"video")
+        return str(target)
+
+    results = []
+
+    def node(index):
+        results.append(registry.fetch(TASK_ID, "yivideo", "input/video.mp4", download,
+                                      local_dir=str(tmp_path / f"node{index}")))
+
+    threads = [threading.Thread(target=node, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    gate.set()
+    for thread in threads:
+        thread.join(15)
+
+    assert downloads == [1]
+    assert len(results) == 4
+    assert all(open(path, "rb").read() == b"video" for path in results)
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""运行指标测试。"""
+
+import subprocess
+
+import pytest
+
+from services.common import metrics
+from services.common.base_node_executor import BaseNodeExecutor
+from services.common.context import WorkflowContext
+from services.common.subprocess_utils import run_with_popen
+from services.common.task_cancellation import TaskCancelledError
+
+
+class RecordingMetric:
+    """记录 labels/observe 调用的指标"""
+
+    def __init__(self):
+        self.samples = []
+        self._labels = None
+
+    def labels(self, **labels):
+        self._labels = labels
+        return self
+
+    def observe(self, value):
+        self.samples.append((self._labels, value))
+
+    def inc(self, amount=1):
+        self.samples.append((self._labels, amount))
+
+    def outcomes(self):
+        return [labels["outcome"] for labels, _ in self.samples]
+
+
+class FailingExecutor(BaseNodeExecutor):
+    def validate_input(self):
+        pass
+
+    def execute_core_logic(self):
+        raise subprocess.TimeoutExpired("ffmpeg", 5)
+
+    def get_cache_key_fields(self):
+        return []
+
+
+def test_outcome_and_node_labels():
+    assert metrics.outcome_of(None) == "success"
+    assert metrics.outcome_of(TaskCancelledError("x")) == "cancelled"
+    assert metrics.outcome_of(subprocess.TimeoutExpired("cmd", 1)) == "timeout"
+    assert metrics.outcome_of(RuntimeError("x")) == "failed"
+    assert metrics.node_label("ffmpeg_segment_12") == "ffmpeg_segment"
+    assert metrics.node_label(None) == "unknown"
+
+
+def test_timed_records_outcome_on_error():
+    histogram, counter = RecordingMetric(), RecordingMetric()
+
+    with metrics.timed(histogram, counter, operation="update"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timed(histogram, counter, operation="update"):
+            raise ValueError("boom")
+
+    assert histogram.outcomes() == ["success", "failed"]
+    assert counter.samples[1] == ({"operation": "update", "outcome": "failed"}, 1)
+
+
+def test_stage_and_subprocess_are_observed(monkeypatch):
+    stage_duration, stage_total, subprocess_duration = RecordingMetric(), RecordingMetric(), RecordingMetric()
+    monkeypatch.setattr(metrics, "STAGE_DURATION", stage_duration)
+    monkeypatch.setattr(metrics, "STAGE_TOTAL", stage_total)
+    monkeypatch.setattr("services.common.subprocess_utils.SUBPROCESS_DURATION", subprocess_duration)
+
+    context = WorkflowContext(workflow_id="metrics-task", input_params={}, shared_storage_path="/tmp")
+    FailingExecutor("ffmpeg.extract_audio", context).execute()
+    run_with_popen(["sh", "-c", "exit 3"], log_prefix="ffmpeg")
+
+    assert stage_duration.samples[0][0] == {"node": "ffmpeg.extract_audio", "outcome": "timeout"}
+    assert stage_total.outcomes() == ["timeout"]
+    assert subprocess_duration.samples[0][0] == {"node": "ffmpeg", "outcome": "failed"}
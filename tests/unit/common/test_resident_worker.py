@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""常驻推理进程测试。"""
+
+import os
+
+import pytest
+
+from services.common.resident_worker import (
+    ModelCache,
+    ResidentJobError,
+    ResidentWorkerClient,
+)
+
+TARGET = "tests.unit.common.test_resident_worker:create_echo_handler"
+
+
+class EchoHandler:
+    """测试用处理器：按键缓存"模型"并回显进程信息"""
+
+    def __init__(self, options):
+        self.models = ModelCache(lambda key: {"key": key}, max_models=1)
+
+    def handle(self, payload):
+        if payload.get("crash_marker") and not os.path.exists(payload["crash_marker"]):
+            open(payload["crash_marker"], "w").close()
+            os._exit(3)
+        if payload.get("fail"):
+            raise ValueError("bad input")
+        _, cached = self.models.get(payload["model"])
+        return {"pid": os.getpid(), "cached": cached, "loads": self.models.stats["loads"]}
+
+
+def create_echo_handler(options):
+    return EchoHandler(options)
+
+
+def test_model_cache_lru_and_idle_eviction():
+    unloaded = []
+    cache = ModelCache(lambda key: key.upper(), max_models=2, idle_ttl=10,
+                       unloader=lambda key, model: unloaded.append(key))
+
+    assert cache.get("a") == ("A", False)
+    assert cache.get("a") == ("A", True)
+    cache.get("b")
+    cache.get("c")
+    assert cache.keys() == ["b", "c"] and unloaded == ["a"]
+
+    cache._entries["b"][1] -= 20
+    assert cache.evict_idle() == ["b"]
+    assert cache.keys() == ["c"]
+
+
+@pytest.fixture
+def client():
+    client = ResidentWorkerClient("test-echo", TARGET, startup_timeout=30)
+    yield client
+    client.stop()
+
+
+def test_jobs_reuse_resident_process_and_loaded_model(client):
+    first = client.submit({"model": "m1"}, timeout=30)
+    second = client.submit({"model": "m1"}, timeout=30)
+
+    assert first["pid"] == second["pid"]
+    assert (first["cached"], second["cached"], second["loads"]) == (False, True, 1)
+
+    with pytest.raises(ResidentJobError, match="bad input"):
+        client.submit({"fail": True}, timeout=30)
+    # 任务失败不影响常驻进程
+    assert client.submit({"model": "m1"}, timeout=30)["pid"] == first["pid"]
+
+
+def test_crash_during_job_restarts_and_retries(client, tmp_path):
+    first = client.submit({"model": "m1"}, timeout=30)
+
+    result = client.submit({"model": "m1", "crash_marker": str(tmp_path / "crashed")}, timeout=30)
+
+    assert result["pid"] != first["pid"]
+    assert result["cached"] is False
+    assert client.stats["crashes"] == 1 and client.stats["starts"] == 2
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""节点状态编码与大字段外置测试。"""
+
+import json
+
+import fakeredis
+
+from services.common import state_codec, state_manager
+from services.common.context import WorkflowContext
+
+TASK_ID = "codec-task"
+TASK_NAME = "paddleocr.detect_subtitle_area"
+
+
+def _context(segments):
+    return WorkflowContext(
+        workflow_id=TASK_ID,
+        input_params={"task_name": TASK_NAME, "input_data": {}},
+        shared_storage_path=f"/share/workflows/{TASK_ID}",
+        stages={TASK_NAME: {"status": "SUCCESS", "output": {"segments": segments, "segments_file": "/tmp/s.json"}}},
+        status="completed",
+    )
+
+
+def _segments(count):
+    return [{"id": i, "start": i * 1.5, "end": i * 1.5 + 1.2, "text": f"第{i}句字幕内容"} for i in range(count)]
+
+
+def _use(monkeypatch, **settings):
+    redis_client = fakeredis.FakeRedis()
+    monkeypatch.setattr(state_manager, "redis_client", redis_client)
+    monkeypatch.setattr(state_manager, "get_callback_manager", None)
+    monkeypatch.setattr(state_codec, "_settings_instance", state_codec.StateCodecSettings(**settings))
+    return redis_client
+
+
+def test_binary_encoding_round_trip_and_legacy_json():
+    settings = state_codec.StateCodecSettings(encoding="binary", compress_min_bytes=100)
+    value = {"stages": {"a": {"output": {"segments": _segments(200)}}}, "status": "运行中"}
+
+    encoded = state_codec.encode_value(value, settings)
+
+    assert encoded.startswith(state_codec.MAGIC)
+    assert len(encoded) < len(json.dumps(value).encode()) / 3
+    assert state_codec.decode_value(encoded) == value
+    # 旧版本写入的 JSON 文本
+    assert state_codec.decode_value(json.dumps(value).encode()) == value
+    assert state_codec.decode_value(json.dumps(value)) == value
+
+
+def test_large_outputs_are_offloaded_and_resolved(monkeypatch):
+    redis_client = _use(monkeypatch, encoding="binary", offload_min_bytes=1024)
+    segments = _segments(300)
+
+    state_manager.create_workflow_state(_context(segments))
+
+    node_raw = redis_client.get(f"{TASK_ID}:paddleocr:detect_subtitle_area")
+    output = state_codec.decode_value(node_raw)["stages"][TASK_NAME]["output"]
+    assert state_codec.is_state_ref(output["segments"])
+    assert output["segments_file"] == "/tmp/s.json"
+    assert len(node_raw) < 1024
+
+    state = state_manager.get_workflow_state(TASK_ID)
+    assert state["stages"][TASK_NAME]["output"]["segments"] == segments
+    assert state["status"] == "completed"
+
+    light = state_manager.get_workflow_state(TASK_ID, resolve_refs=False)
+    assert state_codec.is_state_ref(light["stages"][TASK_NAME]["output"]["segments"])
+
+    # 内容不变时复用同一外置键；状态读回后写回（保留引用）也不丢失内容
+    state_manager.update_workflow_state(WorkflowContext(**light), skip_side_effects=True)
+    state_manager.update_workflow_state(_context(segments), skip_side_effects=True)
+    blob_keys = [k for k in redis_client.keys(f"{TASK_ID}:*") if state_codec.is_blob_key(k)]
+    assert len(blob_keys) == 1
+    assert state_manager.get_workflow_state(TASK_ID)["stages"][TASK_NAME]["output"]["segments"] == segments
+
+
+def test_reads_legacy_json_state(monkeypatch):
+    redis_client = _use(monkeypatch, encoding="json")
+    legacy = _context(_segments(3)).model_dump_json()
+    redis_client.set(f"{TASK_ID}:paddleocr:detect_subtitle_area", legacy)
+
+    state = state_manager.get_workflow_state(TASK_ID)
+
+    assert state["stages"][TASK_NAME]["output"]["segments"] == _segments(3)
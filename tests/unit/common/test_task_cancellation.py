@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""任务取消测试。"""
+
+import os
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from services.common import state_manager, task_cancellation
+from services.common.subprocess_utils import run_with_popen
+from services.common.task_cancellation import TaskCancelledError
+
+TASK_ID = "cancel-task"
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(state_manager, "redis_client", client)
+    task_cancellation.bind_task(TASK_ID)
+    yield client
+    task_cancellation.bind_task(None)
+
+
+def _is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as handle:
+            # 已退出但未被回收的进程状态为 Z
+            return handle.read().split(") ", 1)[1][0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="需要 /proc 检查进程状态")
+def test_cancel_terminates_subprocess_tree(redis, tmp_path):
+    pid_file = tmp_path / "child.pid"
+    threading.Timer(0.5, task_cancellation.request_cancel, args=(TASK_ID,)).start()
+
+    started = time.time()
+    with pytest.raises(TaskCancelledError):
+        # 子进程再派生一个孙进程，取消时两者都应退出
+        run_with_popen(["sh", "-c", f"sleep 30 & echo $! > {pid_file}; wait"], timeout=60)
+
+    assert time.time() - started < 10
+    assert not _is_running(int(pid_file.read_text()))
+
+
+def test_uncancelled_command_and_resubmission(redis):
+    task_cancellation.request_cancel(TASK_ID)
+    task_cancellation.clear_cancel(TASK_ID)
+
+    result = run_with_popen(["sh", "-c", "echo ok"], capture_output=True)
+
+    assert result.returncode == 0
+    assert "ok" in result.stdout
+    assert not task_cancellation.is_cancel_requested(TASK_ID)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""工作流 DAG 调度测试。"""
+
+import fakeredis
+import pytest
+
+from services.common import state_manager
+from services.common.context import WorkflowContext
+from services.common.workflow_dag import (
+    WorkflowDagError,
+    WorkflowDagScheduler,
+    build_dag_spec,
+)
+
+TASK_ID = "dag-task"
+
+NODES = [
+    {"task_name": "ffmpeg.extract_audio", "input_data": {"video_path": "/share/in.mp4"}},
+    {
+        "task_name": "pyannote_audio.diarize_speakers",
+        "input_data": {"audio_path": "${{ stages.ffmpeg.extract_audio.output.audio_path }}"},
+    },
+    {
+        "task_name": "faster_whisper.transcribe_audio",
+        "input_data": {"audio_path": "${{ stages.ffmpeg.extract_audio.output.audio_path }}"},
+    },
+    {
+        "task_name": "wservice.merge_speaker_segments",
+        "input_data": {},
+        "depends_on": ["pyannote_audio.diarize_speakers", "faster_whisper.transcribe_audio"],
+    },
+]
+
+
+@pytest.fixture
+def env(monkeypatch):
+    monkeypatch.setattr(state_manager, "redis_client", fakeredis.FakeRedis())
+    monkeypatch.setattr(state_manager, "get_callback_manager", None)
+    dispatched = []
+
+    def dispatcher(task_name, context):
+        dispatched.append((task_name, context))
+        return f"celery-{task_name}"
+
+    scheduler = WorkflowDagScheduler(dispatcher=dispatcher)
+    scheduler.register(TASK_ID, build_dag_spec(NODES))
+    return scheduler, dispatched
+
+
+def _finish(context, status, output=None):
+    """模拟 worker 写入节点阶段结果"""
+    task_name = context["input_params"]["task_name"]
+    context["stages"][task_name] = {"status": status, "output": output or {}}
+    state_manager.update_workflow_state(WorkflowContext(**context), skip_side_effects=True)
+
+
+def test_build_dag_spec_validates_graph():
+    spec = build_dag_spec(NODES)
+
+    assert spec["order"][0] == "ffmpeg.extract_audio"
+    assert spec["order"][-1] == "wservice.merge_speaker_segments"
+    # 只有汇点上传 MinIO
+    assert [name for name, node in spec["nodes"].items() if node["upload_to_minio"]] == [
+        "wservice.merge_speaker_segments"
+    ]
+
+    with pytest.raises(WorkflowDagError):
+        build_dag_spec([{"task_name": "a.x", "input_data": {"p": "${{ stages.b.y.output.f }}"}}])
+    with pytest.raises(WorkflowDagError):
+        build_dag_spec([
+            {"task_name": "a.x", "depends_on": ["b.y"]},
+            {"task_name": "b.y", "depends_on": ["a.x"]},
+        ])
+
+
+def test_branches_run_in_parallel_and_join_waits_for_both(env):
+    scheduler, dispatched = env
+
+    assert scheduler.start(TASK_ID) == ["ffmpeg.extract_audio"]
+    _, root_context = dispatched[0]
+    _finish(root_context, "SUCCESS", {"audio_path": "/share/workflows/dag-task/audio.wav"})
+
+    # 上游完成后两个分支同时投递，引用解析为共享存储上的本地路径
+    assert scheduler.on_node_finished(TASK_ID, "ffmpeg.extract_audio", "SUCCESS") == [
+        "pyannote_audio.diarize_speakers",
+        "faster_whisper.transcribe_audio",
+    ]
+    branches = {name: context for name, context in dispatched[1:]}
+    for context in branches.values():
+        assert context["input_params"]["input_data"]["audio_path"] == "/share/workflows/dag-task/audio.wav"
+        assert context["input_params"]["workflow_dag"] == {"upload_to_minio": False}
+        assert "ffmpeg.extract_audio" in context["stages"]
+
+    _finish(branches["pyannote_audio.diarize_speakers"], "SUCCESS")
+    assert scheduler.on_node_finished(TASK_ID, "pyannote_audio.diarize_speakers", "SUCCESS") == []
+
+    _finish(branches["faster_whisper.transcribe_audio"], "SUCCESS")
+    assert scheduler.on_node_finished(TASK_ID, "faster_whisper.transcribe_audio", "SUCCESS") == [
+        "wservice.merge_speaker_segments"
+    ]
+    # 重复的结束通知不会再次投递
+    assert scheduler.on_node_finished(TASK_ID, "faster_whisper.transcribe_audio", "SUCCESS") == []
+    assert len(dispatched) == 4
+
+
+def test_failed_branch_only_skips_its_descendants(env):
+    scheduler, dispatched = env
+
+    scheduler.start(TASK_ID)
+    _finish(dispatched[0][1], "SUCCESS", {"audio_path": "/share/a.wav"})
+    scheduler.on_node_finished(TASK_ID, "ffmpeg.extract_audio", "SUCCESS")
+
+    scheduler.on_node_finished(TASK_ID, "pyannote_audio.diarize_speakers", "FAILED")
+    status = scheduler.get_status(TASK_ID)
+
+    assert status["status"] == "running"
+    assert status["nodes"]["faster_whisper.transcribe_audio"]["status"] == "RUNNING"
+    assert status["nodes"]["wservice.merge_speaker_segments"]["status"] == "SKIPPED"
+
+    scheduler.on_node_finished(TASK_ID, "faster_whisper.transcribe_audio", "SUCCESS")
+    assert scheduler.get_status(TASK_ID)["status"] == "failed"
+    assert len(dispatched) == 3
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""Faster Whisper 长音频分块测试。"""
+
+import numpy as np
+import pytest
+
+from services.workers.faster_whisper_service.app import long_audio as la
+
+SR = la.SAMPLE_RATE
+
+
+def _regions(*pairs):
+    return [{"start": int(s * SR), "end": int(e * SR)} for s, e in pairs]
+
+
+def test_plan_chunks_cuts_in_silence_and_covers_timeline():
+    speech = _regions((0, 250), (260, 550), (570, 900), (910, 1000))
+
+    chunks = la.plan_chunks(speech, 1000 * SR, 600 * SR)
+
+    assert chunks == [(0, 560 * SR), (560 * SR, 1000 * SR)]
+    # 连续覆盖全部样本
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_plan_chunks_hard_cuts_long_speech_and_merges_short_tail():
+    speech = _regions((0, 1205))
+
+    assert la.plan_chunks(speech, 1210 * SR, 600 * SR, min_chunk_samples=30 * SR) == [
+        (0, 600 * SR), (600 * SR, 1210 * SR)
+    ]
+    assert la.plan_chunks([], 100 * SR, 600 * SR) == [(0, 100 * SR)]
+
+
+def test_offset_and_stitch_restore_original_timeline():
+    first = la.offset_segments([{"id": 1, "start": 1.0, "end": 2.0,
+                                 "words": [{"word": "a", "start": 1.0, "end": 1.5}]}], 0.0)
+    second = la.offset_segments([{"id": 1, "start": 0.5, "end": 1.25,
+                                  "words": [{"word": "b", "start": 0.5, "end": 1.25}]}], 560.0)
+
+    stitched = la.stitch_segments([first, second])
+
+    assert [s["id"] for s in stitched] == [1, 2]
+    assert stitched[1]["start"] == 560.5 and stitched[1]["words"][0]["end"] == 561.25
+
+
+def test_checkpoint_resumes_only_with_matching_fingerprint(tmp_path):
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"0" * 10)
+    directory = tmp_path / "chunks"
+    fingerprint = la.ChunkCheckpoint.build_fingerprint(str(audio), {"beam_size": 3})
+
+    checkpoint = la.ChunkCheckpoint(str(directory), fingerprint)
+    assert checkpoint.prepare() == 0
+    checkpoint.save(0, (0, 10), {"segments": [], "info": {"language": "zh"}})
+
+    resumed = la.ChunkCheckpoint(str(directory), fingerprint)
+    assert resumed.prepare() == 1
+    assert resumed.load(0, (0, 10))["info"]["language"] == "zh"
+
+    changed = la.ChunkCheckpoint(
+        str(directory), la.ChunkCheckpoint.build_fingerprint(str(audio), {"beam_size": 5})
+    )
+    assert changed.prepare() == 0
+    assert changed.load(0, (0, 10)) is None
+
+
+class _FakeModel:
+    """每块返回一个块内 1.0s-2.0s 的片段，记录每次调用的块长与语言"""
+
+    def __init__(self, fail_on_call=None):
+        self.calls = []
+        self.fail_on_call = fail_on_call
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio), options.get("language")))
+        if len(self.calls) == self.fail_on_call:
+            raise RuntimeError("CUDA out of memory")
+        segment = {"id": 1, "start": 1.0, "end": 2.0, "text": f"块{len(self.calls)}",
+                   "words": [{"word": "x", "start": 1.25, "end": 1.75}]}
+        info = {"language": "zh", "language_probability": 0.9, "duration_after_vad": 8.0}
+        return iter([segment]), info
+
+
+def _transcribe(model, tmp_path, **kwargs):
+    audio_path = tmp_path / "audio.wav"
+    if not audio_path.exists():
+        audio_path.write_bytes(b"RIFF")
+    return la.transcribe_long_audio(
+        model,
+        np.zeros(30 * SR, dtype=np.float32),
+        str(audio_path),
+        {"beam_size": 3},
+        serialize_segment=dict,
+        serialize_info=dict,
+        chunk_max_duration=10,
+        speech_timestamps=_regions((0, 9), (11, 19), (21, 30)),
+        **kwargs,
+    )
+
+
+def test_transcribe_long_audio_chunks_and_merges_timestamps(tmp_path):
+    model = _FakeModel()
+
+    segments, info, statistics = _transcribe(model, tmp_path, workers=2)
+
+    # 在 10s、20s 的静音处切分；首块先确定语言，其余块沿用
+    assert [length for length, _ in model.calls] == [10 * SR] * 3
+    assert [language for _, language in model.calls] == [None, "zh", "zh"]
+    assert [s["id"] for s in segments] == [1, 2, 3]
+    assert [(s["start"], s["end"]) for s in segments] == [(1.0, 2.0), (11.0, 12.0), (21.0, 22.0)]
+    assert segments[2]["words"][0] == {"word": "x", "start": 21.25, "end": 21.75}
+    assert info["language"] == "zh" and info["duration"] == 30.0 and info["duration_after_vad"] == 24.0
+    assert statistics == {"chunks": 3, "resumed_chunks": 0, "workers": 2}
+
+
+def test_transcribe_long_audio_resumes_from_checkpoints(tmp_path):
+    checkpoint_dir = str(tmp_path / "chunks")
+    with pytest.raises(RuntimeError):
+        _transcribe(_FakeModel(fail_on_call=3), tmp_path, checkpoint_dir=checkpoint_dir)
+
+    model = _FakeModel()
+    segments, info, statistics = _transcribe(model, tmp_path, checkpoint_dir=checkpoint_dir)
+
+    # 只重新转录失败的第三块，且沿用检查点中的语言
+    assert model.calls == [(10 * SR, "zh")]
+    assert statistics["resumed_chunks"] == 2
+    assert [(s["id"], s["start"]) for s in segments] == [(1, 1.0), (2, 11.0), (3, 21.0)]
+    assert info["language"] == "zh"
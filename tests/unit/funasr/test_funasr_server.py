@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""FunASR 常驻推理进程测试。"""
+
+import json
+
+from services.workers.funasr_service.app import funasr_server
+
+
+class _FakeModel:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = []
+
+    def generate(self, **kwargs):
+        self.calls.append(kwargs)
+        return [{"text": "你好", "sentence_info": [{"start": 0, "end": 800, "text": "你好"}]}]
+
+
+class _FakeLoader:
+    def __init__(self):
+        self.models = []
+
+    def __call__(self, **kwargs):
+        model = _FakeModel(**kwargs)
+        self.models.append(model)
+        return model
+
+
+def _argv(tmp_path, name, *extra):
+    return [
+        "--audio_path", str(tmp_path / f"{name}.wav"),
+        "--output_file", str(tmp_path / f"{name}.json"),
+        "--model_name", "paraformer-zh",
+        "--device", "cpu",
+        "--vad_model", "fsmn-vad",
+        *extra,
+    ]
+
+
+def test_handler_reuses_model_until_model_params_change(tmp_path):
+    loader = _FakeLoader()
+    handler = funasr_server.FunASRHandler({"max_models": 1}, model_loader=loader)
+
+    first = handler.handle({"argv": _argv(tmp_path, "a", "--language", "zh")})
+    # 只改变推理参数（语言、热词）不重建模型
+    second = handler.handle({"argv": _argv(tmp_path, "b", "--language", "en", "--hotwords", "测试")})
+
+    assert len(loader.models) == 1
+    assert first["statistics"]["model_cached"] is False
+    assert second["statistics"]["model_cached"] is True
+    assert loader.models[0].kwargs == {"model": "paraformer-zh", "device": "cpu", "vad_model": "fsmn-vad"}
+    assert [call["language"] for call in loader.models[0].calls] == ["zh", "en"]
+    assert second["payload"]["text"] == "你好"
+    with open(tmp_path / "b.json", encoding="utf-8") as handle:
+        assert json.load(handle) == second["payload"]
+
+    # 子模型变化时重新构建
+    third = handler.handle({"argv": _argv(tmp_path, "c", "--punc_model", "ct-punc")})
+
+    assert len(loader.models) == 2
+    assert third["statistics"]["model_cached"] is False
+    assert loader.models[1].kwargs["punc_model"] == "ct-punc"
+    assert len(handler.models.keys()) == 1
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""GPUDecoder 预取解码测试（CPU，伪造的 av 容器）。"""
+
+import threading
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("av")
+
+from services.workers.paddleocr_service.app.modules import decoder as decoder_module
+from services.workers.paddleocr_service.app.modules.decoder import GPUDecoder
+
+HEIGHT, WIDTH = 4, 6
+
+
+class _FakeFrame:
+    def __init__(self, index):
+        self.pts = index
+        self.index = index
+
+    def to_ndarray(self, format=None):
+        return np.full((HEIGHT, WIDTH, 3), self.index, dtype=np.uint8)
+
+
+class _FakeStream:
+    def __init__(self, frames):
+        self.frames = frames
+        self.duration = frames
+        self.time_base = Fraction(1, 10)
+        self.average_rate = Fraction(10, 1)
+        self.height = HEIGHT
+        self.width = WIDTH
+        self.thread_type = None
+
+
+class _FakeContainer:
+    """记录解码线程何时退出、容器何时被关闭"""
+
+    def __init__(self, frames, fail_at=None):
+        self.total = frames
+        self.fail_at = fail_at
+        self.streams = type("Streams", (), {"video": [_FakeStream(frames)]})()
+        self.decoding = False
+        self.decode_threads = set()
+        self.closed_while_decoding = False
+        self.closed = threading.Event()
+
+    def decode(self, stream):
+        self.decoding = True
+        self.decode_threads.add(threading.current_thread())
+        try:
+            for index in range(self.total):
+                if index == self.fail_at:
+                    raise RuntimeError("corrupt packet")
+                yield _FakeFrame(index)
+        finally:
+            self.decoding = False
+
+    def close(self):
+        self.closed_while_decoding = self.decoding
+        self.closed.set()
+
+
+def _decode(monkeypatch, container, **kwargs):
+    monkeypatch.setattr(decoder_module.av, "open", lambda path, **_: container)
+    decoder = GPUDecoder({"batch_size": 4, "prefetch_batches": 2})
+    return decoder.decode("fake.mp4", **kwargs)
+
+
+def _assert_closed_after_producer(container):
+    assert container.closed.wait(timeout=5)
+    assert not container.closed_while_decoding
+    assert all(not thread.is_alive() for thread in container.decode_threads)
+
+
+def test_prefetch_yields_all_frames_in_order(monkeypatch):
+    container = _FakeContainer(10)
+
+    batches = [(batch.clone(), timestamps) for batch, timestamps in _decode(monkeypatch, container)]
+
+    assert [len(batch) for batch, _ in batches] == [4, 4, 2]
+    frames = torch.cat([batch for batch, _ in batches])
+    assert frames.shape == (10, 3, HEIGHT, WIDTH)
+    assert [int(frame[0, 0, 0]) for frame in frames] == list(range(10))
+    np.testing.assert_allclose(np.concatenate([ts for _, ts in batches]), np.arange(10) / 10)
+    _assert_closed_after_producer(container)
+
+
+def test_early_break_stops_producer_before_closing(monkeypatch):
+    container = _FakeContainer(1000)
+
+    generator = _decode(monkeypatch, container)
+    first, _ = next(generator)
+    assert int(first[0, 0, 0, 0]) == 0
+    generator.close()
+
+    _assert_closed_after_producer(container)
+
+
+def test_decode_error_ends_stream_and_closes_container(monkeypatch):
+    container = _FakeContainer(20, fail_at=6)
+
+    batches = list(_decode(monkeypatch, container))
+
+    # 出错前已凑满的批次照常产出，未满的批次丢弃
+    assert [len(batch) for batch, _ in batches] == [4]
+    _assert_closed_after_producer(container)
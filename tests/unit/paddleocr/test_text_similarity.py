@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""字幕文本相似度快速判定测试。"""
+
+import difflib
+import random
+
+import pytest
+
+from services.workers.paddleocr_service.app.modules import text_similarity
+from services.workers.paddleocr_service.app.modules.text_similarity import TextSimilarityMatcher
+
+
+def _ocr_like_pairs(count: int = 3000):
+    """生成带 OCR 抖动的相邻文本对（增删改字符、首尾空白、完全不同的句子）。"""
+    rng = random.Random(11)
+    alphabet = "我们今天去公园散步天气很好的了吗呢，。ABCab 1"
+    pairs = []
+    base = "".join(rng.choice(alphabet) for _ in range(12))
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.15:
+            base = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+        other = list(base)
+        for _ in range(rng.randint(0, 4)):
+            op = rng.random()
+            pos = rng.randint(0, len(other))
+            if op < 0.4 and other:
+                other.pop(min(pos, len(other) - 1))
+            elif op < 0.7:
+                other.insert(pos, rng.choice(alphabet))
+            elif other:
+                other[min(pos, len(other) - 1)] = rng.choice(alphabet)
+        pairs.append((base, " " * rng.randint(0, 1) + "".join(other)))
+    return pairs
+
+
+@pytest.mark.parametrize("rapidfuzz_available", [True, False])
+def test_matches_sequence_matcher_exactly(monkeypatch, rapidfuzz_available):
+    """所有预过滤路径下，判定结果与 SequenceMatcher 逐一一致。"""
+    if rapidfuzz_available and not text_similarity.RAPIDFUZZ_AVAILABLE:
+        pytest.skip("rapidfuzz 未安装")
+    monkeypatch.setattr(text_similarity, "RAPIDFUZZ_AVAILABLE", rapidfuzz_available)
+    matcher = TextSimilarityMatcher(cache_size=256)
+
+    for a, b in _ocr_like_pairs() + [("  ", "   "), ("abc", "abc "), ("", "x")]:
+        for threshold in (0.0, 0.5, 0.6, 0.8, 1.0):
+            expected = bool(a and b) and difflib.SequenceMatcher(None, a.strip(), b.strip()).ratio() >= threshold
+            assert matcher.is_similar(a, b, threshold) == expected, (a, b, threshold)
+            assert matcher.is_similar(b, a, threshold) == (
+                bool(a and b) and difflib.SequenceMatcher(None, b.strip(), a.strip()).ratio() >= threshold
+            )
+
+    stats = matcher.stats
+    assert stats["cache_hits"] > 0
+    assert stats["full_ratio"] < stats["calls"]
+
+
+def test_cache_is_bounded():
+    matcher = TextSimilarityMatcher(cache_size=8)
+    for i in range(50):
+        matcher.is_similar(f"字幕{i}", f"字幕{i + 1}", 0.6)
+
+    assert len(matcher._cache) == 8
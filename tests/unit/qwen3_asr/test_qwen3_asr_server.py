@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""Qwen3-ASR 常驻推理进程测试。"""
+
+from services.workers.qwen3_asr_service.app import qwen3_asr_infer
+from services.workers.qwen3_asr_service.app import qwen3_asr_server
+
+
+class _FakeQwen3ASRModel:
+    loads = []
+
+    @classmethod
+    def LLM(cls, model, forced_aligner=None, max_model_len=None, gpu_memory_utilization=None):
+        cls.loads.append(("vllm", model, forced_aligner, max_model_len))
+        return object()
+
+    @classmethod
+    def from_pretrained(cls, model, forced_aligner=None):
+        cls.loads.append(("transformers", model, forced_aligner, None))
+        return object()
+
+
+def _args(*extra):
+    return qwen3_asr_infer.parse_args([
+        "--audio_path", "/tmp/a.wav",
+        "--output_file", "/tmp/a.json",
+        "--model_name", "Qwen/Qwen3-ASR-0.6B",
+        *extra,
+    ])
+
+
+def test_model_cache_key_ignores_request_params():
+    base = qwen3_asr_infer.model_cache_key(_args("--backend", "vllm", "--language", "Chinese"))
+
+    assert qwen3_asr_infer.model_cache_key(_args("--backend", "vllm", "--language", "English")) == base
+    # 不输出时间戳时对齐模型参数不影响模型实例
+    assert qwen3_asr_infer.model_cache_key(
+        _args("--backend", "vllm", "--forced_aligner_model", "Qwen/Qwen3-ForcedAligner-0.6B")
+    ) == base
+    assert qwen3_asr_infer.model_cache_key(_args("--backend", "transformers")) != base
+    assert qwen3_asr_infer.model_cache_key(_args("--backend", "vllm", "--max_model_len", "30000")) != base
+
+
+def test_handler_loads_engine_once_per_model_params():
+    _FakeQwen3ASRModel.loads = []
+    handler = qwen3_asr_server.Qwen3ASRHandler({"max_models": 1}, model_loader=_FakeQwen3ASRModel)
+
+    for language in ("Chinese", "English"):
+        key = qwen3_asr_infer.model_cache_key(_args("--backend", "vllm", "--language", language))
+        handler.models.get(key)
+    handler.models.get(qwen3_asr_infer.model_cache_key(_args("--backend", "transformers")))
+
+    assert _FakeQwen3ASRModel.loads == [
+        ("vllm", "Qwen/Qwen3-ASR-0.6B", None, 50000),
+        ("transformers", "Qwen/Qwen3-ASR-0.6B", None, None),
+    ]
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""AIMD 自适应并发限制器测试。"""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from services.common.subtitle.optimizer_v2.concurrency import AdaptiveConcurrencyLimiter, get_shared_limiter
+
+
+def _rate_limited(retry_after=None):
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+    return aiohttp.ClientResponseError(None, (), status=429, message="Too Many Requests", headers=headers)
+
+
+def test_window_grows_on_success():
+    """连续成功时窗口加性增长且不超过上限。"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4)
+
+    async def _run():
+        for _ in range(20):
+            async with limiter.slot():
+                pass
+
+    asyncio.run(_run())
+    assert limiter.limit == 4
+    assert limiter.get_stats()["successes"] == 20
+
+
+def test_burst_of_429_shrinks_window_once():
+    """同一批在途请求同时被限流只收缩一次，并遵守 Retry-After。"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=8, default_retry_after=0.0)
+
+    async def _call():
+        async with limiter.slot():
+            await asyncio.sleep(0.01)
+            raise _rate_limited(retry_after=0.2)
+
+    async def _run():
+        results = await asyncio.gather(*(_call() for _ in range(8)), return_exceptions=True)
+        assert all(isinstance(r, aiohttp.ClientResponseError) for r in results)
+        assert limiter.limit == 4
+        assert limiter.get_stats()["decreases"] == 1
+
+        started = time.monotonic()
+        async with limiter.slot():
+            pass
+        return time.monotonic() - started
+
+    waited = asyncio.run(_run())
+    assert waited >= 0.15
+
+
+def test_in_flight_never_exceeds_window_and_fifo():
+    """在途数不超过窗口，排队者按到达顺序放行。"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    order = []
+    peak = {"value": 0}
+
+    async def _call(i):
+        async with limiter.slot():
+            peak["value"] = max(peak["value"], limiter.in_flight)
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    async def _run():
+        tasks = [asyncio.ensure_future(_call(i)) for i in range(6)]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(_run())
+    assert peak["value"] == 2
+    assert order == list(range(6))
+    assert limiter.in_flight == 0
+
+
+def test_queued_calls_resume_after_pause_without_retry():
+    """Retry-After 暂停期间在途调用全部结束且过载方不再重试时，排队者在暂停结束后仍被放行。"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+    done = []
+
+    async def _overloaded():
+        async with limiter.slot():
+            await asyncio.sleep(0.01)
+            raise _rate_limited(retry_after=0.1)
+
+    async def _queued(i):
+        async with limiter.slot():
+            done.append(i)
+
+    async def _run():
+        first = asyncio.ensure_future(_overloaded())
+        await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(_queued(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 3
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(asyncio.gather(*queued), timeout=2)
+
+    asyncio.run(_run())
+    assert done == [0, 1, 2]
+    assert limiter.in_flight == 0
+
+
+def test_shared_limiter_follows_options():
+    """同名限制器参数变化时不沿用首次创建的实例。"""
+    adaptive = get_shared_limiter("llm:test", initial_limit=3, min_limit=1, max_limit=8)
+    assert get_shared_limiter("llm:test", initial_limit=3, min_limit=1, max_limit=8) is adaptive
+
+    fixed = get_shared_limiter("llm:test", initial_limit=3, min_limit=3, max_limit=3)
+    assert fixed is not adaptive
+    assert (fixed.min_limit, fixed.max_limit) == (3, 3)
+
+
+@pytest.mark.parametrize("value,expected", [("3", 3.0), ("0", 0.0), ("bogus", None)])
+def test_parse_retry_after(value, expected):
+    """Retry-After 支持秒数，无法解析时返回 None。"""
+    assert AdaptiveConcurrencyLimiter.parse_retry_after(_rate_limited(value)) == expected
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""锚点分段序列对齐测试。"""
+
+import random
+from difflib import SequenceMatcher
+
+from services.common.subtitle.anchored_matcher import AnchoredSequenceMatcher
+from services.common.subtitle.word_level_aligner import align_words_to_text
+
+
+def _transcript(count, seed=7):
+    rng = random.Random(seed)
+    vocab = [f"w{i}" for i in range(3000)] + ["the", "a", "of", "and", "to"] * 300
+    original = [rng.choice(vocab) for _ in range(count)]
+    edited = []
+    for token in original:
+        roll = rng.random()
+        if roll < 0.01:
+            continue
+        if roll < 0.02:
+            token = rng.choice(vocab)
+        edited.append(token)
+        if roll > 0.99:
+            edited.append(rng.choice(vocab))
+    return original, edited
+
+
+def _apply(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+def test_short_sequences_match_sequence_matcher():
+    a, b = _transcript(150)
+    expected = SequenceMatcher(None, a, b, autojunk=False)
+    matcher = AnchoredSequenceMatcher(a, b)
+
+    assert matcher.get_opcodes() == expected.get_opcodes()
+    assert matcher.ratio() == expected.ratio()
+
+
+def test_randomized_parity_with_sequence_matcher():
+    """规模不超过 direct_limit 时，各种重复程度的输入都与 SequenceMatcher(autojunk=False) 完全一致。"""
+    rng = random.Random(3)
+    for _ in range(500):
+        alphabet = rng.choice(["ab", "abc", "abcdef", "abcdefghijklmnop"])
+        a = [rng.choice(alphabet) for _ in range(rng.randint(0, 120))]
+        b = list(a)
+        for _ in range(rng.randint(0, 20)):
+            pos = rng.randint(0, len(b))
+            roll = rng.random()
+            if roll < 0.4 and b:
+                b.pop(min(pos, len(b) - 1))
+            elif roll < 0.7:
+                b.insert(pos, rng.choice(alphabet))
+            elif b:
+                b[min(pos, len(b) - 1)] = rng.choice(alphabet)
+        if rng.random() < 0.2:
+            b = [rng.choice(alphabet) for _ in range(rng.randint(0, 120))]
+
+        expected = SequenceMatcher(None, a, b, autojunk=False)
+        matcher = AnchoredSequenceMatcher(a, b)
+        assert matcher.get_opcodes() == expected.get_opcodes(), (a, b)
+        assert matcher.ratio() == expected.ratio()
+
+
+def test_long_transcript_alignment_is_complete():
+    a, b = _transcript(12000)
+    matcher = AnchoredSequenceMatcher(a, b)
+    opcodes = matcher.get_opcodes()
+
+    # 操作连续覆盖两侧并能还原目标序列
+    assert opcodes[0][1] == 0 and opcodes[0][3] == 0
+    assert opcodes[-1][2] == len(a) and opcodes[-1][4] == len(b)
+    assert all(prev[2] == cur[1] and prev[4] == cur[3] for prev, cur in zip(opcodes, opcodes[1:]))
+    assert _apply(a, b, opcodes) == b
+    assert abs(matcher.ratio() - SequenceMatcher(None, a, b, autojunk=False).ratio()) < 0.005
+
+
+def test_repetitive_input_without_anchors():
+    a = ["la"] * 400
+    b = ["la"] * 390 + ["da"] * 20
+    matcher = AnchoredSequenceMatcher(a, b, direct_limit=100)
+
+    assert _apply(a, b, matcher.get_opcodes()) == b
+    assert matcher.ratio() == SequenceMatcher(None, a, b, autojunk=False).ratio()
+
+
+def test_align_words_to_text_on_long_transcript():
+    original, edited = _transcript(6000)
+    words = [{"word": f" {token}", "start": i * 0.4, "end": i * 0.4 + 0.3} for i, token in enumerate(original)]
+
+    aligned, error = align_words_to_text(words, " ".join(edited), return_error=True)
+
+    assert error is None
+    assert len(aligned) == len(words)
+    assert [w["start"] for w in aligned] == [w["start"] for w in words]
+    assert " ".join(w["word"].strip() for w in aligned if w["word"]).split() == edited
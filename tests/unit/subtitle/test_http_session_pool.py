@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""AI/LLM HTTP 连接池测试。"""
+
+import asyncio
+import gc
+
+from aiohttp import web
+
+from services.common.subtitle import ai_providers
+from services.common.subtitle.http_session_pool import HTTPPoolConfig, HTTPSessionPool
+from services.common.subtitle.optimizer_v2.llm_providers import DeepSeekProvider
+
+
+async def _start_stub_server(delay: float = 0.0):
+    async def handler(request):
+        body = await request.json()
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response({"choices": [{"message": {"content": body["messages"][-1]["content"]}}]})
+
+    app = web.Application()
+    app.router.add_post("/chat/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/chat/completions"
+
+
+def test_connections_are_reused_across_requests():
+    """同一事件循环内的顺序请求应复用 keep-alive 连接。"""
+    pool = HTTPSessionPool(HTTPPoolConfig(limit_per_host=4))
+
+    async def _run():
+        runner, url = await _start_stub_server()
+        try:
+            provider = DeepSeekProvider({"api_key": "test", "api_base_url": url, "http_pool": pool})
+            replies = [await provider.call(f"hello {i}") for i in range(5)]
+            await provider.aclose()
+            return replies
+        finally:
+            await runner.cleanup()
+
+    replies = asyncio.run(_run())
+
+    assert replies == [f"hello {i}" for i in range(5)]
+    stats = pool.get_stats()
+    assert stats["requests"] == 5
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["sessions_created"] == 1
+    assert stats["active_sessions"] == 0
+
+
+def test_ai_providers_use_pool():
+    """ai_providers 中的提供商同样走连接池。"""
+    pool = HTTPSessionPool()
+
+    async def _run():
+        runner, url = await _start_stub_server()
+        try:
+            provider = ai_providers.DeepSeekProvider(
+                {"api_key": "test", "api_base_url": url, "http_pool": pool}
+            )
+            replies = []
+            for i in range(3):
+                replies.append(await provider.chat_completion([{"role": "user", "content": f"hi {i}"}]))
+            await provider.aclose()
+            return replies
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(_run()) == ["hi 0", "hi 1", "hi 2"]
+    stats = pool.get_stats()
+    assert stats["connections_created"] == 1
+    assert stats["connections_reused"] == 2
+
+
+def test_concurrent_fan_out_respects_limit_per_host():
+    """并发扇出时新建连接数不超过单主机上限。"""
+    pool = HTTPSessionPool(HTTPPoolConfig(limit_per_host=3))
+
+    async def _run():
+        runner, url = await _start_stub_server(delay=0.05)
+        try:
+            provider = DeepSeekProvider({"api_key": "test", "api_base_url": url, "http_pool": pool})
+            replies = await asyncio.gather(*(provider.call(f"seg {i}") for i in range(12)))
+            await provider.aclose()
+            return replies
+        finally:
+            await runner.cleanup()
+
+    replies = asyncio.run(_run())
+
+    assert replies == [f"seg {i}" for i in range(12)]
+    stats = pool.get_stats()
+    assert stats["requests"] == 12
+    assert stats["connections_created"] <= 3
+    assert stats["connections_created"] + stats["connections_reused"] == 12
+
+
+def test_release_keeps_session_for_other_providers():
+    """一个提供商释放后，同一循环上其他提供商的会话不受影响。"""
+    pool = HTTPSessionPool()
+
+    async def _run():
+        runner, url = await _start_stub_server()
+        try:
+            first = DeepSeekProvider({"api_key": "test", "api_base_url": url, "http_pool": pool})
+            second = ai_providers.DeepSeekProvider({"api_key": "test", "api_base_url": url, "http_pool": pool})
+            await first.call("a")
+            await second.chat_completion([{"role": "user", "content": "b"}])
+            await first.aclose()
+            assert pool.get_stats()["active_sessions"] == 1
+            reply = await second.chat_completion([{"role": "user", "content": "c"}])
+            await second.aclose()
+            assert pool.get_stats()["active_sessions"] == 0
+            return reply
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(_run()) == "c"
+
+
+def test_sessions_released_when_loops_end_without_close():
+    """未显式关闭时，asyncio.run 结束也不应残留会话。"""
+    pool = HTTPSessionPool()
+    sessions = []
+
+    async def _get():
+        sessions.append(pool.get_session())
+
+    for _ in range(3):
+        asyncio.run(_get())
+    gc.collect()
+
+    assert len(pool._sessions) == 0
+    assert all(session.closed for session in sessions)
+    assert pool.get_stats()["sessions_created"] == 3
+    assert pool.get_stats()["active_sessions"] == 0
+
+
+def test_separate_event_loops_get_separate_sessions():
+    """不同事件循环不能共享会话。"""
+    pool = HTTPSessionPool()
+
+    async def _get():
+        session = pool.get_session()
+        assert pool.get_session() is session
+        await pool.close()
+        return session
+
+    first = asyncio.run(_get())
+    second = asyncio.run(_get())
+
+    assert first is not second
+    assert first.closed and second.closed
+    assert pool.get_stats()["sessions_created"] == 2
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+"""LLM 响应缓存测试。"""
+
+import asyncio
+
+from services.common.subtitle.llm_response_cache import LLMCacheConfig, LLMResponseCache
+from services.common.subtitle.optimizer_v2.config import LLMConfig
+from services.common.subtitle.optimizer_v2.llm_optimizer import LLMOptimizer
+from services.common.subtitle.optimizer_v2.models import SegmentTask, SubtitleSegment
+
+
+def _cache(tmp_path, **kwargs):
+    return LLMResponseCache(LLMCacheConfig(path=str(tmp_path / "cache.sqlite3"), **kwargs))
+
+
+def test_hit_and_miss(tmp_path):
+    """确定性调用写入后命中，提示词不同则未命中。"""
+    cache = _cache(tmp_path)
+    assert cache.get("deepseek", "m", "sys", "user", 0.0) is None
+    assert cache.set("deepseek", "m", "sys", "user", 0.0, "reply")
+    assert cache.get("deepseek", "m", "sys", "user", 0.0) == "reply"
+    assert cache.get("deepseek", "m", "sys", "other", 0.0) is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["writes"] == 1
+
+
+def test_non_deterministic_temperature_not_cached(tmp_path):
+    """温度高于上限的调用默认不缓存。"""
+    cache = _cache(tmp_path)
+    assert not cache.set("deepseek", "m", "sys", "user", 0.7, "reply")
+    assert cache.get("deepseek", "m", "sys", "user", 0.7) is None
+    assert cache.get_stats()["misses"] == 0
+
+
+def test_ttl_and_bypass(tmp_path, monkeypatch):
+    """过期条目不返回；旁路开关跳过读取。"""
+    cache = _cache(tmp_path, ttl_seconds=10)
+    cache.set("p", "m", "s", "u", 0.0, "reply")
+    now = __import__("time").time()
+    monkeypatch.setattr("services.common.subtitle.llm_response_cache.time.time", lambda: now + 11)
+    assert cache.get("p", "m", "s", "u", 0.0) is None
+    assert cache.get_stats()["expired"] == 1
+
+    monkeypatch.setenv("LLM_CACHE_BYPASS", "1")
+    assert not cache.set("p", "m", "s", "u", 0.0, "reply")
+    assert cache.get("p", "m", "s", "u", 0.0) is None
+    assert cache.get_stats()["bypassed"] == 1
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path):
+    """超出条目上限时淘汰最久未访问的条目。"""
+    cache = _cache(tmp_path, max_entries=2)
+    cache.set("p", "m", "s", "a", 0.0, "A")
+    cache.set("p", "m", "s", "b", 0.0, "B")
+    assert cache.get("p", "m", "s", "a", 0.0) == "A"
+    cache.set("p", "m", "s", "c", 0.0, "C")
+
+    assert cache.get("p", "m", "s", "b", 0.0) is None
+    assert cache.get("p", "m", "s", "a", 0.0) == "A"
+    assert cache.get("p", "m", "s", "c", 0.0) == "C"
+    assert cache.get_stats()["evictions"] == 1
+
+
+class _FakeProvider:
+    model = "fake"
+    provider_name = "deepseek"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def call(self, prompt, system_prompt=None, **kwargs):
+        self.calls += 1
+        return "[1]你好。\n[2]世界。"
+
+
+def test_llm_optimizer_reuses_cached_response(tmp_path):
+    """重跑同一段时直接使用缓存结果（默认温度即可缓存，按提供商名称共享键），不再调用 LLM。"""
+    cache = _cache(tmp_path)
+    provider = _FakeProvider()
+    optimizer = LLMOptimizer(provider=provider, llm_config=LLMConfig(), cache=cache)
+    task = SegmentTask(
+        task_id="seg_0",
+        segments=[
+            SubtitleSegment(id=1, start=0.0, end=1.0, text="你好"),
+            SubtitleSegment(id=2, start=1.0, end=2.0, text="世界"),
+        ],
+    )
+
+    first = asyncio.run(optimizer.optimize_segment(task))
+    second = asyncio.run(optimizer.optimize_segment(task))
+
+    assert provider.calls == 1
+    assert [line.text for line in second.optimized_lines] == [line.text for line in first.optimized_lines]
+    assert second.metadata["cached"] is True
+    system_prompt = optimizer._build_system_prompt()
+    user_prompt = optimizer._build_user_prompt(task, None, None)
+    assert cache.get("deepseek", "fake", system_prompt, user_prompt, LLMConfig().temperature) is not None
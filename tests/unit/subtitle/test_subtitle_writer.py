@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""字幕快速写出与流式解析测试。"""
+
+import io
+import json
+import random
+
+import pytest
+
+from services.common.subtitle import subtitle_writer
+from services.common.subtitle.subtitle_parser import SRTParser, SubtitleEntry
+
+
+def _segments(count: int = 200):
+    rng = random.Random(7)
+    return [
+        {
+            "start": rng.uniform(0, 40000),
+            "end": rng.uniform(0, 40000),
+            "text": f" 第{i}句 ",
+            "speaker": f"SPEAKER_{i % 2:02d}",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("numpy_available", [True, False])
+def test_bulk_times_match_per_entry_formatting(monkeypatch, numpy_available):
+    """批量格式化结果与逐条格式化逐字一致（含 NumPy 不可用的回退路径）。"""
+    if numpy_available and not subtitle_writer.NUMPY_AVAILABLE:
+        pytest.skip("numpy 未安装")
+    monkeypatch.setattr(subtitle_writer, "NUMPY_AVAILABLE", numpy_available)
+    values = [0.0, 0.999, 1.001, 59.9999, 3599.9995, 86399.999, 123456.789, 2.675] + [
+        seg["start"] for seg in _segments()
+    ]
+
+    assert subtitle_writer.format_srt_times(values) == [
+        SubtitleEntry._seconds_to_srt_time(v) for v in values
+    ]
+
+
+def test_build_srt_text_matches_legacy_loop():
+    """整块构建的 SRT 与原逐条写出格式一致。"""
+    segments = _segments(50)
+    expected = []
+    for i, seg in enumerate(segments):
+        start = SubtitleEntry._seconds_to_srt_time(seg["start"])
+        end = SubtitleEntry._seconds_to_srt_time(seg["end"])
+        expected.append(f"{i+1}\n{start} --> {end}\n[{seg['speaker']}] {seg['text'].strip()}\n\n")
+
+    assert subtitle_writer.build_srt_text(segments, with_speaker=True) == "".join(expected)
+    assert subtitle_writer.build_srt_text([]) == ""
+
+
+def test_dumps_json_default_is_unchanged_and_compact_round_trips():
+    data = {"segments": _segments(5), "text": "中文"}
+
+    assert subtitle_writer.dumps_json(data) == json.dumps(data, ensure_ascii=False, indent=2)
+    compact = subtitle_writer.dumps_json(data, compact=True)
+    assert "\n" not in compact and "中文" in compact
+    assert json.loads(compact) == data
+
+
+def test_streaming_parser_matches_parse_text():
+    """流式解析与整块解析得到相同条目（排序前）。"""
+    content = (
+        "1\n00:00:01,000 --> 00:00:02,500\n第一行\n第二行\n\n"
+        "bad block\n\n"
+        "2\n0:00:03.250 --> 00:00:04,000\nhello\n  \n"
+        "3\n00:00:05,000 --> 00:00:04,000\n倒退\n\n\n"
+        "4\n00:00:06,000 --> 00:00:07,000\nlast"
+    )
+    parser = SRTParser()
+
+    streamed = list(parser.iter_entries(io.StringIO(content)))
+
+    # parse_text 会重新编号，流式解析保留原始序号
+    assert [(e.start_time, e.end_time, e.text) for e in streamed] == [
+        (e.start_time, e.end_time, e.text) for e in parser.parse_text(content)
+    ]
+    assert [e.index for e in streamed] == [1, 2, 4]
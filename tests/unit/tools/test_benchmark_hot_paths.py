@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""热路径基准测试工具冒烟测试。"""
+
+import importlib.util
+from pathlib import Path
+
+from services.common import state_manager
+
+TOOL_PATH = Path(__file__).resolve().parents[3] / "tools" / "benchmark_hot_paths.py"
+
+
+def _load_tool():
+    spec = importlib.util.spec_from_file_location("benchmark_hot_paths", TOOL_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_cases_run_at_small_scale(monkeypatch):
+    # 状态读写用例会替换 redis_client
+    monkeypatch.setattr(state_manager, "redis_client", state_manager.redis_client)
+    tool = _load_tool()
+
+    results = tool.run_cases(scale=0.02, repeat=1)
+
+    assert set(results) == {name for name, _ in tool.CASES}
+    for name, result in results.items():
+        assert "skipped" in result or (result["best_ms"] >= 0 and result["items"] > 0), name
+    # 输入由固定种子生成，跨提交可比
+    assert tool.make_optimized_text(tool.make_words(200)) == tool.make_optimized_text(tool.make_words(200))
+
+
+def test_compare_flags_regressions():
+    tool = _load_tool()
+    baseline = {"srt_generation": {"best_ms": 10.0, "items": 100}, "segmenter": {"best_ms": 10.0, "items": 100}}
+    results = {"srt_generation": {"best_ms": 13.0, "items": 100}, "segmenter": {"best_ms": 11.0, "items": 100}}
+
+    assert tool.compare(results, baseline, threshold=0.15) == ["srt_generation"]
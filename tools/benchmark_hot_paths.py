@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+CPU 热路径基准测试工具
+
+离线、无需 GPU，使用固定随机种子生成接近真实规模的合成输入（默认约等于一小时视频），
+覆盖以下路径:
+    - 字幕断句 (MultilingualSubtitleSegmenter)
+    - 词级对齐 (align_words_to_text)
+    - 关键帧 dHash 相似度 (KeyFrameDetector)
+    - OCR 后处理合并 (SubtitlePostprocessor)
+    - 状态读写 (state_manager + fakeredis)
+    - SRT 生成 (subtitle_writer)
+
+依赖缺失的用例标记为 skipped，不影响其他用例。结果可保存为 JSON，并与另一提交的结果比较，
+耗时超过阈值的用例视为回退（退出码 1）。比较应在同一台机器、相同 --scale 下进行。
+
+用法:
+    python tools/benchmark_hot_paths.py
+    python tools/benchmark_hot_paths.py -r 7 --output bench.json
+    python tools/benchmark_hot_paths.py --baseline bench_main.json --threshold 0.15
+    python tools/benchmark_hot_paths.py -k align -k srt --scale 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+SEED = 42
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog we are going to talk about video subtitles "
+    "and how speech recognition turns audio into text with timestamps for every word "
+    "today this model works well but sometimes it makes small mistakes that we fix later"
+).split()
+
+
+def make_words(count: int, seed: int = SEED) -> List[Dict]:
+    """生成模拟 ASR 词级时间戳（约每 12 词一个句末标点）"""
+    rng = random.Random(seed)
+    words = []
+    cursor = 0.0
+    for i in range(count):
+        start = cursor + rng.uniform(0.0, 0.15)
+        end = start + rng.uniform(0.12, 0.6)
+        cursor = end
+        token = rng.choice(_WORDS)
+        if i % 12 == 11:
+            token += rng.choice(".?!")
+        elif i % 7 == 6:
+            token += ","
+        words.append({"word": f" {token}", "start": round(start, 3), "end": round(end, 3),
+                      "probability": round(rng.uniform(0.6, 1.0), 3)})
+    return words
+
+
+def make_optimized_text(words: List[Dict], edit_rate: float = 0.03, seed: int = SEED) -> str:
+    """模拟 LLM 优化后的文本：少量替换、删除与插入"""
+    rng = random.Random(seed + 1)
+    tokens = []
+    for word in words:
+        token = word["word"].strip()
+        roll = rng.random()
+        if roll < edit_rate / 3:
+            continue
+        if roll < edit_rate * 2 / 3:
+            token = rng.choice(_WORDS)
+        tokens.append(token)
+        if roll > 1 - edit_rate / 3:
+            tokens.append(rng.choice(_WORDS))
+    return " ".join(tokens)
+
+
+def make_segments(count: int, seed: int = SEED) -> List[Dict]:
+    """生成模拟转录片段"""
+    rng = random.Random(seed)
+    segments = []
+    cursor = 0.0
+    for i in range(count):
+        start = cursor + rng.uniform(0.0, 0.5)
+        end = start + rng.uniform(0.8, 6.0)
+        cursor = end
+        segments.append({
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "text": f" 第{i}句字幕 sample text {i} ",
+            "speaker": f"SPEAKER_{i % 3:02d}",
+        })
+    return segments
+
+
+def make_frame_hashes(count: int, seed: int = SEED):
+    """生成模拟逐帧 8x8 dHash，字幕平均持续约 3 秒（25fps）"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    hashes = []
+    current = rng.integers(0, 2, 64).astype(bool)
+    for _ in range(count):
+        if rng.random() < 1 / 75:
+            current = rng.integers(0, 2, 64).astype(bool)
+        frame = current.copy()
+        # 压缩噪声导致的少量比特翻转
+        frame[rng.integers(0, 64, 2)] ^= True
+        hashes.append(frame)
+    return hashes
+
+
+def make_ocr_results(frames: int, seed: int = SEED) -> Dict[int, Tuple[str, List]]:
+    """生成模拟逐帧 OCR 结果：同一字幕持续若干帧，文字偶有识别抖动，字幕之间有空白帧"""
+    rng = random.Random(seed)
+    results = {}
+    frame = 0
+    line = 0
+    while frame < frames:
+        text = f"这是第{line}行字幕 subtitle line {line}"
+        duration = rng.randint(20, 120)
+        for offset in range(duration):
+            noisy = text if rng.random() > 0.1 else text.replace("字幕", "字慕")
+            results[frame + offset] = (noisy, [[100, 900], [1800, 900], [1800, 980], [100, 980]])
+        frame += duration
+        for offset in range(rng.randint(0, 10)):
+            results[frame + offset] = ("", None)
+        frame += 10
+        line += 1
+    return results
+
+
+# ========================================
+# 用例：返回 (待计时函数, 输入规模)
+# ========================================
+
+def case_segmenter(scale: float):
+    from services.common.subtitle.segmenter import MultilingualSubtitleSegmenter
+
+    words = make_words(int(9000 * scale))
+    segmenter = MultilingualSubtitleSegmenter()
+    return lambda: segmenter.segment(words, language="en"), len(words)
+
+
+def case_word_alignment(scale: float):
+    from services.common.subtitle.word_level_aligner import align_words_to_text
+
+    words = make_words(int(9000 * scale))
+    optimized_text = make_optimized_text(words)
+    return lambda: align_words_to_text(words, optimized_text, return_error=True), len(words)
+
+
+def case_keyframe_similarity(scale: float):
+    from services.workers.paddleocr_service.app.modules.keyframe_detector import KeyFrameDetector
+
+    hashes = make_frame_hashes(int(90000 * scale))
+    # 只测相似度比对，跳过依赖解码器的初始化
+    detector = object.__new__(KeyFrameDetector)
+    detector.similarity_threshold = 0.90
+    detector.progress_interval_frames = 10 ** 9
+    return lambda: detector._detect_keyframes_sequential(hashes), len(hashes)
+
+
+def case_ocr_postprocess(scale: float):
+    from services.workers.paddleocr_service.app.modules.postprocessor import SubtitlePostprocessor
+
+    ocr_results = make_ocr_results(int(90000 * scale))
+    config = {"postprocessor": {"min_duration_seconds": 0.2, "similarity_threshold": 0.6}}
+    # 每次新建实例，避免相似度缓存在多次运行间累积
+    return lambda: SubtitlePostprocessor(config).format_from_full_frames(ocr_results, 25.0), len(ocr_results)
+
+
+def case_state_manager(scale: float):
+    import fakeredis
+
+    from services.common import state_manager
+    from services.common.context import WorkflowContext
+
+    state_manager.redis_client = fakeredis.FakeRedis()
+    nodes = max(1, int(20 * scale))
+    updates = 10
+    contexts = []
+    for i in range(nodes):
+        task_name = f"bench_service.node_{i}"
+        contexts.append(WorkflowContext(
+            workflow_id="bench-task",
+            input_params={"task_name": task_name, "input_data": {"video_path": "/share/bench/input.mp4"}},
+            shared_storage_path="/share/workflows/bench-task",
+            stages={task_name: {"status": "IN_PROGRESS", "output": {
+                "segments_file": "/share/workflows/bench-task/segments.json",
+                "segments": make_segments(50, seed=i),
+            }}},
+            status="running",
+        ))
+
+    def run():
+        for context in contexts:
+            state_manager.create_workflow_state(context)
+        for _ in range(updates):
+            for context in contexts:
+                state_manager.update_workflow_state(context, skip_side_effects=True)
+        for _ in range(updates):
+            state_manager.get_workflow_state("bench-task")
+
+    return run, nodes * (updates + 1) + updates
+
+
+def case_srt_generation(scale: float):
+    from services.common.subtitle import subtitle_writer
+
+    segments = make_segments(int(10000 * scale))
+    return lambda: subtitle_writer.build_srt_text(segments, with_speaker=True), len(segments)
+
+
+CASES: List[Tuple[str, Callable[[float], Tuple[Callable[[], object], int]]]] = [
+    ("segmenter", case_segmenter),
+    ("word_alignment", case_word_alignment),
+    ("keyframe_similarity", case_keyframe_similarity),
+    ("ocr_postprocess", case_ocr_postprocess),
+    ("state_manager", case_state_manager),
+    ("srt_generation", case_srt_generation),
+]
+
+
+def measure(func: Callable[[], object], repeat: int) -> List[float]:
+    """返回每次运行的耗时（毫秒），运行期间屏蔽被测代码的打印输出"""
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()  # 预热：导入缓存、正则编译等
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run_cases(scale: float = 1.0, repeat: int = 5, keywords: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    运行基准用例
+
+    Args:
+        scale: 输入规模倍数（1.0 约等于一小时视频）
+        repeat: 每个用例的计时次数
+        keywords: 只运行名称包含任一关键字的用例
+
+    Returns:
+        Dict[str, Dict]: {用例名: {"best_ms", "median_ms", "items"} 或 {"skipped": 原因}}
+    """
+    results = {}
+    for name, factory in CASES:
+        if keywords and not any(keyword in name for keyword in keywords):
+            continue
+        try:
+            func, items = factory(scale)
+        except ImportError as e:
+            results[name] = {"skipped": f"缺少依赖: {e}"}
+            continue
+        timings = measure(func, repeat)
+        results[name] = {
+            "best_ms": round(min(timings), 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "items": items,
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    与基线比较最短耗时
+
+    Returns:
+        List[str]: 回退的用例名
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name) or {}
+        if "best_ms" not in current or "best_ms" not in previous:
+            continue
+        if previous.get("items") != current.get("items"):
+            print(f"  {name}: 输入规模不同，跳过比较")
+            continue
+        ratio = current["best_ms"] / previous["best_ms"] if previous["best_ms"] else 1.0
+        marker = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            marker = "  <-- 回退"
+        print(f"  {name:<22} {previous['best_ms']:10.2f} -> {current['best_ms']:10.2f} ms  x{ratio:.2f}{marker}")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CPU 热路径基准测试")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="每个用例的计时次数（取最短与中位数）")
+    parser.add_argument("--scale", type=float, default=1.0, help="输入规模倍数，1.0 约等于一小时视频")
+    parser.add_argument("-k", "--keyword", action="append", help="只运行名称包含该关键字的用例，可重复")
+    parser.add_argument("--output", help="结果保存路径（JSON）")
+    parser.add_argument("--baseline", help="用于比较的基线结果（JSON）")
+    parser.add_argument("--threshold", type=float, default=0.15, help="最短耗时增加超过该比例视为回退")
+    args = parser.parse_args()
+
+    # 被测代码的日志会淹没结果并影响计时
+    logging.disable(logging.CRITICAL)
+
+    results = run_cases(args.scale, args.repeat, args.keyword)
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    print(f"提交: {report['commit']}, Python {report['python']}, 规模 x{args.scale}, 重复 {args.repeat} 次")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:<22} skipped ({result['skipped']})")
+        else:
+            print(f"{name:<22} best {result['best_ms']:10.2f} ms  median {result['median_ms']:10.2f} ms"
+                  f"  ({result['items']} items)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("scale") != args.scale:
+            print(f"警告: 基线规模 x{baseline.get('scale')} 与当前不同")
+        print(f"与基线 {baseline.get('commit')} 比较 (阈值 +{args.threshold:.0%}):")
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        if regressions:
+            print(f"性能回退: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
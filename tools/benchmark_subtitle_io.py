@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+字幕读写基准测试工具
+
+对比逐条写出/整块正则解析的原实现与批量格式化/流式解析的快速路径。
+
+用法:
+    python tools/benchmark_subtitle_io.py
+    python tools/benchmark_subtitle_io.py -n 20000 -r 5
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from services.common.subtitle import subtitle_writer
+from services.common.subtitle.subtitle_parser import SRTParser, SubtitleEntry
+
+
+def make_segments(count: int, seed: int = 42) -> List[Dict]:
+    """生成模拟转录片段"""
+    rng = random.Random(seed)
+    segments = []
+    cursor = 0.0
+    for i in range(count):
+        start = cursor + rng.uniform(0.0, 0.5)
+        end = start + rng.uniform(0.8, 6.0)
+        cursor = end
+        segments.append({
+            "start": round(start, 3),
+            "end": round(end, 3),
+            "text": f" 第{i}句字幕 sample text {i} ",
+            "speaker": f"SPEAKER_{i % 3:02d}",
+        })
+    return segments
+
+
+def legacy_srt(segments: List[Dict]) -> str:
+    """原实现：逐条格式化并逐条写入"""
+    buffer = io.StringIO()
+    for i, segment in enumerate(segments):
+        start_str = SubtitleEntry._seconds_to_srt_time(segment['start'])
+        end_str = SubtitleEntry._seconds_to_srt_time(segment['end'])
+        buffer.write(f"{i+1}\n{start_str} --> {end_str}\n{segment['text'].strip()}\n\n")
+    return buffer.getvalue()
+
+
+def timeit(func: Callable[[], object], repeat: int) -> float:
+    """返回多次运行的最短耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="字幕读写基准测试")
+    parser.add_argument("-n", "--count", type=int, default=10000, help="字幕条数")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="重复次数（取最短）")
+    args = parser.parse_args()
+
+    segments = make_segments(args.count)
+    legacy_text = legacy_srt(segments)
+    fast_text = subtitle_writer.build_srt_text(segments)
+    if legacy_text != fast_text:
+        print("错误: 快速路径输出与原实现不一致")
+        return 1
+
+    srt_parser = SRTParser()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        srt_path = os.path.join(tmp_dir, "bench.srt")
+        subtitle_writer.write_text_file(srt_path, fast_text)
+
+        def legacy_parse():
+            with open(srt_path, "r", encoding="utf-8") as f:
+                return srt_parser.parse_text(f.read())
+
+        def streaming_parse():
+            return sum(1 for _ in srt_parser.iter_file(srt_path))
+
+        results = [
+            ("SRT 生成 (原实现)", timeit(lambda: legacy_srt(segments), args.repeat)),
+            ("SRT 生成 (批量格式化)", timeit(lambda: subtitle_writer.build_srt_text(segments), args.repeat)),
+            ("JSON indent=2 (json)", timeit(lambda: json.dumps(segments, ensure_ascii=False, indent=2), args.repeat)),
+            ("JSON 紧凑", timeit(lambda: subtitle_writer.dumps_json(segments, compact=True), args.repeat)),
+            ("SRT 解析 (parse_text)", timeit(legacy_parse, args.repeat)),
+            ("SRT 解析 (iter_file)", timeit(streaming_parse, args.repeat)),
+        ]
+
+    print(f"条数: {args.count}, NumPy: {subtitle_writer.NUMPY_AVAILABLE}, "
+          f"orjson: {subtitle_writer.ORJSON_AVAILABLE}")
+    for name, elapsed in results:
+        print(f"{name:<28} {elapsed:10.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -245,7 +245,10 @@ async def main() -> int:
 
         # 6. 执行优化
         logger.info("开始执行优化...")
-        result = await optimizer.optimize(output_path=args.output)
+        try:
+            result = await optimizer.optimize(output_path=args.output)
+        finally:
+            await optimizer.aclose()
 
         # 7. 打印结果
         print_results(result, args.output)